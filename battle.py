@@ -49,6 +49,8 @@ class BattleView(discord.ui.View):
         self.turn_count = 1
         self.selected_card = None
         self.is_panic = False
+        # 전투 전체가 이 RNG 하나로 굴러가므로 시드와 명령만으로 재현할 수 있다.
+        self.rng = battle_engine.BattleRandom()
         
         self.revived = False # 일반 부활(불멸의 아티팩트 등)
         self.item_revived = False # 던전 아이템 부활 체크
@@ -317,7 +319,7 @@ class BattleView(discord.ui.View):
                 if severe_heal:
                     effect_logs.append(f"🌨️ 혹한 흡혈 +{severe_heal}")
                 effect_log = battle_engine.apply_dice_effect(
-                    dice, self.player, monster, True
+                    dice, self.player, monster, True, rng=self.rng
                 )
                 if effect_log:
                     effect_logs.append(effect_log.strip())
@@ -415,7 +417,8 @@ class BattleView(discord.ui.View):
                     self.player.current_mental,
                     user_data=self.user_data,
                     damage_taken=self.damage_taken_last_turn,
-                    character=self.player
+                    character=self.player,
+                    rng=self.rng,
                 )
 
                 p_res = battle_engine.apply_stat_scaling(p_res, self.player)
@@ -432,17 +435,19 @@ class BattleView(discord.ui.View):
             m_card = None
             m_res = [{"type": "none", "value": 0}]
         else:
-            m_card = target.decide_action()
+            m_card = target.decide_action(rng=self.rng)
             m_res = m_card.use_card(
                 battle_engine.effective_combat_stat(target, "attack"),
                 battle_engine.effective_combat_stat(target, "defense"),
+                rng=self.rng,
             )
         m_res = battle_engine.apply_stat_scaling(m_res, target)
         
         # [수정] 배틀 엔진을 통해 아티팩트 효과 처리 (샤일라, 카이안 등)
         art_log, next_trigger = battle_engine.process_turn_start_artifacts(
             self.player, target, p_res, m_res, self.turn_count, self.shayla_light_trigger, 
-            self.selected_card.name if self.selected_card else ""
+            self.selected_card.name if self.selected_card else "",
+            rng=self.rng,
         )
         rec_log += art_log
         self.shayla_light_trigger = next_trigger
@@ -454,7 +459,7 @@ class BattleView(discord.ui.View):
         
         # [고조된] 매 턴 모든 유효 주사위에 독립적인 -10~+100 보정.
         if "escalation" in effects and not is_stunned:
-            escalation = apply_escalation_to_dice(self.player, p_res)
+            escalation = apply_escalation_to_dice(self.player, p_res, self.rng)
             if escalation:
                 summary = ", ".join(
                     f"{entry['index'] + 1}번 {entry['rolled']:+d}"
@@ -466,7 +471,7 @@ class BattleView(discord.ui.View):
         # [파문] 앞 주사위의 최종값 일부가 뒤 주사위로 연쇄 전이된다.
         if "ripple" in effects and not is_stunned:
             ripple = apply_ripple_to_dice(
-                self.player, p_res, self.turn_count
+                self.player, p_res, self.turn_count, self.rng
             )
             if ripple:
                 amounts = " → ".join(
@@ -491,6 +496,7 @@ class BattleView(discord.ui.View):
             self.turn_count,
             is_stunned1=is_stunned,
             is_stunned2=is_monster_stunned,
+            rng=self.rng,
         ) # is_stunned2는 battle_engine 내부에서 m_res가 none일 때 자동 처리됨 (혹은 추가 인자로 넘길 수도 있음)
         
         # [시간가속] 적립된 보너스 적용
@@ -21,6 +21,7 @@ from gem_effects import (
     reflection_incoming_damage,
     reduce_turn_first_damage,
     reduce_guardian_mental_damage,
+    refresh_gem_profile,
     reuse_dice_bonus,
     reuse_failure_bonus,
     runtime_cooldowns,
@@ -42,6 +43,21 @@ SEVERE_COLD_LIFESTEAL_RATIO = 0.20
 NON_ATTACK_DICE_TYPES = frozenset({"defense", "counter", "heal", "mental_heal"})
 
 
+class BattleRandom(random.Random):
+    """Battle-scoped RNG.
+
+    Every random draw of one battle goes through the instance passed as
+    ``rng``; the same ``battle_seed`` and the same commands replay the
+    battle exactly.
+    """
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.battle_seed = seed
+        super().__init__(seed)
+
+
 def get_emoji(action_type):
     return {"attack": "⚔️", "defense": "🛡️", "counter": "⚡", "heal": "💚", "mental_heal": "🔮", "none": "💨"}.get(action_type, "🎲")
 
@@ -238,6 +254,7 @@ def reset_encounter_runtime(entity, preserve_keys=()):
     }
     runtime.clear()
     runtime.update(preserved)
+    refresh_gem_profile(entity)
     return runtime
 
 
@@ -384,10 +401,11 @@ def apply_stat_scaling(dice_results, char):
         dice["value"] = val + bonus
     return dice_results
 
-def process_turn_start_artifacts(char, target, my_res, opp_res, turn_count, shayla_trigger, selected_card_name):
+def process_turn_start_artifacts(char, target, my_res, opp_res, turn_count, shayla_trigger, selected_card_name, rng=None):
     """
     전투 시작 전(합 진행 전) 아티팩트 효과 처리
     """
+    roller = rng or random
     log = ""
     effects = []
     
@@ -398,11 +416,11 @@ def process_turn_start_artifacts(char, target, my_res, opp_res, turn_count, shay
 
     # 1. [샤일라: 빛나는]
     if shayla_trigger:
-        destroy_count = random.randint(1, 3)
+        destroy_count = roller.randint(1, 3)
         destroyed = 0
         valid_indices = [i for i, d in enumerate(opp_res) if d["type"] != "none"]
         if valid_indices:
-            targets = random.sample(valid_indices, min(len(valid_indices), destroy_count))
+            targets = roller.sample(valid_indices, min(len(valid_indices), destroy_count))
             for idx in targets:
                 opp_res[idx] = {"type": "none", "value": 0}
                 destroyed += 1
@@ -440,7 +458,7 @@ def process_turn_start_artifacts(char, target, my_res, opp_res, turn_count, shay
 
     # 4. [센쇼: 별똥별]
     if "sensho_star" in effects and selected_card_name == "별의 은총":
-        if random.randint(1, 7) == 1:
+        if roller.randint(1, 7) == 1:
             char.current_hp = char.max_hp
             dmg = char.current_mental
             target.current_hp = max(0, target.current_hp - dmg)
@@ -457,21 +475,22 @@ def process_turn_start_artifacts(char, target, my_res, opp_res, turn_count, shay
         next_shayla_trigger = True
 
     # Freeze is resolved after artifact destruction and before the first clash.
-    log += apply_freeze_dice_lock(char, my_res, turn_count)
-    log += apply_freeze_dice_lock(target, opp_res, turn_count)
+    log += apply_freeze_dice_lock(char, my_res, turn_count, rng)
+    log += apply_freeze_dice_lock(target, opp_res, turn_count, rng)
         
     return log, next_shayla_trigger
 
-def apply_luude_logic(actor, target, current_log):
+def apply_luude_logic(actor, target, current_log, rng=None):
     """
     루우데 아티팩트(악몽) 효과 처리
     - 50% 확률: 정신력/체력 회복 (기존 유지)
     - 50% 확률: 파괴 스택 적립 및 60% 확률로 (스택*10 + 공격력) 고정 피해 (신규 적용)
     """
     is_mirror = "루우데" in actor.name and "루우데" in target.name
+    roller = rng or random
 
     # 1. 50% 확률로 회복 (기존 로직 유지)
-    if random.random() < 0.5:
+    if roller.random() < 0.5:
         heal_val = int(actor.max_mental * 0.1)
         actor.current_mental = min(actor.max_mental, actor.current_mental + heal_val)
         msg = "나 자신을 알라" if is_mirror else "이 잔은 나에게."
@@ -490,7 +509,7 @@ def apply_luude_logic(actor, target, current_log):
         stack = actor.runtime_cooldowns.get("luude_destroy_stack", 0) + 1
         
         # 60% 확률로 스택 폭발 (고정 피해)
-        if random.randint(1, 100) <= 60:
+        if roller.randint(1, 100) <= 60:
             fixed_dmg = (stack * 10) + actor.attack
             target.current_hp = max(0, target.current_hp - fixed_dmg)
             
@@ -506,7 +525,7 @@ def apply_luude_logic(actor, target, current_log):
             
     return current_log
 
-def apply_dice_effect(dice, attacker, defender, is_win, is_self=False):
+def apply_dice_effect(dice, attacker, defender, is_win, is_self=False, rng=None):
     """주사위 효과 적용 헬퍼 함수 (마비, 출혈, 기절 등 파싱)"""
     eff = dice.get("effect", "")
     if not eff: return ""
@@ -530,7 +549,7 @@ def apply_dice_effect(dice, attacker, defender, is_win, is_self=False):
             prob = int(parts[prob_idx + 1])
         except: pass
     
-    if random.randint(1, 100) > prob: return ""
+    if (rng or random).randint(1, 100) > prob: return ""
 
     if is_self and eff in {"self_major", "self_minor"}:
         runtime = runtime_cooldowns(attacker)
@@ -578,7 +597,7 @@ def apply_dice_effect(dice, attacker, defender, is_win, is_self=False):
 
     return log
 
-def process_clash_loop(char1, char2, res1, res2, effs1, effs2, turn_count, is_stunned1=False, is_stunned2=False):
+def process_clash_loop(char1, char2, res1, res2, effs1, effs2, turn_count, is_stunned1=False, is_stunned2=False, rng=None):
     """
     합(Clash) 처리 및 결과 반환
     """
@@ -649,7 +668,7 @@ def process_clash_loop(char1, char2, res1, res2, effs1, effs2, turn_count, is_st
             if destroyed > 0:
                 log += f"🔒 **{char1.name}**의 잠금! 적 주사위 {destroyed}개 파괴!\n"
                 if "luude_imprint" in effs1: 
-                    for _ in range(destroyed): log = apply_luude_logic(char1, char2, log)
+                    for _ in range(destroyed): log = apply_luude_logic(char1, char2, log, rng)
                     log += "\n"
 
         if d2.get("effect") == "lock_others":
@@ -661,7 +680,7 @@ def process_clash_loop(char1, char2, res1, res2, effs1, effs2, turn_count, is_st
             if destroyed > 0:
                 log += f"🔒 **{char2.name}**의 잠금! 적 주사위 {destroyed}개 파괴!\n"
                 if "luude_imprint" in effs2:
-                    for _ in range(destroyed): log = apply_luude_logic(char2, char1, log)
+                    for _ in range(destroyed): log = apply_luude_logic(char2, char1, log, rng)
                     log += "\n"
 
         # 4. 출혈 시너지
@@ -843,19 +862,19 @@ def process_clash_loop(char1, char2, res1, res2, effs1, effs2, turn_count, is_st
                 record_balance_loss(char2)
 
         # --- [최적화] 효과 적용 (apply_dice_effect 사용) ---
-        clash_log += apply_dice_effect(d1, char1, char2, val_win1)
-        clash_log += apply_dice_effect(d2, char2, char1, val_win2)
+        clash_log += apply_dice_effect(d1, char1, char2, val_win1, rng=rng)
+        clash_log += apply_dice_effect(d2, char2, char1, val_win2, rng=rng)
         for extra_effect in d1.get("extra_effects", []):
             clash_log += apply_dice_effect(
-                {"effect": extra_effect}, char1, char2, val_win1
+                {"effect": extra_effect}, char1, char2, val_win1, rng=rng
             )
         for extra_effect in d2.get("extra_effects", []):
             clash_log += apply_dice_effect(
-                {"effect": extra_effect}, char2, char1, val_win2
+                {"effect": extra_effect}, char2, char1, val_win2, rng=rng
             )
         
-        if "self" in (d1.get("effect") or ""): clash_log += apply_dice_effect(d1, char1, char2, val_win1, is_self=True)
-        if "self" in (d2.get("effect") or ""): clash_log += apply_dice_effect(d2, char2, char1, val_win2, is_self=True)
+        if "self" in (d1.get("effect") or ""): clash_log += apply_dice_effect(d1, char1, char2, val_win1, is_self=True, rng=rng)
+        if "self" in (d2.get("effect") or ""): clash_log += apply_dice_effect(d2, char2, char1, val_win2, is_self=True, rng=rng)
 
         # [마비 비례 고정 피해] (dmg_by_para_X)
         if d1.get("effect") and "dmg_by_para_" in d1["effect"]:
@@ -883,7 +902,7 @@ def process_clash_loop(char1, char2, res1, res2, effs1, effs2, turn_count, is_st
                     dmg = p1_para * int(d1["effect"].split("_")[-1])
                 elif "by_para" not in d1["effect"]:
                     parts = d1["effect"].split("_")
-                    dmg = random.randint(int(parts[2]), int(parts[3]))
+                    dmg = (rng or random).randint(int(parts[2]), int(parts[3]))
                 if dmg > 0:
                     char1.current_hp = max(0, char1.current_hp - dmg); clash_log += f" 🩸자해(-{dmg})"
             except: pass
@@ -895,7 +914,7 @@ def process_clash_loop(char1, char2, res1, res2, effs1, effs2, turn_count, is_st
                     dmg = p2_para * int(d2["effect"].split("_")[-1])
                 elif "by_para" not in d2["effect"]:
                     parts = d2["effect"].split("_")
-                    dmg = random.randint(int(parts[2]), int(parts[3]))
+                    dmg = (rng or random).randint(int(parts[2]), int(parts[3]))
                 if dmg > 0:
                     char2.current_hp = max(0, char2.current_hp - dmg); clash_log += f" 🩸자해(-{dmg})"
             except: pass
@@ -1037,7 +1056,7 @@ def process_clash_loop(char1, char2, res1, res2, effs1, effs2, turn_count, is_st
             and i + 1 < len(res2)
         ):
             res2[i+1] = {"type": "none", "value": 0}; clash_log += " 💥파괴!"
-            if "luude_imprint" in effs1: clash_log = apply_luude_logic(char1, char2, clash_log)
+            if "luude_imprint" in effs1: clash_log = apply_luude_logic(char1, char2, clash_log, rng)
         
         if (
             val_win2
@@ -1045,7 +1064,7 @@ def process_clash_loop(char1, char2, res1, res2, effs1, effs2, turn_count, is_st
             and i + 1 < len(res1)
         ):
             res1[i+1] = {"type": "none", "value": 0}; clash_log += " 💥파괴!"
-            if "luude_imprint" in effs2: clash_log = apply_luude_logic(char2, char1, clash_log)
+            if "luude_imprint" in effs2: clash_log = apply_luude_logic(char2, char1, clash_log, rng)
 
         # 최종 피해 적용
         actual_dmg1 = min(max(0, int(char1.current_hp)), max(0, int(dmg1)))
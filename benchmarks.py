@@ -0,0 +1,223 @@
+"""운영 DB를 대상으로 하는 성능 측정 스크립트.
+
+사용법:
+    python benchmarks.py user-loader [--users 20] [--rounds 10]
+    python benchmarks.py raid-supplies [--rounds 50]
+    python benchmarks.py decide-action [--rounds 200000]   (DB 불필요)
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import aiomysql
+
+import cards
+import data_manager
+import monsters
+
+
+def percentile_summary(samples_ms):
+    ordered = sorted(samples_ms)
+    if len(ordered) == 1:
+        return ordered[0], ordered[0]
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+    return cuts[49], cuts[98]
+
+
+async def bench_user_loader(users=20, rounds=10):
+    """Compare p50/p99 latency of the per-table and aggregate user loaders."""
+    pool = await data_manager.get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT user_id FROM users ORDER BY data_revision DESC LIMIT %s",
+                (int(users),),
+            )
+            user_ids = [row[0] for row in await cur.fetchall()]
+    if not user_ids:
+        print("측정할 유저가 없습니다.")
+        return {}
+
+    results = {}
+    for mode in ("tables", "aggregate"):
+        samples = []
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                for _ in range(int(rounds)):
+                    for user_id in user_ids:
+                        started = time.perf_counter()
+                        await data_manager._load_user_data(cur, user_id, mode=mode)
+                        samples.append((time.perf_counter() - started) * 1000)
+        p50, p99 = percentile_summary(samples)
+        results[mode] = (p50, p99)
+        print(f"{mode:>10}: p50={p50:.2f}ms p99={p99:.2f}ms (n={len(samples)})")
+    return results
+
+
+class CountingCursor:
+    """Counts statements sent through a cursor."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.statements = 0
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def execute(self, sql, args=None):
+        self.statements += 1
+        return await self._cursor.execute(sql, args)
+
+
+async def _legacy_take_raid_supplies(cur):
+    """The per-item loop consume_guild_raid_supplies used before bulk updates."""
+    consumed = []
+    for name in data_manager.GUILD_RAID_SUPPLY_NAMES:
+        await cur.execute(
+            """SELECT count FROM guild_inventory
+               WHERE guild_id=%s AND item_name=%s FOR UPDATE""",
+            (data_manager.GLOBAL_GUILD_ID, name),
+        )
+        row = await cur.fetchone()
+        if not row or int(row[0]) <= 0:
+            continue
+        if int(row[0]) == 1:
+            await cur.execute(
+                "DELETE FROM guild_inventory WHERE guild_id=%s AND item_name=%s",
+                (data_manager.GLOBAL_GUILD_ID, name),
+            )
+        else:
+            await cur.execute(
+                """UPDATE guild_inventory SET count=count-1
+                   WHERE guild_id=%s AND item_name=%s""",
+                (data_manager.GLOBAL_GUILD_ID, name),
+            )
+        consumed.append(name)
+    return consumed
+
+
+async def bench_raid_supplies(rounds=50):
+    """Statements and latency per raid start, per-item loop vs bulk update.
+
+    Every round is rolled back, so the guild's stock is left untouched.
+    """
+    pool = await data_manager.get_db_pool()
+    results = {}
+    for mode, take in (
+        ("per-item", _legacy_take_raid_supplies),
+        ("bulk", data_manager._take_guild_raid_supplies),
+    ):
+        samples = []
+        statements = 0
+        consumed = []
+        async with pool.acquire() as conn:
+            async with conn.cursor() as raw_cur:
+                cur = CountingCursor(raw_cur)
+                for _ in range(int(rounds)):
+                    started = time.perf_counter()
+                    await conn.begin()
+                    try:
+                        consumed = await take(cur)
+                    finally:
+                        await conn.rollback()
+                    samples.append((time.perf_counter() - started) * 1000)
+                statements = cur.statements / int(rounds)
+        p50, p99 = percentile_summary(samples)
+        results[mode] = (statements, p50, p99)
+        print(
+            f"{mode:>10}: {statements:.1f} statements/raid "
+            f"p50={p50:.2f}ms p99={p99:.2f}ms (보급품 {len(consumed)}종 재고)"
+        )
+    return results
+
+
+def _legacy_get_card(name):
+    """get_card before interning: special cards were rebuilt on every call."""
+    return (
+        cards._build_special_card(name)
+        or cards.SKILL_CARDS.get(name)
+        or cards.BOSS_CARDS.get(name)
+    )
+
+
+def _legacy_decide_action(monster, rng):
+    """Monster.decide_action before compiled action tables."""
+    available_cards = [
+        _legacy_get_card(name) for name in monster.card_deck if _legacy_get_card(name)
+    ]
+    if not available_cards:
+        return _legacy_get_card("기본공격")
+    weights = []
+    for card in available_cards:
+        primary_type = card.dice_list[0].action_type
+        if monster.pattern_type == "aggressive":
+            w = 70 if primary_type == "attack" else 15
+        elif monster.pattern_type == "defensive":
+            w = 70 if primary_type in ["defense", "counter", "heal"] else 15
+        else:
+            w = 33
+        weights.append(w)
+    return rng.choices(available_cards, weights=weights)[0]
+
+
+def bench_decide_action(rounds=200_000):
+    """decide_action throughput over every monster deck, legacy vs compiled."""
+    spawned = [monsters.spawn_monster(name) for name in monsters.MONSTER_DATA]
+    spawned += [
+        monsters.get_dungeon_boss(region, depth)
+        for region in monsters.DUNGEON_BOSSES
+        for depth in (30, 60, 90)
+    ]
+    spawned += [monsters.get_raid_boss(rank) for rank in monsters.RAID_BOSS_DATA]
+    spawned.append(monsters.Monster(
+        "특수 카드 허수아비", 100, 5, 5,
+        card_deck=["인파이트", "모닝 글로리", "전부매입", "시간술식:기본형"],
+    ))
+    results = {}
+    picks = {}
+    for mode, decide in (
+        ("legacy", _legacy_decide_action),
+        ("compiled", lambda monster, rng: monster.decide_action(rng=rng)),
+    ):
+        rng = random.Random(1)
+        chosen = []
+        started = time.perf_counter()
+        for index in range(int(rounds)):
+            chosen.append(decide(spawned[index % len(spawned)], rng).name)
+        elapsed = time.perf_counter() - started
+        picks[mode] = chosen
+        results[mode] = int(rounds) / elapsed
+        print(f"{mode:>10}: {results[mode]:,.0f} decisions/s ({elapsed * 1000:.0f}ms)")
+    same = "같음" if picks["legacy"] == picks["compiled"] else "다름"
+    print(f"같은 시드의 선택 순서: {same} · 속도 {results['compiled'] / results['legacy']:.1f}배")
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+    loader = sub.add_parser("user-loader", help="유저 로더 모드별 지연 시간")
+    loader.add_argument("--users", type=int, default=20)
+    loader.add_argument("--rounds", type=int, default=10)
+    supplies = sub.add_parser("raid-supplies", help="레이드 시작 시 보급품 소비 쿼리 수")
+    supplies.add_argument("--rounds", type=int, default=50)
+    decide = sub.add_parser("decide-action", help="몬스터 행동 결정 처리량 (DB 불필요)")
+    decide.add_argument("--rounds", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if args.command == "user-loader":
+        await bench_user_loader(args.users, args.rounds)
+    elif args.command == "raid-supplies":
+        await bench_raid_supplies(args.rounds)
+    elif args.command == "decide-action":
+        bench_decide_action(args.rounds)
+    pool = data_manager._pool
+    if pool is not None:
+        pool.close()
+        await pool.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,6 +8,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
 import math
 import random
 import re
@@ -29,13 +30,17 @@ from cards import (
 )
 from data_manager import (
     add_guild_contribution,
+    apply_user_deltas,
     get_db_pool,
     get_user_data,
     mutate_user_data,
 )
+from dice_tables import uniform_moments
 from monsters import Monster
 
 
+logger = logging.getLogger(__name__)
+
 KST = ZoneInfo("Asia/Seoul")
 PURE_HOPE_ITEM = "순수한 희망"
 START_MONEY = 300_000
@@ -2371,7 +2376,7 @@ class UserBossMonster(Monster):
         ]
         return result or list(self.skill_cards)
 
-    def decide_action(self):
+    def decide_action(self, rng=None):
         cards = self.available_cards()
         weights = []
         for card in cards:
@@ -2383,9 +2388,9 @@ class UserBossMonster(Monster):
             else:
                 weight = 33
             weights.append(weight)
-        return random.choices(cards, weights=weights, k=1)[0]
+        return (rng or random).choices(cards, weights=weights, k=1)[0]
 
-    def commit_card(self, card: BossSkillCard) -> None:
+    def commit_card(self, card: BossSkillCard, rng=None) -> None:
         for key in list(self.runtime_cooldowns):
             if key.startswith("skill:"):
                 self.runtime_cooldowns[key] = max(0, int(self.runtime_cooldowns[key]) - 1)
@@ -2406,7 +2411,7 @@ class UserBossMonster(Monster):
         if self.inheritance == "센쇼" and any(
             dice.action_type == "defense" for dice in card.dice_list
         ):
-            miracle = random.randint(1, 7) == 1
+            miracle = (rng or random).randint(1, 7) == 1
             self.runtime_cooldowns["sensho_miracle"] = miracle
             self.runtime_cooldowns["sensho_guard_boost"] = not miracle
             if miracle:
@@ -2466,12 +2471,13 @@ class UserBossMonster(Monster):
                 if dice.get("type") == "defense":
                     dice["value"] = max(0, math.floor(int(dice["value"]) * 1.5))
 
-    def modify_opponent_dice(self, dice_results: list[dict[str, Any]], target) -> str:
+    def modify_opponent_dice(self, dice_results: list[dict[str, Any]], target, rng=None) -> str:
+        roller = rng or random
         logs = []
         if self.inheritance == "샤일라" and self.runtime_cooldowns.get("shayla_destroy_this_turn"):
             valid = [index for index, dice in enumerate(dice_results) if dice.get("type") != "none"]
-            count = min(len(valid), random.randint(1, 3))
-            for index in random.sample(valid, count) if count else []:
+            count = min(len(valid), roller.randint(1, 3))
+            for index in roller.sample(valid, count) if count else []:
                 dice_results[index] = {"type": "none", "value": 0, "effect": None}
             stack = int(self.runtime_cooldowns.get("shayla_destroy_stack", 0)) + count
             if stack >= 10:
@@ -2511,7 +2517,7 @@ class UserBossMonster(Monster):
             damage = math.floor(damage * 0.75)
         return damage
 
-    def on_turn_end(self) -> str:
+    def on_turn_end(self, rng=None) -> str:
         logs = []
         if (
             "last_recovery" in self.general_passives
@@ -2536,7 +2542,7 @@ class UserBossMonster(Monster):
             logs.append("불굴의 외피 발동")
         elif self.runtime_cooldowns.get("shell_reduction_turns", 0) > 0:
             self.runtime_cooldowns["shell_reduction_turns"] -= 1
-        if self.innate_passive == "anomaly_circuit" and random.random() < 0.25:
+        if self.innate_passive == "anomaly_circuit" and (rng or random).random() < 0.25:
             for key in list(self.runtime_cooldowns):
                 if key.startswith("skill:"):
                     self.runtime_cooldowns[key] = max(0, int(self.runtime_cooldowns[key]) - 1)
@@ -2588,6 +2594,7 @@ def _decode_boss_row(row: Any) -> dict[str, Any]:
             "boss_id", "owner_id", "guild_id", "boss_name", "grade", "power_score",
             "boss_data", "is_published", "publish_scope", "active_battles",
             "weekly_key", "weekly_elo", "all_time_best_elo", "created_at", "updated_at",
+            "dungeon_ready", "factor_version",
         ),
     )
     raw = data.get("boss_data")
@@ -2596,26 +2603,29 @@ def _decode_boss_row(row: Any) -> dict[str, Any]:
     return data
 
 
-async def _normalize_boss_rows(conn, cur, rows: list[Any]) -> list[dict[str, Any]]:
-    """레거시 보스 인자를 최초 조회 시 결정적으로 생성해 영구 저장한다."""
-    normalized_rows: list[dict[str, Any]] = []
-    changed_any = False
-    for row in rows:
-        decoded = _decode_boss_row(row)
-        normalized, changed = ensure_completed_boss_factors(decoded)
-        normalized_rows.append(normalized)
-        if changed:
-            await cur.execute(
-                "UPDATE user_bosses SET boss_data=%s WHERE boss_id=%s",
-                (
-                    json.dumps(normalized["boss_data"], ensure_ascii=False),
-                    normalized["boss_id"],
-                ),
-            )
-            changed_any = True
-    if changed_any:
-        await conn.commit()
-    return normalized_rows
+# Everything a listing shows. boss_data stays in the row until a specific
+# boss is opened (get_boss_records); owner_name comes from the display-name
+# table the bot keeps current on every interaction.
+_BOSS_SUMMARY_COLUMNS = (
+    "b.boss_id,b.owner_id,b.guild_id,b.boss_name,b.grade,b.power_score,"
+    "b.is_published,b.publish_scope,b.active_battles,b.weekly_key,b.weekly_elo,"
+    "b.all_time_best_elo,b.dungeon_ready,b.factor_version,b.created_at,b.updated_at,"
+    "d.display_name AS owner_name"
+)
+_BOSS_SUMMARY_FROM = (
+    "FROM user_bosses b LEFT JOIN user_display_names d ON d.user_id=b.owner_id"
+)
+_BOSS_BACKFILL_BATCH = 100
+
+
+def _summary_rows(rows: list[Any]) -> list[dict[str, Any]]:
+    current_week = weekly_key()
+    return [_current_weekly_rating(dict(row), current_week) for row in rows]
+
+
+def _boss_summary_values(data: dict[str, Any]) -> tuple[int, int]:
+    """(dungeon_ready, factor_version) columns for a boss_data payload."""
+    return int(dungeon_is_ready(data)), int(data.get("factors_version", 0) or 0)
 
 
 def weekly_key(now: datetime | None = None) -> str:
@@ -2624,12 +2634,57 @@ def weekly_key(now: datetime | None = None) -> str:
     return monday.isoformat()
 
 
-async def _reset_stale_weekly_ratings(cur) -> None:
-    await cur.execute(
-        """UPDATE user_bosses SET weekly_key=%s,weekly_elo=1500
-           WHERE weekly_key IS NULL OR weekly_key<>%s""",
-        (weekly_key(), weekly_key()),
-    )
+# A weekly_key other than the current week means the boss has not defended
+# yet this week: readers treat its rating as 1500 (in Python for returned
+# rows, via _WEEKLY_ELO_SQL for ORDER BY), so listings never write. The
+# stored rows are rolled over once a week by rollover_weekly_ratings.
+_WEEKLY_ELO_SQL = "CASE WHEN weekly_key=%s THEN weekly_elo ELSE 1500 END"
+_WEEKLY_ROLLOVER_MARKER = "boss_weekly_rollover"
+
+
+def _current_weekly_rating(row: dict[str, Any], current_week: str) -> dict[str, Any]:
+    if row.get("weekly_key") != current_week:
+        row["weekly_key"] = current_week
+        row["weekly_elo"] = 1500
+    return row
+
+
+async def rollover_weekly_ratings() -> int:
+    """Reset stale weekly ratings once per week; returns rows reset.
+
+    The maintenance_markers row is locked for the whole reset, so concurrent
+    callers wait and then find the week already done.
+    """
+    key = weekly_key()
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            try:
+                await conn.begin()
+                await cur.execute(
+                    "SELECT value FROM maintenance_markers WHERE name=%s FOR UPDATE",
+                    (_WEEKLY_ROLLOVER_MARKER,),
+                )
+                marker = await cur.fetchone()
+                if marker and marker[0] == key:
+                    await conn.rollback()
+                    return 0
+                await cur.execute(
+                    """UPDATE user_bosses SET weekly_key=%s,weekly_elo=1500
+                       WHERE weekly_key IS NULL OR weekly_key<>%s""",
+                    (key, key),
+                )
+                reset = cur.rowcount
+                await cur.execute(
+                    """INSERT INTO maintenance_markers (name, value) VALUES (%s, %s) AS new
+                       ON DUPLICATE KEY UPDATE value=new.value""",
+                    (_WEEKLY_ROLLOVER_MARKER, key),
+                )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+    return reset
 
 
 async def save_completed_boss(owner_id: int | str, guild_id: int, boss: dict[str, Any]) -> None:
@@ -2640,16 +2695,19 @@ async def save_completed_boss(owner_id: int | str, guild_id: int, boss: dict[str
             await cur.execute(
                 """INSERT INTO user_bosses
                    (boss_id,owner_id,guild_id,boss_name,grade,power_score,boss_data,
-                    weekly_key,weekly_elo,all_time_best_elo)
-                   VALUES (%s,%s,%s,%s,%s,%s,%s,%s,1500,1500)
+                    dungeon_ready,factor_version,weekly_key,weekly_elo,all_time_best_elo)
+                   VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,1500,1500)
                    ON DUPLICATE KEY UPDATE boss_data=VALUES(boss_data),
-                    boss_name=VALUES(boss_name),grade=VALUES(grade),power_score=VALUES(power_score)""",
+                    boss_name=VALUES(boss_name),grade=VALUES(grade),power_score=VALUES(power_score),
+                    dungeon_ready=VALUES(dungeon_ready),factor_version=VALUES(factor_version)""",
                 (
                     boss["boss_id"], str(owner_id), int(guild_id), boss["name"], boss["grade"],
-                    int(boss["power_score"]), json.dumps(boss, ensure_ascii=False), weekly_key(),
+                    int(boss["power_score"]), json.dumps(boss, ensure_ascii=False),
+                    *_boss_summary_values(boss), weekly_key(),
                 ),
             )
             await conn.commit()
+    _bump_boss_rankings()
 
 
 async def save_legacy_boss_dungeon(
@@ -2683,35 +2741,52 @@ async def save_legacy_boss_dungeon(
             data["dungeon"] = deepcopy(dungeon)
             await cur.execute(
                 """UPDATE user_bosses
-                   SET boss_data=%s,is_published=0
+                   SET boss_data=%s,dungeon_ready=1,is_published=0
                    WHERE boss_id=%s AND owner_id=%s""",
                 (json.dumps(data, ensure_ascii=False), boss_id, str(owner_id)),
             )
             await conn.commit()
+    _bump_boss_rankings()
 
 
 async def list_owned_bosses(owner_id: int | str) -> list[dict[str, Any]]:
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await _reset_stale_weekly_ratings(cur)
-            await conn.commit()
             await cur.execute(
-                "SELECT * FROM user_bosses WHERE owner_id=%s ORDER BY created_at DESC",
+                f"""SELECT {_BOSS_SUMMARY_COLUMNS} {_BOSS_SUMMARY_FROM}
+                    WHERE b.owner_id=%s ORDER BY b.created_at DESC""",
                 (str(owner_id),),
             )
-            return await _normalize_boss_rows(conn, cur, list(await cur.fetchall()))
+            return _summary_rows(await cur.fetchall())
 
 
-async def get_boss_record(boss_id: str) -> dict[str, Any] | None:
+async def get_boss_records(boss_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """Full records (decoded boss_data) for the given bosses, keyed by id."""
+    ids = list(dict.fromkeys(str(boss_id) for boss_id in boss_ids if boss_id))
+    if not ids:
+        return {}
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute("SELECT * FROM user_bosses WHERE boss_id=%s", (boss_id,))
-            row = await cur.fetchone()
-            if not row:
-                return None
-            return (await _normalize_boss_rows(conn, cur, [row]))[0]
+            await cur.execute(
+                f"SELECT * FROM user_bosses WHERE boss_id IN ({','.join(['%s'] * len(ids))})",
+                tuple(ids),
+            )
+            rows = await cur.fetchall()
+    current_week = weekly_key()
+    records = {}
+    for row in rows:
+        record = _current_weekly_rating(_decode_boss_row(row), current_week)
+        if int(record.get("factor_version") or 0) < FACTOR_VERSION:
+            # Not backfilled yet: normalize in memory, the backfill persists it.
+            record, _ = ensure_completed_boss_factors(record)
+        records[str(record["boss_id"])] = record
+    return records
+
+
+async def get_boss_record(boss_id: str) -> dict[str, Any] | None:
+    return (await get_boss_records([boss_id])).get(str(boss_id))
 
 
 async def list_published_bosses(
@@ -2719,29 +2794,20 @@ async def list_published_bosses(
     scope: str = "guild",
     limit: int = 25,
 ) -> list[dict[str, Any]]:
+    if scope == "world":
+        where, params = "b.publish_scope='world'", ()
+    else:
+        where, params = "b.guild_id=%s", (int(guild_id),)
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await _reset_stale_weekly_ratings(cur)
-            await conn.commit()
-            if scope == "world":
-                await cur.execute(
-                    """SELECT * FROM user_bosses
-                       WHERE is_published=1 AND publish_scope='world'
-                       ORDER BY weekly_elo DESC,power_score DESC LIMIT %s""",
-                    (int(limit),),
-                )
-            else:
-                await cur.execute(
-                    """SELECT * FROM user_bosses WHERE is_published=1 AND guild_id=%s
-                       ORDER BY weekly_elo DESC,power_score DESC LIMIT %s""",
-                    (int(guild_id), int(limit)),
-                )
-            rows = await _normalize_boss_rows(conn, cur, list(await cur.fetchall()))
-            return [
-                row for row in rows
-                if dungeon_is_ready(row.get("boss_data", {}))
-            ]
+            await cur.execute(
+                f"""SELECT {_BOSS_SUMMARY_COLUMNS} {_BOSS_SUMMARY_FROM}
+                    WHERE b.is_published=1 AND b.dungeon_ready=1 AND {where}
+                    ORDER BY {_WEEKLY_ELO_SQL} DESC,b.power_score DESC LIMIT %s""",
+                params + (weekly_key(), int(limit)),
+            )
+            return _summary_rows(await cur.fetchall())
 
 
 async def list_inheritance_parent_bosses(
@@ -2786,35 +2852,248 @@ def inheritance_source_label(record: dict[str, Any]) -> str:
     }.get(str(record.get("inheritance_source", "")), "공개")
 
 
-async def get_boss_rankings(limit: int = 10) -> dict[str, list[dict[str, Any]]]:
-    pool = await get_db_pool()
-    queries = {
-        "weekly": "weekly_elo DESC,power_score DESC",
-        "all_time": "all_time_best_elo DESC,power_score DESC",
-        "power": "power_score DESC,all_time_best_elo DESC",
+try:
+    from config import BOSS_RANKING_REFRESH_TIMEOUT
+except ImportError:
+    BOSS_RANKING_REFRESH_TIMEOUT = 1.5
+
+# ORDER BY columns (all DESC) of each world board; each has a matching
+# idx_user_boss_*_rank index.
+_BOSS_RANKING_ORDER = {
+    "weekly": ("weekly_elo", "power_score"),
+    "all_time": ("all_time_best_elo", "power_score"),
+    "power": ("power_score", "all_time_best_elo"),
+}
+_BOSS_RANKING_WHERE = "b.is_published=1 AND b.publish_scope='world' AND b.dungeon_ready=1"
+
+# Snapshots keyed by limit. Writers that change who is on the boards bump
+# the generation; finish_boss_battle patches the boards in place instead.
+_boss_ranking_generation = 0
+_boss_ranking_snapshots: dict[int, dict[str, Any]] = {}
+_boss_ranking_refreshes: dict[int, asyncio.Future] = {}
+
+
+def _bump_boss_rankings() -> None:
+    global _boss_ranking_generation
+    _boss_ranking_generation += 1
+
+
+def _ranking_sort_key(row: dict[str, Any], order: tuple[str, ...]) -> tuple[int, ...]:
+    return tuple(int(row.get(column) or 0) for column in order)
+
+
+def _copy_rankings(snapshot: dict[str, Any]) -> dict[str, list[dict[str, Any]]]:
+    return {
+        board: [dict(row) for row in rows]
+        for board, rows in snapshot["rankings"].items()
     }
+
+
+async def _query_boss_rankings(limit: int, week: str) -> dict[str, list[dict[str, Any]]]:
+    pool = await get_db_pool()
     result: dict[str, list[dict[str, Any]]] = {}
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await _reset_stale_weekly_ratings(cur)
-            await conn.commit()
-            for key, ordering in queries.items():
+            # Bosses not rolled over yet rate 1500 this week. Reading them
+            # apart keeps both halves on idx_user_boss_weekly_rank.
+            await cur.execute(
+                f"""SELECT {_BOSS_SUMMARY_COLUMNS} {_BOSS_SUMMARY_FROM}
+                    WHERE {_BOSS_RANKING_WHERE} AND b.weekly_key=%s
+                    ORDER BY b.weekly_elo DESC,b.power_score DESC LIMIT %s""",
+                (week, limit),
+            )
+            weekly = list(await cur.fetchall())
+            await cur.execute(
+                f"""SELECT {_BOSS_SUMMARY_COLUMNS} {_BOSS_SUMMARY_FROM}
+                    WHERE {_BOSS_RANKING_WHERE} AND (b.weekly_key IS NULL OR b.weekly_key<>%s)
+                    ORDER BY b.power_score DESC LIMIT %s""",
+                (week, limit),
+            )
+            weekly.extend(await cur.fetchall())
+            order = _BOSS_RANKING_ORDER["weekly"]
+            result["weekly"] = sorted(
+                _summary_rows(weekly),
+                key=lambda row: _ranking_sort_key(row, order),
+                reverse=True,
+            )[:limit]
+            for board in ("all_time", "power"):
+                ordering = ",".join(f"b.{column} DESC" for column in _BOSS_RANKING_ORDER[board])
                 await cur.execute(
-                    f"""SELECT * FROM user_bosses
-                        WHERE is_published=1 AND publish_scope='world'
+                    f"""SELECT {_BOSS_SUMMARY_COLUMNS} {_BOSS_SUMMARY_FROM}
+                        WHERE {_BOSS_RANKING_WHERE}
                         ORDER BY {ordering} LIMIT %s""",
-                    (int(limit),),
-                )
-                normalized = await _normalize_boss_rows(
-                    conn, cur, list(await cur.fetchall())
+                    (limit,),
                 )
-                result[key] = [
-                    row for row in normalized
-                    if dungeon_is_ready(row.get("boss_data", {}))
-                ]
+                result[board] = _summary_rows(await cur.fetchall())
     return result
 
 
+async def _refresh_boss_rankings(limit: int, week: str) -> dict[str, Any]:
+    generation = _boss_ranking_generation
+    rankings = await _query_boss_rankings(limit, week)
+    snapshot = {"generation": generation, "week": week, "limit": limit, "rankings": rankings}
+    _boss_ranking_snapshots[limit] = snapshot
+    return snapshot
+
+
+def _forget_ranking_refresh(limit: int, task: asyncio.Future) -> None:
+    if _boss_ranking_refreshes.get(limit) is task:
+        del _boss_ranking_refreshes[limit]
+    if not task.cancelled():
+        task.exception()  # mark retrieved; awaiting callers still get it
+
+
+async def get_boss_rankings(limit: int = 10) -> dict[str, list[dict[str, Any]]]:
+    """World boss boards, served from an in-process snapshot.
+
+    A stale snapshot from the current week is returned as-is when the
+    refresh takes longer than BOSS_RANKING_REFRESH_TIMEOUT or fails; a slow
+    refresh keeps running and a later call picks up its result.
+    """
+    limit = int(limit)
+    week = weekly_key()
+    snapshot = _boss_ranking_snapshots.get(limit)
+    if snapshot and snapshot["week"] != week:
+        snapshot = None
+    if snapshot and snapshot["generation"] == _boss_ranking_generation:
+        return _copy_rankings(snapshot)
+    task = _boss_ranking_refreshes.get(limit)
+    if task is None:
+        task = asyncio.ensure_future(_refresh_boss_rankings(limit, week))
+        task.add_done_callback(lambda done: _forget_ranking_refresh(limit, done))
+        _boss_ranking_refreshes[limit] = task
+    if snapshot is None:
+        return _copy_rankings(await asyncio.shield(task))
+    try:
+        snapshot = await asyncio.wait_for(asyncio.shield(task), BOSS_RANKING_REFRESH_TIMEOUT)
+    except asyncio.TimeoutError:
+        pass
+    except Exception as exc:
+        logger.warning("보스 랭킹 갱신 실패, 이전 스냅샷 사용 (limit=%s): %s", limit, exc)
+    return _copy_rankings(snapshot)
+
+
+def _patch_top_k(
+    rankings: dict[str, list[dict[str, Any]]],
+    board: str,
+    row: dict[str, Any],
+    limit: int,
+) -> bool:
+    """Re-place one boss on a cached board; False if that needs a re-query."""
+    rows = rankings[board]
+    order = _BOSS_RANKING_ORDER[board]
+    new_key = _ranking_sort_key(row, order)
+    index = next(
+        (position for position, entry in enumerate(rows) if entry["boss_id"] == row["boss_id"]),
+        None,
+    )
+    if index is None:
+        if len(rows) >= limit and new_key <= _ranking_sort_key(rows[-1], order):
+            return True
+        # The owner name comes from the display-name join; reuse it from
+        # another board or re-query.
+        owner_name = next(
+            (
+                entry.get("owner_name")
+                for entries in rankings.values()
+                for entry in entries
+                if entry["boss_id"] == row["boss_id"]
+            ),
+            None,
+        )
+        if owner_name is None:
+            return False
+        rows.append({**row, "owner_name": owner_name})
+        dropped = False
+    else:
+        dropped = new_key < _ranking_sort_key(rows[index], order)
+        rows[index] = {**rows[index], **row}
+    rows.sort(key=lambda entry: _ranking_sort_key(entry, order), reverse=True)
+    # A boss that fell to the cut-off may now rank below one outside the board.
+    if dropped and len(rows) >= limit and rows[-1]["boss_id"] == row["boss_id"]:
+        return False
+    del rows[limit:]
+    return True
+
+
+def _apply_battle_to_rankings(row: dict[str, Any]) -> None:
+    """Fold a boss's post-battle ratings into the cached boards.
+
+    Power never changes in a battle, so only the weekly and all-time boards
+    are touched. Anything that cannot be patched locally, including a refresh
+    that is still reading, bumps the generation instead.
+    """
+    if not (row.get("is_published") and row.get("publish_scope") == "world"
+            and row.get("dungeon_ready")):
+        return
+    if _boss_ranking_refreshes:
+        _bump_boss_rankings()
+        return
+    for snapshot in _boss_ranking_snapshots.values():
+        if (snapshot["generation"] != _boss_ranking_generation
+                or snapshot["week"] != row.get("weekly_key")):
+            continue
+        for board in ("weekly", "all_time"):
+            if not _patch_top_k(snapshot["rankings"], board, row, snapshot["limit"]):
+                _bump_boss_rankings()
+                return
+
+
+async def backfill_boss_summaries() -> int:
+    """Persist legacy factor normalization and the summary columns.
+
+    Walks rows whose factor_version is behind FACTOR_VERSION in boss_id order,
+    one locked batch per transaction; returns the number of rows rewritten.
+    A row that cannot be normalized is logged and skipped, so it stays behind
+    (listings normalize it in memory) and is retried by the next run. Once
+    every row is current this is a single empty index read.
+    """
+    pool = await get_db_pool()
+    updated = 0
+    last_id = ""
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            while True:
+                try:
+                    await conn.begin()
+                    await cur.execute(
+                        """SELECT boss_id,boss_name,grade,boss_data FROM user_bosses
+                           WHERE factor_version<%s AND boss_id>%s
+                           ORDER BY boss_id LIMIT %s FOR UPDATE""",
+                        (FACTOR_VERSION, last_id, _BOSS_BACKFILL_BATCH),
+                    )
+                    rows = list(await cur.fetchall())
+                    if not rows:
+                        await conn.rollback()
+                        return updated
+                    params = []
+                    for row in rows:
+                        try:
+                            normalized, _ = ensure_completed_boss_factors(_decode_boss_row(row))
+                            data = normalized["boss_data"]
+                            params.append((
+                                json.dumps(data, ensure_ascii=False),
+                                *_boss_summary_values(data),
+                                row["boss_id"],
+                            ))
+                        except Exception as e:
+                            logger.warning("보스 요약 백필 건너뜀 (boss_id=%s): %s", row["boss_id"], e)
+                    if params:
+                        await cur.executemany(
+                            """UPDATE user_bosses SET boss_data=%s,dungeon_ready=%s,factor_version=%s
+                               WHERE boss_id=%s""",
+                            params,
+                        )
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+                if params:
+                    _bump_boss_rankings()
+                updated += len(params)
+                last_id = rows[-1]["boss_id"]
+
+
 async def publish_boss(owner_id: int | str, boss_id: str, scope: str | None) -> None:
     if scope not in {None, "guild", "world"}:
         raise BossTrainingError("공개 범위는 길드 또는 월드여야 합니다.")
@@ -2823,7 +3102,7 @@ async def publish_boss(owner_id: int | str, boss_id: str, scope: str | None) ->
         async with conn.cursor() as cur:
             await conn.begin()
             await cur.execute(
-                "SELECT owner_id,active_battles,boss_data FROM user_bosses WHERE boss_id=%s FOR UPDATE",
+                "SELECT owner_id,active_battles,dungeon_ready FROM user_bosses WHERE boss_id=%s FOR UPDATE",
                 (boss_id,),
             )
             row = await cur.fetchone()
@@ -2831,10 +3110,7 @@ async def publish_boss(owner_id: int | str, boss_id: str, scope: str | None) ->
                 await conn.rollback()
                 raise BossTrainingError("본인의 보스를 찾지 못했습니다.")
             if scope:
-                raw_data = row[2]
-                if isinstance(raw_data, str):
-                    raw_data = json.loads(raw_data)
-                if not dungeon_is_ready(raw_data):
+                if not row[2]:
                     await conn.rollback()
                     raise BossTrainingError(
                         "던전 몬스터 3종을 제작·확정한 뒤 공개할 수 있습니다."
@@ -2854,6 +3130,7 @@ async def publish_boss(owner_id: int | str, boss_id: str, scope: str | None) ->
                     (boss_id,),
                 )
             await conn.commit()
+    _bump_boss_rankings()
 
 
 async def sell_boss(owner_id: int | str, boss_id: str, typed_name: str, user_name: str) -> dict[str, int]:
@@ -2870,18 +3147,13 @@ async def sell_boss(owner_id: int | str, boss_id: str, typed_name: str, user_nam
                 raise BossTrainingError("진행 중인 레이드가 있어 판매할 수 없습니다.")
             reward = dict(SALE_REWARDS[str(row["grade"])])
 
-    def grant(latest):
-        state = ensure_boss_training_data(latest)
-        if boss_id in state["sold_boss_ids"]:
-            return
-        latest["money"] = int(latest.get("money", 0)) + reward["money"]
-        latest["pt"] = int(latest.get("pt", 0)) + reward["pt"]
-        if reward["hope"]:
-            inv = latest.setdefault("inventory", {})
-            inv[PURE_HOPE_ITEM] = int(inv.get(PURE_HOPE_ITEM, 0)) + reward["hope"]
-        state["sold_boss_ids"].append(boss_id)
-
-    await mutate_user_data(owner_id, grant, user_name)
+    await apply_user_deltas(
+        owner_id,
+        money=reward["money"],
+        pt=reward["pt"],
+        items={PURE_HOPE_ITEM: reward["hope"]},
+        once=("boss_training.sold_boss_ids", boss_id),
+    )
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             await cur.execute(
@@ -2889,6 +3161,7 @@ async def sell_boss(owner_id: int | str, boss_id: str, typed_name: str, user_nam
                 (boss_id, str(owner_id)),
             )
             await conn.commit()
+            _bump_boss_rankings()
             if cur.rowcount != 1:
                 raise BossTrainingError(
                     "판매 보상은 안전하게 기록했지만 보스 삭제를 마치지 못했습니다. 다시 시도해주세요."
@@ -2979,6 +3252,13 @@ async def finish_boss_battle(
                     (key, updated, best, boss_id),
                 )
             await conn.commit()
+    if inserted:
+        _apply_battle_to_rankings({
+            **{column: value for column, value in row.items() if column != "boss_data"},
+            "weekly_key": key,
+            "weekly_elo": updated,
+            "all_time_best_elo": best,
+        })
     reward = (
         {"money": 0, "pt": 0, "contribution": 0}
         if self_challenge
@@ -2996,20 +3276,15 @@ async def finish_boss_battle(
             "self_challenge": True,
         }
     owner_id = str(record["owner_id"])
-    granted = {"value": False}
-
-    def grant(latest):
-        state = ensure_boss_training_data(latest)
-        ledger = state["rewarded_battle_ids"]
-        if battle_id in ledger or not inserted or self_challenge:
-            return
-        latest["money"] = int(latest.get("money", 0)) + reward["money"]
-        latest["pt"] = int(latest.get("pt", 0)) + reward["pt"]
-        ledger.append(battle_id)
-        granted["value"] = True
-
-    await mutate_user_data(owner_id, grant, owner_name)
-    if granted["value"]:
+    granted = False
+    if inserted:
+        granted = await apply_user_deltas(
+            owner_id,
+            money=reward["money"],
+            pt=reward["pt"],
+            once=("boss_training.rewarded_battle_ids", battle_id),
+        ) is not None
+    if granted:
         await add_guild_contribution(
             owner_id, reward["contribution"], "user_boss_defense",
             record.get("boss_name", "육성 보스"), owner_name,
@@ -3025,7 +3300,7 @@ async def finish_boss_battle(
         "elo_before": current,
         "elo_after": updated,
         "owner_reward": reward,
-        "granted": granted["value"],
+        "granted": granted,
         "self_challenge": bool(self_challenge),
     }
 
@@ -3035,7 +3310,9 @@ async def get_public_supports(guild_id: int, exclude_user_id: int | str) -> list
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute(
-                """SELECT gm.user_id,uld.data,u.characters
+                """SELECT gm.user_id,
+                          CAST(JSON_EXTRACT(uld.data,'$.boss_training') AS CHAR) AS boss_training,
+                          u.characters
                    FROM guild_members gm
                    JOIN user_life_data uld ON uld.user_id=gm.user_id
                    JOIN users u ON u.user_id=gm.user_id
@@ -3044,8 +3321,11 @@ async def get_public_supports(guild_id: int, exclude_user_id: int | str) -> list
             )
             result = []
             for row in await cur.fetchall():
-                life = json.loads(row["data"]) if isinstance(row["data"], str) else row["data"]
-                public = (life or {}).get("boss_training", {}).get("public_support")
+                training = row["boss_training"]
+                training = json.loads(training) if isinstance(training, str) else training
+                if not isinstance(training, dict):
+                    continue
+                public = training.get("public_support")
                 if not isinstance(public, dict):
                     continue
                 chars = json.loads(row["characters"]) if isinstance(row["characters"], str) else row["characters"]
@@ -3055,7 +3335,7 @@ async def get_public_supports(guild_id: int, exclude_user_id: int | str) -> list
                 )
                 if not isinstance(char, dict):
                     continue
-                upgrades = (life or {}).get("boss_training", {}).get("support_upgrades", {})
+                upgrades = training.get("support_upgrades", {})
                 result.append(_snapshot_support(
                     char, int(upgrades.get(char.get("name"), 0)), str(row["user_id"])
                 ))
@@ -3395,6 +3675,7 @@ class BossTrainingHubView(_OwnerView):
             lines = [
                 f"{index}. **{row['boss_name']}** [{row['grade']}] · "
                 f"{label} {int(row[score_key]):,}"
+                + (f" · {row['owner_name']}" if row.get("owner_name") else "")
                 for index, row in enumerate(rankings[key], 1)
             ]
             embed.add_field(name=title, value="\n".join(lines) or "기록 없음", inline=False)
@@ -3480,6 +3761,7 @@ class BossSetupView(_OwnerView):
         self.innate_passive: str | None = None
         self.inheritance_bosses: list[dict[str, Any]] = []
         self.parent_ids: list[str] = []
+        self.parent_records: dict[str, dict[str, Any]] = {}
         self.scenario_id = "normal"
 
     async def setup(self, user_data):
@@ -3671,6 +3953,11 @@ class BossSetupView(_OwnerView):
                     "선택한 부모 보스가 판매·비공개되었거나 더 이상 존재하지 않습니다. 고급 설정에서 다시 선택해주세요."
                 )
             self.inheritance_bosses = current_bosses
+            self.parent_records = await get_boss_records(self.parent_ids)
+            if any(parent_id not in self.parent_records for parent_id in self.parent_ids):
+                raise BossTrainingError(
+                    "선택한 부모 보스가 판매·비공개되었거나 더 이상 존재하지 않습니다. 고급 설정에서 다시 선택해주세요."
+                )
 
             def create(latest):
                 create_training_run(
@@ -3678,8 +3965,7 @@ class BossSetupView(_OwnerView):
                     self.guild_supports[self.guild_index],
                     base_tokens=self.base_tokens, innate_passive=self.innate_passive,
                     parent_records=[
-                        row for row in self.inheritance_bosses
-                        if str(row.get("boss_id")) in self.parent_ids
+                        self.parent_records[parent_id] for parent_id in self.parent_ids
                     ],
                     scenario_id=self.scenario_id,
                 )
@@ -3734,6 +4020,9 @@ class BossAdvancedSetupView(_OwnerView):
                     )
                 else:
                     self.setup_view.parent_ids.append(selected_id)
+                self.setup_view.parent_records = await get_boss_records(
+                    self.setup_view.parent_ids
+                )
                 self.rebuild()
                 await interaction.response.edit_message(embed=self.get_embed(), view=self)
 
@@ -3804,9 +4093,10 @@ class BossAdvancedSetupView(_OwnerView):
             row for row in bosses
             if str(row.get("boss_id")) in self.setup_view.parent_ids
         ]
+        details = self.setup_view.parent_records
         factor_lines = []
         for row in selected:
-            factors = row.get("boss_data", {}).get("factors", [])
+            factors = details.get(str(row["boss_id"]), {}).get("boss_data", {}).get("factors", [])
             factor_lines.append(
                 f"• **{row['boss_name']} [{row['grade']}]** · "
                 f"{inheritance_source_label(row)} · 인자 {len(factors)}개"
@@ -3834,7 +4124,7 @@ class BossAdvancedSetupView(_OwnerView):
             inline=False,
         )
         for row in selected:
-            factors = row.get("boss_data", {}).get("factors", [])
+            factors = details.get(str(row["boss_id"]), {}).get("boss_data", {}).get("factors", [])
             embed.add_field(
                 name=f"🔎 {row['boss_name']} 인자",
                 value=(
@@ -4453,6 +4743,12 @@ class BossSkillWizardView(_OwnerView):
             "name": "최종 SP 비용을 확인한 뒤 스킬 이름만 입력하세요.",
         }
         effects = ", ".join(self.effects) or "없음"
+        expected_text = " ➜ ".join(
+            f"{mean:.1f}±{variance ** 0.5:.1f}"
+            for mean, variance in (
+                uniform_moments(int(item["min"]), int(item["max"])) for item in self.dice
+            )
+        ) or "미선택"
         current_cost = 0
         if self.dice:
             current_cost = skill_sp_cost({
@@ -4476,7 +4772,8 @@ class BossSkillWizardView(_OwnerView):
         embed.add_field(
             name="현재 설계",
             value=(
-                f"주사위: {dice_text}\n효과: {effects}\n"
+                f"주사위: {dice_text}\n기대값(능력치 제외): {expected_text}\n"
+                f"효과: {effects}\n"
                 f"쿨다운: {self.cooldown}턴 · 범위: {'광역' if self.is_aoe else '단일'}"
             ),
             inline=False,
@@ -5550,13 +5847,18 @@ class BossArchiveView(_OwnerView):
         self.guild_info = guild_info
         self.records: list[dict[str, Any]] = []
         self.selected_id: str | None = None
+        self.detail: dict[str, Any] | None = None
 
     async def setup(self):
         self.records = await list_owned_bosses(self.author.id)
         if self.selected_id and not any(row["boss_id"] == self.selected_id for row in self.records):
             self.selected_id = None
+        await self.load_detail()
         self.rebuild()
 
+    async def load_detail(self):
+        self.detail = await get_boss_record(self.selected_id) if self.selected_id else None
+
     def selected(self):
         return next((row for row in self.records if row["boss_id"] == self.selected_id), None)
 
@@ -5578,6 +5880,7 @@ class BossArchiveView(_OwnerView):
 
             async def choose(interaction):
                 self.selected_id = interaction.data["values"][0]
+                await self.load_detail()
                 await interaction.response.edit_message(embed=self.get_embed(), view=self)
 
             select.callback = choose
@@ -5611,8 +5914,8 @@ class BossArchiveView(_OwnerView):
             color=discord.Color.dark_gold(),
         )
         row = self.selected()
-        if row:
-            data = row["boss_data"]
+        if row and self.detail:
+            data = self.detail["boss_data"]
             reward = SALE_REWARDS[row["grade"]]
             embed.add_field(
                 name=f"[{row['grade']}] {row['boss_name']}",
@@ -5683,15 +5986,19 @@ class BossArchiveView(_OwnerView):
             return await _reply_error(
                 interaction, BossTrainingError("던전을 제작할 보스를 선택해주세요.")
             )
-        if dungeon_is_ready(row.get("boss_data", {})):
+        if row.get("dungeon_ready"):
             return await _reply_error(
                 interaction, BossTrainingError("이미 확정된 던전은 다시 편집할 수 없습니다.")
             )
+        if not self.detail:
+            return await _reply_error(
+                interaction, BossTrainingError("보스 정보를 불러오지 못했습니다. 다시 선택해주세요.")
+            )
         view = BossDungeonBuilderView(
             self.author,
             self.guild_info,
             active_run=False,
-            record=row,
+            record=self.detail,
         )
         await view.setup()
         await interaction.response.edit_message(embed=view.get_embed(), view=view)
@@ -5708,10 +6015,12 @@ class BossChallengeView(_OwnerView):
         self.scope = "guild"
         self.records: list[dict[str, Any]] = []
         self.selected_id: str | None = None
+        self.detail: dict[str, Any] | None = None
 
     async def setup(self):
         self.records = await list_published_bosses(self.guild_info["guild_id"], self.scope)
         self.selected_id = None
+        self.detail = None
         self.rebuild()
 
     def rebuild(self):
@@ -5732,6 +6041,7 @@ class BossChallengeView(_OwnerView):
 
             async def choose(interaction):
                 self.selected_id = interaction.data["values"][0]
+                self.detail = await get_boss_record(self.selected_id)
                 await interaction.response.edit_message(embed=self.get_embed(), view=self)
 
             select.callback = choose
@@ -5761,10 +6071,7 @@ class BossChallengeView(_OwnerView):
             description="\n".join(lines) or "현재 공개된 보스가 없습니다.",
             color=discord.Color.red(),
         )
-        selected = next(
-            (row for row in self.records if row["boss_id"] == self.selected_id),
-            None,
-        )
+        selected = self.detail
         if selected and dungeon_is_ready(selected.get("boss_data", {})):
             dungeon = selected["boss_data"]["dungeon"]
             floor_lines = []
@@ -5793,8 +6100,8 @@ class BossChallengeView(_OwnerView):
 
     async def challenge(self, interaction):
         try:
-            record = next((row for row in self.records if row["boss_id"] == self.selected_id), None)
-            if not record:
+            record = self.detail
+            if not record or not self.selected_id:
                 raise BossTrainingError("도전할 보스를 선택해주세요.")
             from guild import RaidLobbyView
 
@@ -10,7 +10,13 @@ from typing import Any
 import aiomysql
 import discord
 
-from data_manager import get_db_pool, get_user_data
+from data_manager import (
+    flushed_user_lock,
+    flushed_user_lock_where,
+    get_db_pool,
+    get_user_data,
+    invalidate_user_snapshot,
+)
 from items import COMMON_ITEMS, ITEM_CATEGORIES, RARE_ITEMS
 from life_system import FINGERLING_ITEMS, SEED_ITEMS, STONE_GEMS, ensure_life_data
 
@@ -84,40 +90,6 @@ def request_catalog() -> list[tuple[str, str]]:
     ]
 
 
-async def ensure_market_schema() -> None:
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute("SHOW COLUMNS FROM global_trades")
-            columns = {row["Field"] for row in await cur.fetchall()}
-            if "asset_type" not in columns:
-                await cur.execute(
-                    "ALTER TABLE global_trades ADD COLUMN asset_type VARCHAR(20) NOT NULL DEFAULT 'item'"
-                )
-            if "asset_data" not in columns:
-                await cur.execute("ALTER TABLE global_trades ADD COLUMN asset_data JSON NULL")
-            await cur.execute(
-                """SELECT 1 FROM information_schema.tables
-                   WHERE table_schema=DATABASE()
-                     AND table_name='global_purchase_requests' LIMIT 1"""
-            )
-            if not await cur.fetchone():
-                await cur.execute(
-                    """CREATE TABLE global_purchase_requests (
-                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                    buyer_id BIGINT NOT NULL,
-                    buyer_name VARCHAR(100) NOT NULL,
-                    asset_type VARCHAR(20) NOT NULL,
-                    item_name VARCHAR(100) NOT NULL,
-                    quantity INT NOT NULL,
-                    price INT NOT NULL,
-                    currency VARCHAR(10) NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )"""
-                )
-            await conn.commit()
-
-
 async def _life_for_update(cur, user_id: int) -> dict[str, Any]:
     await cur.execute(
         "SELECT data FROM user_life_data WHERE user_id=%s FOR UPDATE",
@@ -172,96 +144,98 @@ async def register_sale(
     if asset_type == "gem" and quantity != 1:
         return False, "젬은 한 매물에 하나씩 등록할 수 있습니다."
 
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                payload = None
-                if asset_type == "item":
-                    await cur.execute(
-                        """SELECT quantity FROM inventory
-                           WHERE user_id=%s AND item_name=%s FOR UPDATE""",
-                        (str(user.id), asset_key),
-                    )
-                    row = await cur.fetchone()
-                    owned = int(row["quantity"]) if row else 0
-                    if owned < quantity:
-                        await conn.rollback()
-                        return False, f"재고가 부족합니다. ({owned}/{quantity})"
-                    if owned == quantity:
+    async with flushed_user_lock(user.id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    payload = None
+                    if asset_type == "item":
                         await cur.execute(
-                            "DELETE FROM inventory WHERE user_id=%s AND item_name=%s",
+                            """SELECT quantity FROM inventory
+                               WHERE user_id=%s AND item_name=%s FOR UPDATE""",
                             (str(user.id), asset_key),
                         )
-                    else:
-                        await cur.execute(
-                            """UPDATE inventory SET quantity=quantity-%s
-                               WHERE user_id=%s AND item_name=%s""",
-                            (quantity, str(user.id), asset_key),
-                        )
-                    item_name = asset_key
-                elif asset_type in {"gem", "stone"}:
-                    life = await _life_for_update(cur, user.id)
-                    if asset_type == "stone":
-                        stones = life.setdefault("stones", {})
-                        owned = int(stones.get(asset_key, 0) or 0)
+                        row = await cur.fetchone()
+                        owned = int(row["quantity"]) if row else 0
                         if owned < quantity:
                             await conn.rollback()
-                            return False, f"감정된 원석이 부족합니다. ({owned}/{quantity})"
+                            return False, f"재고가 부족합니다. ({owned}/{quantity})"
                         if owned == quantity:
-                            stones.pop(asset_key, None)
+                            await cur.execute(
+                                "DELETE FROM inventory WHERE user_id=%s AND item_name=%s",
+                                (str(user.id), asset_key),
+                            )
                         else:
-                            stones[asset_key] = owned - quantity
+                            await cur.execute(
+                                """UPDATE inventory SET quantity=quantity-%s
+                                   WHERE user_id=%s AND item_name=%s""",
+                                (quantity, str(user.id), asset_key),
+                            )
                         item_name = asset_key
-                        await _save_life(cur, user.id, life)
+                    elif asset_type in {"gem", "stone"}:
+                        life = await _life_for_update(cur, user.id)
+                        if asset_type == "stone":
+                            stones = life.setdefault("stones", {})
+                            owned = int(stones.get(asset_key, 0) or 0)
+                            if owned < quantity:
+                                await conn.rollback()
+                                return False, f"감정된 원석이 부족합니다. ({owned}/{quantity})"
+                            if owned == quantity:
+                                stones.pop(asset_key, None)
+                            else:
+                                stones[asset_key] = owned - quantity
+                            item_name = asset_key
+                            await _save_life(cur, user.id, life)
+                        else:
+                            gems = life.setdefault("gems", [])
+                            index = next(
+                                (
+                                    index
+                                    for index, gem in enumerate(gems)
+                                    if isinstance(gem, dict) and str(gem.get("id")) == str(asset_key)
+                                ),
+                                None,
+                            )
+                            if index is None:
+                                await conn.rollback()
+                                return False, "판매할 젬을 찾지 못했습니다."
+                            if str(asset_key) in await _db_equipped_gem_ids(cur, user.id):
+                                await conn.rollback()
+                                return False, "아티팩트에 장착된 젬은 판매할 수 없습니다."
+                            payload = dict(gems.pop(index))
+                            item_name = str(payload.get("name", "젬"))
+                            await _save_life(cur, user.id, life)
                     else:
-                        gems = life.setdefault("gems", [])
-                        index = next(
-                            (
-                                index
-                                for index, gem in enumerate(gems)
-                                if isinstance(gem, dict) and str(gem.get("id")) == str(asset_key)
-                            ),
-                            None,
-                        )
-                        if index is None:
-                            await conn.rollback()
-                            return False, "판매할 젬을 찾지 못했습니다."
-                        if str(asset_key) in await _db_equipped_gem_ids(cur, user.id):
-                            await conn.rollback()
-                            return False, "아티팩트에 장착된 젬은 판매할 수 없습니다."
-                        payload = dict(gems.pop(index))
-                        item_name = str(payload.get("name", "젬"))
-                        await _save_life(cur, user.id, life)
-                else:
+                        await conn.rollback()
+                        return False, "지원하지 않는 자산 종류입니다."
+
+                    await cur.execute(
+                        """INSERT INTO global_trades
+                           (seller_id,seller_name,item_name,quantity,price,currency,asset_type,asset_data)
+                           VALUES (%s,%s,%s,%s,%s,%s,%s,%s)""",
+                        (
+                            user.id,
+                            user.display_name,
+                            item_name,
+                            quantity,
+                            price,
+                            currency,
+                            asset_type,
+                            json.dumps(payload, ensure_ascii=False) if payload else None,
+                        ),
+                    )
+                    await cur.execute(
+                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                        (str(user.id),),
+                    )
+                    await conn.commit()
+                    invalidate_user_snapshot(user.id)
+                    return True, f"{item_name} ×{quantity} 판매 공고를 등록했습니다."
+                except Exception as exc:
                     await conn.rollback()
-                    return False, "지원하지 않는 자산 종류입니다."
-
-                await cur.execute(
-                    """INSERT INTO global_trades
-                       (seller_id,seller_name,item_name,quantity,price,currency,asset_type,asset_data)
-                       VALUES (%s,%s,%s,%s,%s,%s,%s,%s)""",
-                    (
-                        user.id,
-                        user.display_name,
-                        item_name,
-                        quantity,
-                        price,
-                        currency,
-                        asset_type,
-                        json.dumps(payload, ensure_ascii=False) if payload else None,
-                    ),
-                )
-                await cur.execute(
-                    "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                    (str(user.id),),
-                )
-                await conn.commit()
-                return True, f"{item_name} ×{quantity} 판매 공고를 등록했습니다."
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"판매 등록 오류: {exc}"
+                    return False, f"판매 등록 오류: {exc}"
 
 
 async def register_request(
@@ -276,70 +250,165 @@ async def register_request(
         return False, "수량·가격·화폐 설정이 올바르지 않습니다."
     if asset_type == "gem" and quantity != 1:
         return False, "젬 구매 의뢰는 한 번에 하나만 등록할 수 있습니다."
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    f"SELECT {currency} AS balance FROM users WHERE user_id=%s FOR UPDATE",
-                    (str(user.id),),
-                )
-                row = await cur.fetchone()
-                if not row or int(row["balance"] or 0) < price:
+    async with flushed_user_lock(user.id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    await cur.execute(
+                        f"SELECT {currency} AS balance FROM users WHERE user_id=%s FOR UPDATE",
+                        (str(user.id),),
+                    )
+                    row = await cur.fetchone()
+                    if not row or int(row["balance"] or 0) < price:
+                        await conn.rollback()
+                        return False, f"등록 금액이 부족합니다. (필요: {price:,}{VALID_CURRENCIES[currency]})"
+                    await cur.execute(
+                        f"""UPDATE users SET {currency}={currency}-%s,
+                               data_revision=data_revision+1 WHERE user_id=%s""",
+                        (price, str(user.id)),
+                    )
+                    await cur.execute(
+                        """INSERT INTO global_purchase_requests
+                           (buyer_id,buyer_name,asset_type,item_name,quantity,price,currency)
+                           VALUES (%s,%s,%s,%s,%s,%s,%s)""",
+                        (
+                            user.id,
+                            user.display_name,
+                            asset_type,
+                            item_name,
+                            quantity,
+                            price,
+                            currency,
+                        ),
+                    )
+                    await conn.commit()
+                    invalidate_user_snapshot(user.id)
+                    return True, f"{item_name} ×{quantity} 구매 의뢰를 등록하고 대금을 보관했습니다."
+                except Exception as exc:
                     await conn.rollback()
-                    return False, f"등록 금액이 부족합니다. (필요: {price:,}{VALID_CURRENCIES[currency]})"
-                await cur.execute(
-                    f"""UPDATE users SET {currency}={currency}-%s,
-                           data_revision=data_revision+1 WHERE user_id=%s""",
-                    (price, str(user.id)),
-                )
-                await cur.execute(
-                    """INSERT INTO global_purchase_requests
-                       (buyer_id,buyer_name,asset_type,item_name,quantity,price,currency)
-                       VALUES (%s,%s,%s,%s,%s,%s,%s)""",
-                    (
-                        user.id,
-                        user.display_name,
-                        asset_type,
-                        item_name,
-                        quantity,
-                        price,
-                        currency,
-                    ),
-                )
-                await conn.commit()
-                return True, f"{item_name} ×{quantity} 구매 의뢰를 등록하고 대금을 보관했습니다."
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"구매 의뢰 등록 오류: {exc}"
+                    return False, f"구매 의뢰 등록 오류: {exc}"
 
 
 async def cancel_listing(user, table: str, listing_id: int):
     if table not in {"global_trades", "global_purchase_requests"}:
         return False, "잘못된 게시판입니다."
     owner_column = "seller_id" if table == "global_trades" else "buyer_id"
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    f"SELECT * FROM {table} WHERE id=%s FOR UPDATE",
-                    (listing_id,),
-                )
-                row = await cur.fetchone()
-                if not row or str(row[owner_column]) != str(user.id):
+    async with flushed_user_lock(user.id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    await cur.execute(
+                        f"SELECT * FROM {table} WHERE id=%s FOR UPDATE",
+                        (listing_id,),
+                    )
+                    row = await cur.fetchone()
+                    if not row or str(row[owner_column]) != str(user.id):
+                        await conn.rollback()
+                        return False, "본인의 공고가 아니거나 이미 처리되었습니다."
+                    if table == "global_trades":
+                        if (row.get("asset_type") or "item") == "gem":
+                            life = await _life_for_update(cur, user.id)
+                            payload = _loads(row.get("asset_data"), None)
+                            if not isinstance(payload, dict):
+                                await conn.rollback()
+                                return False, "젬 매물 데이터가 손상되어 관리자 확인이 필요합니다."
+                            life.setdefault("gems", []).append(payload)
+                            await _save_life(cur, user.id, life)
+                        elif row.get("asset_type") == "stone":
+                            life = await _life_for_update(cur, user.id)
+                            stones = life.setdefault("stones", {})
+                            stones[row["item_name"]] = (
+                                int(stones.get(row["item_name"], 0) or 0)
+                                + int(row["quantity"])
+                            )
+                            await _save_life(cur, user.id, life)
+                        else:
+                            await cur.execute(
+                                """INSERT INTO inventory (user_id,item_name,quantity)
+                                   VALUES (%s,%s,%s) AS new
+                                   ON DUPLICATE KEY UPDATE quantity=inventory.quantity+new.quantity""",
+                                (str(user.id), row["item_name"], int(row["quantity"])),
+                            )
+                    else:
+                        currency = row["currency"]
+                        if currency not in VALID_CURRENCIES:
+                            await conn.rollback()
+                            return False, "의뢰 화폐 정보가 올바르지 않습니다."
+                        await cur.execute(
+                            f"UPDATE users SET {currency}={currency}+%s WHERE user_id=%s",
+                            (int(row["price"]), str(user.id)),
+                        )
+                    await cur.execute(f"DELETE FROM {table} WHERE id=%s", (listing_id,))
+                    await cur.execute(
+                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                        (str(user.id),),
+                    )
+                    await conn.commit()
+                    invalidate_user_snapshot(user.id)
+                    return True, "공고를 취소하고 보관된 자산을 돌려받았습니다."
+                except Exception as exc:
                     await conn.rollback()
-                    return False, "본인의 공고가 아니거나 이미 처리되었습니다."
-                if table == "global_trades":
+                    return False, f"공고 취소 오류: {exc}"
+
+
+async def buy_sale(user, listing_id: int):
+    async with flushed_user_lock_where(
+        "SELECT seller_id FROM global_trades WHERE id=%s", (listing_id,), user.id
+    ):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    await cur.execute(
+                        "SELECT * FROM global_trades WHERE id=%s FOR UPDATE",
+                        (listing_id,),
+                    )
+                    row = await cur.fetchone()
+                    if not row:
+                        await conn.rollback()
+                        return False, "이미 거래된 매물입니다."
+                    if str(row["seller_id"]) == str(user.id):
+                        await conn.rollback()
+                        return False, "본인 매물은 구매 대신 취소할 수 있습니다."
+                    currency = row["currency"]
+                    if currency not in VALID_CURRENCIES:
+                        await conn.rollback()
+                        return False, "지원하지 않는 화폐입니다."
+                    await cur.execute(
+                        f"""SELECT user_id,{currency} AS balance FROM users
+                            WHERE user_id IN (%s,%s) ORDER BY user_id FOR UPDATE""",
+                        (str(user.id), str(row["seller_id"])),
+                    )
+                    accounts = {str(item["user_id"]): item for item in await cur.fetchall()}
+                    buyer = accounts.get(str(user.id))
+                    if not buyer or int(buyer["balance"] or 0) < int(row["price"]):
+                        await conn.rollback()
+                        return False, "구매 금액이 부족합니다."
+                    await cur.execute(
+                        f"""UPDATE users SET {currency}={currency}-%s,
+                               data_revision=data_revision+1 WHERE user_id=%s""",
+                        (int(row["price"]), str(user.id)),
+                    )
+                    await cur.execute(
+                        f"""UPDATE users SET {currency}={currency}+%s,
+                               data_revision=data_revision+1 WHERE user_id=%s""",
+                        (int(row["price"]), str(row["seller_id"])),
+                    )
                     if (row.get("asset_type") or "item") == "gem":
                         life = await _life_for_update(cur, user.id)
                         payload = _loads(row.get("asset_data"), None)
                         if not isinstance(payload, dict):
                             await conn.rollback()
-                            return False, "젬 매물 데이터가 손상되어 관리자 확인이 필요합니다."
-                        life.setdefault("gems", []).append(payload)
+                            return False, "젬 매물 데이터가 손상되었습니다."
+                        existing = {str(gem.get("id")) for gem in life.setdefault("gems", []) if isinstance(gem, dict)}
+                        if str(payload.get("id")) in existing:
+                            payload["id"] = uuid.uuid4().hex
+                        life["gems"].append(payload)
                         await _save_life(cur, user.id, life)
                     elif row.get("asset_type") == "stone":
                         life = await _life_for_update(cur, user.id)
@@ -356,219 +425,136 @@ async def cancel_listing(user, table: str, listing_id: int):
                                ON DUPLICATE KEY UPDATE quantity=inventory.quantity+new.quantity""",
                             (str(user.id), row["item_name"], int(row["quantity"])),
                         )
-                else:
-                    currency = row["currency"]
-                    if currency not in VALID_CURRENCIES:
-                        await conn.rollback()
-                        return False, "의뢰 화폐 정보가 올바르지 않습니다."
-                    await cur.execute(
-                        f"UPDATE users SET {currency}={currency}+%s WHERE user_id=%s",
-                        (int(row["price"]), str(user.id)),
-                    )
-                await cur.execute(f"DELETE FROM {table} WHERE id=%s", (listing_id,))
-                await cur.execute(
-                    "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                    (str(user.id),),
-                )
-                await conn.commit()
-                return True, "공고를 취소하고 보관된 자산을 돌려받았습니다."
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"공고 취소 오류: {exc}"
-
-
-async def buy_sale(user, listing_id: int):
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    "SELECT * FROM global_trades WHERE id=%s FOR UPDATE",
-                    (listing_id,),
-                )
-                row = await cur.fetchone()
-                if not row:
-                    await conn.rollback()
-                    return False, "이미 거래된 매물입니다."
-                if str(row["seller_id"]) == str(user.id):
-                    await conn.rollback()
-                    return False, "본인 매물은 구매 대신 취소할 수 있습니다."
-                currency = row["currency"]
-                if currency not in VALID_CURRENCIES:
-                    await conn.rollback()
-                    return False, "지원하지 않는 화폐입니다."
-                await cur.execute(
-                    f"""SELECT user_id,{currency} AS balance FROM users
-                        WHERE user_id IN (%s,%s) ORDER BY user_id FOR UPDATE""",
-                    (str(user.id), str(row["seller_id"])),
-                )
-                accounts = {str(item["user_id"]): item for item in await cur.fetchall()}
-                buyer = accounts.get(str(user.id))
-                if not buyer or int(buyer["balance"] or 0) < int(row["price"]):
+                    await cur.execute("DELETE FROM global_trades WHERE id=%s", (listing_id,))
+                    await conn.commit()
+                    invalidate_user_snapshot(user.id, row["seller_id"])
+                    return True, f"{row['item_name']} ×{row['quantity']} 구매를 완료했습니다."
+                except Exception as exc:
                     await conn.rollback()
-                    return False, "구매 금액이 부족합니다."
-                await cur.execute(
-                    f"""UPDATE users SET {currency}={currency}-%s,
-                           data_revision=data_revision+1 WHERE user_id=%s""",
-                    (int(row["price"]), str(user.id)),
-                )
-                await cur.execute(
-                    f"""UPDATE users SET {currency}={currency}+%s,
-                           data_revision=data_revision+1 WHERE user_id=%s""",
-                    (int(row["price"]), str(row["seller_id"])),
-                )
-                if (row.get("asset_type") or "item") == "gem":
-                    life = await _life_for_update(cur, user.id)
-                    payload = _loads(row.get("asset_data"), None)
-                    if not isinstance(payload, dict):
-                        await conn.rollback()
-                        return False, "젬 매물 데이터가 손상되었습니다."
-                    existing = {str(gem.get("id")) for gem in life.setdefault("gems", []) if isinstance(gem, dict)}
-                    if str(payload.get("id")) in existing:
-                        payload["id"] = uuid.uuid4().hex
-                    life["gems"].append(payload)
-                    await _save_life(cur, user.id, life)
-                elif row.get("asset_type") == "stone":
-                    life = await _life_for_update(cur, user.id)
-                    stones = life.setdefault("stones", {})
-                    stones[row["item_name"]] = (
-                        int(stones.get(row["item_name"], 0) or 0)
-                        + int(row["quantity"])
-                    )
-                    await _save_life(cur, user.id, life)
-                else:
-                    await cur.execute(
-                        """INSERT INTO inventory (user_id,item_name,quantity)
-                           VALUES (%s,%s,%s) AS new
-                           ON DUPLICATE KEY UPDATE quantity=inventory.quantity+new.quantity""",
-                        (str(user.id), row["item_name"], int(row["quantity"])),
-                    )
-                await cur.execute("DELETE FROM global_trades WHERE id=%s", (listing_id,))
-                await conn.commit()
-                return True, f"{row['item_name']} ×{row['quantity']} 구매를 완료했습니다."
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"거래 오류: {exc}"
+                    return False, f"거래 오류: {exc}"
 
 
 async def fulfill_request(user, request_id: int, gem_id: str | None = None):
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    "SELECT * FROM global_purchase_requests WHERE id=%s FOR UPDATE",
-                    (request_id,),
-                )
-                row = await cur.fetchone()
-                if not row:
-                    await conn.rollback()
-                    return False, "이미 완료되거나 취소된 의뢰입니다."
-                if str(row["buyer_id"]) == str(user.id):
-                    await conn.rollback()
-                    return False, "본인의 구매 의뢰는 납품 대신 취소할 수 있습니다."
-                quantity = int(row["quantity"])
-                if row["asset_type"] == "gem":
-                    life = await _life_for_update(cur, user.id)
-                    gems = life.setdefault("gems", [])
-                    index = next(
-                        (
-                            index
-                            for index, gem in enumerate(gems)
-                            if isinstance(gem, dict)
-                            and str(gem.get("id")) == str(gem_id)
-                            and gem.get("name") == row["item_name"]
-                        ),
-                        None,
+    async with flushed_user_lock_where(
+        "SELECT buyer_id FROM global_purchase_requests WHERE id=%s", (request_id,), user.id
+    ):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    await cur.execute(
+                        "SELECT * FROM global_purchase_requests WHERE id=%s FOR UPDATE",
+                        (request_id,),
                     )
-                    if index is None:
-                        await conn.rollback()
-                        return False, "조건에 맞는 젬을 찾지 못했습니다."
-                    if str(gem_id) in await _db_equipped_gem_ids(cur, user.id):
+                    row = await cur.fetchone()
+                    if not row:
                         await conn.rollback()
-                        return False, "장착된 젬은 납품할 수 없습니다."
-                    payload = dict(gems.pop(index))
-                    await _save_life(cur, user.id, life)
-                    buyer_life = await _life_for_update(cur, row["buyer_id"])
-                    existing = {
-                        str(gem.get("id"))
-                        for gem in buyer_life.setdefault("gems", [])
-                        if isinstance(gem, dict)
-                    }
-                    if str(payload.get("id")) in existing:
-                        payload["id"] = uuid.uuid4().hex
-                    buyer_life["gems"].append(payload)
-                    await _save_life(cur, row["buyer_id"], buyer_life)
-                elif row["asset_type"] == "stone":
-                    life = await _life_for_update(cur, user.id)
-                    stones = life.setdefault("stones", {})
-                    owned = int(stones.get(row["item_name"], 0) or 0)
-                    if owned < quantity:
+                        return False, "이미 완료되거나 취소된 의뢰입니다."
+                    if str(row["buyer_id"]) == str(user.id):
                         await conn.rollback()
-                        return False, f"감정된 원석이 부족합니다. ({owned}/{quantity})"
-                    if owned == quantity:
-                        stones.pop(row["item_name"], None)
+                        return False, "본인의 구매 의뢰는 납품 대신 취소할 수 있습니다."
+                    quantity = int(row["quantity"])
+                    if row["asset_type"] == "gem":
+                        life = await _life_for_update(cur, user.id)
+                        gems = life.setdefault("gems", [])
+                        index = next(
+                            (
+                                index
+                                for index, gem in enumerate(gems)
+                                if isinstance(gem, dict)
+                                and str(gem.get("id")) == str(gem_id)
+                                and gem.get("name") == row["item_name"]
+                            ),
+                            None,
+                        )
+                        if index is None:
+                            await conn.rollback()
+                            return False, "조건에 맞는 젬을 찾지 못했습니다."
+                        if str(gem_id) in await _db_equipped_gem_ids(cur, user.id):
+                            await conn.rollback()
+                            return False, "장착된 젬은 납품할 수 없습니다."
+                        payload = dict(gems.pop(index))
+                        await _save_life(cur, user.id, life)
+                        buyer_life = await _life_for_update(cur, row["buyer_id"])
+                        existing = {
+                            str(gem.get("id"))
+                            for gem in buyer_life.setdefault("gems", [])
+                            if isinstance(gem, dict)
+                        }
+                        if str(payload.get("id")) in existing:
+                            payload["id"] = uuid.uuid4().hex
+                        buyer_life["gems"].append(payload)
+                        await _save_life(cur, row["buyer_id"], buyer_life)
+                    elif row["asset_type"] == "stone":
+                        life = await _life_for_update(cur, user.id)
+                        stones = life.setdefault("stones", {})
+                        owned = int(stones.get(row["item_name"], 0) or 0)
+                        if owned < quantity:
+                            await conn.rollback()
+                            return False, f"감정된 원석이 부족합니다. ({owned}/{quantity})"
+                        if owned == quantity:
+                            stones.pop(row["item_name"], None)
+                        else:
+                            stones[row["item_name"]] = owned - quantity
+                        await _save_life(cur, user.id, life)
+                        buyer_life = await _life_for_update(cur, row["buyer_id"])
+                        buyer_stones = buyer_life.setdefault("stones", {})
+                        buyer_stones[row["item_name"]] = (
+                            int(buyer_stones.get(row["item_name"], 0) or 0) + quantity
+                        )
+                        await _save_life(cur, row["buyer_id"], buyer_life)
                     else:
-                        stones[row["item_name"]] = owned - quantity
-                    await _save_life(cur, user.id, life)
-                    buyer_life = await _life_for_update(cur, row["buyer_id"])
-                    buyer_stones = buyer_life.setdefault("stones", {})
-                    buyer_stones[row["item_name"]] = (
-                        int(buyer_stones.get(row["item_name"], 0) or 0) + quantity
-                    )
-                    await _save_life(cur, row["buyer_id"], buyer_life)
-                else:
-                    await cur.execute(
-                        """SELECT quantity FROM inventory
-                           WHERE user_id=%s AND item_name=%s FOR UPDATE""",
-                        (str(user.id), row["item_name"]),
-                    )
-                    stock = await cur.fetchone()
-                    owned = int(stock["quantity"]) if stock else 0
-                    if owned < quantity:
-                        await conn.rollback()
-                        return False, f"재고가 부족합니다. ({owned}/{quantity})"
-                    if owned == quantity:
                         await cur.execute(
-                            "DELETE FROM inventory WHERE user_id=%s AND item_name=%s",
+                            """SELECT quantity FROM inventory
+                               WHERE user_id=%s AND item_name=%s FOR UPDATE""",
                             (str(user.id), row["item_name"]),
                         )
-                    else:
+                        stock = await cur.fetchone()
+                        owned = int(stock["quantity"]) if stock else 0
+                        if owned < quantity:
+                            await conn.rollback()
+                            return False, f"재고가 부족합니다. ({owned}/{quantity})"
+                        if owned == quantity:
+                            await cur.execute(
+                                "DELETE FROM inventory WHERE user_id=%s AND item_name=%s",
+                                (str(user.id), row["item_name"]),
+                            )
+                        else:
+                            await cur.execute(
+                                """UPDATE inventory SET quantity=quantity-%s
+                                   WHERE user_id=%s AND item_name=%s""",
+                                (quantity, str(user.id), row["item_name"]),
+                            )
                         await cur.execute(
-                            """UPDATE inventory SET quantity=quantity-%s
-                               WHERE user_id=%s AND item_name=%s""",
-                            (quantity, str(user.id), row["item_name"]),
+                            """INSERT INTO inventory (user_id,item_name,quantity)
+                               VALUES (%s,%s,%s) AS new
+                               ON DUPLICATE KEY UPDATE quantity=inventory.quantity+new.quantity""",
+                            (str(row["buyer_id"]), row["item_name"], quantity),
                         )
+                    currency = row["currency"]
+                    if currency not in VALID_CURRENCIES:
+                        await conn.rollback()
+                        return False, "의뢰 화폐 정보가 올바르지 않습니다."
+                    await cur.execute(
+                        f"""UPDATE users SET {currency}={currency}+%s,
+                               data_revision=data_revision+1 WHERE user_id=%s""",
+                        (int(row["price"]), str(user.id)),
+                    )
                     await cur.execute(
-                        """INSERT INTO inventory (user_id,item_name,quantity)
-                           VALUES (%s,%s,%s) AS new
-                           ON DUPLICATE KEY UPDATE quantity=inventory.quantity+new.quantity""",
-                        (str(row["buyer_id"]), row["item_name"], quantity),
+                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                        (str(row["buyer_id"]),),
                     )
-                currency = row["currency"]
-                if currency not in VALID_CURRENCIES:
+                    await cur.execute(
+                        "DELETE FROM global_purchase_requests WHERE id=%s",
+                        (request_id,),
+                    )
+                    await conn.commit()
+                    invalidate_user_snapshot(user.id, row["buyer_id"])
+                    return True, f"{row['item_name']} ×{quantity} 납품 후 대금을 받았습니다."
+                except Exception as exc:
                     await conn.rollback()
-                    return False, "의뢰 화폐 정보가 올바르지 않습니다."
-                await cur.execute(
-                    f"""UPDATE users SET {currency}={currency}+%s,
-                           data_revision=data_revision+1 WHERE user_id=%s""",
-                    (int(row["price"]), str(user.id)),
-                )
-                await cur.execute(
-                    "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                    (str(row["buyer_id"]),),
-                )
-                await cur.execute(
-                    "DELETE FROM global_purchase_requests WHERE id=%s",
-                    (request_id,),
-                )
-                await conn.commit()
-                return True, f"{row['item_name']} ×{quantity} 납품 후 대금을 받았습니다."
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"구매 의뢰 납품 오류: {exc}"
+                    return False, f"구매 의뢰 납품 오류: {exc}"
 
 
 class MarketTermsModal(discord.ui.Modal):
@@ -964,7 +950,6 @@ class CafeMarketView(discord.ui.View):
         return False
 
     async def load(self):
-        await ensure_market_schema()
         table = "global_trades" if self.mode == "sales" else "global_purchase_requests"
         pool = await get_db_pool()
         async with pool.acquire() as conn:
@@ -4,7 +4,6 @@
 
 from __future__ import annotations
 
-import asyncio
 import json
 import random
 from typing import Any
@@ -12,7 +11,12 @@ from typing import Any
 import aiomysql
 import discord
 
-from data_manager import get_db_pool
+from data_manager import (
+    flushed_user_lock,
+    flushed_user_lock_where,
+    get_db_pool,
+    invalidate_user_snapshot,
+)
 from items import ITEM_CATEGORIES
 
 
@@ -33,6 +37,8 @@ MACHINE_LABELS = {
     "lounge": "직원 휴게실",
 }
 MACHINE_MAX = {"coffee": 4, "oven": 4, "display": 4, "service": 3, "lounge": 3}
+# Turn advances bump every member's data_revision; commit their queued saves first.
+_SESSION_MEMBER_IDS_SQL = "SELECT user_id FROM cafe_tycoon_members WHERE session_id=%s"
 PRODUCT_LABELS = {"drink": "음료", "food": "음식", "dessert": "디저트"}
 RECIPE_PAGE_SIZE = 8
 RECIPE_CATALOG = {
@@ -213,8 +219,6 @@ DECOR_EFFECTS = {
 }
 DECOR_MILESTONES = {25: 20, 50: 30, 75: 40, 100: 60}
 IDLE_RELEASE_SECONDS = 30 * 60
-_schema_lock = asyncio.Lock()
-_schema_ready = False
 
 
 def settlement_reward_candidates(settlement_id: int, user_id: int) -> tuple[str, ...]:
@@ -693,136 +697,7 @@ def _resolve_automatic_turn(state: dict[str, Any]) -> tuple[int, int, int, int,
     return cash, score, reputation, decor_tokens, notes
 
 
-async def ensure_tycoon_schema() -> None:
-    global _schema_ready
-    if _schema_ready:
-        return
-    async with _schema_lock:
-        if _schema_ready:
-            return
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                await cur.execute(
-                    """SELECT table_name AS name FROM information_schema.tables
-                       WHERE table_schema=DATABASE()
-                         AND table_name IN (
-                           'cafe_tycoon_sessions','cafe_tycoon_members',
-                           'cafe_tycoon_seasons','cafe_tycoon_season_rewards'
-                         )"""
-                )
-                existing = {row["name"] for row in await cur.fetchall()}
-                if "cafe_tycoon_sessions" not in existing:
-                    await cur.execute(
-                        """CREATE TABLE cafe_tycoon_sessions (
-                            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                            host_id BIGINT NOT NULL,
-                            host_name VARCHAR(100) NOT NULL,
-                            status VARCHAR(20) NOT NULL DEFAULT 'lobby',
-                            turn_no INT NOT NULL DEFAULT 0,
-                            score BIGINT NOT NULL DEFAULT 0,
-                            cafe_cash BIGINT NOT NULL DEFAULT 30000,
-                            season_no INT NOT NULL DEFAULT 1,
-                            reputation INT NOT NULL DEFAULT 0,
-                            decor_tokens INT NOT NULL DEFAULT 0,
-                            state_json JSON NOT NULL,
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                                ON UPDATE CURRENT_TIMESTAMP,
-                            INDEX idx_tycoon_status (status)
-                        )"""
-                    )
-                if "cafe_tycoon_members" not in existing:
-                    await cur.execute(
-                        """CREATE TABLE cafe_tycoon_members (
-                            session_id BIGINT NOT NULL,
-                            user_id BIGINT NOT NULL,
-                            user_name VARCHAR(100) NOT NULL,
-                            actions_left INT NOT NULL DEFAULT 2,
-                            ready TINYINT(1) NOT NULL DEFAULT 0,
-                            participating TINYINT(1) NOT NULL DEFAULT 0,
-                            last_action_at DATETIME NULL,
-                            end_vote TINYINT(1) NOT NULL DEFAULT 0,
-                            reward_choices JSON NULL,
-                            reward_claimed TINYINT(1) NOT NULL DEFAULT 0,
-                            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            PRIMARY KEY (session_id,user_id),
-                            INDEX idx_tycoon_member_user (user_id),
-                            FOREIGN KEY (session_id) REFERENCES cafe_tycoon_sessions(id)
-                                ON DELETE CASCADE
-                        )"""
-                    )
-                if "cafe_tycoon_sessions" in existing:
-                    await cur.execute(
-                        """SELECT column_name AS name FROM information_schema.columns
-                           WHERE table_schema=DATABASE()
-                             AND table_name='cafe_tycoon_sessions'"""
-                    )
-                    columns = {row["name"] for row in await cur.fetchall()}
-                    for name, definition in (
-                        ("season_no", "INT NOT NULL DEFAULT 1"),
-                        ("reputation", "INT NOT NULL DEFAULT 0"),
-                        ("decor_tokens", "INT NOT NULL DEFAULT 0"),
-                    ):
-                        if name not in columns:
-                            await cur.execute(
-                                f"ALTER TABLE cafe_tycoon_sessions ADD COLUMN {name} {definition}"
-                            )
-                if "cafe_tycoon_members" in existing:
-                    await cur.execute(
-                        """SELECT column_name AS name FROM information_schema.columns
-                           WHERE table_schema=DATABASE()
-                             AND table_name='cafe_tycoon_members'"""
-                    )
-                    columns = {row["name"] for row in await cur.fetchall()}
-                    if "participating" not in columns:
-                        await cur.execute(
-                            """ALTER TABLE cafe_tycoon_members
-                               ADD COLUMN participating TINYINT(1) NOT NULL DEFAULT 0"""
-                        )
-                    if "last_action_at" not in columns:
-                        await cur.execute(
-                            """ALTER TABLE cafe_tycoon_members
-                               ADD COLUMN last_action_at DATETIME NULL"""
-                        )
-                if "cafe_tycoon_seasons" not in existing:
-                    await cur.execute(
-                        """CREATE TABLE cafe_tycoon_seasons (
-                            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                            session_id BIGINT NOT NULL,
-                            season_no INT NOT NULL,
-                            score BIGINT NOT NULL,
-                            reputation INT NOT NULL,
-                            reward_money BIGINT NOT NULL,
-                            reward_points BIGINT NOT NULL,
-                            reward_rare_total INT NOT NULL,
-                            settled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            UNIQUE KEY uq_tycoon_season (session_id,season_no),
-                            INDEX idx_tycoon_season_session (session_id,id),
-                            FOREIGN KEY (session_id) REFERENCES cafe_tycoon_sessions(id)
-                                ON DELETE CASCADE
-                        )"""
-                    )
-                if "cafe_tycoon_season_rewards" not in existing:
-                    await cur.execute(
-                        """CREATE TABLE cafe_tycoon_season_rewards (
-                            season_id BIGINT NOT NULL,
-                            user_id BIGINT NOT NULL,
-                            reward_choices JSON NULL,
-                            claimed TINYINT(1) NOT NULL DEFAULT 0,
-                            claimed_at DATETIME NULL,
-                            PRIMARY KEY (season_id,user_id),
-                            INDEX idx_tycoon_reward_user (user_id,claimed),
-                            FOREIGN KEY (season_id) REFERENCES cafe_tycoon_seasons(id)
-                                ON DELETE CASCADE
-                        )"""
-                    )
-                await conn.commit()
-        _schema_ready = True
-
-
 async def get_session(session_id: int) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
-    await ensure_tycoon_schema()
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
@@ -845,7 +720,6 @@ async def get_session(session_id: int) -> tuple[dict[str, Any] | None, list[dict
 
 
 async def get_user_active_session(user_id: int) -> dict[str, Any] | None:
-    await ensure_tycoon_schema()
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
@@ -860,7 +734,6 @@ async def get_user_active_session(user_id: int) -> dict[str, Any] | None:
 
 
 async def list_lobbies() -> list[dict[str, Any]]:
-    await ensure_tycoon_schema()
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
@@ -875,7 +748,6 @@ async def list_lobbies() -> list[dict[str, Any]]:
 
 
 async def create_session(user) -> tuple[bool, str, int | None]:
-    await ensure_tycoon_schema()
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
@@ -924,7 +796,6 @@ async def create_session(user) -> tuple[bool, str, int | None]:
 
 
 async def join_session(user, session_id: int) -> tuple[bool, str]:
-    await ensure_tycoon_schema()
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
@@ -1204,6 +1075,7 @@ async def _save_or_advance_cycle(
                WHERE user_id=%s""",
             (str(row["user_id"]),),
         )
+        invalidate_user_snapshot(row["user_id"])
     return True, next_turn
 
 
@@ -1218,209 +1090,211 @@ async def perform_action(
     recipe_allocations: dict[str, int] | None = None,
     category: str | None = None,
 ) -> tuple[bool, str, bool]:
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                session, member, state = await _lock_running(cur, user.id, session_id)
-                if not session or not member or state is None:
-                    await conn.rollback()
-                    return False, "진행 중인 카페 참가 정보를 찾지 못했습니다.", False
-                if int(member["ready"]) or int(member["actions_left"]) <= 0:
-                    await conn.rollback()
-                    return False, "이번 사이클의 행동을 이미 마쳤습니다.", False
-
-                if state.get("cycle_loadout") is None:
-                    state["cycle_loadout"] = json.loads(
-                        json.dumps(state.get("decor_loadout") or _default_loadout())
-                    )
-                cafe_cash = int(session["cafe_cash"])
-                score_delta = 0
-                cash_delta = 0
-                reputation_delta = 0
-                decor_tokens_delta = 0
-                message = ""
-                if action == "stock":
-                    cost = 5_000
-                    if cafe_cash < cost:
-                        await conn.rollback()
-                        return False, "카페 운영 자금 5,000원이 필요합니다.", False
-                    cafe_cash -= cost
-                    stock_bonus = _has_effect(state, "counter_stock")
-                    for name, count in _stock_bundle(state).items():
-                        state["ingredients"][name] = int(state["ingredients"].get(name, 0)) + count
-                    score_delta = 2
-                    message = "재료 묶음을 구매했습니다." + (
-                        " (넓은 작업대 +20%)" if stock_bonus else ""
-                    )
-                elif action == "make":
-                    recipe = RECIPE_CATALOG.get(recipe_name or "")
-                    if not recipe or recipe_name not in state["unlocked_recipes"]:
+    async with flushed_user_lock_where(_SESSION_MEMBER_IDS_SQL, (int(session_id),), user.id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    session, member, state = await _lock_running(cur, user.id, session_id)
+                    if not session or not member or state is None:
                         await conn.rollback()
-                        return False, "아직 연구하지 않은 메뉴입니다.", False
-                    made = _make_recipe(state, recipe_name, 1)
-                    if not made:
+                        return False, "진행 중인 카페 참가 정보를 찾지 못했습니다.", False
+                    if int(member["ready"]) or int(member["actions_left"]) <= 0:
                         await conn.rollback()
-                        needs = " · ".join(
-                            f"{name} {count}" for name, count in recipe["ingredients"].items()
+                        return False, "이번 사이클의 행동을 이미 마쳤습니다.", False
+
+                    if state.get("cycle_loadout") is None:
+                        state["cycle_loadout"] = json.loads(
+                            json.dumps(state.get("decor_loadout") or _default_loadout())
                         )
-                        return False, f"재료가 부족합니다. 필요: {needs}", False
-                    score_delta = _manual_score(state, recipe)
-                    state["manual_products"] = int(state.get("manual_products", 0)) + 1
-                    bonus_product = False
-                    if _has_effect(state, "counter_master"):
-                        counter = int(state.get("manual_effect_counter", 0)) + 1
-                        if counter >= 5:
-                            counter = 0
-                            state["products"][recipe_name] = (
-                                int(state["products"].get(recipe_name, 0)) + 1
+                    cafe_cash = int(session["cafe_cash"])
+                    score_delta = 0
+                    cash_delta = 0
+                    reputation_delta = 0
+                    decor_tokens_delta = 0
+                    message = ""
+                    if action == "stock":
+                        cost = 5_000
+                        if cafe_cash < cost:
+                            await conn.rollback()
+                            return False, "카페 운영 자금 5,000원이 필요합니다.", False
+                        cafe_cash -= cost
+                        stock_bonus = _has_effect(state, "counter_stock")
+                        for name, count in _stock_bundle(state).items():
+                            state["ingredients"][name] = int(state["ingredients"].get(name, 0)) + count
+                        score_delta = 2
+                        message = "재료 묶음을 구매했습니다." + (
+                            " (넓은 작업대 +20%)" if stock_bonus else ""
+                        )
+                    elif action == "make":
+                        recipe = RECIPE_CATALOG.get(recipe_name or "")
+                        if not recipe or recipe_name not in state["unlocked_recipes"]:
+                            await conn.rollback()
+                            return False, "아직 연구하지 않은 메뉴입니다.", False
+                        made = _make_recipe(state, recipe_name, 1)
+                        if not made:
+                            await conn.rollback()
+                            needs = " · ".join(
+                                f"{name} {count}" for name, count in recipe["ingredients"].items()
                             )
-                            bonus_product = True
-                        state["manual_effect_counter"] = counter
-                    message = (
-                        f"{PRODUCT_LABELS[recipe['kind']]} · {recipe_name} 1개를 "
-                        "직접 만들었습니다."
-                        + (" 장인의 카운터로 1개를 더 만들었습니다." if bonus_product else "")
-                    )
-                elif action == "serve":
-                    if order_id is None:
-                        await conn.rollback()
-                        return False, "처리할 주문을 선택하세요.", False
-                    (
-                        ok, cash_delta, score_delta, reputation_delta,
-                        decor_tokens_delta, message,
-                    ) = _serve_order(
-                        state, order_id, recipe_name, recipe_allocations
-                    )
-                    if not ok:
-                        await conn.rollback()
-                        return False, message, False
-                    cafe_cash += cash_delta
-                elif action == "research":
-                    if category not in PRODUCT_LABELS:
-                        await conn.rollback()
-                        return False, "연구할 메뉴 분류를 선택하세요.", False
-                    locked = [
-                        (name, recipe) for name, recipe in RECIPE_CATALOG.items()
-                        if recipe["kind"] == category
-                        and name not in state["unlocked_recipes"]
-                    ]
-                    if not locked:
-                        await conn.rollback()
-                        return False, f"{PRODUCT_LABELS[category]} 레시피를 모두 연구했습니다.", False
-                    next_tier = min(int(recipe["tier"]) for _, recipe in locked)
-                    candidates = [
-                        name for name, recipe in locked if int(recipe["tier"]) == next_tier
-                    ]
-                    cost = _research_price(state, next_tier)
-                    if cafe_cash < cost:
-                        await conn.rollback()
-                        return False, f"연구 자금 {cost:,}원이 필요합니다.", False
-                    cafe_cash -= cost
-                    if (
-                        recipe_name in candidates
-                        and _has_effect(state, "wall_research_choice")
-                    ):
-                        chosen_recipe = recipe_name
+                            return False, f"재료가 부족합니다. 필요: {needs}", False
+                        score_delta = _manual_score(state, recipe)
+                        state["manual_products"] = int(state.get("manual_products", 0)) + 1
+                        bonus_product = False
+                        if _has_effect(state, "counter_master"):
+                            counter = int(state.get("manual_effect_counter", 0)) + 1
+                            if counter >= 5:
+                                counter = 0
+                                state["products"][recipe_name] = (
+                                    int(state["products"].get(recipe_name, 0)) + 1
+                                )
+                                bonus_product = True
+                            state["manual_effect_counter"] = counter
+                        message = (
+                            f"{PRODUCT_LABELS[recipe['kind']]} · {recipe_name} 1개를 "
+                            "직접 만들었습니다."
+                            + (" 장인의 카운터로 1개를 더 만들었습니다." if bonus_product else "")
+                        )
+                    elif action == "serve":
+                        if order_id is None:
+                            await conn.rollback()
+                            return False, "처리할 주문을 선택하세요.", False
+                        (
+                            ok, cash_delta, score_delta, reputation_delta,
+                            decor_tokens_delta, message,
+                        ) = _serve_order(
+                            state, order_id, recipe_name, recipe_allocations
+                        )
+                        if not ok:
+                            await conn.rollback()
+                            return False, message, False
+                        cafe_cash += cash_delta
+                    elif action == "research":
+                        if category not in PRODUCT_LABELS:
+                            await conn.rollback()
+                            return False, "연구할 메뉴 분류를 선택하세요.", False
+                        locked = [
+                            (name, recipe) for name, recipe in RECIPE_CATALOG.items()
+                            if recipe["kind"] == category
+                            and name not in state["unlocked_recipes"]
+                        ]
+                        if not locked:
+                            await conn.rollback()
+                            return False, f"{PRODUCT_LABELS[category]} 레시피를 모두 연구했습니다.", False
+                        next_tier = min(int(recipe["tier"]) for _, recipe in locked)
+                        candidates = [
+                            name for name, recipe in locked if int(recipe["tier"]) == next_tier
+                        ]
+                        cost = _research_price(state, next_tier)
+                        if cafe_cash < cost:
+                            await conn.rollback()
+                            return False, f"연구 자금 {cost:,}원이 필요합니다.", False
+                        cafe_cash -= cost
+                        if (
+                            recipe_name in candidates
+                            and _has_effect(state, "wall_research_choice")
+                        ):
+                            chosen_recipe = recipe_name
+                        else:
+                            chosen_recipe = random.choice(candidates)
+                        recipe_name = chosen_recipe
+                        state["unlocked_recipes"].append(recipe_name)
+                        state["products"].setdefault(recipe_name, 0)
+                        score_delta = 20 * next_tier
+                        message = (
+                            f"{PRODUCT_LABELS[category]} 연구에 성공해 "
+                            f"**{recipe_name}** 레시피를 발견했습니다."
+                        )
+                    elif action == "upgrade":
+                        if machine not in MACHINE_LABELS:
+                            await conn.rollback()
+                            return False, "강화할 기기를 선택하세요.", False
+                        current = int(state["machines"].get(machine, 0))
+                        if current >= MACHINE_MAX[machine]:
+                            await conn.rollback()
+                            return False, "이미 최대 강화입니다.", False
+                        cost = _upgrade_price(state, current)
+                        if cafe_cash < cost:
+                            await conn.rollback()
+                            return False, f"카페 운영 자금 {cost:,}원이 필요합니다.", False
+                        cafe_cash -= cost
+                        state["machines"][machine] = current + 1
+                        score_delta = 15 * (current + 1)
+                        message = f"{MACHINE_LABELS[machine]}을(를) {current + 1}단계로 강화했습니다."
                     else:
-                        chosen_recipe = random.choice(candidates)
-                    recipe_name = chosen_recipe
-                    state["unlocked_recipes"].append(recipe_name)
-                    state["products"].setdefault(recipe_name, 0)
-                    score_delta = 20 * next_tier
-                    message = (
-                        f"{PRODUCT_LABELS[category]} 연구에 성공해 "
-                        f"**{recipe_name}** 레시피를 발견했습니다."
-                    )
-                elif action == "upgrade":
-                    if machine not in MACHINE_LABELS:
-                        await conn.rollback()
-                        return False, "강화할 기기를 선택하세요.", False
-                    current = int(state["machines"].get(machine, 0))
-                    if current >= MACHINE_MAX[machine]:
                         await conn.rollback()
-                        return False, "이미 최대 강화입니다.", False
-                    cost = _upgrade_price(state, current)
-                    if cafe_cash < cost:
-                        await conn.rollback()
-                        return False, f"카페 운영 자금 {cost:,}원이 필요합니다.", False
-                    cafe_cash -= cost
-                    state["machines"][machine] = current + 1
-                    score_delta = 15 * (current + 1)
-                    message = f"{MACHINE_LABELS[machine]}을(를) {current + 1}단계로 강화했습니다."
-                else:
-                    await conn.rollback()
-                    return False, "알 수 없는 행동입니다.", False
+                        return False, "알 수 없는 행동입니다.", False
 
-                _add_log(state, f"{user.display_name}: {message}")
-                actions_left = int(member["actions_left"]) - 1
-                ready = 1 if actions_left <= 0 else 0
-                await cur.execute(
-                    """UPDATE cafe_tycoon_members
-                       SET actions_left=%s,ready=%s,participating=1,
-                           last_action_at=UTC_TIMESTAMP()
-                       WHERE session_id=%s AND user_id=%s""",
-                    (max(0, actions_left), ready, int(session_id), int(user.id)),
-                )
-                turn_advanced, next_turn = await _save_or_advance_cycle(
-                    cur,
-                    session,
-                    state,
-                    cafe_cash=cafe_cash,
-                    score_delta=score_delta,
-                    reputation_delta=reputation_delta,
-                    decor_tokens_delta=decor_tokens_delta,
-                )
-                if turn_advanced:
-                    message += (
-                        f"\n참여자의 행동이 끝나 **{next_turn}사이클**로 넘어갔습니다. "
-                        "카페 멤버 전원의 공용 활동 턴이 1 증가했습니다."
+                    _add_log(state, f"{user.display_name}: {message}")
+                    actions_left = int(member["actions_left"]) - 1
+                    ready = 1 if actions_left <= 0 else 0
+                    await cur.execute(
+                        """UPDATE cafe_tycoon_members
+                           SET actions_left=%s,ready=%s,participating=1,
+                               last_action_at=UTC_TIMESTAMP()
+                           WHERE session_id=%s AND user_id=%s""",
+                        (max(0, actions_left), ready, int(session_id), int(user.id)),
                     )
-                await conn.commit()
-                return True, message, turn_advanced
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"타이쿤 행동 오류: {exc}", False
+                    turn_advanced, next_turn = await _save_or_advance_cycle(
+                        cur,
+                        session,
+                        state,
+                        cafe_cash=cafe_cash,
+                        score_delta=score_delta,
+                        reputation_delta=reputation_delta,
+                        decor_tokens_delta=decor_tokens_delta,
+                    )
+                    if turn_advanced:
+                        message += (
+                            f"\n참여자의 행동이 끝나 **{next_turn}사이클**로 넘어갔습니다. "
+                            "카페 멤버 전원의 공용 활동 턴이 1 증가했습니다."
+                        )
+                    await conn.commit()
+                    return True, message, turn_advanced
+                except Exception as exc:
+                    await conn.rollback()
+                    return False, f"타이쿤 행동 오류: {exc}", False
 
 
 async def finish_turn_early(user_id: int, session_id: int) -> tuple[bool, str, bool]:
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                session, member, state = await _lock_running(cur, user_id, session_id)
-                if not session or not member or state is None:
-                    await conn.rollback()
-                    return False, "진행 중인 카페 참가 정보를 찾지 못했습니다.", False
-                if int(member["ready"]):
-                    await conn.rollback()
-                    return False, "이미 영업 완료를 선언했습니다.", False
-                if not int(member.get("participating", 0)):
-                    await conn.rollback()
-                    return False, "이번 사이클에 한 번 이상 행동한 뒤 마칠 수 있습니다.", False
-                await cur.execute(
-                    """UPDATE cafe_tycoon_members SET actions_left=0,ready=1,
-                           last_action_at=UTC_TIMESTAMP()
-                       WHERE session_id=%s AND user_id=%s""",
-                    (int(session_id), int(user_id)),
-                )
-                advanced, next_turn = await _save_or_advance_cycle(
-                    cur, session, state, cafe_cash=int(session["cafe_cash"])
-                )
-                if advanced:
-                    await conn.commit()
-                    return (
-                        True,
-                        f"영업을 마쳤습니다. 참여자가 모두 준비되어 **{next_turn}사이클**로 넘어갑니다.",
-                        True,
+    async with flushed_user_lock_where(_SESSION_MEMBER_IDS_SQL, (int(session_id),), user_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    session, member, state = await _lock_running(cur, user_id, session_id)
+                    if not session or not member or state is None:
+                        await conn.rollback()
+                        return False, "진행 중인 카페 참가 정보를 찾지 못했습니다.", False
+                    if int(member["ready"]):
+                        await conn.rollback()
+                        return False, "이미 영업 완료를 선언했습니다.", False
+                    if not int(member.get("participating", 0)):
+                        await conn.rollback()
+                        return False, "이번 사이클에 한 번 이상 행동한 뒤 마칠 수 있습니다.", False
+                    await cur.execute(
+                        """UPDATE cafe_tycoon_members SET actions_left=0,ready=1,
+                               last_action_at=UTC_TIMESTAMP()
+                           WHERE session_id=%s AND user_id=%s""",
+                        (int(session_id), int(user_id)),
                     )
-                await conn.commit()
-                return True, "남은 행동을 포기하고 다른 참여자를 기다립니다.", False
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"영업 완료 오류: {exc}", False
+                    advanced, next_turn = await _save_or_advance_cycle(
+                        cur, session, state, cafe_cash=int(session["cafe_cash"])
+                    )
+                    if advanced:
+                        await conn.commit()
+                        return (
+                            True,
+                            f"영업을 마쳤습니다. 참여자가 모두 준비되어 **{next_turn}사이클**로 넘어갑니다.",
+                            True,
+                        )
+                    await conn.commit()
+                    return True, "남은 행동을 포기하고 다른 참여자를 기다립니다.", False
+                except Exception as exc:
+                    await conn.rollback()
+                    return False, f"영업 완료 오류: {exc}", False
 
 
 async def release_idle_member(
@@ -1428,40 +1302,41 @@ async def release_idle_member(
 ) -> tuple[bool, str, bool]:
     if int(requester_id) == int(target_user_id):
         return False, "본인은 작업창의 영업 마치기를 사용하세요.", False
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                session, requester, state = await _lock_running(
-                    cur, requester_id, session_id
-                )
-                if not session or not requester or state is None:
-                    await conn.rollback()
-                    return False, "진행 중인 카페 참가 정보가 없습니다.", False
-                await cur.execute(
-                    """UPDATE cafe_tycoon_members
-                       SET actions_left=0,ready=1
-                       WHERE session_id=%s AND user_id=%s
-                         AND participating=1 AND ready=0
-                         AND last_action_at IS NOT NULL
-                         AND last_action_at <= UTC_TIMESTAMP() - INTERVAL 30 MINUTE""",
-                    (int(session_id), int(target_user_id)),
-                )
-                if cur.rowcount <= 0:
+    async with flushed_user_lock_where(_SESSION_MEMBER_IDS_SQL, (int(session_id),), requester_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    session, requester, state = await _lock_running(
+                        cur, requester_id, session_id
+                    )
+                    if not session or not requester or state is None:
+                        await conn.rollback()
+                        return False, "진행 중인 카페 참가 정보가 없습니다.", False
+                    await cur.execute(
+                        """UPDATE cafe_tycoon_members
+                           SET actions_left=0,ready=1
+                           WHERE session_id=%s AND user_id=%s
+                             AND participating=1 AND ready=0
+                             AND last_action_at IS NOT NULL
+                             AND last_action_at <= UTC_TIMESTAMP() - INTERVAL 30 MINUTE""",
+                        (int(session_id), int(target_user_id)),
+                    )
+                    if cur.rowcount <= 0:
+                        await conn.rollback()
+                        return False, "30분 이상 자리를 비운 미완료 참여자가 아닙니다.", False
+                    advanced, next_turn = await _save_or_advance_cycle(
+                        cur, session, state, cafe_cash=int(session["cafe_cash"])
+                    )
+                    await conn.commit()
+                    message = "자리 비움 처리로 남은 행동을 정리했습니다."
+                    if advanced:
+                        message += f" **{next_turn}사이클**로 넘어갑니다."
+                    return True, message, advanced
+                except Exception as exc:
                     await conn.rollback()
-                    return False, "30분 이상 자리를 비운 미완료 참여자가 아닙니다.", False
-                advanced, next_turn = await _save_or_advance_cycle(
-                    cur, session, state, cafe_cash=int(session["cafe_cash"])
-                )
-                await conn.commit()
-                message = "자리 비움 처리로 남은 행동을 정리했습니다."
-                if advanced:
-                    message += f" **{next_turn}사이클**로 넘어갑니다."
-                return True, message, advanced
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"자리 비움 처리 오류: {exc}", False
+                    return False, f"자리 비움 처리 오류: {exc}", False
 
 
 async def reroll_order(
@@ -1794,83 +1669,84 @@ async def claim_settlement(
     candidates = settlement_reward_candidates(session_id, user_id)
     if len(choices) != 2 or any(item not in candidates for item in choices):
         return False, "이번 정산 후보 8종 중 서로 다른 희귀 재료 2종을 선택하세요."
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    "SELECT status,score FROM cafe_tycoon_sessions WHERE id=%s FOR UPDATE",
-                    (int(session_id),),
-                )
-                session = await cur.fetchone()
-                if not session or session["status"] != "settling":
-                    await conn.rollback()
-                    return False, "정산 가능한 카페가 아닙니다."
-                await cur.execute(
-                    """SELECT reward_claimed FROM cafe_tycoon_members
-                       WHERE session_id=%s AND user_id=%s FOR UPDATE""",
-                    (int(session_id), int(user_id)),
-                )
-                member = await cur.fetchone()
-                if not member:
-                    await conn.rollback()
-                    return False, "참가 기록을 찾지 못했습니다."
-                if int(member["reward_claimed"]):
-                    await conn.rollback()
-                    return False, "이미 정산을 받았습니다."
-                money, points, total = settlement_amounts(int(session["score"]))
-                first = (total + 1) // 2
-                second = total // 2
-                await cur.execute(
-                    """UPDATE users
-                       SET money=money+%s,pt=pt+%s,data_revision=data_revision+1
-                       WHERE user_id=%s""",
-                    (money, points, str(user_id)),
-                )
-                for item, count in zip(choices, (first, second)):
+    async with flushed_user_lock(user_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
                     await cur.execute(
-                        """INSERT INTO inventory (user_id,item_name,quantity)
-                           VALUES (%s,%s,%s) AS new
-                           ON DUPLICATE KEY UPDATE
-                             quantity=inventory.quantity+new.quantity""",
-                        (str(user_id), item, count),
+                        "SELECT status,score FROM cafe_tycoon_sessions WHERE id=%s FOR UPDATE",
+                        (int(session_id),),
                     )
-                await cur.execute(
-                    """UPDATE cafe_tycoon_members
-                       SET reward_choices=%s,reward_claimed=1
-                       WHERE session_id=%s AND user_id=%s""",
-                    (
-                        json.dumps(choices, ensure_ascii=False),
-                        int(session_id),
-                        int(user_id),
-                    ),
-                )
-                await cur.execute(
-                    """SELECT reward_claimed FROM cafe_tycoon_members
-                       WHERE session_id=%s ORDER BY user_id FOR UPDATE""",
-                    (int(session_id),),
-                )
-                claims = list(await cur.fetchall())
-                if claims and all(int(row["reward_claimed"]) for row in claims):
+                    session = await cur.fetchone()
+                    if not session or session["status"] != "settling":
+                        await conn.rollback()
+                        return False, "정산 가능한 카페가 아닙니다."
                     await cur.execute(
-                        "UPDATE cafe_tycoon_sessions SET status='closed' WHERE id=%s",
+                        """SELECT reward_claimed FROM cafe_tycoon_members
+                           WHERE session_id=%s AND user_id=%s FOR UPDATE""",
+                        (int(session_id), int(user_id)),
+                    )
+                    member = await cur.fetchone()
+                    if not member:
+                        await conn.rollback()
+                        return False, "참가 기록을 찾지 못했습니다."
+                    if int(member["reward_claimed"]):
+                        await conn.rollback()
+                        return False, "이미 정산을 받았습니다."
+                    money, points, total = settlement_amounts(int(session["score"]))
+                    first = (total + 1) // 2
+                    second = total // 2
+                    await cur.execute(
+                        """UPDATE users
+                           SET money=money+%s,pt=pt+%s,data_revision=data_revision+1
+                           WHERE user_id=%s""",
+                        (money, points, str(user_id)),
+                    )
+                    for item, count in zip(choices, (first, second)):
+                        await cur.execute(
+                            """INSERT INTO inventory (user_id,item_name,quantity)
+                               VALUES (%s,%s,%s) AS new
+                               ON DUPLICATE KEY UPDATE
+                                 quantity=inventory.quantity+new.quantity""",
+                            (str(user_id), item, count),
+                        )
+                    await cur.execute(
+                        """UPDATE cafe_tycoon_members
+                           SET reward_choices=%s,reward_claimed=1
+                           WHERE session_id=%s AND user_id=%s""",
+                        (
+                            json.dumps(choices, ensure_ascii=False),
+                            int(session_id),
+                            int(user_id),
+                        ),
+                    )
+                    await cur.execute(
+                        """SELECT reward_claimed FROM cafe_tycoon_members
+                           WHERE session_id=%s ORDER BY user_id FOR UPDATE""",
                         (int(session_id),),
                     )
-                await conn.commit()
-                return True, (
-                    f"{money:,}원, {points:,}pt, "
-                    f"{choices[0]} ×{first}, {choices[1]} ×{second}을(를) 받았습니다."
-                )
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"정산 오류: {exc}"
+                    claims = list(await cur.fetchall())
+                    if claims and all(int(row["reward_claimed"]) for row in claims):
+                        await cur.execute(
+                            "UPDATE cafe_tycoon_sessions SET status='closed' WHERE id=%s",
+                            (int(session_id),),
+                        )
+                    await conn.commit()
+                    invalidate_user_snapshot(user_id)
+                    return True, (
+                        f"{money:,}원, {points:,}pt, "
+                        f"{choices[0]} ×{first}, {choices[1]} ×{second}을(를) 받았습니다."
+                    )
+                except Exception as exc:
+                    await conn.rollback()
+                    return False, f"정산 오류: {exc}"
 
 
 async def list_season_rewards(
     session_id: int, user_id: int
 ) -> list[dict[str, Any]]:
-    await ensure_tycoon_schema()
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
@@ -1892,69 +1768,71 @@ async def claim_season_reward(
     candidates = settlement_reward_candidates(season_id, user_id)
     if len(choices) != 2 or any(item not in candidates for item in choices):
         return False, "이번 시즌 후보 중 서로 다른 희귀 재료 2종을 선택하세요."
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    """SELECT s.reward_money,s.reward_points,s.reward_rare_total,
-                              s.season_no,r.claimed
-                       FROM cafe_tycoon_seasons s
-                       JOIN cafe_tycoon_season_rewards r ON r.season_id=s.id
-                       WHERE s.id=%s AND r.user_id=%s FOR UPDATE""",
-                    (int(season_id), int(user_id)),
-                )
-                reward = await cur.fetchone()
-                if not reward:
-                    await conn.rollback()
-                    return False, "받을 수 있는 시즌 정산을 찾지 못했습니다."
-                if int(reward["claimed"]):
-                    await conn.rollback()
-                    return False, "이미 받은 시즌 정산입니다."
-                total = int(reward["reward_rare_total"])
-                first, second = (total + 1) // 2, total // 2
-                await cur.execute(
-                    """UPDATE users
-                       SET money=money+%s,pt=pt+%s,data_revision=data_revision+1
-                       WHERE user_id=%s""",
-                    (
-                        int(reward["reward_money"]),
-                        int(reward["reward_points"]),
-                        str(user_id),
-                    ),
-                )
-                for item, count in zip(choices, (first, second)):
+    async with flushed_user_lock(user_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
                     await cur.execute(
-                        """INSERT INTO inventory (user_id,item_name,quantity)
-                           VALUES (%s,%s,%s) AS new
-                           ON DUPLICATE KEY UPDATE
-                             quantity=inventory.quantity+new.quantity""",
-                        (str(user_id), item, count),
+                        """SELECT s.reward_money,s.reward_points,s.reward_rare_total,
+                                  s.season_no,r.claimed
+                           FROM cafe_tycoon_seasons s
+                           JOIN cafe_tycoon_season_rewards r ON r.season_id=s.id
+                           WHERE s.id=%s AND r.user_id=%s FOR UPDATE""",
+                        (int(season_id), int(user_id)),
                     )
-                await cur.execute(
-                    """UPDATE cafe_tycoon_season_rewards
-                       SET claimed=1,reward_choices=%s,claimed_at=UTC_TIMESTAMP()
-                       WHERE season_id=%s AND user_id=%s AND claimed=0""",
-                    (
-                        json.dumps(choices, ensure_ascii=False),
-                        int(season_id),
-                        int(user_id),
-                    ),
-                )
-                if cur.rowcount != 1:
+                    reward = await cur.fetchone()
+                    if not reward:
+                        await conn.rollback()
+                        return False, "받을 수 있는 시즌 정산을 찾지 못했습니다."
+                    if int(reward["claimed"]):
+                        await conn.rollback()
+                        return False, "이미 받은 시즌 정산입니다."
+                    total = int(reward["reward_rare_total"])
+                    first, second = (total + 1) // 2, total // 2
+                    await cur.execute(
+                        """UPDATE users
+                           SET money=money+%s,pt=pt+%s,data_revision=data_revision+1
+                           WHERE user_id=%s""",
+                        (
+                            int(reward["reward_money"]),
+                            int(reward["reward_points"]),
+                            str(user_id),
+                        ),
+                    )
+                    for item, count in zip(choices, (first, second)):
+                        await cur.execute(
+                            """INSERT INTO inventory (user_id,item_name,quantity)
+                               VALUES (%s,%s,%s) AS new
+                               ON DUPLICATE KEY UPDATE
+                                 quantity=inventory.quantity+new.quantity""",
+                            (str(user_id), item, count),
+                        )
+                    await cur.execute(
+                        """UPDATE cafe_tycoon_season_rewards
+                           SET claimed=1,reward_choices=%s,claimed_at=UTC_TIMESTAMP()
+                           WHERE season_id=%s AND user_id=%s AND claimed=0""",
+                        (
+                            json.dumps(choices, ensure_ascii=False),
+                            int(season_id),
+                            int(user_id),
+                        ),
+                    )
+                    if cur.rowcount != 1:
+                        await conn.rollback()
+                        return False, "정산이 이미 처리되었습니다."
+                    await conn.commit()
+                    invalidate_user_snapshot(user_id)
+                    return True, (
+                        f"시즌 {int(reward['season_no'])} 정산: "
+                        f"{int(reward['reward_money']):,}원, "
+                        f"{int(reward['reward_points']):,}pt, "
+                        f"{choices[0]} ×{first}, {choices[1]} ×{second}"
+                    )
+                except Exception as exc:
                     await conn.rollback()
-                    return False, "정산이 이미 처리되었습니다."
-                await conn.commit()
-                return True, (
-                    f"시즌 {int(reward['season_no'])} 정산: "
-                    f"{int(reward['reward_money']):,}원, "
-                    f"{int(reward['reward_points']):,}pt, "
-                    f"{choices[0]} ×{first}, {choices[1]} ×{second}"
-                )
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"시즌 정산 오류: {exc}"
+                    return False, f"시즌 정산 오류: {exc}"
 
 
 def _status_embed(session: dict[str, Any], members: list[dict[str, Any]]) -> discord.Embed:
@@ -2024,7 +1902,6 @@ class CafeTycoonEntryView(discord.ui.View):
         return False
 
     async def open(self, interaction):
-        await ensure_tycoon_schema()
         active = await get_user_active_session(self.author.id)
         if active:
             view = CafeTycoonSessionView(int(active["id"]), self.parent_view)
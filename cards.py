@@ -57,7 +57,8 @@ class Dice:
         self.d_max = d_max
         self.effect = effect # 특수 효과 (bleed_X_on_win, destroy_next_on_hit 등)
 
-    def roll(self, attack_stat=0, defense_stat=0, current_mental=0):
+    def bounds(self, attack_stat=0, defense_stat=0):
+        """Inclusive (min, max) of the uniform roll for the given stats."""
         f_min, f_max = self.d_min, self.d_max
         
         if self.action_type == "attack":
@@ -74,8 +75,11 @@ class Dice:
 
         f_min = min(f_min, self.d_max)
         f_max = max(f_min, f_max)
+        return f_min, f_max
 
-        return self.action_type, random.randint(f_min, f_max)
+    def roll(self, attack_stat=0, defense_stat=0, current_mental=0, rng=None):
+        f_min, f_max = self.bounds(attack_stat, defense_stat)
+        return self.action_type, (rng or random).randint(f_min, f_max)
 
 class SkillCard:
     def __init__(self, name, dice_list, is_aoe=False):
@@ -101,9 +105,11 @@ class SkillCard:
         return desc
 
     def use_card(self, attack_stat=0, defense_stat=0, current_mental=0, **kwargs):
+        # kwargs["rng"] is the battle-scoped RNG (battle_engine.BattleRandom).
+        rng = kwargs.get("rng")
         results = []
         for dice in self.dice_list:
-            a_type, val = dice.roll(attack_stat, defense_stat, current_mental)
+            a_type, val = dice.roll(attack_stat, defense_stat, current_mental, rng=rng)
             results.append({"type": a_type, "value": val, "effect": dice.effect})
         return results
 
@@ -254,7 +260,7 @@ class GoldMechanicCard(SkillCard):
             elif dtype == "mental_heal": f_min += defense_stat
             
             f_min = min(f_min, f_max)
-            val = random.randint(f_min, f_max)
+            val = (kwargs.get("rng") or random).randint(f_min, f_max)
             val += bonus
             results.append({"type": dtype, "value": val, "effect": None})
         return results
@@ -361,7 +367,9 @@ class SenshoCard(SkillCard):
         
         results = []
         for dice in self.dice_list:
-            a_type, val = dice.roll(attack_stat, defense_stat, current_mental)
+            a_type, val = dice.roll(
+                attack_stat, defense_stat, current_mental, rng=kwargs.get("rng")
+            )
             val += bonus
             results.append({"type": a_type, "value": val, "effect": dice.effect})
         return results
@@ -379,16 +387,17 @@ class MorningGloryCard(SkillCard):
         return "⚔️(1~4, 4가 나오면 +70) ➔ 🛡️(10~13)"
 
     def use_card(self, attack_stat=0, defense_stat=0, current_mental=0, **kwargs):
+        rng = kwargs.get("rng") or random
         results = []
         for dice in self.dice_list:
             if dice.effect == "morning_glory":
                 # 능력치 미적용 롤
-                val = random.randint(dice.d_min, dice.d_max)
+                val = rng.randint(dice.d_min, dice.d_max)
                 if val == 4:
                     val += 70
                 results.append({"type": dice.action_type, "value": val, "effect": "morning_glory"})
             else:
-                a_type, val = dice.roll(attack_stat, defense_stat, current_mental)
+                a_type, val = dice.roll(attack_stat, defense_stat, current_mental, rng=rng)
                 results.append({"type": a_type, "value": val, "effect": dice.effect})
         return results
 
@@ -570,7 +579,7 @@ BOSS_CARDS = {
     "화염숨결(광역)": SkillCard("화염숨결(광역)", [Dice("attack", 20, 30, effect="bleed_5")], is_aoe=True),
 }
 
-def get_card(name):
+def _build_special_card(name):
     if name == "전부매입": 
         return GoldMechanicCard("전부매입", [("attack", 3, 7), ("defense", 3, 7)])
     elif name == "금융치료": 
@@ -585,13 +594,28 @@ def get_card(name):
         return SenshoCard(name)
     elif name == "모닝 글로리":
         return MorningGloryCard(name)
-    
-    card = SKILL_CARDS.get(name)
+    return None
+
+
+# Interned cards by name. Card objects are shared flyweights: battles must keep
+# per-battle state on the combatant (runtime_cooldowns), never on the card.
+_CARD_REGISTRY = {}
+
+
+def get_card(name):
+    card = _CARD_REGISTRY.get(name)
+    if card is not None:
+        return card
+    card = _build_special_card(name)
     if not card:
-        card = BOSS_CARDS.get(name)
+        card = SKILL_CARDS.get(name)
     if not card:
-        card = _BOSS_REWARD_CARDS.get(name)
-    return card
+        card = BOSS_CARDS.get(name)
+    if card:
+        _CARD_REGISTRY[name] = card
+        return card
+    # Reward cards are re-registered from life_data, so they are not interned.
+    return _BOSS_REWARD_CARDS.get(name)
 
 CARD_PRICES = {
     "기본공격": 700, "기본방어": 700, "기본회복": 1000, "기본반격": 1000,
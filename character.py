@@ -7,7 +7,7 @@ import json
 import math
 import random
 
-from gem_effects import gem_final_aux_value, gem_final_main_value
+from gem_effects import gem_final_aux_value, gem_final_main_value, refresh_gem_profile
 
 
 GEM_MAIN_STAT_LABELS = {
@@ -371,6 +371,7 @@ class Character:
             equipped_artifacts,
         )
         self._add_stats(self._applied_gem_main_stats)
+        refresh_gem_profile(self)
 
         self.has_artifact_buff = True
 
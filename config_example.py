@@ -16,4 +16,27 @@ DB_CONFIG = {
     'password': DB_PASSWORD,
     'db': DB_NAME,
     'autocommit': True
-}
\ No newline at end of file
+}
+
+# 유저 데이터 로더: "tables"(테이블별 SELECT) 또는 "aggregate"(JSON 집계 단일 쿼리)
+# 원격 DB(VPN 등)처럼 왕복 지연이 큰 환경에서는 "aggregate"가 유리합니다.
+USER_LOADER_MODE = "tables"
+
+# 지연 저장(write-behind): 0이면 끔. 예) 250 → 250ms 안의 연속 저장을 한 번에 커밋합니다.
+# 거래·장터·길드 상점 등 재화 처리 직전과 봇 종료 시에는 즉시 커밋됩니다.
+SAVE_WRITE_BEHIND_MS = 0
+
+# 이 시간(ms) 이상 걸린 쿼리는 호출 위치와 함께 로그에 남깁니다. 0이면 끔. (/관리자 쿼리통계)
+SLOW_QUERY_MS = 200
+
+# 길드 공헌도·길드 로그를 모아서 기록하는 주기(ms). 봇 종료 시에는 남은 분량을 즉시 기록합니다.
+GUILD_CONTRIBUTION_FLUSH_MS = 250
+
+# 길드 로그 원본 보관 기간(일). 지난 기록은 매시간 월별·활동별·유저별 요약으로 옮겨집니다.
+GUILD_LOG_RETENTION_DAYS = 30
+
+# 유저 보스 순위 캐시 갱신 대기 시간(초). DB가 이보다 느리면 직전 순위를 먼저 보여주고 뒤에서 갱신합니다.
+BOSS_RANKING_REFRESH_TIMEOUT = 1.5
+
+# 카드 기대값·합 승률 표 캐시 파일. numpy가 설치된 경우에만 만들어지며, 없으면 즉석 계산합니다.
+DICE_TABLE_PATH = "dice_tables.npz"
@@ -7,9 +7,15 @@ import random
 import datetime
 import asyncio
 import inspect
-from collections import defaultdict
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
 from config import DB_CONFIG
 from character import DEFAULT_PLAYER_DATA
+import save_history
+import schema_migrations
+from keyed_locks import KeyedLocks
+from db_metrics import InstrumentedPool
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +29,7 @@ logger = logging.getLogger(__name__)
 # guild-rank-training-score-v8.6.2
 
 _pool = None
-_user_save_locks = defaultdict(asyncio.Lock)
+_user_save_locks = KeyedLocks("user_save")
 
 
 class StaleUserDataError(RuntimeError):
@@ -38,11 +44,32 @@ class StaleUserDataError(RuntimeError):
             "최신 상태를 보호하기 위해 저장을 중단했습니다. 메뉴를 다시 열어주세요."
         )
 
+class InsufficientResourcesError(RuntimeError):
+    """``apply_user_deltas`` would have taken a balance below zero."""
+
+    _LABELS = {"money": "돈", "pt": "포인트"}
+
+    def __init__(self, user_id, resource):
+        self.user_id = str(user_id)
+        self.resource = str(resource)
+        label = self._LABELS.get(self.resource, self.resource)
+        super().__init__(f"{label}이(가) 부족합니다.")
+
+class ReadOnlyUserDataError(RuntimeError):
+    """A section projection from ``get_user_data(sections=...)`` reached a save."""
+
+    def __init__(self, user_id, sections):
+        self.user_id = str(user_id)
+        self.sections = tuple(sections)
+        super().__init__(
+            "일부 정보만 불러온 조회용 데이터는 저장할 수 없습니다. 메뉴를 다시 열어주세요."
+        )
+
 async def get_db_pool():
     global _pool
     if _pool is None:
         try:
-            _pool = await aiomysql.create_pool(**DB_CONFIG)
+            _pool = InstrumentedPool(await aiomysql.create_pool(**DB_CONFIG))
             logger.info("DB Pool Created")
             await check_schema(_pool)
         except Exception as e:
@@ -55,7 +82,7 @@ async def get_db_pool():
                         async with temp_pool.acquire() as conn:
                             async with conn.cursor() as cur:
                                 await cur.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['db']}")
-                    _pool = await aiomysql.create_pool(**DB_CONFIG)
+                    _pool = InstrumentedPool(await aiomysql.create_pool(**DB_CONFIG))
                     logger.info("DB Pool Created (New DB)")
                     await check_schema(_pool)
                 except Exception as create_err:
@@ -70,206 +97,13 @@ async def check_schema(pool):
     if not os.path.exists("schema.sql"): return
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
-            async def create_table_if_missing(table_name, create_sql):
-                """Avoid MySQL 1050 warnings by checking before CREATE TABLE."""
-                await cur.execute(
-                    """SELECT 1
-                       FROM information_schema.tables
-                       WHERE table_schema=DATABASE() AND table_name=%s
-                       LIMIT 1""",
-                    (table_name,),
-                )
-                if not await cur.fetchone():
-                    await cur.execute(create_sql)
-
-            await cur.execute("SHOW TABLES LIKE 'users'")
-            if not await cur.fetchone():
-                with open("schema.sql", "r", encoding="utf-8") as f:
-                    for stmt in f.read().split(';'):
-                        if stmt.strip() and not stmt.upper().startswith(("CREATE DATABASE", "USE")):
-                            try: await cur.execute(stmt)
-                            except: continue
-            
-            # 길드 테이블 확인
-            try:
-                await create_table_if_missing("guilds", """CREATE TABLE guilds (
-                        guild_id INT AUTO_INCREMENT PRIMARY KEY,
-                        name VARCHAR(50) NOT NULL UNIQUE,
-                        owner_id VARCHAR(50),
-                        level INT DEFAULT 1,
-                        exp INT DEFAULT 0,
-                        member_count INT DEFAULT 1,
-                        token_wood INT DEFAULT 0, token_iron INT DEFAULT 0,
-                        token_magic INT DEFAULT 0, token_sorcery INT DEFAULT 0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )""")
-                await create_table_if_missing("guild_members", """CREATE TABLE guild_members (
-                        guild_id INT, user_id VARCHAR(50), role VARCHAR(20) DEFAULT 'member',
-                        contribution INT DEFAULT 0, joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        PRIMARY KEY (guild_id, user_id), FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
-                    )""")
-                await create_table_if_missing("guild_inventory", """CREATE TABLE guild_inventory (
-                        guild_id INT, item_name VARCHAR(100), count INT DEFAULT 0, category VARCHAR(50),
-                        PRIMARY KEY (guild_id, item_name), FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
-                    )""")
-                await create_table_if_missing("guild_stored_artifacts", """CREATE TABLE guild_stored_artifacts (
-                        id BIGINT AUTO_INCREMENT PRIMARY KEY, guild_id INT, artifact_id VARCHAR(100),
-                        name VARCHAR(100), rank_level INT, level INT, data JSON,
-                        stored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
-                    )""")
-                await create_table_if_missing("guild_log", """CREATE TABLE guild_log (
-                        id BIGINT AUTO_INCREMENT PRIMARY KEY, guild_id INT, user_id VARCHAR(50),
-                        user_name VARCHAR(100), action_type VARCHAR(50), item_name VARCHAR(100),
-                        count INT, logged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
-                    )""")
-                await create_table_if_missing("guild_shop_stock", """CREATE TABLE guild_shop_stock (
-                        guild_id INT NOT NULL,
-                        day_key VARCHAR(10) NOT NULL,
-                        slot_index INT NOT NULL,
-                        item_name VARCHAR(100) NOT NULL,
-                        category VARCHAR(50) NOT NULL,
-                        stock INT NOT NULL,
-                        initial_stock INT NOT NULL,
-                        cost_json JSON NOT NULL,
-                        description VARCHAR(255),
-                        PRIMARY KEY (guild_id, day_key, slot_index),
-                        FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
-                    )""")
-            except Exception as e: logger.error(f"Guild Table Error: {e}")
-
-            # 컬럼 추가
-            await cur.execute("DESCRIBE users")
-            u_cols = [r[0] for r in await cur.fetchall()]
-            required_user_columns = [
-                ("guild_rank", "VARCHAR(20)"),
-                ("guild_data", "JSON"),
-                ("characters", "JSON"),
-                ("fishing_max_slots", "INT NOT NULL DEFAULT 3"),
-                ("max_subjugation_depth", "INT NOT NULL DEFAULT 0"),
-                ("daily_quests", "JSON"),
-                ("last_quest_date", "DATE"),
-                ("construction_step", "INT NOT NULL DEFAULT 0"),
-                ("current_dungeon", "JSON"),
-                ("max_subjugation_char", "VARCHAR(100)"),
-                ("max_subjugation_region", "VARCHAR(100)"),
-                ("data_revision", "BIGINT NOT NULL DEFAULT 0"),
-            ]
-            for col, typ in required_user_columns:
-                if col not in u_cols:
-                    try:
-                        await cur.execute(f"ALTER TABLE users ADD COLUMN {col} {typ}")
-                    except Exception as e:
-                        logger.warning("users.%s migration skipped: %s", col, e)
-            if "total_turns" not in u_cols:
-                try:
-                    await cur.execute("ALTER TABLE users ADD COLUMN total_turns BIGINT NOT NULL DEFAULT 0")
-                    await cur.execute(
-                        "UPDATE users SET total_turns=GREATEST(COALESCE(total_investigations,0),"
-                        " COALESCE(total_subjugations,0)) WHERE total_turns=0"
-                    )
-                except Exception as e:
-                    logger.warning("total_turns migration skipped: %s", e)
-
-            await create_table_if_missing("user_life_data", """CREATE TABLE user_life_data (
-                user_id VARCHAR(50) PRIMARY KEY,
-                data JSON NOT NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-            )""")
-            await create_table_if_missing("user_save_history", """CREATE TABLE user_save_history (
-                id BIGINT AUTO_INCREMENT PRIMARY KEY,
-                user_id VARCHAR(50) NOT NULL,
-                revision BIGINT NOT NULL,
-                data JSON NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_user_revision (user_id, revision),
-                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-            )""")
-            await create_table_if_missing("user_bosses", """CREATE TABLE user_bosses (
-                boss_id CHAR(32) PRIMARY KEY,
-                owner_id VARCHAR(50) NOT NULL,
-                guild_id INT,
-                boss_name VARCHAR(80) NOT NULL,
-                grade VARCHAR(4) NOT NULL,
-                power_score INT NOT NULL,
-                boss_data JSON NOT NULL,
-                is_published TINYINT(1) NOT NULL DEFAULT 0,
-                publish_scope VARCHAR(10) NOT NULL DEFAULT 'guild',
-                active_battles INT NOT NULL DEFAULT 0,
-                weekly_key VARCHAR(10),
-                weekly_elo INT NOT NULL DEFAULT 1500,
-                all_time_best_elo INT NOT NULL DEFAULT 1500,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_user_boss_owner (owner_id, created_at),
-                INDEX idx_user_boss_publish (is_published, publish_scope, weekly_elo),
-                INDEX idx_user_boss_power (power_score),
-                FOREIGN KEY (owner_id) REFERENCES users(user_id) ON DELETE CASCADE
-            )""")
-            await create_table_if_missing("user_boss_battles", """CREATE TABLE user_boss_battles (
-                battle_id CHAR(32) PRIMARY KEY,
-                boss_id CHAR(32) NOT NULL,
-                challenger_id VARCHAR(50) NOT NULL,
-                result VARCHAR(12) NOT NULL,
-                weekly_key VARCHAR(10) NOT NULL,
-                elo_before INT NOT NULL,
-                elo_after INT NOT NULL,
-                owner_rewarded TINYINT(1) NOT NULL DEFAULT 0,
-                battle_data JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_user_boss_battle_boss (boss_id, created_at),
-                INDEX idx_user_boss_battle_week (weekly_key, elo_after),
-                FOREIGN KEY (boss_id) REFERENCES user_bosses(boss_id) ON DELETE CASCADE
-            )""")
-            # User-boss raids now require a locked five-floor dungeon.  Legacy
-            # bosses remain owned, but must be configured once before republishing.
-            try:
-                await cur.execute(
-                    """UPDATE user_bosses
-                       SET is_published=0
-                       WHERE is_published=1
-                         AND (
-                           JSON_EXTRACT(boss_data, '$.dungeon.locked') IS NULL
-                           OR JSON_UNQUOTE(JSON_EXTRACT(boss_data, '$.dungeon.locked')) <> 'true'
-                         )"""
-                )
-            except Exception as e:
-                logger.warning("User boss dungeon migration skipped: %s", e)
+            await schema_migrations.apply_migrations(conn, cur)
             # Discord views do not survive a process restart; no user-boss
             # battle can still be active when schema initialization runs.
             await cur.execute("UPDATE user_bosses SET active_battles=0 WHERE active_battles<>0")
-            try:
-                await cur.execute("DESCRIBE workshop_slots")
-                workshop_cols = [r[0] for r in await cur.fetchall()]
-                if "start_count" not in workshop_cols:
-                    await cur.execute(
-                        "ALTER TABLE workshop_slots ADD COLUMN start_count BIGINT NOT NULL DEFAULT 0"
-                    )
-                if "required_count" not in workshop_cols:
-                    await cur.execute(
-                        "ALTER TABLE workshop_slots ADD COLUMN required_count BIGINT NOT NULL DEFAULT 0"
-                    )
-            except Exception as e:
-                logger.warning("Workshop schema migration skipped: %s", e)
-            try:
-                await cur.execute("DESCRIBE artifacts")
-                art_cols = [r[0] for r in await cur.fetchall()]
-                if "gems" not in art_cols:
-                    await cur.execute("ALTER TABLE artifacts ADD COLUMN gems JSON")
-                if "metadata" not in art_cols:
-                    await cur.execute("ALTER TABLE artifacts ADD COLUMN metadata JSON")
-            except Exception as e:
-                logger.warning("Artifact v5 schema migration skipped: %s", e)
-
-            await cur.execute("""INSERT INTO guilds
-                (guild_id, name, owner_id, level, exp, member_count)
-                VALUES (1, '공용 길드', NULL, 1, 0, 0)
-                ON DUPLICATE KEY UPDATE name='공용 길드'""")
             await conn.commit()
 
+
 async def _get_new_user_data(user_name=None):
     new_char = copy.deepcopy(DEFAULT_PLAYER_DATA)
     new_char["name"] = user_name if user_name else "플레이어"
@@ -285,13 +119,173 @@ async def _get_new_user_data(user_name=None):
         "guild_rank": None, "guild_data": {}, "life_data": {}
     }
 
-async def _get_inventory(cur, user_id):
-    await cur.execute("SELECT item_name, quantity FROM inventory WHERE user_id = %s", (str(user_id),))
-    return {row['item_name']: row['quantity'] for row in await cur.fetchall()}
+# Per-user child tables in load order. JSON-typed columns are listed in
+# ``json`` so the aggregate loader can ship them as text, exactly like the
+# per-table cursor returns them.
+_USER_LOAD_TABLES = {
+    "inventory": {"columns": ("item_name", "quantity"), "order": ("item_name",)},
+    "characters": {
+        "columns": (
+            "id", "name", "hp", "current_hp", "max_mental", "current_mental",
+            "attack", "defense", "defense_rate", "card_slots",
+            "equipped_cards", "equipped_engraved_artifact",
+        ),
+        "json": ("equipped_cards", "equipped_engraved_artifact"),
+        "order": ("id",),
+    },
+    "artifacts": {
+        "columns": (
+            "id", "name", "rank_level", "grade", "level", "prefix", "stats",
+            "special", "description", "equipped_char_index", "gems", "metadata",
+        ),
+        "json": ("stats", "gems", "metadata"),
+        "order": ("id",),
+    },
+    "unlocked_regions": {"columns": ("region_name",), "order": ("region_name",)},
+    "recruit_progress": {"columns": ("char_key", "progress"), "order": ("char_key",)},
+    "garden_slots": {
+        "columns": ("id", "slot_index", "planted", "plant_name", "stage", "last_invest_count", "fertilizer"),
+        "order": ("slot_index", "id"),
+    },
+    "workshop_slots": {
+        "columns": ("id", "slot_index", "craft_item", "start_count", "required_count"),
+        "order": ("id",),
+    },
+    "fishing_slots": {"columns": ("id", "fish_name", "start_count"), "order": ("id",)},
+    "user_fertilizers": {"columns": ("id", "target"), "order": ("id",)},
+}
+
+try:
+    from config import USER_LOADER_MODE
+except ImportError:
+    USER_LOADER_MODE = "tables"
+
+
+def _json_column(value, default):
+    return json.loads(value) if value else default
+
+
+# Read-only projections for screens that only need part of a user. Every
+# projection also reads the users row, which carries data_revision, the
+# scalar columns and the users.characters extension JSON.
+_USER_SECTIONS = {
+    "scalars": {
+        "keys": (
+            "pt", "money", "last_checkin", "investigator_index",
+            "main_quest_id", "main_quest_current", "main_quest_index",
+            "main_quest_progress", "cards", "buffs", "daily_quests",
+            "last_quest_date", "current_dungeon", "guild_rank", "guild_data",
+        ),
+        "tables": (),
+    },
+    "inventory": {"keys": ("inventory",), "tables": ("inventory",)},
+    "characters": {"keys": ("characters",), "tables": ("characters", "artifacts")},
+    "artifacts": {"keys": ("artifacts",), "tables": ("artifacts",)},
+    "unlocked_regions": {"keys": ("unlocked_regions",), "tables": ("unlocked_regions",)},
+    "recruit_progress": {"keys": ("recruit_progress",), "tables": ("recruit_progress",)},
+    "myhome": {
+        "keys": ("myhome",),
+        "tables": ("garden_slots", "workshop_slots", "fishing_slots"),
+    },
+    "fertilizers": {"keys": ("fertilizers",), "tables": ("user_fertilizers",)},
+    "life_data": {"keys": ("life_data",), "tables": ("user_life_data",)},
+}
+
+
+def _normalize_sections(sections):
+    if sections is None:
+        return None
+    if isinstance(sections, str):
+        sections = (sections,)
+    normalized = tuple(sorted(set(sections)))
+    unknown = [name for name in normalized if name not in _USER_SECTIONS]
+    if unknown or not normalized:
+        raise ValueError(f"unknown user data sections: {unknown or sections!r}")
+    return normalized
+
+
+def _section_tables(sections):
+    return {table for name in sections for table in _USER_SECTIONS[name]["tables"]}
+
+
+def _project_user_data(data, sections):
+    """Keep only the keys of ``sections``; the result is marked read-only."""
+    projected = {"_data_revision": data["_data_revision"], "_projection": sections}
+    for name in sections:
+        for key in _USER_SECTIONS[name]["keys"]:
+            projected[key] = data.get(key)
+    return projected
+
 
-async def _get_characters_and_artifacts(cur, user_id):
-    await cur.execute("SELECT * FROM characters WHERE user_id = %s", (str(user_id),))
-    char_rows = await cur.fetchall()
+async def _fetch_user_tables(cur, user_id, only=None):
+    """One SELECT per child table (the ``tables`` loader mode).
+
+    ``only`` limits the reads to a set of table names; the rest come back
+    empty so the assembly code can run unchanged.
+    """
+    tables = {}
+    for table, spec in _USER_LOAD_TABLES.items():
+        if only is not None and table not in only:
+            tables[table] = []
+            continue
+        await cur.execute(
+            f"SELECT {', '.join(spec['columns'])} FROM {table} "
+            f"WHERE user_id = %s ORDER BY {', '.join(spec['order'])}",
+            (str(user_id),),
+        )
+        tables[table] = list(await cur.fetchall())
+    tables["user_life_data"] = None
+    if only is None or "user_life_data" in only:
+        await cur.execute("SELECT data FROM user_life_data WHERE user_id=%s", (str(user_id),))
+        tables["user_life_data"] = await cur.fetchone()
+    return tables
+
+
+def _aggregate_user_sql(only=None):
+    subqueries = []
+    for table, spec in _USER_LOAD_TABLES.items():
+        if only is not None and table not in only:
+            continue
+        pairs = ", ".join(
+            f"'{col}', CAST({col} AS CHAR)" if col in spec.get("json", ()) else f"'{col}', {col}"
+            for col in spec["columns"]
+        )
+        subqueries.append(
+            f"(SELECT JSON_ARRAYAGG(JSON_OBJECT({pairs})) FROM {table} "
+            f"WHERE user_id=u.user_id) AS agg_{table}"
+        )
+    if only is None or "user_life_data" in only:
+        subqueries.append(
+            "(SELECT CAST(data AS CHAR) FROM user_life_data WHERE user_id=u.user_id) AS agg_user_life_data"
+        )
+    if not subqueries:
+        return "SELECT u.* FROM users u WHERE u.user_id = %s"
+    return f"SELECT u.*, {', '.join(subqueries)} FROM users u WHERE u.user_id = %s"
+
+
+_AGGREGATE_USER_SQL = _aggregate_user_sql()
+
+
+def _split_aggregate_row(row):
+    """Turn one aggregate row back into the rows ``_fetch_user_tables`` returns."""
+    user_row = {k: v for k, v in row.items() if not k.startswith("agg_")}
+    tables = {}
+    for table, spec in _USER_LOAD_TABLES.items():
+        rows = _json_column(row.get(f"agg_{table}"), [])
+        order = spec["order"]
+        # MySQL sorts NULL first; mirror it so both loaders agree.
+        rows.sort(key=lambda r: tuple((r[col] is not None, r[col]) for col in order))
+        tables[table] = rows
+    life = row.get("agg_user_life_data")
+    tables["user_life_data"] = {"data": life} if life is not None else None
+    return user_row, tables
+
+
+def _inventory_from_rows(rows):
+    return {row['item_name']: row['quantity'] for row in rows}
+
+
+def _characters_and_artifacts_from_rows(char_rows, art_rows):
     characters = []
     for row in char_rows:
         char_data = {
@@ -299,23 +293,21 @@ async def _get_characters_and_artifacts(cur, user_id):
             "max_mental": row['max_mental'], "current_mental": row['current_mental'],
             "attack": row['attack'], "defense": row['defense'], "defense_rate": row['defense_rate'],
             "card_slots": row['card_slots'],
-            "equipped_cards": json.loads(row['equipped_cards']) if row['equipped_cards'] else [],
-            "equipped_engraved_artifact": json.loads(row['equipped_engraved_artifact']) if row.get('equipped_engraved_artifact') else None,
+            "equipped_cards": _json_column(row['equipped_cards'], []),
+            "equipped_engraved_artifact": _json_column(row.get('equipped_engraved_artifact'), None),
             "status_effects": {}, "is_recruited": True, "is_down": False
         }
         characters.append(char_data)
 
-    await cur.execute("SELECT * FROM artifacts WHERE user_id = %s", (str(user_id),))
-    art_rows = await cur.fetchall()
     artifacts = []
     for row in art_rows:
         art = {
             "id": row['id'], "name": row['name'], "rank": row['rank_level'], "grade": row['grade'],
-            "level": row['level'], "prefix": row['prefix'], "stats": json.loads(row['stats']) if row['stats'] else {},
+            "level": row['level'], "prefix": row['prefix'], "stats": _json_column(row['stats'], {}),
             "special": row['special'], "description": row['description'],
             "equipped_char_index": row.get('equipped_char_index', -1),
-            "gems": json.loads(row["gems"]) if row.get("gems") else [],
-            "metadata": json.loads(row["metadata"]) if row.get("metadata") else {},
+            "gems": _json_column(row.get("gems"), []),
+            "metadata": _json_column(row.get("metadata"), {}),
         }
         artifacts.append(art)
         eq_idx = row.get('equipped_char_index', -1)
@@ -323,15 +315,10 @@ async def _get_characters_and_artifacts(cur, user_id):
             characters[eq_idx]["equipped_artifact"] = art
     return characters, artifacts
 
-async def _get_myhome_data(cur, user_id, user_row):
-    await cur.execute("SELECT * FROM garden_slots WHERE user_id = %s ORDER BY slot_index", (str(user_id),))
-    g_slots = [{"planted": bool(r['planted']), "plant_name": r['plant_name'], "stage": r['stage'], "last_invest_count": r['last_invest_count'], "fertilizer": r['fertilizer']} for r in await cur.fetchall()]
-    
-    await cur.execute("SELECT * FROM workshop_slots WHERE user_id = %s", (str(user_id),))
-    w_slots = [{"slot_index": r['slot_index'], "craft_item": r['craft_item'], "start_count": r['start_count'], "required_count": r['required_count']} for r in await cur.fetchall()]
-
-    await cur.execute("SELECT * FROM fishing_slots WHERE user_id = %s", (str(user_id),))
-    f_slots = [{"fish": r['fish_name'], "start_count": r['start_count']} for r in await cur.fetchall()]
+def _myhome_from_rows(user_row, tables):
+    g_slots = [{"planted": bool(r['planted']), "plant_name": r['plant_name'], "stage": r['stage'], "last_invest_count": r['last_invest_count'], "fertilizer": r['fertilizer']} for r in tables["garden_slots"]]
+    w_slots = [{"slot_index": r['slot_index'], "craft_item": r['craft_item'], "start_count": r['start_count'], "required_count": r['required_count']} for r in tables["workshop_slots"]]
+    f_slots = [{"fish": r['fish_name'], "start_count": r['start_count']} for r in tables["fishing_slots"]]
 
     return {
         "garden": {"level": user_row['garden_level'] or 1, "slots": g_slots, "water_can": user_row['water_can'] or 0},
@@ -351,103 +338,223 @@ async def _get_myhome_data(cur, user_id, user_row):
         "construction_step": user_row.get('construction_step', 0)
     }
 
-async def get_user_data(user_id, user_name=None):
+def _estimate_snapshot_bytes(rows):
+    """Cheap size estimate from the serialized row image of a snapshot."""
+    size = len(rows["life_data"])
+    size += sum(len(v) for v in rows["users"].values() if isinstance(v, str))
+    for table in tuple(_KEYED_SAVE_TABLES) + tuple(_REPLACED_SAVE_TABLES):
+        size += 64 * len(rows[table])
+    return size
+
+
+def _cache_user_snapshot(user_key, revision, data, rows):
+    old = _user_snapshot_cache.pop(user_key, None)
+    if old:
+        _user_snapshot_cache_stats["bytes"] -= old[2]
+    size = _estimate_snapshot_bytes(rows)
+    _user_snapshot_cache[user_key] = (int(revision), copy.deepcopy(data), size, rows)
+    _user_snapshot_cache_stats["bytes"] += size
+    while _user_snapshot_cache and (
+        len(_user_snapshot_cache) > _USER_SNAPSHOT_CACHE_LIMIT
+        or _user_snapshot_cache_stats["bytes"] > _USER_SNAPSHOT_CACHE_MAX_BYTES
+    ):
+        _, (_, _, evicted_size, _) = _user_snapshot_cache.popitem(last=False)
+        _user_snapshot_cache_stats["bytes"] -= evicted_size
+        _user_snapshot_cache_stats["evictions"] += 1
+
+
+def invalidate_user_snapshot(*user_ids):
+    """Drop cached snapshots after a write that bumped data_revision."""
+    for user_id in user_ids:
+        old = _user_snapshot_cache.pop(str(user_id), None)
+        if old:
+            _user_snapshot_cache_stats["bytes"] -= old[2]
+            _user_snapshot_cache_stats["invalidations"] += 1
+
+
+def get_user_cache_stats():
+    stats = dict(_user_snapshot_cache_stats)
+    stats["entries"] = len(_user_snapshot_cache)
+    return stats
+
+
+async def get_user_data(user_id, user_name=None, sections=None):
+    """Load a user snapshot, reusing the cached copy while data_revision matches.
+
+    With ``sections`` (names from ``_USER_SECTIONS``) only those tables are
+    read and the result is a read-only projection that ``save_user_data``
+    refuses. Projections are served from a valid cache entry when one exists
+    but are never cached themselves.
+    """
+    sections = _normalize_sections(sections)
+    user_key = str(user_id)
+    pending = _pending_saves.get(user_key)
+    if pending:
+        data = copy.deepcopy(pending["data"])
+        return _project_user_data(data, sections) if sections else data
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute("SELECT * FROM users WHERE user_id = %s", (str(user_id),))
-            user_row = await cur.fetchone()
-            if not user_row: return await _get_new_user_data(user_name)
-
-            inventory = await _get_inventory(cur, user_id)
-            characters, artifacts = await _get_characters_and_artifacts(cur, user_id)
-            json_chars = user_row.get("characters")
+            cached = _user_snapshot_cache.get(user_key)
+            if cached:
+                await cur.execute(
+                    "SELECT data_revision FROM users WHERE user_id=%s", (user_key,)
+                )
+                row = await cur.fetchone()
+                if row and int(row["data_revision"] or 0) == cached[0]:
+                    if user_key in _user_snapshot_cache:
+                        _user_snapshot_cache.move_to_end(user_key)
+                    if _save_baselines.get(user_key, (None,))[0] != cached[0]:
+                        _remember_save_baseline(user_key, cached[0], cached[3])
+                    _user_snapshot_cache_stats["hits"] += 1
+                    if sections:
+                        return copy.deepcopy(_project_user_data(cached[1], sections))
+                    data = copy.deepcopy(cached[1])
+                    from cards import register_boss_reward_cards
+
+                    register_boss_reward_cards(data["life_data"])
+                    return data
+                invalidate_user_snapshot(user_key)
+            if sections:
+                _user_snapshot_cache_stats["projected_loads"] += 1
+                data, _ = await _load_user_data(cur, user_id, user_name, sections=sections)
+                return data
+            _user_snapshot_cache_stats["misses"] += 1
+            data, baseline = await _load_user_data(cur, user_id, user_name)
+    if baseline is not None:
+        _remember_save_baseline(user_key, data["_data_revision"], baseline)
+        _cache_user_snapshot(user_key, data["_data_revision"], data, baseline)
+    return data
+
+
+async def _load_user_data(cur, user_id, user_name=None, mode=None, sections=None):
+    """Read every user table; returns the snapshot and its stored row image.
+
+    ``tables`` issues one SELECT per table; ``aggregate`` fetches the whole
+    user in a single statement with JSON_ARRAYAGG subqueries. Both feed the
+    same assembly code, so the snapshot shape is identical. With normalized
+    ``sections`` only their tables are read and the row image is None.
+    """
+    only = _section_tables(sections) if sections else None
+    if (mode or USER_LOADER_MODE) == "aggregate":
+        sql = _AGGREGATE_USER_SQL if only is None else _aggregate_user_sql(only)
+        await cur.execute(sql, (str(user_id),))
+        row = await cur.fetchone()
+        user_row, tables = _split_aggregate_row(row) if row else (None, None)
+    else:
+        await cur.execute("SELECT * FROM users WHERE user_id = %s", (str(user_id),))
+        user_row = await cur.fetchone()
+        tables = await _fetch_user_tables(cur, user_id, only) if user_row else None
+    if not user_row:
+        data = await _get_new_user_data(user_name)
+        return (_project_user_data(data, sections) if sections else data), None
+    if sections:
+        data, _ = _assemble_user_data(user_id, user_row, tables, with_baseline=False)
+        return _project_user_data(data, sections), None
+    return _assemble_user_data(user_id, user_row, tables)
+
+
+def _assemble_user_data(user_id, user_row, tables, with_baseline=True):
+    inventory = _inventory_from_rows(tables["inventory"])
+    characters, artifacts = _characters_and_artifacts_from_rows(
+        tables["characters"], tables["artifacts"]
+    )
+    has_character_rows = bool(characters)
+    json_chars = user_row.get("characters")
+    parsed_json_chars = []
+    if json_chars:
+        try:
+            parsed_json_chars = (
+                json.loads(json_chars) if isinstance(json_chars, str) else json_chars
+            )
+            if not isinstance(parsed_json_chars, list):
+                parsed_json_chars = []
+        except (TypeError, ValueError):
+            logger.warning("Invalid users.characters JSON for user %s", user_id)
             parsed_json_chars = []
-            if json_chars:
-                try:
-                    parsed_json_chars = (
-                        json.loads(json_chars) if isinstance(json_chars, str) else json_chars
-                    )
-                    if not isinstance(parsed_json_chars, list):
-                        parsed_json_chars = []
-                except (TypeError, ValueError):
-                    logger.warning("Invalid users.characters JSON for user %s", user_id)
-                    parsed_json_chars = []
-
-            # The relational character rows remain authoritative for persisted
-            # combat stats. Preserve character-specific extension fields from the
-            # JSON snapshot so loading does not silently erase them.
-            if characters and parsed_json_chars:
-                json_by_name = {
-                    str(item.get("name")): item
-                    for item in parsed_json_chars
-                    if isinstance(item, dict) and item.get("name")
-                }
-                merged_characters = []
-                for index, relational in enumerate(characters):
-                    extension = json_by_name.get(str(relational.get("name")))
-                    if extension is None and index < len(parsed_json_chars):
-                        candidate = parsed_json_chars[index]
-                        extension = candidate if isinstance(candidate, dict) else None
-                    merged = copy.deepcopy(extension) if extension else {}
-                    merged.update(relational)
-                    if "equipped_artifact" not in relational:
-                        merged["equipped_artifact"] = None
-                    merged_characters.append(merged)
-                characters = merged_characters
-
-            if not characters:
-                if parsed_json_chars:
-                    characters = parsed_json_chars
-            if not characters:
-                new_char = copy.deepcopy(DEFAULT_PLAYER_DATA)
-                new_char["name"] = f"모험가_{str(user_id)[-4:]}"
-                characters = [new_char]
-
-            await cur.execute("SELECT region_name FROM unlocked_regions WHERE user_id = %s", (str(user_id),))
-            unlocked_regions = [r['region_name'] for r in await cur.fetchall()] or ["기원의 쌍성"]
-
-            await cur.execute("SELECT char_key, progress FROM recruit_progress WHERE user_id = %s", (str(user_id),))
-            recruit_progress = {r['char_key']: r['progress'] for r in await cur.fetchall()}
-
-            myhome_data = await _get_myhome_data(cur, user_id, user_row)
-            await cur.execute("SELECT data FROM user_life_data WHERE user_id=%s", (str(user_id),))
-            life_row = await cur.fetchone()
-            life_data = {}
-            if life_row and life_row.get("data"):
-                try:
-                    life_data = json.loads(life_row["data"]) if isinstance(life_row["data"], str) else life_row["data"]
-                except (TypeError, ValueError):
-                    logger.warning("Invalid life_data JSON for user %s", user_id)
-
-            await cur.execute("SELECT target FROM user_fertilizers WHERE user_id = %s", (str(user_id),))
-            fertilizers = [{"target": r['target']} for r in await cur.fetchall()]
-
-            data = {
-                "_data_revision": int(user_row.get("data_revision", 0) or 0),
-                "pt": user_row['pt'] or 0, "money": user_row['money'] or 0,
-                "last_checkin": str(user_row['last_checkin']) if user_row['last_checkin'] else None,
-                "investigator_index": user_row['investigator_index'] or 0,
-                "main_quest_id": user_row['main_quest_id'] or 0,
-                "main_quest_current": user_row['main_quest_current'] or 0,
-                "main_quest_index": user_row['main_quest_index'] or 0,
-                "main_quest_progress": json.loads(user_row['main_quest_progress']) if user_row.get('main_quest_progress') else {},
-                "cards": json.loads(user_row['cards']) if user_row['cards'] else ["기본공격", "기본방어", "기본반격"],
-                "buffs": json.loads(user_row['buffs']) if user_row['buffs'] else {},
-                "inventory": inventory, "characters": characters, "artifacts": artifacts,
-                "unlocked_regions": unlocked_regions, "recruit_progress": recruit_progress,
-                "myhome": myhome_data, "fertilizers": fertilizers,
-                "daily_quests": json.loads(user_row['daily_quests']) if user_row.get('daily_quests') else [],
-                "last_quest_date": str(user_row['last_quest_date']) if user_row.get('last_quest_date') else None,
-                "current_dungeon": json.loads(user_row['current_dungeon']) if user_row.get('current_dungeon') else {},
-                "guild_rank": user_row.get('guild_rank'),
-                "guild_data": json.loads(user_row['guild_data']) if user_row.get('guild_data') else {},
-                "life_data": life_data,
-            }
-            from cards import register_boss_reward_cards
-
-            register_boss_reward_cards(life_data)
-            return data
+
+    # The relational character rows remain authoritative for persisted
+    # combat stats. Preserve character-specific extension fields from the
+    # JSON snapshot so loading does not silently erase them.
+    if characters and parsed_json_chars:
+        json_by_name = {
+            str(item.get("name")): item
+            for item in parsed_json_chars
+            if isinstance(item, dict) and item.get("name")
+        }
+        merged_characters = []
+        for index, relational in enumerate(characters):
+            extension = json_by_name.get(str(relational.get("name")))
+            if extension is None and index < len(parsed_json_chars):
+                candidate = parsed_json_chars[index]
+                extension = candidate if isinstance(candidate, dict) else None
+            merged = copy.deepcopy(extension) if extension else {}
+            merged.update(relational)
+            if "equipped_artifact" not in relational:
+                merged["equipped_artifact"] = None
+            merged_characters.append(merged)
+        characters = merged_characters
+
+    if not characters:
+        if parsed_json_chars:
+            characters = parsed_json_chars
+    if not characters:
+        new_char = copy.deepcopy(DEFAULT_PLAYER_DATA)
+        new_char["name"] = f"모험가_{str(user_id)[-4:]}"
+        characters = [new_char]
+
+    stored_regions = [r['region_name'] for r in tables["unlocked_regions"]]
+    unlocked_regions = stored_regions or ["기원의 쌍성"]
+
+    recruit_progress = {r['char_key']: r['progress'] for r in tables["recruit_progress"]}
+
+    myhome_data = _myhome_from_rows(user_row, tables)
+    life_row = tables["user_life_data"]
+    life_data = {}
+    if life_row and life_row.get("data"):
+        try:
+            life_data = json.loads(life_row["data"]) if isinstance(life_row["data"], str) else life_row["data"]
+        except (TypeError, ValueError):
+            logger.warning("Invalid life_data JSON for user %s", user_id)
+
+    fertilizers = [{"target": r['target']} for r in tables["user_fertilizers"]]
+
+    data = {
+        "_data_revision": int(user_row.get("data_revision", 0) or 0),
+        "pt": user_row['pt'] or 0, "money": user_row['money'] or 0,
+        "last_checkin": str(user_row['last_checkin']) if user_row['last_checkin'] else None,
+        "investigator_index": user_row['investigator_index'] or 0,
+        "main_quest_id": user_row['main_quest_id'] or 0,
+        "main_quest_current": user_row['main_quest_current'] or 0,
+        "main_quest_index": user_row['main_quest_index'] or 0,
+        "main_quest_progress": json.loads(user_row['main_quest_progress']) if user_row.get('main_quest_progress') else {},
+        "cards": json.loads(user_row['cards']) if user_row['cards'] else ["기본공격", "기본방어", "기본반격"],
+        "buffs": json.loads(user_row['buffs']) if user_row['buffs'] else {},
+        "inventory": inventory, "characters": characters, "artifacts": artifacts,
+        "unlocked_regions": unlocked_regions, "recruit_progress": recruit_progress,
+        "myhome": myhome_data, "fertilizers": fertilizers,
+        "daily_quests": json.loads(user_row['daily_quests']) if user_row.get('daily_quests') else [],
+        "last_quest_date": str(user_row['last_quest_date']) if user_row.get('last_quest_date') else None,
+        "current_dungeon": json.loads(user_row['current_dungeon']) if user_row.get('current_dungeon') else {},
+        "guild_rank": user_row.get('guild_rank'),
+        "guild_data": json.loads(user_row['guild_data']) if user_row.get('guild_data') else {},
+        "life_data": life_data,
+    }
+    baseline = None
+    if with_baseline:
+        # Record what the tables hold at this revision so the next save can
+        # write only the difference. Defaults filled in above are not rows.
+        baseline = _build_save_rows(str(user_id), data)
+        if not has_character_rows:
+            baseline["characters"] = []
+        baseline["unlocked_regions"] = {
+            r: (str(user_id), r) for r in stored_regions
+        }
+
+    from cards import register_boss_reward_cards
+
+    register_boss_reward_cards(life_data)
+    return data, baseline
 
 def _sync_obtained_wiki(data):
     """현재 보유·성장 데이터를 '한 번 얻은 기록'으로 보존한다."""
@@ -479,9 +586,298 @@ def _sync_obtained_wiki(data):
         remember("titles", key)
 
 
-async def _save_user_data_unlocked(user_id, data):
+_USER_SAVE_COLUMNS = (
+    "pt", "money", "last_checkin", "investigator_index",
+    "main_quest_id", "main_quest_current", "main_quest_index",
+    "garden_level", "water_can", "workshop_level", "fishing_level",
+    "fishing_rod", "fishing_spot_level", "total_subjugations",
+    "cards", "buffs", "main_quest_progress", "total_investigations",
+    "total_turns", "fishing_max_slots", "max_subjugation_depth",
+    "daily_quests", "last_quest_date", "construction_step", "current_dungeon",
+    "max_subjugation_char", "max_subjugation_region",
+    "guild_rank", "guild_data", "characters",
+)
+
+# Tables with a natural key per user: only changed keys are rewritten.
+# ``upsert`` is None when the row must be deleted and re-inserted instead
+# (artifact ids are globally unique, so an upsert could steal another
+# user's row).
+_KEYED_SAVE_TABLES = {
+    "inventory": {
+        "key": "item_name",
+        "insert": "INSERT INTO inventory (user_id, item_name, quantity) VALUES (%s, %s, %s)",
+        "upsert": """INSERT INTO inventory (user_id, item_name, quantity)
+                     VALUES (%s, %s, %s) AS new
+                     ON DUPLICATE KEY UPDATE quantity=new.quantity""",
+    },
+    "artifacts": {
+        "key": "id",
+        "insert": """INSERT INTO artifacts
+            (id,user_id,name,rank_level,grade,level,prefix,stats,special,
+             description,equipped_char_index,gems,metadata)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)""",
+        "upsert": None,
+    },
+    "unlocked_regions": {
+        "key": "region_name",
+        "insert": "INSERT INTO unlocked_regions (user_id, region_name) VALUES (%s, %s)",
+        "upsert": None,
+    },
+    "recruit_progress": {
+        "key": "char_key",
+        "insert": "INSERT INTO recruit_progress (user_id, char_key, progress) VALUES (%s, %s, %s)",
+        "upsert": """INSERT INTO recruit_progress (user_id, char_key, progress)
+                     VALUES (%s, %s, %s) AS new
+                     ON DUPLICATE KEY UPDATE progress=new.progress""",
+    },
+}
+
+# Ordered slot tables without a usable unique key are replaced as a whole,
+# but only when their row list actually changed.
+_REPLACED_SAVE_TABLES = {
+    "characters": """INSERT INTO characters (user_id, name, hp, current_hp, max_mental, current_mental, attack, defense, defense_rate, card_slots, equipped_cards, equipped_engraved_artifact) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+    "garden_slots": "INSERT INTO garden_slots (user_id, slot_index, planted, plant_name, stage, last_invest_count, fertilizer) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+    "user_fertilizers": "INSERT INTO user_fertilizers (user_id, target) VALUES (%s, %s)",
+    "workshop_slots": "INSERT INTO workshop_slots (user_id, slot_index, craft_item, start_count, required_count) VALUES (%s, %s, %s, %s, %s)",
+    "fishing_slots": "INSERT INTO fishing_slots (user_id, fish_name, start_count) VALUES (%s, %s, %s)",
+}
+
+_SAVE_BASELINE_LIMIT = 4096
+_save_baselines = OrderedDict()
+_USER_SNAPSHOT_CACHE_LIMIT = 1024
+_USER_SNAPSHOT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_user_snapshot_cache = OrderedDict()
+_user_snapshot_cache_stats = {
+    "hits": 0,
+    "misses": 0,
+    "projected_loads": 0,
+    "evictions": 0,
+    "invalidations": 0,
+    "bytes": 0,
+}
+_save_metrics = {
+    "saves": 0,
+    "incremental_saves": 0,
+    "full_saves": 0,
+    "rows_written": 0,
+    "write_behind_saves": 0,
+    "coalesced_saves": 0,
+    "write_behind_flushes": 0,
+    "write_behind_failures": 0,
+    "last_rows_written": 0,
+}
+
+
+def get_save_metrics():
+    """Return save counters; ``last_rows_written`` covers the latest commit."""
+    return dict(_save_metrics)
+
+
+def _remember_save_baseline(user_key, revision, rows):
+    _save_baselines[user_key] = (int(revision), rows)
+    _save_baselines.move_to_end(user_key)
+    while len(_save_baselines) > _SAVE_BASELINE_LIMIT:
+        _save_baselines.popitem(last=False)
+
+
+def _build_save_rows(user_id, data):
+    """Flatten a user snapshot into the exact rows the save path would write."""
+    myhome = data.get("myhome", {})
+    garden = myhome.get("garden", {})
+    fishing = myhome.get("fishing", {})
+    users = {
+        "pt": data.get("pt", 0), "money": data.get("money", 0),
+        "last_checkin": data.get("last_checkin"),
+        "investigator_index": data.get("investigator_index", 0),
+        "main_quest_id": data.get("main_quest_id", 0),
+        "main_quest_current": data.get("main_quest_current", 0),
+        "main_quest_index": data.get("main_quest_index", 0),
+        "garden_level": garden.get("level", 1), "water_can": garden.get("water_can", 0),
+        "workshop_level": myhome.get("workshop_level", 1),
+        "fishing_level": myhome.get("fishing_level", 1),
+        "fishing_rod": fishing.get("rod", 0), "fishing_spot_level": fishing.get("spot_level", 0),
+        "total_subjugations": myhome.get("total_subjugations", 0),
+        "cards": json.dumps(data.get("cards", [])),
+        "buffs": json.dumps(data.get("buffs", {})),
+        "main_quest_progress": json.dumps(data.get("main_quest_progress", {})),
+        "total_investigations": myhome.get("total_investigations", 0),
+        "total_turns": myhome.get("total_turns", 0),
+        "fishing_max_slots": fishing.get("max_dismantle_slots", 3),
+        "max_subjugation_depth": myhome.get("max_subjugation_depth", 0),
+        "daily_quests": json.dumps(data.get("daily_quests", [])),
+        "last_quest_date": data.get("last_quest_date"),
+        "construction_step": myhome.get("construction_step", 0),
+        "current_dungeon": json.dumps(data.get("current_dungeon", {})),
+        "max_subjugation_char": myhome.get("max_subjugation_char", ""),
+        "max_subjugation_region": myhome.get("max_subjugation_region", ""),
+        "guild_rank": data.get("guild_rank"),
+        "guild_data": json.dumps(data.get("guild_data", {})),
+        "characters": json.dumps(data.get("characters", [])),
+    }
+
+    artifact_owner_map = {}
+    for idx, c in enumerate(data.get("characters", [])):
+        eq_art = c.get("equipped_artifact")
+        if eq_art and isinstance(eq_art, dict) and eq_art.get("id"):
+            artifact_owner_map[eq_art["id"]] = idx
+
+    artifacts = {}
+    for a in data.get("artifacts") or []:
+        owner_idx = artifact_owner_map.get(a.get("id"), a.get("equipped_char_index", -1))
+        artifacts[a.get("id")] = (
+            a.get("id"), user_id, a.get("name"), a.get("rank", 1), a.get("grade", 1),
+            a.get("level", 0), a.get("prefix", ""), json.dumps(a.get("stats", {})),
+            a.get("special"), a.get("description"), owner_idx,
+            json.dumps(a.get("gems", []), ensure_ascii=False),
+            json.dumps(a.get("metadata", {}), ensure_ascii=False),
+        )
+
+    return {
+        "users": users,
+        "life_data": json.dumps(data.get("life_data", {}), ensure_ascii=False),
+        "inventory": {
+            k: (user_id, k, v) for k, v in (data.get("inventory") or {}).items() if v > 0
+        },
+        "artifacts": artifacts,
+        "unlocked_regions": {
+            r: (user_id, r) for r in data.get("unlocked_regions") or []
+        },
+        "recruit_progress": {
+            k: (user_id, k, v) for k, v in (data.get("recruit_progress") or {}).items()
+        },
+        "characters": [
+            (
+                user_id, c.get("name", "Unknown"), c.get("hp", 100), c.get("current_hp", 100),
+                c.get("max_mental", 50), c.get("current_mental", 50), c.get("attack", 5), c.get("defense", 0),
+                c.get("defense_rate", 0), c.get("card_slots", 4), json.dumps(c.get("equipped_cards", [])),
+                json.dumps(c.get("equipped_engraved_artifact")) if c.get("equipped_engraved_artifact") else None,
+            )
+            for c in data.get("characters") or []
+        ],
+        "garden_slots": [
+            (user_id, i, s.get("planted", False), s.get("plant_name"), s.get("stage", 0), s.get("last_invest_count", 0), s.get("fertilizer"))
+            for i, s in enumerate(garden.get("slots") or [])
+        ],
+        "user_fertilizers": [(user_id, f.get("target")) for f in data.get("fertilizers") or []],
+        "workshop_slots": [
+            (user_id, s.get("slot_index", 0), s.get("craft_item"), s.get("start_count", 0), s.get("required_count", 0))
+            for s in myhome.get("workshop_slots") or []
+        ],
+        "fishing_slots": [
+            (user_id, s.get("fish"), s.get("start_count", 0))
+            for s in fishing.get("dismantle_slots") or []
+        ],
+    }
+
+
+def _diff_save_rows(base, rows):
+    """Compute the minimal change set that turns ``base`` into ``rows``."""
+    changes = {
+        "users": {
+            col: rows["users"][col]
+            for col in _USER_SAVE_COLUMNS
+            if base["users"].get(col) != rows["users"][col]
+        },
+        "life_data": rows["life_data"] if base["life_data"] != rows["life_data"] else None,
+        "upserts": {},
+        "deletes": {},
+        "replace": {},
+    }
+    for table in _KEYED_SAVE_TABLES:
+        old, new = base[table], rows[table]
+        deletes = [key for key in old if key not in new]
+        upserts = [row for key, row in new.items() if old.get(key) != row]
+        if _KEYED_SAVE_TABLES[table]["upsert"] is None:
+            deletes += [key for key, row in new.items() if key in old and old[key] != row]
+        if deletes:
+            changes["deletes"][table] = deletes
+        if upserts:
+            changes["upserts"][table] = upserts
+    for table in _REPLACED_SAVE_TABLES:
+        if base[table] != rows[table]:
+            changes["replace"][table] = rows[table]
+    return changes
+
+
+async def _write_full_snapshot(cur, user_id, rows):
+    users = rows["users"]
+    columns = ", ".join(_USER_SAVE_COLUMNS)
+    placeholders = ", ".join(["%s"] * (len(_USER_SAVE_COLUMNS) + 1))
+    assignments = ", ".join(f"{col}=new.{col}" for col in _USER_SAVE_COLUMNS)
+    await cur.execute(
+        f"""INSERT INTO users (user_id, {columns})
+            VALUES ({placeholders}) AS new
+            ON DUPLICATE KEY UPDATE {assignments}""",
+        (user_id,) + tuple(users[col] for col in _USER_SAVE_COLUMNS),
+    )
+    await cur.execute(
+        """INSERT INTO user_life_data (user_id, data) VALUES (%s, %s) AS new
+           ON DUPLICATE KEY UPDATE data=new.data""",
+        (user_id, rows["life_data"]),
+    )
+    written = 2
+    for table, spec in _KEYED_SAVE_TABLES.items():
+        await cur.execute(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+        written += max(0, cur.rowcount or 0)
+        if rows[table]:
+            await cur.executemany(spec["insert"], list(rows[table].values()))
+            written += len(rows[table])
+    for table, insert_sql in _REPLACED_SAVE_TABLES.items():
+        await cur.execute(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+        written += max(0, cur.rowcount or 0)
+        if rows[table]:
+            await cur.executemany(insert_sql, rows[table])
+            written += len(rows[table])
+    return written
+
+
+async def _write_change_set(cur, user_id, changes, next_revision):
+    """Apply a change set; the revision bump shares the scalar UPDATE."""
+    assignments = [f"{col}=%s" for col in changes["users"]]
+    await cur.execute(
+        f"UPDATE users SET {', '.join(assignments + ['data_revision=%s'])} WHERE user_id=%s",
+        tuple(changes["users"].values()) + (next_revision, user_id),
+    )
+    written = 1
+    if changes["life_data"] is not None:
+        await cur.execute(
+            """INSERT INTO user_life_data (user_id, data) VALUES (%s, %s) AS new
+               ON DUPLICATE KEY UPDATE data=new.data""",
+            (user_id, changes["life_data"]),
+        )
+        written += 1
+    for table, keys in changes["deletes"].items():
+        key_col = _KEYED_SAVE_TABLES[table]["key"]
+        await cur.execute(
+            f"DELETE FROM {table} WHERE user_id=%s AND {key_col} IN ({', '.join(['%s'] * len(keys))})",
+            (user_id, *keys),
+        )
+        written += len(keys)
+    for table, upsert_rows in changes["upserts"].items():
+        spec = _KEYED_SAVE_TABLES[table]
+        await cur.executemany(spec["upsert"] or spec["insert"], upsert_rows)
+        written += len(upsert_rows)
+    for table, table_rows in changes["replace"].items():
+        await cur.execute(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+        written += max(0, cur.rowcount or 0)
+        if table_rows:
+            await cur.executemany(_REPLACED_SAVE_TABLES[table], table_rows)
+            written += len(table_rows)
+    return written
+
+
+async def _save_user_data_unlocked(user_id, data, expected_revision=None, target_revision=None):
+    """Write ``data`` in one transaction.
+
+    ``expected_revision``/``target_revision`` let a write-behind flush check
+    against the revision the chain started from and land on the revision the
+    caller already holds; by default both follow ``data["_data_revision"]``.
+    """
+    if data.get("_projection"):
+        raise ReadOnlyUserDataError(user_id, data["_projection"])
     _sync_obtained_wiki(data)
     user_key = str(user_id)
+    rows = _build_save_rows(user_key, data)
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
@@ -496,162 +892,46 @@ async def _save_user_data_unlocked(user_id, data):
                 )
                 revision_row = await cur.fetchone()
                 current_revision = int((revision_row or (0,))[0] or 0)
-                loaded_revision = int(data.get("_data_revision", current_revision) or 0)
+                if expected_revision is None:
+                    loaded_revision = int(data.get("_data_revision", current_revision) or 0)
+                else:
+                    loaded_revision = int(expected_revision)
                 if revision_row and loaded_revision != current_revision:
                     raise StaleUserDataError(user_key, loaded_revision, current_revision)
-                next_revision = current_revision + 1
-
-                artifact_owner_map = {}
-                for idx, c in enumerate(data.get("characters", [])):
-                    eq_art = c.get("equipped_artifact")
-                    if eq_art and isinstance(eq_art, dict) and eq_art.get("id"):
-                        artifact_owner_map[eq_art["id"]] = idx
-
-                myhome = data.get("myhome", {})
-                json_cols = {
-                    'cards': json.dumps(data.get("cards", [])),
-                    'buffs': json.dumps(data.get("buffs", {})),
-                    'main_quest_progress': json.dumps(data.get("main_quest_progress", {})),
-                    'daily_quests': json.dumps(data.get("daily_quests", [])),
-                    'current_dungeon': json.dumps(data.get("current_dungeon", {})),
-                    'guild_data': json.dumps(data.get("guild_data", {})),
-                    'characters': json.dumps(data.get("characters", []))
-                }
-
-                await cur.execute("""
-                    INSERT INTO users 
-                    (user_id, pt, money, last_checkin, investigator_index, 
-                     main_quest_id, main_quest_current, main_quest_index,
-                     garden_level, water_can, workshop_level, fishing_level, fishing_rod, fishing_spot_level, total_subjugations, cards, buffs, main_quest_progress, total_investigations, total_turns, fishing_max_slots, max_subjugation_depth, daily_quests, last_quest_date, construction_step, current_dungeon, max_subjugation_char, max_subjugation_region, guild_rank, guild_data, characters)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) AS new
-                    ON DUPLICATE KEY UPDATE
-                    pt=new.pt, money=new.money, last_checkin=new.last_checkin,
-                    investigator_index=new.investigator_index,
-                    main_quest_id=new.main_quest_id, main_quest_current=new.main_quest_current, main_quest_index=new.main_quest_index,
-                    garden_level=new.garden_level, water_can=new.water_can, workshop_level=new.workshop_level,
-                    fishing_level=new.fishing_level, fishing_rod=new.fishing_rod, fishing_spot_level=new.fishing_spot_level,
-                    total_subjugations=new.total_subjugations, cards=new.cards, buffs=new.buffs, 
-                    main_quest_progress=new.main_quest_progress, total_investigations=new.total_investigations,
-                    total_turns=new.total_turns,
-                    fishing_max_slots=new.fishing_max_slots, max_subjugation_depth=new.max_subjugation_depth,
-                    daily_quests=new.daily_quests, last_quest_date=new.last_quest_date,
-                    construction_step=new.construction_step, current_dungeon=new.current_dungeon,
-                    max_subjugation_char=new.max_subjugation_char, max_subjugation_region=new.max_subjugation_region,
-                    guild_rank=new.guild_rank, guild_data=new.guild_data, characters=new.characters
-                """, (
-                    str(user_id), data.get("pt", 0), data.get("money", 0), data.get("last_checkin"),
-                    data.get("investigator_index", 0),
-                    data.get("main_quest_id", 0), data.get("main_quest_current", 0), data.get("main_quest_index", 0),
-                    myhome.get("garden", {}).get("level", 1), myhome.get("garden", {}).get("water_can", 0),
-                    myhome.get("workshop_level", 1), myhome.get("fishing_level", 1),
-                    myhome.get("fishing", {}).get("rod", 0), myhome.get("fishing", {}).get("spot_level", 0),
-                    myhome.get("total_subjugations", 0),
-                    json_cols['cards'], json_cols['buffs'], json_cols['main_quest_progress'],
-                    myhome.get("total_investigations", 0), myhome.get("total_turns", 0),
-                    myhome.get("fishing", {}).get("max_dismantle_slots", 3),
-                    myhome.get("max_subjugation_depth", 0), json_cols['daily_quests'], data.get("last_quest_date"),
-                    myhome.get("construction_step", 0), json_cols['current_dungeon'],
-                    myhome.get("max_subjugation_char", ""), myhome.get("max_subjugation_region", ""),
-                    data.get("guild_rank"), json_cols['guild_data'], json_cols['characters']
-                ))
-
-                await cur.execute(
-                    """INSERT INTO user_life_data (user_id, data) VALUES (%s, %s) AS new
-                       ON DUPLICATE KEY UPDATE data=new.data""",
-                    (str(user_id), json.dumps(data.get("life_data", {}), ensure_ascii=False)),
-                )
-
-                await cur.execute("DELETE FROM inventory WHERE user_id = %s", (user_id,))
-                if data.get("inventory"):
-                    inv_list = [(user_id, k, v) for k, v in data["inventory"].items() if v > 0]
-                    if inv_list: await cur.executemany("INSERT INTO inventory (user_id, item_name, quantity) VALUES (%s, %s, %s)", inv_list)
-
-                await cur.execute("DELETE FROM characters WHERE user_id = %s", (user_id,))
-                if data.get("characters"):
-                    char_rows = []
-                    for c in data["characters"]:
-                        char_rows.append((
-                            user_id, c.get("name", "Unknown"), c.get("hp", 100), c.get("current_hp", 100),
-                            c.get("max_mental", 50), c.get("current_mental", 50), c.get("attack", 5), c.get("defense", 0),
-                            c.get("defense_rate", 0), c.get("card_slots", 4), json.dumps(c.get("equipped_cards", [])),
-                            json.dumps(c.get("equipped_engraved_artifact")) if c.get("equipped_engraved_artifact") else None
-                        ))
-                    await cur.executemany("""INSERT INTO characters (user_id, name, hp, current_hp, max_mental, current_mental, attack, defense, defense_rate, card_slots, equipped_cards, equipped_engraved_artifact) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""", char_rows)
-
-                await cur.execute("DELETE FROM artifacts WHERE user_id = %s", (user_id,))
-                if data.get("artifacts"):
-                    art_rows = []
-                    for a in data["artifacts"]:
-                        owner_idx = artifact_owner_map.get(a.get("id"), a.get("equipped_char_index", -1))
-                        art_rows.append((
-                            a.get("id"), user_id, a.get("name"), a.get("rank", 1), a.get("grade", 1),
-                            a.get("level", 0), a.get("prefix", ""), json.dumps(a.get("stats", {})),
-                            a.get("special"), a.get("description"), owner_idx,
-                            json.dumps(a.get("gems", []), ensure_ascii=False),
-                            json.dumps(a.get("metadata", {}), ensure_ascii=False),
-                        ))
-                    await cur.executemany("""INSERT INTO artifacts
-                        (id,user_id,name,rank_level,grade,level,prefix,stats,special,
-                         description,equipped_char_index,gems,metadata)
-                        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)""", art_rows)
-
-                await cur.execute("DELETE FROM unlocked_regions WHERE user_id = %s", (user_id,))
-                if data.get("unlocked_regions"):
-                    await cur.executemany("INSERT INTO unlocked_regions (user_id, region_name) VALUES (%s, %s)", [(user_id, r) for r in data["unlocked_regions"]])
-
-                await cur.execute("DELETE FROM garden_slots WHERE user_id = %s", (user_id,))
-                if myhome.get("garden", {}).get("slots"):
-                    g_rows = [(user_id, i, s.get("planted", False), s.get("plant_name"), s.get("stage", 0), s.get("last_invest_count", 0), s.get("fertilizer")) for i, s in enumerate(myhome["garden"]["slots"])]
-                    await cur.executemany("INSERT INTO garden_slots (user_id, slot_index, planted, plant_name, stage, last_invest_count, fertilizer) VALUES (%s, %s, %s, %s, %s, %s, %s)", g_rows)
-
-                await cur.execute("DELETE FROM user_fertilizers WHERE user_id = %s", (user_id,))
-                if data.get("fertilizers"):
-                    await cur.executemany("INSERT INTO user_fertilizers (user_id, target) VALUES (%s, %s)", [(user_id, f.get("target")) for f in data["fertilizers"]])
-
-                await cur.execute("DELETE FROM workshop_slots WHERE user_id = %s", (user_id,))
-                if myhome.get("workshop_slots"):
-                    w_rows = [(user_id, s.get("slot_index", 0), s.get("craft_item"), s.get("start_count", 0), s.get("required_count", 0)) for s in myhome["workshop_slots"]]
-                    await cur.executemany("INSERT INTO workshop_slots (user_id, slot_index, craft_item, start_count, required_count) VALUES (%s, %s, %s, %s, %s)", w_rows)
-
-                await cur.execute("DELETE FROM fishing_slots WHERE user_id = %s", (user_id,))
-                if myhome.get("fishing", {}).get("dismantle_slots"):
-                    f_rows = [(user_id, s.get("fish"), s.get("start_count", 0)) for s in myhome["fishing"]["dismantle_slots"]]
-                    await cur.executemany("INSERT INTO fishing_slots (user_id, fish_name, start_count) VALUES (%s, %s, %s)", f_rows)
-
-                await cur.execute("DELETE FROM recruit_progress WHERE user_id = %s", (user_id,))
-                if data.get("recruit_progress"):
-                    await cur.executemany("INSERT INTO recruit_progress (user_id, char_key, progress) VALUES (%s, %s, %s)", [(user_id, k, v) for k, v in data["recruit_progress"].items()])
-
-                await cur.execute(
-                    "UPDATE users SET data_revision=%s WHERE user_id=%s",
-                    (next_revision, user_key),
-                )
-                history_snapshot = copy.deepcopy(data)
-                history_snapshot["_data_revision"] = next_revision
-                await cur.execute(
-                    """INSERT INTO user_save_history (user_id, revision, data)
-                       VALUES (%s, %s, %s)""",
-                    (
-                        user_key,
-                        next_revision,
-                        json.dumps(history_snapshot, ensure_ascii=False, default=str),
-                    ),
-                )
-                await cur.execute(
-                    """DELETE FROM user_save_history
-                       WHERE user_id=%s
-                         AND id NOT IN (
-                             SELECT id FROM (
-                                 SELECT id FROM user_save_history
-                                 WHERE user_id=%s
-                                 ORDER BY revision DESC, id DESC
-                                 LIMIT 10
-                             ) AS retained
-                         )""",
-                    (user_key, user_key),
+                next_revision = max(current_revision + 1, int(target_revision or 0))
+
+                # Every writer bumps data_revision, so a baseline recorded at the
+                # locked revision is exactly what the tables hold right now.
+                baseline = _save_baselines.get(user_key)
+                if revision_row and baseline and baseline[0] == current_revision:
+                    changes = _diff_save_rows(baseline[1], rows)
+                    written = await _write_change_set(cur, user_key, changes, next_revision)
+                    incremental = True
+                    if "max_subjugation_depth" in changes["users"]:
+                        await _record_subjugation_best(cur, user_key, rows["users"])
+                else:
+                    written = await _write_full_snapshot(cur, user_key, rows)
+                    await cur.execute(
+                        "UPDATE users SET data_revision=%s WHERE user_id=%s",
+                        (next_revision, user_key),
+                    )
+                    incremental = False
+                    await _record_subjugation_best(cur, user_key, rows["users"])
+                # Freeze the history image now; life_data is already serialized
+                # in ``rows``. Encoding and the INSERT happen after commit.
+                history_text = json.dumps(
+                    {k: v for k, v in data.items() if k != "life_data"},
+                    ensure_ascii=False, default=str,
                 )
                 await conn.commit()
                 data["_data_revision"] = next_revision
+                _queue_save_history(user_key, next_revision, history_text, rows["life_data"])
+                invalidate_user_snapshot(user_key)
+                _remember_save_baseline(user_key, next_revision, rows)
+                _save_metrics["saves"] += 1
+                _save_metrics["incremental_saves" if incremental else "full_saves"] += 1
+                _save_metrics["rows_written"] += written
+                _save_metrics["last_rows_written"] = written
             except StaleUserDataError:
                 await conn.rollback()
                 logger.warning(
@@ -663,21 +943,178 @@ async def _save_user_data_unlocked(user_id, data):
                 raise
             except Exception as e:
                 await conn.rollback()
+                _save_baselines.pop(user_key, None)
                 logger.error(f"Save Error for {user_id}: {e}")
                 raise
 
 
+# subjugation_leaderboard keeps each user's best depth on the all-region board
+# ('*') and on the board of the region it was reached in. Saves that change
+# max_subjugation_depth upsert both rows; GREATEST keeps the better record.
+SUBJUGATION_ALL_REGIONS = "*"
+
+
+async def _record_subjugation_best(cur, user_key, users_row):
+    depth = int(users_row.get("max_subjugation_depth") or 0)
+    if depth <= 0:
+        return
+    char_name = users_row.get("max_subjugation_char") or ""
+    region = users_row.get("max_subjugation_region") or ""
+    boards = [SUBJUGATION_ALL_REGIONS] + ([region] if region else [])
+    await cur.executemany(
+        """INSERT INTO subjugation_leaderboard (board, user_id, depth, char_name, region)
+           VALUES (%s, %s, %s, %s, %s) AS new
+           ON DUPLICATE KEY UPDATE
+             char_name=IF(new.depth > subjugation_leaderboard.depth, new.char_name, subjugation_leaderboard.char_name),
+             region=IF(new.depth > subjugation_leaderboard.depth, new.region, subjugation_leaderboard.region),
+             achieved_at=IF(new.depth > subjugation_leaderboard.depth, CURRENT_TIMESTAMP, subjugation_leaderboard.achieved_at),
+             depth=GREATEST(subjugation_leaderboard.depth, new.depth)""",
+        [(board, user_key, depth, char_name, region) for board in boards],
+    )
+
+
 async def save_user_data(user_id, data):
-    """Serialize snapshots per user and reject stale full-state writes."""
+    """Serialize snapshots per user and reject stale full-state writes.
+
+    With SAVE_WRITE_BEHIND_MS set, the snapshot is queued instead and
+    consecutive saves inside the window are committed once.
+    """
     user_key = str(user_id)
-    async with _user_save_locks[user_key]:
+    # While an economy write holds the lock (flushed_user_lock), a queued save
+    # would land on the revision that write is about to bump and fail unseen
+    # in the background; take the synchronous path so the conflict reaches
+    # the caller.
+    if SAVE_WRITE_BEHIND_MS > 0 and not _user_save_locks.locked(user_key):
+        return _queue_write_behind(user_key, data)
+    async with _user_save_locks.hold(user_key):
+        await _flush_pending_save_unlocked(user_key)
         return await _save_user_data_unlocked(user_key, data)
 
 
+# Write-behind saves. Each pending entry is a private copy of the newest
+# snapshot plus the revision the chain started from (``base``) and the one
+# the caller now holds (``revision``); the flush commits straight to
+# ``revision`` so the caller's next save still matches. Reads of a user with a
+# pending entry are served from it.
+try:
+    from config import SAVE_WRITE_BEHIND_MS
+except ImportError:
+    SAVE_WRITE_BEHIND_MS = 0
+
+_pending_saves = {}
+_failed_write_behind = {}  # user -> (revision of the lost chain, error)
+
+
+def _queue_write_behind(user_key, data):
+    if data.get("_projection"):
+        raise ReadOnlyUserDataError(user_key, data["_projection"])
+    loaded = int(data.get("_data_revision", 0) or 0)
+    failed = _failed_write_behind.get(user_key)
+    if failed and failed[0] == loaded:
+        del _failed_write_behind[user_key]
+        raise failed[1]
+    _sync_obtained_wiki(data)
+    pending = _pending_saves.get(user_key)
+    if pending:
+        if loaded != pending["revision"]:
+            raise StaleUserDataError(user_key, loaded, pending["revision"])
+        pending["revision"] += 1
+        pending["saves"] += 1
+        _save_metrics["coalesced_saves"] += 1
+    else:
+        pending = {"base": loaded, "revision": loaded + 1, "saves": 1}
+        pending["task"] = asyncio.get_running_loop().create_task(
+            _flush_after_window(user_key, pending)
+        )
+        _pending_saves[user_key] = pending
+    pending["data"] = copy.deepcopy(data)
+    pending["data"]["_data_revision"] = pending["revision"]
+    data["_data_revision"] = pending["revision"]
+    _save_metrics["write_behind_saves"] += 1
+
+
+async def _flush_after_window(user_key, pending):
+    await asyncio.sleep(SAVE_WRITE_BEHIND_MS / 1000)
+    if _pending_saves.get(user_key) is pending:
+        await flush_user_saves(user_key)
+
+
+async def _flush_pending_save_unlocked(user_key):
+    pending = _pending_saves.pop(user_key, None)
+    if not pending:
+        return
+    if pending["task"] is not asyncio.current_task():
+        pending["task"].cancel()
+    try:
+        await _save_user_data_unlocked(
+            user_key,
+            pending["data"],
+            expected_revision=pending["base"],
+            target_revision=pending["revision"],
+        )
+        _save_metrics["write_behind_flushes"] += 1
+        _failed_write_behind.pop(user_key, None)
+    except Exception as e:
+        # Nobody awaits a deferred save; report it on the chain's next save.
+        _save_metrics["write_behind_failures"] += 1
+        _failed_write_behind[user_key] = (pending["revision"], e)
+        logger.warning("Write-behind save for %s failed: %s", user_key, e)
+
+
+async def flush_user_saves(*user_ids):
+    """Commit pending write-behind saves now.
+
+    Economy operations that write users rows directly call this first so the
+    queued snapshot is not overtaken and rejected as stale.
+    """
+    for user_id in user_ids:
+        user_key = str(user_id)
+        if user_key in _pending_saves:
+            async with _user_save_locks.hold(user_key):
+                await _flush_pending_save_unlocked(user_key)
+
+
+@asynccontextmanager
+async def flushed_user_lock(*user_ids):
+    """Hold the users' save locks with their pending saves committed.
+
+    Economy writers that bump data_revision in their own transaction run
+    inside this, so no save can be queued against the revision they are
+    about to replace. Locks are taken in key order to avoid deadlocks.
+    """
+    async with AsyncExitStack() as stack:
+        for user_key in sorted({str(user_id) for user_id in user_ids}):
+            await stack.enter_async_context(_user_save_locks.hold(user_key))
+            await _flush_pending_save_unlocked(user_key)
+        yield
+
+
+@asynccontextmanager
+async def flushed_user_lock_where(sql, params, *user_ids):
+    """flushed_user_lock for ``user_ids`` plus every user id ``sql`` selects.
+
+    For trades whose counterparty is only known from a listing row; all of
+    the resolved locks are still taken in key order.
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params)
+            found = [row[0] for row in await cur.fetchall()]
+    async with flushed_user_lock(*user_ids, *found):
+        yield
+
+
+async def flush_all_saves():
+    """Commit every pending write-behind save (bot shutdown)."""
+    await flush_user_saves(*list(_pending_saves))
+
+
 async def mutate_user_data(user_id, mutator, user_name=None):
     """Apply a focused change to the latest snapshot under the user's save lock."""
     user_key = str(user_id)
-    async with _user_save_locks[user_key]:
+    async with _user_save_locks.hold(user_key):
+        await _flush_pending_save_unlocked(user_key)
         latest = await get_user_data(user_key, user_name)
         result = mutator(latest)
         if inspect.isawaitable(result):
@@ -686,9 +1123,239 @@ async def mutate_user_data(user_id, mutator, user_name=None):
         return latest
 
 
+# user_save_history is written after commit by one background task per event
+# loop. The queue is bounded: when it is full the entry is dropped and counted,
+# and the next entry for that user becomes a delta against the last row that
+# was actually written.
+_SAVE_HISTORY_QUEUE_LIMIT = 2048
+_SAVE_HISTORY_BATCH = 100
+_SAVE_HISTORY_KEYFRAME_INTERVAL = 10
+_SAVE_HISTORY_RETAIN = 10
+_SAVE_HISTORY_TRIM_INTERVAL = 600
+_SAVE_HISTORY_HEAD_LIMIT = 512
+
+_save_history_writer = None  # (loop, queue, task)
+_save_history_heads = OrderedDict()  # user -> (revision, snapshot, deltas since keyframe)
+_save_history_stats = {
+    "queued": 0,
+    "written": 0,
+    "keyframes": 0,
+    "deltas": 0,
+    "dropped": 0,
+    "failed": 0,
+    "payload_bytes": 0,
+    "trimmed": 0,
+}
+
+
+def get_save_history_stats():
+    stats = dict(_save_history_stats)
+    writer = _save_history_writer
+    stats["pending"] = writer[1].qsize() if writer else 0
+    return stats
+
+
+def _save_history_queue():
+    global _save_history_writer
+    loop = asyncio.get_running_loop()
+    writer = _save_history_writer
+    if writer is None or writer[0] is not loop:
+        queue = asyncio.Queue(maxsize=_SAVE_HISTORY_QUEUE_LIMIT)
+    elif writer[2].done():
+        queue = writer[1]
+    else:
+        return writer[1]
+    task = loop.create_task(_save_history_worker(queue))
+    _save_history_writer = (loop, queue, task)
+    return queue
+
+
+def _queue_save_history(user_key, revision, history_text, life_text):
+    try:
+        _save_history_queue().put_nowait((user_key, revision, history_text, life_text))
+        _save_history_stats["queued"] += 1
+    except asyncio.QueueFull:
+        _save_history_stats["dropped"] += 1
+        logger.warning("Save history queue full; dropped revision %s of %s", revision, user_key)
+
+
+def _encode_save_history(user_key, revision, history_text, life_text):
+    snapshot = json.loads(history_text)
+    snapshot["life_data"] = json.loads(life_text)
+    snapshot["_data_revision"] = revision
+    head = _save_history_heads.pop(user_key, None)
+    if head and head[0] < revision and head[2] < _SAVE_HISTORY_KEYFRAME_INTERVAL - 1:
+        kind, base, deltas = save_history.DELTA, head[0], head[2] + 1
+        payload = save_history.encode_payload(save_history.make_patch(head[1], snapshot))
+    else:
+        kind, base, deltas = save_history.KEYFRAME, None, 0
+        payload = save_history.encode_payload(snapshot)
+    _save_history_heads[user_key] = (revision, snapshot, deltas)
+    while len(_save_history_heads) > _SAVE_HISTORY_HEAD_LIMIT:
+        _save_history_heads.popitem(last=False)
+    return (user_key, revision, kind, base, payload)
+
+
+async def _write_save_history(batch):
+    entries = [_encode_save_history(*item) for item in batch]
+    try:
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(
+                    """INSERT INTO user_save_history
+                       (user_id, revision, kind, base_revision, payload)
+                       VALUES (%s, %s, %s, %s, %s)""",
+                    entries,
+                )
+                await conn.commit()
+    except Exception:
+        # The chain in the table no longer matches the in-memory heads.
+        for entry in entries:
+            _save_history_heads.pop(entry[0], None)
+        raise
+    for entry in entries:
+        _save_history_stats["written"] += 1
+        _save_history_stats["keyframes" if entry[2] == save_history.KEYFRAME else "deltas"] += 1
+        _save_history_stats["payload_bytes"] += len(entry[4])
+
+
+async def _save_history_worker(queue):
+    last_trim = time.monotonic()
+    while True:
+        batch = []
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout=_SAVE_HISTORY_TRIM_INTERVAL))
+            while len(batch) < _SAVE_HISTORY_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+            await _write_save_history(batch)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _save_history_stats["failed"] += len(batch)
+            logger.error("Save history write failed (%s entries): %s", len(batch), e)
+        finally:
+            for _ in batch:
+                queue.task_done()
+        if time.monotonic() - last_trim >= _SAVE_HISTORY_TRIM_INTERVAL:
+            last_trim = time.monotonic()
+            try:
+                await trim_save_history()
+            except Exception as e:
+                logger.warning("Save history retention skipped: %s", e)
+
+
+async def flush_save_history():
+    """Wait until every queued history entry has been written (or failed)."""
+    writer = _save_history_writer
+    if writer and writer[0] is asyncio.get_running_loop() and not writer[2].done():
+        await writer[1].join()
+
+
+async def trim_save_history(retain=None, batch_size=500):
+    """Keep the last ``retain`` revisions per user plus the keyframe they need.
+
+    Runs periodically from the history worker; returns the deleted row count.
+    """
+    retain = int(retain or _SAVE_HISTORY_RETAIN)
+    deleted = 0
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """SELECT user_id FROM user_save_history
+                   GROUP BY user_id HAVING COUNT(*) > %s LIMIT %s""",
+                (retain, int(batch_size)),
+            )
+            for (user_key,) in await cur.fetchall():
+                await cur.execute(
+                    """SELECT revision FROM user_save_history WHERE user_id=%s
+                       ORDER BY revision DESC LIMIT 1 OFFSET %s""",
+                    (user_key, retain - 1),
+                )
+                floor = await cur.fetchone()
+                if not floor:
+                    continue
+                await cur.execute(
+                    """SELECT MAX(revision) FROM user_save_history
+                       WHERE user_id=%s AND revision<=%s AND kind<>%s""",
+                    (user_key, floor[0], save_history.DELTA),
+                )
+                keep_from = (await cur.fetchone() or (None,))[0]
+                if keep_from is None:
+                    continue
+                await cur.execute(
+                    "DELETE FROM user_save_history WHERE user_id=%s AND revision<%s",
+                    (user_key, keep_from),
+                )
+                deleted += cur.rowcount
+            await conn.commit()
+    _save_history_stats["trimmed"] += deleted
+    return deleted
+
+
+async def list_user_revisions(user_id, limit=None):
+    """Revisions that ``load_user_revision`` can rebuild, newest first."""
+    await flush_save_history()
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """SELECT revision FROM user_save_history WHERE user_id=%s
+                   ORDER BY revision DESC LIMIT %s""",
+                (str(user_id), int(limit or _SAVE_HISTORY_RETAIN)),
+            )
+            return [int(row[0]) for row in await cur.fetchall()]
+
+
+async def load_user_revision(user_id, revision):
+    """Rebuild the snapshot saved at ``revision``; None when it is not kept."""
+    await flush_save_history()
+    user_key = str(user_id)
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """SELECT MAX(revision) FROM user_save_history
+                   WHERE user_id=%s AND revision<=%s AND kind<>%s""",
+                (user_key, int(revision), save_history.DELTA),
+            )
+            start = (await cur.fetchone() or (None,))[0]
+            if start is None:
+                return None
+            await cur.execute(
+                """SELECT revision, kind, base_revision, payload, data
+                   FROM user_save_history
+                   WHERE user_id=%s AND revision BETWEEN %s AND %s
+                   ORDER BY revision, id""",
+                (user_key, start, int(revision)),
+            )
+            rows = list(await cur.fetchall())
+    if not rows or int(rows[-1][0]) != int(revision):
+        return None
+    return save_history.rebuild_snapshot(rows)
+
+
+async def restore_user_revision(user_id, revision):
+    """Write a kept history revision back as the user's current state."""
+    snapshot = await load_user_revision(user_id, revision)
+    if snapshot is None:
+        return None
+    user_key = str(user_id)
+    async with _user_save_locks.hold(user_key):
+        await _flush_pending_save_unlocked(user_key)
+        latest = await get_user_data(user_key)
+        snapshot["_data_revision"] = latest["_data_revision"]
+        await _save_user_data_unlocked(user_key, snapshot)
+    return snapshot
+
+
 async def update_user_resources(user_id, money_change=0, pt_change=0):
     user_key = str(user_id)
-    async with _user_save_locks[user_key]:
+    async with _user_save_locks.hold(user_key):
+        await _flush_pending_save_unlocked(user_key)
         pool = await get_db_pool()
         async with pool.acquire() as conn:
             async with conn.cursor() as cur:
@@ -707,11 +1374,156 @@ async def update_user_resources(user_id, money_change=0, pt_change=0):
                     )
                     result = await cur.fetchone()
                     await conn.commit()
+                    invalidate_user_snapshot(user_id)
+                    return result
+                except Exception:
+                    await conn.rollback()
+                    raise
+
+
+# Idempotency ledgers appended by ``apply_user_deltas(once=...)`` keep the
+# same tail length ensure_boss_training_data() trims them to.
+_DELTA_LEDGER_LIMIT = 500
+
+
+def _life_json_path(dotted):
+    return "$" + "".join(f'."{key}"' for key in str(dotted).split("."))
+
+
+def _life_parent_skeleton(dotted_paths):
+    """A JSON_MERGE_PATCH document that creates missing parent objects only."""
+    skeleton = {}
+    for dotted in dotted_paths:
+        node = skeleton
+        for key in str(dotted).split(".")[:-1]:
+            node = node.setdefault(key, {})
+    return skeleton
+
+
+async def apply_user_deltas(user_id, money=0, pt=0, items=None, life_paths=None, once=None):
+    """Apply counter changes in SQL without loading or rewriting the snapshot.
+
+    ``items`` maps item names to signed deltas; ``life_paths`` maps dotted
+    life_data paths to JSON values to set. Negative balances are rejected by
+    the UPDATE itself and raise InsufficientResourcesError with nothing
+    applied. ``once=(dotted_path, token)`` makes the call idempotent: when
+    ``token`` is already in that life_data list nothing happens and None is
+    returned, otherwise it is appended with the rest. data_revision is bumped
+    once; returns the new ``(money, pt, data_revision)``.
+    """
+    user_key = str(user_id)
+    money, pt = int(money), int(pt)
+    items = {str(name): int(delta) for name, delta in (items or {}).items() if int(delta)}
+    life_paths = dict(life_paths or {})
+    life_targets = list(life_paths)
+    if once:
+        life_targets.append(once[0])
+    async with _user_save_locks.hold(user_key):
+        await _flush_pending_save_unlocked(user_key)
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await conn.begin()
+                    if life_targets:
+                        await cur.execute(
+                            "INSERT IGNORE INTO user_life_data (user_id, data) VALUES (%s, '{}')",
+                            (user_key,),
+                        )
+                    if once:
+                        ledger_path = _life_json_path(once[0])
+                        await cur.execute(
+                            """SELECT JSON_CONTAINS(
+                                   COALESCE(JSON_EXTRACT(data, %s), JSON_ARRAY()), JSON_QUOTE(%s))
+                               FROM user_life_data WHERE user_id=%s FOR UPDATE""",
+                            (ledger_path, str(once[1]), user_key),
+                        )
+                        seen = await cur.fetchone()
+                        if seen and seen[0]:
+                            await conn.rollback()
+                            return None
+
+                    guards, guard_params = [], []
+                    for column, delta in (("money", money), ("pt", pt)):
+                        if delta < 0:
+                            guards.append(f" AND {column}>=%s")
+                            guard_params.append(-delta)
+                    await cur.execute(
+                        "UPDATE users SET money=money+%s, pt=pt+%s, data_revision=data_revision+1"
+                        " WHERE user_id=%s" + "".join(guards),
+                        (money, pt, user_key, *guard_params),
+                    )
+                    if cur.rowcount != 1:
+                        await cur.execute("SELECT money, pt FROM users WHERE user_id=%s", (user_key,))
+                        row = await cur.fetchone()
+                        await conn.rollback()
+                        if not row:
+                            raise LookupError(f"user {user_key} not found")
+                        raise InsufficientResourcesError(user_key, "money" if money < 0 and row[0] < -money else "pt")
+
+                    gains = [(user_key, name, delta) for name, delta in items.items() if delta > 0]
+                    if gains:
+                        await cur.executemany(
+                            """INSERT INTO inventory (user_id, item_name, quantity)
+                               VALUES (%s, %s, %s) AS new
+                               ON DUPLICATE KEY UPDATE quantity=inventory.quantity+new.quantity""",
+                            gains,
+                        )
+                    spent = [name for name, delta in items.items() if delta < 0]
+                    for name in spent:
+                        await cur.execute(
+                            """UPDATE inventory SET quantity=quantity-%s
+                               WHERE user_id=%s AND item_name=%s AND quantity>=%s""",
+                            (-items[name], user_key, name, -items[name]),
+                        )
+                        if cur.rowcount != 1:
+                            await conn.rollback()
+                            raise InsufficientResourcesError(user_key, name)
+                    if spent:
+                        await cur.execute(
+                            "DELETE FROM inventory WHERE user_id=%s AND quantity<=0 AND item_name IN ("
+                            + ",".join(["%s"] * len(spent)) + ")",
+                            (user_key, *spent),
+                        )
+
+                    if life_targets:
+                        assignments, params = [], [
+                            json.dumps(_life_parent_skeleton(life_targets), ensure_ascii=False)
+                        ]
+                        for dotted, value in life_paths.items():
+                            assignments.append("%s, CAST(%s AS JSON)")
+                            params.extend([_life_json_path(dotted), json.dumps(value, ensure_ascii=False)])
+                        if once:
+                            assignments.append(
+                                "%s, JSON_ARRAY_APPEND("
+                                "COALESCE(JSON_EXTRACT(data, %s), JSON_ARRAY()), '$', %s)"
+                            )
+                            params.extend([ledger_path, ledger_path, str(once[1])])
+                        await cur.execute(
+                            "UPDATE user_life_data SET data=JSON_SET(JSON_MERGE_PATCH(data, %s), "
+                            + ", ".join(assignments) + ") WHERE user_id=%s",
+                            (*params, user_key),
+                        )
+                        if once:
+                            await cur.execute(
+                                """UPDATE user_life_data SET data=JSON_REMOVE(data, CONCAT(%s, '[0]'))
+                                   WHERE user_id=%s AND JSON_LENGTH(data, %s) > %s""",
+                                (ledger_path, user_key, ledger_path, _DELTA_LEDGER_LIMIT),
+                            )
+
+                    await cur.execute(
+                        "SELECT money, pt, data_revision FROM users WHERE user_id=%s",
+                        (user_key,),
+                    )
+                    result = await cur.fetchone()
+                    await conn.commit()
+                    invalidate_user_snapshot(user_key)
                     return result
                 except Exception:
                     await conn.rollback()
                     raise
 
+
 GLOBAL_GUILD_ID = 1
 GLOBAL_GUILD_NAME = "공용 길드"
 GUILD_RANK_THRESHOLDS = (
@@ -770,10 +1582,28 @@ def advance_world_turn(user_data, amount=1):
     return myhome["total_turns"]
 
 
+# Users whose single global-guild member row has been verified this process.
+# Membership never changes at runtime; the set only saves the per-call check.
+_global_guild_members = set()
+
+
 async def ensure_global_guild_membership(user_id):
+    user_key = str(user_id)
+    if user_key in _global_guild_members:
+        return
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT guild_id FROM guild_members WHERE user_id=%s",
+                (user_key,),
+            )
+            rows = await cur.fetchall()
+            if [int(row[0]) for row in rows] == [GLOBAL_GUILD_ID]:
+                _global_guild_members.add(user_key)
+                return
+            # New user, or legacy rows in other guilds: fold everything into
+            # one global-guild row and recount the guild.
             try:
                 await conn.begin()
                 await cur.execute(
@@ -786,15 +1616,15 @@ async def ensure_global_guild_membership(user_id):
                 await cur.execute(
                     "SELECT COALESCE(SUM(contribution),0) FROM guild_members "
                     "WHERE user_id=%s FOR UPDATE",
-                    (str(user_id),),
+                    (user_key,),
                 )
                 contribution = int((await cur.fetchone() or (0,))[0] or 0)
-                await cur.execute("DELETE FROM guild_members WHERE user_id=%s", (str(user_id),))
+                await cur.execute("DELETE FROM guild_members WHERE user_id=%s", (user_key,))
                 await cur.execute(
                     """INSERT INTO guild_members
                        (guild_id,user_id,role,contribution)
                        VALUES (%s,%s,'member',%s)""",
-                    (GLOBAL_GUILD_ID, str(user_id), contribution),
+                    (GLOBAL_GUILD_ID, user_key, contribution),
                 )
                 await cur.execute(
                     """UPDATE guilds SET member_count=(
@@ -807,33 +1637,74 @@ async def ensure_global_guild_membership(user_id):
             except Exception:
                 await conn.rollback()
                 raise
+    _global_guild_members.add(user_key)
 
 
-async def get_user_guild_info(user_id):
-    await ensure_global_guild_membership(user_id)
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute("""
-                SELECT g.*, m.role, m.contribution,
-                       (SELECT COALESCE(SUM(m2.contribution),0)
-                        FROM guild_members m2
-                        WHERE m2.guild_id=g.guild_id) AS total_contribution
-                FROM guild_members m JOIN guilds g ON m.guild_id = g.guild_id
+async def _credit_guild_contribution(cur, user_id, amount):
+    """Add ``amount`` to the member row and the guild's running total in one statement.
+
+    guilds.exp is the running total of member contributions; the level is
+    derived from it on read and written back by reconcile_global_guild().
+    Returns False when the member row is missing.
+    """
+    await cur.execute(
+        """UPDATE guild_members m JOIN guilds g ON g.guild_id=m.guild_id
+           SET m.contribution=m.contribution+%s, g.exp=g.exp+%s
+           WHERE m.guild_id=%s AND m.user_id=%s""",
+        (amount, amount, GLOBAL_GUILD_ID, str(user_id)),
+    )
+    return cur.rowcount > 0
+
+
+async def reconcile_global_guild():
+    """Recompute exp, level and member_count from guild_members.
+
+    Returns ``(level, total, drift)`` where drift is how far the running
+    total had moved away from the member sum.
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            try:
+                await conn.begin()
+                await cur.execute(
+                    "SELECT exp FROM guilds WHERE guild_id=%s FOR UPDATE",
+                    (GLOBAL_GUILD_ID,),
+                )
+                row = await cur.fetchone()
+                running = int((row or (0,))[0] or 0)
+                level, total = await _sync_global_guild_level(cur)
+                await cur.execute(
+                    """UPDATE guilds SET member_count=(
+                       SELECT COUNT(*) FROM guild_members WHERE guild_id=%s)
+                       WHERE guild_id=%s""",
+                    (GLOBAL_GUILD_ID, GLOBAL_GUILD_ID),
+                )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+    drift = total - running
+    if drift:
+        logger.warning("Global guild contribution drift corrected: %+d", drift)
+    return level, total, drift
+
+
+async def get_user_guild_info(user_id):
+    await ensure_global_guild_membership(user_id)
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute("""
+                SELECT g.*, m.role, m.contribution
+                FROM guild_members m JOIN guilds g ON m.guild_id = g.guild_id
                 WHERE m.user_id = %s AND m.guild_id = %s
             """, (str(user_id), GLOBAL_GUILD_ID))
             row = await cur.fetchone()
             if not row:
                 return None
-            level = guild_level_for_contribution(row.get("total_contribution", 0))
-            if int(row.get("level", 1) or 1) != level or int(row.get("exp", 0) or 0) != int(row.get("total_contribution", 0) or 0):
-                await cur.execute(
-                    "UPDATE guilds SET level=%s, exp=%s WHERE guild_id=%s",
-                    (level, int(row.get("total_contribution", 0) or 0), GLOBAL_GUILD_ID),
-                )
-                await conn.commit()
-            row["level"] = level
-            row["exp"] = int(row.get("total_contribution", 0) or 0)
+            row["total_contribution"] = int(row.get("exp", 0) or 0)
+            row["level"] = guild_level_for_contribution(row["total_contribution"])
             return row
 
 async def create_guild(user_id, guild_name):
@@ -850,19 +1721,134 @@ async def get_guild_list(limit=5, offset=0):
         async with conn.cursor(aiomysql.DictCursor) as cur:
             await cur.execute("SELECT * FROM guilds WHERE guild_id=%s", (GLOBAL_GUILD_ID,))
             row = await cur.fetchone()
+            if row:
+                row["level"] = guild_level_for_contribution(row.get("exp", 0))
             return [row] if row and int(offset or 0) == 0 else []
 
-async def get_guild_items(guild_id, category=None):
+# Warehouse reads are served from memory. Every function that changes
+# guild_inventory or guild_stored_artifacts bumps the guild's version after
+# it commits, and a cached partition tagged with an older version is read
+# again. guild_inventory is fetched whole and partitioned by category;
+# artifact listings carry summary columns only, and an artifact's data JSON
+# is fetched and decoded by get_guild_artifact_detail when it is opened.
+_guild_warehouse_versions = {}  # guild_id -> version
+_guild_warehouse_cache = {}  # (guild_id, "items" | "artifact") -> (version, rows)
+
+
+def _bump_guild_warehouse(guild_id):
+    guild_id = int(guild_id)
+    _guild_warehouse_versions[guild_id] = _guild_warehouse_versions.get(guild_id, 0) + 1
+
+
+def get_guild_warehouse_version(guild_id):
+    return _guild_warehouse_versions.get(int(guild_id), 0)
+
+
+async def _load_guild_warehouse(guild_id, partition):
+    guild_id = int(guild_id)
+    version = get_guild_warehouse_version(guild_id)
+    cached = _guild_warehouse_cache.get((guild_id, partition))
+    if cached and cached[0] == version:
+        return cached[1]
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            if category == "artifact":
-                await cur.execute("SELECT * FROM guild_stored_artifacts WHERE guild_id = %s", (guild_id,))
+            if partition == "artifact":
+                await cur.execute(
+                    """SELECT id, guild_id, artifact_id, name, rank_level, level, stored_at,
+                              JSON_UNQUOTE(JSON_EXTRACT(data, '$.prefix')) AS prefix
+                       FROM guild_stored_artifacts WHERE guild_id=%s""",
+                    (guild_id,),
+                )
+                rows = list(await cur.fetchall())
             else:
-                sql = "SELECT * FROM guild_inventory WHERE guild_id = %s" + (" AND category = %s" if category else "")
-                params = (guild_id, category) if category else (guild_id,)
-                await cur.execute(sql, params)
-            return await cur.fetchall()
+                await cur.execute("SELECT * FROM guild_inventory WHERE guild_id=%s", (guild_id,))
+                rows = {}
+                for row in await cur.fetchall():
+                    rows.setdefault(row.get("category"), []).append(row)
+    # Tag with the version seen before the read: a write that landed during
+    # the SELECT has already moved the counter on, so it is read again next time.
+    _guild_warehouse_cache[(guild_id, partition)] = (version, rows)
+    return rows
+
+
+def _item_case(amounts):
+    """``CASE item_name WHEN .. THEN .. END`` over ``amounts`` and its params."""
+    sql = "CASE item_name " + " ".join("WHEN %s THEN %s" for _ in amounts) + " END"
+    params = [value for item in amounts.items() for value in item]
+    return sql, params
+
+
+async def _take_guild_items(cur, amounts, guild_id=GLOBAL_GUILD_ID):
+    """Subtract many ``{item_name: count}`` from guild_inventory at once.
+
+    One UPDATE guarded by ``count>=needed`` locks and decrements every row;
+    if any row lacked stock nothing is cleaned up and False is returned so
+    the caller can roll back. Rows left at zero go in one DELETE.
+    """
+    amounts = {str(name): int(count) for name, count in amounts.items() if int(count) > 0}
+    if not amounts:
+        return True
+    case_sql, case_params = _item_case(amounts)
+    names = list(amounts)
+    in_sql = ",".join(["%s"] * len(names))
+    await cur.execute(
+        f"""UPDATE guild_inventory SET count=count-{case_sql}
+            WHERE guild_id=%s AND item_name IN ({in_sql}) AND count>={case_sql}""",
+        tuple(case_params + [guild_id] + names + case_params),
+    )
+    if cur.rowcount != len(names):
+        return False
+    await cur.execute(
+        f"""DELETE FROM guild_inventory
+            WHERE guild_id=%s AND item_name IN ({in_sql}) AND count<=0""",
+        tuple([guild_id] + names),
+    )
+    return True
+
+
+async def _put_guild_items(cur, rows, guild_id=GLOBAL_GUILD_ID, update_category=False):
+    """Add many ``(item_name, count, category)`` rows with one upsert."""
+    rows = [(str(name), int(count), category) for name, count, category in rows if int(count) > 0]
+    if not rows:
+        return
+    values = ",".join(["(%s,%s,%s,%s)"] * len(rows))
+    params = [value for name, count, category in rows for value in (guild_id, name, count, category)]
+    await cur.execute(
+        f"""INSERT INTO guild_inventory (guild_id,item_name,count,category)
+            VALUES {values} AS new
+            ON DUPLICATE KEY UPDATE
+              count=guild_inventory.count+new.count"""
+        + (",\n              category=new.category" if update_category else ""),
+        tuple(params),
+    )
+
+
+async def get_guild_items(guild_id, category=None):
+    if category == "artifact":
+        rows = await _load_guild_warehouse(guild_id, "artifact")
+    else:
+        partitions = await _load_guild_warehouse(guild_id, "items")
+        if category:
+            rows = partitions.get(category, [])
+        else:
+            rows = [row for group in partitions.values() for row in group]
+    return [dict(row) for row in rows]
+
+
+async def get_guild_artifact_detail(guild_id, stored_id):
+    """Full artifact data for one guild_stored_artifacts row, or None."""
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT data FROM guild_stored_artifacts WHERE guild_id=%s AND id=%s",
+                (int(guild_id), int(stored_id)),
+            )
+            row = await cur.fetchone()
+    if not row:
+        return None
+    return _json_column(row[0], {})
 
 async def deposit_guild_item(user_id, guild_id, item_name, count, category, token_rewards, user_name=None):
     try:
@@ -872,77 +1858,75 @@ async def deposit_guild_item(user_id, guild_id, item_name, count, category, toke
     if count <= 0 or int(guild_id) != GLOBAL_GUILD_ID:
         return False, "공용 길드에 양수 수량만 납품할 수 있습니다."
     await ensure_global_guild_membership(user_id)
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor() as cur:
-            try:
-                await conn.begin()
-                # Lock the user snapshot row and invalidate older open menus.
-                await cur.execute(
-                    "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                    (str(user_id),),
-                )
-                await cur.execute(
-                    "SELECT 1 FROM guild_members WHERE guild_id=%s AND user_id=%s FOR UPDATE",
-                    (GLOBAL_GUILD_ID, str(user_id)),
-                )
-                if not await cur.fetchone():
-                    await conn.rollback()
-                    return False, "공용 길드 소속이 아닙니다."
-                await cur.execute(
-                    "SELECT level FROM guilds WHERE guild_id=%s FOR UPDATE",
-                    (GLOBAL_GUILD_ID,),
-                )
-                guild_row = await cur.fetchone()
-                guild_level = max(1, min(10, int((guild_row or (1,))[0] or 1)))
-                efficiency = GUILD_DONATION_EFFICIENCY[guild_level]
-                await cur.execute("SELECT quantity FROM inventory WHERE user_id=%s AND item_name=%s FOR UPDATE", (str(user_id), item_name))
-                row = await cur.fetchone()
-                if not row or row[0] < count:
-                    await conn.rollback()
-                    return False, "보유량 부족"
-                
-                if row[0] == count: await cur.execute("DELETE FROM inventory WHERE user_id=%s AND item_name=%s", (str(user_id), item_name))
-                else: await cur.execute("UPDATE inventory SET quantity=quantity-%s WHERE user_id=%s AND item_name=%s", (count, str(user_id), item_name))
-                
-                scaled_rewards = {
-                    key: (max(0, int(value)) * efficiency + 99) // 100
-                    for key, value in token_rewards.items()
-                    if int(value) > 0
-                }
-                set_c = [f"token_{k} = token_{k} + {int(v)}" for k,v in scaled_rewards.items()]
-                if set_c: await cur.execute(f"UPDATE guilds SET {', '.join(set_c)} WHERE guild_id=%s", (guild_id,))
-                contribution_gain = sum(scaled_rewards.values())
-                if contribution_gain:
+    async with flushed_user_lock(user_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await conn.begin()
+                    # Lock the user snapshot row and invalidate older open menus.
                     await cur.execute(
-                        """UPDATE guild_members SET contribution=contribution+%s
-                           WHERE guild_id=%s AND user_id=%s""",
-                        (contribution_gain, GLOBAL_GUILD_ID, str(user_id)),
+                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                        (str(user_id),),
                     )
-                await _sync_global_guild_level(cur)
-                
-                await cur.execute(
-                    """INSERT INTO guild_log
-                       (guild_id,user_id,user_name,action_type,item_name,count)
-                       VALUES (%s,%s,%s,'donation',%s,%s)""",
-                    (guild_id, str(user_id), user_name, item_name, count),
-                )
-                await conn.commit()
-                token_labels = {"wood": "목재", "iron": "철괴", "magic": "마력", "sorcery": "주술"}
-                gained = ", ".join(
-                    f"{token_labels.get(key, key)} +{int(value)}"
-                    for key, value in scaled_rewards.items()
-                    if int(value) > 0
-                )
-                return True, (
-                    f"{item_name} {count}개 납품 완료"
-                    f"\n공용 자원: {gained or '변화 없음'}"
-                    f"\n개인 공헌도: +{contribution_gain}"
-                    f"\n등급 납품 효율: {efficiency}%"
-                )
-            except Exception as e:
-                await conn.rollback()
-                return False, f"오류: {e}"
+                    await cur.execute(
+                        "SELECT 1 FROM guild_members WHERE guild_id=%s AND user_id=%s FOR UPDATE",
+                        (GLOBAL_GUILD_ID, str(user_id)),
+                    )
+                    if not await cur.fetchone():
+                        await conn.rollback()
+                        return False, "공용 길드 소속이 아닙니다."
+                    await cur.execute(
+                        "SELECT exp FROM guilds WHERE guild_id=%s FOR UPDATE",
+                        (GLOBAL_GUILD_ID,),
+                    )
+                    guild_row = await cur.fetchone()
+                    guild_level = guild_level_for_contribution((guild_row or (0,))[0])
+                    efficiency = GUILD_DONATION_EFFICIENCY[guild_level]
+                    await cur.execute("SELECT quantity FROM inventory WHERE user_id=%s AND item_name=%s FOR UPDATE", (str(user_id), item_name))
+                    row = await cur.fetchone()
+                    if not row or row[0] < count:
+                        await conn.rollback()
+                        return False, "보유량 부족"
+                    
+                    if row[0] == count: await cur.execute("DELETE FROM inventory WHERE user_id=%s AND item_name=%s", (str(user_id), item_name))
+                    else: await cur.execute("UPDATE inventory SET quantity=quantity-%s WHERE user_id=%s AND item_name=%s", (count, str(user_id), item_name))
+                    
+                    scaled_rewards = {
+                        key: (max(0, int(value)) * efficiency + 99) // 100
+                        for key, value in token_rewards.items()
+                        if int(value) > 0
+                    }
+                    set_c = [f"token_{k} = token_{k} + {int(v)}" for k,v in scaled_rewards.items()]
+                    if set_c: await cur.execute(f"UPDATE guilds SET {', '.join(set_c)} WHERE guild_id=%s", (guild_id,))
+                    contribution_gain = sum(scaled_rewards.values())
+                    if contribution_gain:
+                        await _credit_guild_contribution(cur, user_id, contribution_gain)
+
+                    await cur.execute(
+                        """INSERT INTO guild_log
+                           (guild_id,user_id,user_name,action_type,item_name,count)
+                           VALUES (%s,%s,%s,'donation',%s,%s)""",
+                        (guild_id, str(user_id), user_name, item_name, count),
+                    )
+                    await conn.commit()
+                    _bump_guild_warehouse(guild_id)
+                    invalidate_user_snapshot(user_id)
+                    token_labels = {"wood": "목재", "iron": "철괴", "magic": "마력", "sorcery": "주술"}
+                    gained = ", ".join(
+                        f"{token_labels.get(key, key)} +{int(value)}"
+                        for key, value in scaled_rewards.items()
+                        if int(value) > 0
+                    )
+                    return True, (
+                        f"{item_name} {count}개 납품 완료"
+                        f"\n공용 자원: {gained or '변화 없음'}"
+                        f"\n개인 공헌도: +{contribution_gain}"
+                        f"\n등급 납품 효율: {efficiency}%"
+                    )
+                except Exception as e:
+                    await conn.rollback()
+                    return False, f"오류: {e}"
 
 
 async def store_guild_item(user_id, guild_id, item_name, count, category="material", user_name=None):
@@ -955,62 +1939,58 @@ async def store_guild_item(user_id, guild_id, item_name, count, category="materi
         return False, "공용 길드 창고에는 양수 수량만 반입할 수 있습니다."
 
     await ensure_global_guild_membership(user_id)
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                    (str(user_id),),
-                )
-                await cur.execute(
-                    "SELECT 1 FROM guild_members WHERE guild_id=%s AND user_id=%s FOR UPDATE",
-                    (GLOBAL_GUILD_ID, str(user_id)),
-                )
-                if not await cur.fetchone():
-                    await conn.rollback()
-                    return False, "공용 길드 소속이 아닙니다."
-
-                await cur.execute(
-                    "SELECT quantity FROM inventory WHERE user_id=%s AND item_name=%s FOR UPDATE",
-                    (str(user_id), item_name),
-                )
-                row = await cur.fetchone()
-                owned = int(row.get("quantity", 0)) if row else 0
-                if owned < count:
-                    await conn.rollback()
-                    return False, f"보유량이 부족합니다. ({owned}/{count})"
+    async with flushed_user_lock(user_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    await cur.execute(
+                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                        (str(user_id),),
+                    )
+                    await cur.execute(
+                        "SELECT 1 FROM guild_members WHERE guild_id=%s AND user_id=%s FOR UPDATE",
+                        (GLOBAL_GUILD_ID, str(user_id)),
+                    )
+                    if not await cur.fetchone():
+                        await conn.rollback()
+                        return False, "공용 길드 소속이 아닙니다."
 
-                if owned == count:
                     await cur.execute(
-                        "DELETE FROM inventory WHERE user_id=%s AND item_name=%s",
+                        "SELECT quantity FROM inventory WHERE user_id=%s AND item_name=%s FOR UPDATE",
                         (str(user_id), item_name),
                     )
-                else:
+                    row = await cur.fetchone()
+                    owned = int(row.get("quantity", 0)) if row else 0
+                    if owned < count:
+                        await conn.rollback()
+                        return False, f"보유량이 부족합니다. ({owned}/{count})"
+
+                    if owned == count:
+                        await cur.execute(
+                            "DELETE FROM inventory WHERE user_id=%s AND item_name=%s",
+                            (str(user_id), item_name),
+                        )
+                    else:
+                        await cur.execute(
+                            "UPDATE inventory SET quantity=quantity-%s WHERE user_id=%s AND item_name=%s",
+                            (count, str(user_id), item_name),
+                        )
+                    await _put_guild_items(cur, [(item_name, count, category)], update_category=True)
                     await cur.execute(
-                        "UPDATE inventory SET quantity=quantity-%s WHERE user_id=%s AND item_name=%s",
-                        (count, str(user_id), item_name),
+                        """INSERT INTO guild_log
+                           (guild_id,user_id,user_name,action_type,item_name,count)
+                           VALUES (%s,%s,%s,'store_item',%s,%s)""",
+                        (GLOBAL_GUILD_ID, str(user_id), user_name, item_name, count),
                     )
-                await cur.execute(
-                    """INSERT INTO guild_inventory (guild_id,item_name,count,category)
-                       VALUES (%s,%s,%s,%s) AS new
-                       ON DUPLICATE KEY UPDATE
-                         count=guild_inventory.count+new.count,
-                         category=new.category""",
-                    (GLOBAL_GUILD_ID, item_name, count, category),
-                )
-                await cur.execute(
-                    """INSERT INTO guild_log
-                       (guild_id,user_id,user_name,action_type,item_name,count)
-                       VALUES (%s,%s,%s,'store_item',%s,%s)""",
-                    (GLOBAL_GUILD_ID, str(user_id), user_name, item_name, count),
-                )
-                await conn.commit()
-                return True, f"{item_name} {count}개를 길드 공용 창고에 반입했습니다."
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"길드 창고 반입 오류: {exc}"
+                    await conn.commit()
+                    _bump_guild_warehouse(GLOBAL_GUILD_ID)
+                    invalidate_user_snapshot(user_id)
+                    return True, f"{item_name} {count}개를 길드 공용 창고에 반입했습니다."
+                except Exception as exc:
+                    await conn.rollback()
+                    return False, f"길드 창고 반입 오류: {exc}"
 
 
 async def craft_guild_workshop_item(
@@ -1046,186 +2026,460 @@ async def craft_guild_workshop_item(
         return False, "제작 재료가 설정되지 않았습니다."
 
     await ensure_global_guild_membership(user_id)
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    "SELECT 1 FROM guild_members WHERE guild_id=%s AND user_id=%s FOR UPDATE",
-                    (GLOBAL_GUILD_ID, str(user_id)),
-                )
-                if not await cur.fetchone():
-                    await conn.rollback()
-                    return False, "공용 길드 소속이 아닙니다."
-
-                source_table = "inventory" if source == "personal" else "guild_inventory"
-                key_where = "user_id=%s" if source == "personal" else "guild_id=%s"
-                owner_key = str(user_id) if source == "personal" else GLOBAL_GUILD_ID
-                quantity_column = "quantity" if source == "personal" else "count"
-                owned = {}
-                for material_name in sorted(required):
+    async with flushed_user_lock(user_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
                     await cur.execute(
-                        f"""SELECT {quantity_column} AS quantity FROM {source_table}
-                            WHERE {key_where} AND item_name=%s FOR UPDATE""",
-                        (owner_key, material_name),
+                        "SELECT 1 FROM guild_members WHERE guild_id=%s AND user_id=%s FOR UPDATE",
+                        (GLOBAL_GUILD_ID, str(user_id)),
                     )
-                    row = await cur.fetchone()
-                    owned[material_name] = int(row.get("quantity", 0)) if row else 0
-
-                lacking = [
-                    f"{name} {owned.get(name, 0)}/{need}"
-                    for name, need in required.items()
-                    if owned.get(name, 0) < need
-                ]
-                if lacking:
-                    await conn.rollback()
-                    label = "개인 인벤토리" if source == "personal" else "공용 창고"
-                    return False, f"{label} 재료가 부족합니다: " + ", ".join(lacking)
+                    if not await cur.fetchone():
+                        await conn.rollback()
+                        return False, "공용 길드 소속이 아닙니다."
+
+                    if source == "personal":
+                        owned = {}
+                        for material_name in sorted(required):
+                            await cur.execute(
+                                """SELECT quantity FROM inventory
+                                   WHERE user_id=%s AND item_name=%s FOR UPDATE""",
+                                (str(user_id), material_name),
+                            )
+                            row = await cur.fetchone()
+                            owned[material_name] = int(row.get("quantity", 0)) if row else 0
+                        lacking = [
+                            f"{name} {owned.get(name, 0)}/{need}"
+                            for name, need in required.items()
+                            if owned.get(name, 0) < need
+                        ]
+                        if lacking:
+                            await conn.rollback()
+                            return False, "개인 인벤토리 재료가 부족합니다: " + ", ".join(lacking)
 
-                if source == "personal":
-                    await cur.execute(
-                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                        (str(user_id),),
-                    )
+                        await cur.execute(
+                            "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                            (str(user_id),),
+                        )
+                        for material_name, need in required.items():
+                            if owned[material_name] == need:
+                                await cur.execute(
+                                    "DELETE FROM inventory WHERE user_id=%s AND item_name=%s",
+                                    (str(user_id), material_name),
+                                )
+                            else:
+                                await cur.execute(
+                                    """UPDATE inventory SET quantity=quantity-%s
+                                       WHERE user_id=%s AND item_name=%s""",
+                                    (need, str(user_id), material_name),
+                                )
+                    elif not await _take_guild_items(cur, required):
+                        in_sql = ",".join(["%s"] * len(required))
+                        await cur.execute(
+                            f"""SELECT item_name, count FROM guild_inventory
+                                WHERE guild_id=%s AND item_name IN ({in_sql})""",
+                            (GLOBAL_GUILD_ID,) + tuple(required),
+                        )
+                        owned = {row["item_name"]: int(row["count"] or 0) for row in await cur.fetchall()}
+                        lacking = [
+                            f"{name} {owned.get(name, 0)}/{need}"
+                            for name, need in required.items()
+                            if owned.get(name, 0) < need
+                        ]
+                        await conn.rollback()
+                        return False, "공용 창고 재료가 부족합니다: " + ", ".join(lacking)
 
-                for material_name, need in required.items():
-                    if owned[material_name] == need:
+                    if source == "personal":
                         await cur.execute(
-                            f"DELETE FROM {source_table} WHERE {key_where} AND item_name=%s",
-                            (owner_key, material_name),
+                            """INSERT INTO inventory (user_id,item_name,quantity)
+                               VALUES (%s,%s,%s) AS new
+                               ON DUPLICATE KEY UPDATE
+                                 quantity=inventory.quantity+new.quantity""",
+                            (str(user_id), item_name, count),
+                        )
+                        action_type = "workshop_personal"
+                        destination = "개인 인벤토리"
+                    elif auto_donation_rewards:
+                        await cur.execute(
+                            "SELECT exp FROM guilds WHERE guild_id=%s FOR UPDATE",
+                            (GLOBAL_GUILD_ID,),
+                        )
+                        guild_row = await cur.fetchone()
+                        guild_level = guild_level_for_contribution(
+                            (guild_row or {}).get("exp", 0)
+                        )
+                        efficiency = GUILD_DONATION_EFFICIENCY[guild_level]
+                        scaled_rewards = {
+                            str(key): (
+                                max(0, int(value)) * count * efficiency + 99
+                            ) // 100
+                            for key, value in dict(auto_donation_rewards).items()
+                            if str(key) in {"wood", "iron", "magic", "sorcery"}
+                            and int(value) > 0
+                        }
+                        if not scaled_rewards:
+                            await conn.rollback()
+                            return False, "자동 납품 환산값이 올바르지 않습니다."
+                        assignments = ", ".join(
+                            f"token_{key}=token_{key}+%s" for key in scaled_rewards
                         )
-                    else:
                         await cur.execute(
-                            f"""UPDATE {source_table}
-                                SET {quantity_column}={quantity_column}-%s
-                                WHERE {key_where} AND item_name=%s""",
-                            (need, owner_key, material_name),
+                            f"UPDATE guilds SET {assignments} WHERE guild_id=%s",
+                            tuple(scaled_rewards.values()) + (GLOBAL_GUILD_ID,),
+                        )
+                        contribution_gain = sum(scaled_rewards.values())
+                        await _credit_guild_contribution(cur, user_id, contribution_gain)
+                        action_type = "workshop_auto_donate"
+                        destination = (
+                            "길드 공용 자원으로 자동 납품"
+                            f" (공헌도 +{contribution_gain})"
                         )
+                    else:
+                        await _put_guild_items(cur, [(item_name, count, category)], update_category=True)
+                        action_type = "workshop_guild"
+                        destination = "길드 공용 창고"
 
-                if source == "personal":
-                    await cur.execute(
-                        """INSERT INTO inventory (user_id,item_name,quantity)
-                           VALUES (%s,%s,%s) AS new
-                           ON DUPLICATE KEY UPDATE
-                             quantity=inventory.quantity+new.quantity""",
-                        (str(user_id), item_name, count),
-                    )
-                    action_type = "workshop_personal"
-                    destination = "개인 인벤토리"
-                elif auto_donation_rewards:
                     await cur.execute(
-                        "SELECT level FROM guilds WHERE guild_id=%s FOR UPDATE",
-                        (GLOBAL_GUILD_ID,),
-                    )
-                    guild_row = await cur.fetchone()
-                    guild_level = max(
-                        1,
-                        min(10, int((guild_row or {}).get("level", 1) or 1)),
-                    )
-                    efficiency = GUILD_DONATION_EFFICIENCY[guild_level]
-                    scaled_rewards = {
-                        str(key): (
-                            max(0, int(value)) * count * efficiency + 99
-                        ) // 100
-                        for key, value in dict(auto_donation_rewards).items()
-                        if str(key) in {"wood", "iron", "magic", "sorcery"}
-                        and int(value) > 0
-                    }
-                    if not scaled_rewards:
-                        await conn.rollback()
-                        return False, "자동 납품 환산값이 올바르지 않습니다."
-                    assignments = ", ".join(
-                        f"token_{key}=token_{key}+%s" for key in scaled_rewards
-                    )
-                    await cur.execute(
-                        f"UPDATE guilds SET {assignments} WHERE guild_id=%s",
-                        tuple(scaled_rewards.values()) + (GLOBAL_GUILD_ID,),
-                    )
-                    contribution_gain = sum(scaled_rewards.values())
-                    await cur.execute(
-                        """UPDATE guild_members
-                           SET contribution=contribution+%s
-                           WHERE guild_id=%s AND user_id=%s""",
-                        (contribution_gain, GLOBAL_GUILD_ID, str(user_id)),
-                    )
-                    await _sync_global_guild_level(cur)
-                    action_type = "workshop_auto_donate"
-                    destination = (
-                        "길드 공용 자원으로 자동 납품"
-                        f" (공헌도 +{contribution_gain})"
-                    )
-                else:
-                    await cur.execute(
-                        """INSERT INTO guild_inventory (guild_id,item_name,count,category)
-                           VALUES (%s,%s,%s,%s) AS new
-                           ON DUPLICATE KEY UPDATE
-                             count=guild_inventory.count+new.count,
-                             category=new.category""",
-                        (GLOBAL_GUILD_ID, item_name, count, category),
+                        """INSERT INTO guild_log
+                           (guild_id,user_id,user_name,action_type,item_name,count)
+                           VALUES (%s,%s,%s,%s,%s,%s)""",
+                        (GLOBAL_GUILD_ID, str(user_id), user_name, action_type, item_name, count),
                     )
-                    action_type = "workshop_guild"
-                    destination = "길드 공용 창고"
+                    await conn.commit()
+                    _bump_guild_warehouse(GLOBAL_GUILD_ID)
+                    invalidate_user_snapshot(user_id)
+                    return True, f"{item_name} {count}개를 제작해 {destination}에 보관했습니다."
+                except Exception as exc:
+                    await conn.rollback()
+                    return False, f"길드 제작소 오류: {exc}"
+
+
+# Standalone contribution credits (raids, missions, training, cafe) are
+# buffered per user and written by one background task per event loop: the
+# first credit opens a GUILD_CONTRIBUTION_FLUSH_MS window, and a batch of
+# _GUILD_CONTRIBUTION_BATCH events flushes early. One flush is one
+# transaction: a multi-row member upsert, one guilds.exp increment and one
+# guild_log executemany. Failed flushes are put back and retried with
+# exponential backoff; users whose credits keep failing are flushed one by
+# one so a single bad row cannot hold back everyone else, and after
+# _GUILD_CONTRIBUTION_DEAD_LETTER_AFTER failures their credits are written to
+# the dead-letter log (user_key and amount) instead of being retried forever.
+try:
+    from config import GUILD_CONTRIBUTION_FLUSH_MS
+except ImportError:
+    GUILD_CONTRIBUTION_FLUSH_MS = 250
+
+_GUILD_CONTRIBUTION_BATCH = 200
+_GUILD_CONTRIBUTION_MAX_BACKOFF = 60.0
+_GUILD_CONTRIBUTION_ISOLATE_AFTER = 3
+_GUILD_CONTRIBUTION_DEAD_LETTER_AFTER = 8
+
+_guild_contribution_totals = {}  # user -> buffered amount
+_guild_contribution_counts = {}  # user -> buffered events
+_guild_contribution_logs = []  # guild_log rows
+_guild_contribution_events = 0
+_guild_contribution_attempts = {}  # user -> consecutive failed flushes
+_guild_contribution_writer = None  # (loop, task, pending, full)
+_guild_contribution_locks = KeyedLocks("guild_contribution")
+_guild_contribution_stats = {
+    "buffered": 0,
+    "flushes": 0,
+    "member_rows": 0,
+    "log_rows": 0,
+    "failures": 0,
+    "dead_lettered": 0,
+}
 
-                await cur.execute(
-                    """INSERT INTO guild_log
-                       (guild_id,user_id,user_name,action_type,item_name,count)
-                       VALUES (%s,%s,%s,%s,%s,%s)""",
-                    (GLOBAL_GUILD_ID, str(user_id), user_name, action_type, item_name, count),
-                )
-                await conn.commit()
-                return True, f"{item_name} {count}개를 제작해 {destination}에 보관했습니다."
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"길드 제작소 오류: {exc}"
 
+def get_guild_contribution_stats():
+    stats = dict(_guild_contribution_stats)
+    stats["pending_events"] = _guild_contribution_events
+    return stats
 
-async def add_guild_contribution(user_id, amount, action_type=None, item_name=None, user_name=None):
-    """공용 길드 공헌도를 원자적으로 추가한다."""
-    try:
-        amount = int(amount)
-    except (TypeError, ValueError):
-        return False
-    if amount <= 0:
-        return False
-    await ensure_global_guild_membership(user_id)
+
+def _guild_contribution_signals():
+    global _guild_contribution_writer
+    loop = asyncio.get_running_loop()
+    writer = _guild_contribution_writer
+    if writer is not None and writer[0] is loop and not writer[1].done():
+        return writer[2], writer[3]
+    pending, full = asyncio.Event(), asyncio.Event()
+    task = loop.create_task(_guild_contribution_worker(pending, full))
+    _guild_contribution_writer = (loop, task, pending, full)
+    return pending, full
+
+
+def _guild_contribution_backoff(failures):
+    return min(
+        _GUILD_CONTRIBUTION_MAX_BACKOFF,
+        GUILD_CONTRIBUTION_FLUSH_MS / 1000 * 2 ** failures,
+    )
+
+
+async def _guild_contribution_worker(pending, full):
+    failures = 0
+    while True:
+        await pending.wait()
+        try:
+            await asyncio.wait_for(full.wait(), GUILD_CONTRIBUTION_FLUSH_MS / 1000)
+        except asyncio.TimeoutError:
+            pass
+        pending.clear()
+        full.clear()
+        try:
+            async with _guild_contribution_locks.hold("flush"):
+                await _flush_guild_contributions()
+            failures = 0
+        except Exception as e:
+            failures += 1
+            delay = _guild_contribution_backoff(failures)
+            logger.error(
+                "Guild contribution flush failed (attempt %s, retry in %.1fs): %s",
+                failures, delay, e,
+            )
+            await asyncio.sleep(delay)
+            if _guild_contribution_events:
+                pending.set()
+
+
+def _take_guild_contributions():
+    global _guild_contribution_totals, _guild_contribution_counts
+    global _guild_contribution_logs, _guild_contribution_events
+    batch = (_guild_contribution_totals, _guild_contribution_counts, _guild_contribution_logs)
+    _guild_contribution_totals, _guild_contribution_counts = {}, {}
+    _guild_contribution_logs, _guild_contribution_events = [], 0
+    return batch
+
+
+def _restore_guild_contributions(totals, counts, logs):
+    global _guild_contribution_events
+    for user_key, amount in totals.items():
+        _guild_contribution_totals[user_key] = _guild_contribution_totals.get(user_key, 0) + amount
+        _guild_contribution_counts[user_key] = (
+            _guild_contribution_counts.get(user_key, 0) + counts.get(user_key, 0)
+        )
+    _guild_contribution_logs[:0] = logs
+    _guild_contribution_events += sum(counts.values())
+
+
+def _dead_letter_guild_contributions(totals, counts, logs, reason):
+    for user_key, amount in totals.items():
+        logger.error(
+            "Guild contribution dead-lettered: user_key=%s amount=%s events=%s logs=%s reason=%s",
+            user_key, amount, counts.get(user_key, 0),
+            sum(1 for row in logs if row[1] == user_key), reason,
+        )
+        _guild_contribution_attempts.pop(user_key, None)
+    _guild_contribution_stats["dead_lettered"] += sum(counts.values())
+
+
+async def _write_guild_contributions(totals, logs):
+    for user_key in totals:
+        await ensure_global_guild_membership(user_key)
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             try:
                 await conn.begin()
+                rows = [(GLOBAL_GUILD_ID, user_key, amount) for user_key, amount in totals.items()]
                 await cur.execute(
-                    """UPDATE guild_members SET contribution=contribution+%s
-                       WHERE guild_id=%s AND user_id=%s""",
-                    (amount, GLOBAL_GUILD_ID, str(user_id)),
+                    "INSERT INTO guild_members (guild_id,user_id,role,contribution) VALUES "
+                    + ",".join(["(%s,%s,'member',%s)"] * len(rows))
+                    + " AS new ON DUPLICATE KEY UPDATE"
+                    " contribution=guild_members.contribution+new.contribution",
+                    tuple(value for row in rows for value in row),
                 )
-                await _sync_global_guild_level(cur)
-                if action_type:
-                    await cur.execute(
+                await cur.execute(
+                    "UPDATE guilds SET exp=exp+%s WHERE guild_id=%s",
+                    (sum(totals.values()), GLOBAL_GUILD_ID),
+                )
+                if logs:
+                    await cur.executemany(
                         """INSERT INTO guild_log
                            (guild_id,user_id,user_name,action_type,item_name,count)
                            VALUES (%s,%s,%s,%s,%s,%s)""",
-                        (
-                            GLOBAL_GUILD_ID,
-                            str(user_id),
-                            user_name,
-                            str(action_type),
-                            item_name or "길드 활동",
-                            amount,
-                        ),
+                        logs,
                     )
                 await conn.commit()
-                return True
             except Exception:
                 await conn.rollback()
                 raise
 
 
+def _guild_contribution_groups(totals, counts, logs):
+    """Healthy users share one transaction; repeatedly failing users go alone."""
+    suspects = [
+        user_key for user_key in totals
+        if _guild_contribution_attempts.get(user_key, 0) >= _GUILD_CONTRIBUTION_ISOLATE_AFTER
+    ]
+    if not suspects:
+        return [(totals, counts, logs)]
+    isolated = set(suspects)
+    groups = [(
+        {key: value for key, value in totals.items() if key not in isolated},
+        {key: value for key, value in counts.items() if key not in isolated},
+        [row for row in logs if row[1] not in isolated],
+    )]
+    groups.extend(
+        ({key: totals[key]}, {key: counts.get(key, 0)}, [row for row in logs if row[1] == key])
+        for key in suspects
+    )
+    return [group for group in groups if group[0]]
+
+
+async def _flush_guild_contributions():
+    """Write the buffer once; callers hold the "flush" lock.
+
+    Failed groups are restored (or dead-lettered) and the first error is
+    re-raised after every group has been tried.
+    """
+    totals, counts, logs = _take_guild_contributions()
+    if not totals:
+        return 0
+    groups = _guild_contribution_groups(totals, counts, logs)
+    written = 0
+    error = None
+    try:
+        while groups:
+            group_totals, group_counts, group_logs = groups[0]
+            try:
+                await _write_guild_contributions(group_totals, group_logs)
+            except Exception as e:
+                error = error or e
+                _guild_contribution_stats["failures"] += 1
+                dead = {}
+                for user_key in group_totals:
+                    attempts = _guild_contribution_attempts.get(user_key, 0) + 1
+                    _guild_contribution_attempts[user_key] = attempts
+                    if attempts >= _GUILD_CONTRIBUTION_DEAD_LETTER_AFTER:
+                        dead[user_key] = group_totals[user_key]
+                if dead:
+                    _dead_letter_guild_contributions(
+                        dead, group_counts,
+                        [row for row in group_logs if row[1] in dead], repr(e),
+                    )
+                _restore_guild_contributions(
+                    {key: value for key, value in group_totals.items() if key not in dead},
+                    {key: value for key, value in group_counts.items() if key not in dead},
+                    [row for row in group_logs if row[1] not in dead],
+                )
+            else:
+                for user_key in group_totals:
+                    _guild_contribution_attempts.pop(user_key, None)
+                written += sum(group_counts.values())
+                _guild_contribution_stats["flushes"] += 1
+                _guild_contribution_stats["member_rows"] += len(group_totals)
+                _guild_contribution_stats["log_rows"] += len(group_logs)
+            groups.pop(0)
+    finally:
+        # Cancelled mid-write: nothing after the current group was attempted.
+        for group in groups:
+            _restore_guild_contributions(*group)
+    if error is not None:
+        raise error
+    return written
+
+
+async def flush_guild_contributions(max_attempts=_GUILD_CONTRIBUTION_DEAD_LETTER_AFTER):
+    """Stop the background writer and drain the buffer (shutdown, tests).
+
+    Waits for a flush already in flight, then retries until the buffer is
+    empty; whatever is still unwritten after ``max_attempts`` is
+    dead-lettered. The writer restarts with the next credit.
+    """
+    written = 0
+    async with _guild_contribution_locks.hold("flush"):
+        writer = _guild_contribution_writer
+        if writer is not None and writer[0] is asyncio.get_running_loop() and not writer[1].done():
+            writer[1].cancel()
+            try:
+                await writer[1]
+            except asyncio.CancelledError:
+                pass
+        for attempt in range(1, max_attempts + 1):
+            try:
+                written += await _flush_guild_contributions()
+            except Exception as e:
+                logger.error("Guild contribution drain failed (attempt %s): %s", attempt, e)
+                if attempt < max_attempts:
+                    await asyncio.sleep(GUILD_CONTRIBUTION_FLUSH_MS / 1000)
+            if not _guild_contribution_events:
+                break
+        if _guild_contribution_events:
+            _dead_letter_guild_contributions(
+                *_take_guild_contributions(), "shutdown drain exhausted"
+            )
+    return written
+
+
+async def add_guild_contribution(user_id, amount, action_type=None, item_name=None, user_name=None):
+    """공용 길드 공헌도를 버퍼에 적립한다. 짧은 주기로 한 번에 기록된다."""
+    global _guild_contribution_events
+    try:
+        amount = int(amount)
+    except (TypeError, ValueError):
+        return False
+    if amount <= 0:
+        return False
+    user_key = str(user_id)
+    pending, full = _guild_contribution_signals()
+    _guild_contribution_totals[user_key] = _guild_contribution_totals.get(user_key, 0) + amount
+    _guild_contribution_counts[user_key] = _guild_contribution_counts.get(user_key, 0) + 1
+    if action_type:
+        _guild_contribution_logs.append((
+            GLOBAL_GUILD_ID,
+            user_key,
+            user_name,
+            str(action_type),
+            item_name or "길드 활동",
+            amount,
+        ))
+    _guild_contribution_events += 1
+    _guild_contribution_stats["buffered"] += 1
+    pending.set()
+    if _guild_contribution_events >= _GUILD_CONTRIBUTION_BATCH:
+        full.set()
+    return True
+
+
+# (day_key, item names) of rotations this process has already written to
+# guild_shop_stock. Once a rotation is materialized, opening the shop is a
+# plain stock SELECT; purge_stale_guild_shop_stock drops other days' rows and
+# markers once a day.
+_guild_shop_materialized = set()
+
+
+def _decode_guild_shop_rows(rows):
+    for row in rows:
+        raw_cost = row.get("cost_json", {})
+        if isinstance(raw_cost, str):
+            try:
+                row["cost"] = json.loads(raw_cost)
+            except (TypeError, ValueError):
+                row["cost"] = {}
+        else:
+            row["cost"] = raw_cost or {}
+    return rows
+
+
 async def get_or_create_daily_guild_shop(guild_id, day_key, rotation_rows):
     """등급별 결정적 로테이션을 저장하고 같은 날의 구매 재고를 보존한다."""
     if int(guild_id) != GLOBAL_GUILD_ID:
         return []
+    marker = (str(day_key), tuple(row["item_name"] for row in rotation_rows))
     pool = await get_db_pool()
+    if marker in _guild_shop_materialized:
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute(
+                    """SELECT * FROM guild_shop_stock
+                       WHERE guild_id=%s AND day_key=%s ORDER BY slot_index""",
+                    (GLOBAL_GUILD_ID, str(day_key)),
+                )
+                return _decode_guild_shop_rows(await cur.fetchall())
+
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
             try:
@@ -1273,16 +2527,12 @@ async def get_or_create_daily_guild_shop(guild_id, day_key, rotation_rows):
                             row.get("description", ""),
                         ),
                     )
-                await cur.execute(
-                    """DELETE FROM guild_shop_stock
-                       WHERE guild_id=%s AND day_key=%s AND slot_index>=%s""",
-                    (GLOBAL_GUILD_ID, str(day_key), len(rotation_rows)),
-                )
-                await cur.execute(
-                    """DELETE FROM guild_shop_stock
-                       WHERE guild_id=%s AND day_key<>%s""",
-                    (GLOBAL_GUILD_ID, str(day_key)),
-                )
+                if len(existing) > len(rotation_rows):
+                    await cur.execute(
+                        """DELETE FROM guild_shop_stock
+                           WHERE guild_id=%s AND day_key=%s AND slot_index>=%s""",
+                        (GLOBAL_GUILD_ID, str(day_key), len(rotation_rows)),
+                    )
                 await cur.execute(
                     """SELECT * FROM guild_shop_stock
                        WHERE guild_id=%s AND day_key=%s ORDER BY slot_index""",
@@ -1293,16 +2543,30 @@ async def get_or_create_daily_guild_shop(guild_id, day_key, rotation_rows):
             except Exception:
                 await conn.rollback()
                 raise
-    for row in rows:
-        raw_cost = row.get("cost_json", {})
-        if isinstance(raw_cost, str):
-            try:
-                row["cost"] = json.loads(raw_cost)
-            except (TypeError, ValueError):
-                row["cost"] = {}
-        else:
-            row["cost"] = raw_cost or {}
-    return rows
+    # A rank-up mid-day changes the rotation; forget the old marker for the day.
+    _guild_shop_materialized.difference_update(
+        [known for known in _guild_shop_materialized if known[0] == marker[0]]
+    )
+    _guild_shop_materialized.add(marker)
+    return _decode_guild_shop_rows(rows)
+
+
+async def purge_stale_guild_shop_stock(day_key):
+    """Delete shop stock rows for every day but ``day_key``; run once a day."""
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """DELETE FROM guild_shop_stock
+                   WHERE guild_id=%s AND day_key<>%s""",
+                (GLOBAL_GUILD_ID, str(day_key)),
+            )
+            deleted = cur.rowcount
+            await conn.commit()
+    _guild_shop_materialized.difference_update(
+        [known for known in _guild_shop_materialized if known[0] != str(day_key)]
+    )
+    return deleted
 
 
 async def buy_guild_shop_item(user_id, guild_id, day_key, slot_index, count=1, user_name=None):
@@ -1315,90 +2579,92 @@ async def buy_guild_shop_item(user_id, guild_id, day_key, slot_index, count=1, u
     if count <= 0 or int(guild_id) != GLOBAL_GUILD_ID:
         return False, "공용 길드 상점에서 양수 수량만 구매할 수 있습니다."
     await ensure_global_guild_membership(user_id)
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    """SELECT * FROM guild_shop_stock
-                       WHERE guild_id=%s AND day_key=%s AND slot_index=%s
-                       FOR UPDATE""",
-                    (GLOBAL_GUILD_ID, str(day_key), slot_index),
-                )
-                item = await cur.fetchone()
-                if not item:
-                    await conn.rollback()
-                    return False, "오늘의 해당 상품을 찾지 못했습니다. 상점을 다시 열어주세요."
-                if int(item.get("stock", 0)) < count:
-                    await conn.rollback()
-                    return False, f"공용 재고가 부족합니다. (남은 재고: {int(item.get('stock', 0))})"
-
-                raw_cost = item.get("cost_json", {})
-                if isinstance(raw_cost, str):
-                    raw_cost = json.loads(raw_cost)
-                costs = {key: int(value) * count for key, value in (raw_cost or {}).items()}
-                allowed = {"wood", "iron", "magic", "sorcery"}
-                if not costs or any(key not in allowed or value < 0 for key, value in costs.items()):
-                    await conn.rollback()
-                    return False, "상품 비용 설정이 올바르지 않습니다."
+    async with flushed_user_lock(user_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
+                    await cur.execute(
+                        """SELECT * FROM guild_shop_stock
+                           WHERE guild_id=%s AND day_key=%s AND slot_index=%s
+                           FOR UPDATE""",
+                        (GLOBAL_GUILD_ID, str(day_key), slot_index),
+                    )
+                    item = await cur.fetchone()
+                    if not item:
+                        await conn.rollback()
+                        return False, "오늘의 해당 상품을 찾지 못했습니다. 상점을 다시 열어주세요."
+                    if int(item.get("stock", 0)) < count:
+                        await conn.rollback()
+                        return False, f"공용 재고가 부족합니다. (남은 재고: {int(item.get('stock', 0))})"
+
+                    raw_cost = item.get("cost_json", {})
+                    if isinstance(raw_cost, str):
+                        raw_cost = json.loads(raw_cost)
+                    costs = {key: int(value) * count for key, value in (raw_cost or {}).items()}
+                    allowed = {"wood", "iron", "magic", "sorcery"}
+                    if not costs or any(key not in allowed or value < 0 for key, value in costs.items()):
+                        await conn.rollback()
+                        return False, "상품 비용 설정이 올바르지 않습니다."
 
-                await cur.execute(
-                    """SELECT token_wood,token_iron,token_magic,token_sorcery
-                       FROM guilds WHERE guild_id=%s FOR UPDATE""",
-                    (GLOBAL_GUILD_ID,),
-                )
-                guild = await cur.fetchone()
-                lacking = [
-                    f"{key} {int(guild.get('token_' + key, 0))}/{need}"
-                    for key, need in costs.items()
-                    if int(guild.get("token_" + key, 0) or 0) < need
-                ]
-                if lacking:
-                    await conn.rollback()
-                    return False, "공용 길드 자원이 부족합니다: " + ", ".join(lacking)
+                    await cur.execute(
+                        """SELECT token_wood,token_iron,token_magic,token_sorcery
+                           FROM guilds WHERE guild_id=%s FOR UPDATE""",
+                        (GLOBAL_GUILD_ID,),
+                    )
+                    guild = await cur.fetchone()
+                    lacking = [
+                        f"{key} {int(guild.get('token_' + key, 0))}/{need}"
+                        for key, need in costs.items()
+                        if int(guild.get("token_" + key, 0) or 0) < need
+                    ]
+                    if lacking:
+                        await conn.rollback()
+                        return False, "공용 길드 자원이 부족합니다: " + ", ".join(lacking)
 
-                assignments = ", ".join(f"token_{key}=token_{key}-%s" for key in costs)
-                await cur.execute(
-                    f"UPDATE guilds SET {assignments} WHERE guild_id=%s",
-                    tuple(costs.values()) + (GLOBAL_GUILD_ID,),
-                )
-                await cur.execute(
-                    """UPDATE guild_shop_stock SET stock=stock-%s
-                       WHERE guild_id=%s AND day_key=%s AND slot_index=%s""",
-                    (count, GLOBAL_GUILD_ID, str(day_key), slot_index),
-                )
-                await cur.execute(
-                    """INSERT INTO inventory (user_id,item_name,quantity)
-                       VALUES (%s,%s,%s) AS new
-                       ON DUPLICATE KEY UPDATE
-                         quantity=inventory.quantity+new.quantity""",
-                    (str(user_id), item["item_name"], count),
-                )
-                await cur.execute(
-                    "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                    (str(user_id),),
-                )
-                await cur.execute(
-                    """INSERT INTO guild_log
-                       (guild_id,user_id,user_name,action_type,item_name,count)
-                       VALUES (%s,%s,%s,'shop_purchase',%s,%s)""",
-                    (
-                        GLOBAL_GUILD_ID,
-                        str(user_id),
-                        user_name,
-                        item["item_name"],
-                        count,
-                    ),
-                )
-                await conn.commit()
-                return True, (
-                    f"{item['item_name']} {count}개를 구매했습니다."
-                    f"\n길드 공용 남은 재고: {int(item['stock']) - count}개"
-                )
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"길드 상점 오류: {exc}"
+                    assignments = ", ".join(f"token_{key}=token_{key}-%s" for key in costs)
+                    await cur.execute(
+                        f"UPDATE guilds SET {assignments} WHERE guild_id=%s",
+                        tuple(costs.values()) + (GLOBAL_GUILD_ID,),
+                    )
+                    await cur.execute(
+                        """UPDATE guild_shop_stock SET stock=stock-%s
+                           WHERE guild_id=%s AND day_key=%s AND slot_index=%s""",
+                        (count, GLOBAL_GUILD_ID, str(day_key), slot_index),
+                    )
+                    await cur.execute(
+                        """INSERT INTO inventory (user_id,item_name,quantity)
+                           VALUES (%s,%s,%s) AS new
+                           ON DUPLICATE KEY UPDATE
+                             quantity=inventory.quantity+new.quantity""",
+                        (str(user_id), item["item_name"], count),
+                    )
+                    await cur.execute(
+                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                        (str(user_id),),
+                    )
+                    await cur.execute(
+                        """INSERT INTO guild_log
+                           (guild_id,user_id,user_name,action_type,item_name,count)
+                           VALUES (%s,%s,%s,'shop_purchase',%s,%s)""",
+                        (
+                            GLOBAL_GUILD_ID,
+                            str(user_id),
+                            user_name,
+                            item["item_name"],
+                            count,
+                        ),
+                    )
+                    await conn.commit()
+                    invalidate_user_snapshot(user_id)
+                    return True, (
+                        f"{item['item_name']} {count}개를 구매했습니다."
+                        f"\n길드 공용 남은 재고: {int(item['stock']) - count}개"
+                    )
+                except Exception as exc:
+                    await conn.rollback()
+                    return False, f"길드 상점 오류: {exc}"
 
 # [신규] 길드 아이템 출고 (Withdraw)
 async def withdraw_guild_item(
@@ -1416,69 +2682,59 @@ async def withdraw_guild_item(
     if count <= 0 or int(guild_id) != GLOBAL_GUILD_ID:
         return False, "공용 길드에서 양수 수량만 출고할 수 있습니다."
     await ensure_global_guild_membership(user_id)
-    pool = await get_db_pool()
-    async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            try:
-                await conn.begin()
-                await cur.execute(
-                    """SELECT 1 FROM guild_members
-                       WHERE guild_id=%s AND user_id=%s FOR UPDATE""",
-                    (GLOBAL_GUILD_ID, str(user_id)),
-                )
-                if not await cur.fetchone():
-                    await conn.rollback()
-                    return False, "공용 길드 소속이 아닙니다."
-                await cur.execute(
-                    """SELECT count,category FROM guild_inventory
-                       WHERE guild_id=%s AND item_name=%s FOR UPDATE""",
-                    (GLOBAL_GUILD_ID, item_name),
-                )
-                row = await cur.fetchone()
-                owned = int(row.get("count", 0)) if row else 0
-                if owned < count:
-                    await conn.rollback()
-                    return False, f"공용 재고가 부족합니다. ({owned}/{count})"
-                if owned == count:
+    async with flushed_user_lock(user_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                try:
+                    await conn.begin()
                     await cur.execute(
-                        """DELETE FROM guild_inventory
-                           WHERE guild_id=%s AND item_name=%s""",
-                        (GLOBAL_GUILD_ID, item_name),
+                        """SELECT 1 FROM guild_members
+                           WHERE guild_id=%s AND user_id=%s FOR UPDATE""",
+                        (GLOBAL_GUILD_ID, str(user_id)),
                     )
-                else:
+                    if not await cur.fetchone():
+                        await conn.rollback()
+                        return False, "공용 길드 소속이 아닙니다."
+                    if not await _take_guild_items(cur, {item_name: count}):
+                        await cur.execute(
+                            "SELECT count FROM guild_inventory WHERE guild_id=%s AND item_name=%s",
+                            (GLOBAL_GUILD_ID, item_name),
+                        )
+                        row = await cur.fetchone()
+                        owned = int(row.get("count", 0)) if row else 0
+                        await conn.rollback()
+                        return False, f"공용 재고가 부족합니다. ({owned}/{count})"
                     await cur.execute(
-                        """UPDATE guild_inventory SET count=count-%s
-                           WHERE guild_id=%s AND item_name=%s""",
-                        (count, GLOBAL_GUILD_ID, item_name),
+                        """INSERT INTO inventory (user_id,item_name,quantity)
+                           VALUES (%s,%s,%s) AS new
+                           ON DUPLICATE KEY UPDATE
+                             quantity=inventory.quantity+new.quantity""",
+                        (str(user_id), item_name, count),
                     )
-                await cur.execute(
-                    """INSERT INTO inventory (user_id,item_name,quantity)
-                       VALUES (%s,%s,%s) AS new
-                       ON DUPLICATE KEY UPDATE
-                         quantity=inventory.quantity+new.quantity""",
-                    (str(user_id), item_name, count),
-                )
-                await cur.execute(
-                    "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                    (str(user_id),),
-                )
-                await cur.execute(
-                    """INSERT INTO guild_log
-                       (guild_id,user_id,user_name,action_type,item_name,count)
-                       VALUES (%s,%s,%s,'withdraw',%s,%s)""",
-                    (
-                        GLOBAL_GUILD_ID,
-                        str(user_id),
-                        user_name,
-                        item_name,
-                        count,
-                    ),
-                )
-                await conn.commit()
-                return True, f"{item_name} {count}개를 개인 인벤토리로 출고했습니다."
-            except Exception as exc:
-                await conn.rollback()
-                return False, f"길드 창고 출고 오류: {exc}"
+                    await cur.execute(
+                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                        (str(user_id),),
+                    )
+                    await cur.execute(
+                        """INSERT INTO guild_log
+                           (guild_id,user_id,user_name,action_type,item_name,count)
+                           VALUES (%s,%s,%s,'withdraw',%s,%s)""",
+                        (
+                            GLOBAL_GUILD_ID,
+                            str(user_id),
+                            user_name,
+                            item_name,
+                            count,
+                        ),
+                    )
+                    await conn.commit()
+                    _bump_guild_warehouse(GLOBAL_GUILD_ID)
+                    invalidate_user_snapshot(user_id)
+                    return True, f"{item_name} {count}개를 개인 인벤토리로 출고했습니다."
+                except Exception as exc:
+                    await conn.rollback()
+                    return False, f"길드 창고 출고 오류: {exc}"
 
 async def craft_guild_item(user_id, guild_id, item_name, category, token_costs, count=1):
     """공용 길드 토큰을 원자적으로 소비해 길드 제작품을 만든다."""
@@ -1522,19 +2778,8 @@ async def craft_guild_item(user_id, guild_id, item_name, category, token_costs,
                     f"UPDATE guilds SET {assignments} WHERE guild_id=%s",
                     tuple(costs.values()) + (GLOBAL_GUILD_ID,),
                 )
-                await cur.execute(
-                    """INSERT INTO guild_inventory (guild_id,item_name,count,category)
-                       VALUES (%s,%s,%s,%s) AS new
-                       ON DUPLICATE KEY UPDATE
-                         count=guild_inventory.count+new.count""",
-                    (GLOBAL_GUILD_ID, item_name, count, category),
-                )
-                await cur.execute(
-                    """UPDATE guild_members SET contribution=contribution+%s
-                       WHERE guild_id=%s AND user_id=%s""",
-                    (10 * count, GLOBAL_GUILD_ID, str(user_id)),
-                )
-                await _sync_global_guild_level(cur)
+                await _put_guild_items(cur, [(item_name, count, category)])
+                await _credit_guild_contribution(cur, user_id, 10 * count)
                 await cur.execute(
                     """INSERT INTO guild_log
                        (guild_id,user_id,action_type,item_name,count)
@@ -1542,44 +2787,44 @@ async def craft_guild_item(user_id, guild_id, item_name, category, token_costs,
                     (GLOBAL_GUILD_ID, str(user_id), item_name, count),
                 )
                 await conn.commit()
+                _bump_guild_warehouse(GLOBAL_GUILD_ID)
                 return True, f"{item_name} {count}개를 길드 창고에 제작했습니다."
             except Exception as exc:
                 await conn.rollback()
                 return False, f"길드 제작 오류: {exc}"
 
+GUILD_RAID_SUPPLY_NAMES = ("길드 응급상자", "길드 전투도구", "길드 보호부적")
+
+
+async def _take_guild_raid_supplies(cur):
+    """Lock the stocked supplies with one SELECT and take one of each."""
+    in_sql = ",".join(["%s"] * len(GUILD_RAID_SUPPLY_NAMES))
+    await cur.execute(
+        f"""SELECT item_name FROM guild_inventory
+            WHERE guild_id=%s AND item_name IN ({in_sql}) AND count>=1
+            FOR UPDATE""",
+        (GLOBAL_GUILD_ID,) + GUILD_RAID_SUPPLY_NAMES,
+    )
+    stocked = {row[0] for row in await cur.fetchall()}
+    consumed = [name for name in GUILD_RAID_SUPPLY_NAMES if name in stocked]
+    if consumed and not await _take_guild_items(cur, {name: 1 for name in consumed}):
+        raise RuntimeError("locked guild supplies changed during consumption")
+    return consumed
+
+
 async def consume_guild_raid_supplies(guild_id):
     """레이드 시작 시 준비된 길드 보급품을 종류별 최대 1개 소비한다."""
     if int(guild_id) != GLOBAL_GUILD_ID:
         return []
-    names = ("길드 응급상자", "길드 전투도구", "길드 보호부적")
-    consumed = []
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             try:
                 await conn.begin()
-                for name in names:
-                    await cur.execute(
-                        """SELECT count FROM guild_inventory
-                           WHERE guild_id=%s AND item_name=%s FOR UPDATE""",
-                        (GLOBAL_GUILD_ID, name),
-                    )
-                    row = await cur.fetchone()
-                    if not row or int(row[0]) <= 0:
-                        continue
-                    if int(row[0]) == 1:
-                        await cur.execute(
-                            "DELETE FROM guild_inventory WHERE guild_id=%s AND item_name=%s",
-                            (GLOBAL_GUILD_ID, name),
-                        )
-                    else:
-                        await cur.execute(
-                            """UPDATE guild_inventory SET count=count-1
-                               WHERE guild_id=%s AND item_name=%s""",
-                            (GLOBAL_GUILD_ID, name),
-                        )
-                    consumed.append(name)
+                consumed = await _take_guild_raid_supplies(cur)
                 await conn.commit()
+                if consumed:
+                    _bump_guild_warehouse(GLOBAL_GUILD_ID)
                 return consumed
             except Exception:
                 await conn.rollback()
@@ -1589,64 +2834,226 @@ async def deposit_guild_artifact(user_id, guild_id, artifact_data):
     if int(guild_id) != GLOBAL_GUILD_ID:
         return False, "공용 길드에만 아티팩트를 보관할 수 있습니다."
     await ensure_global_guild_membership(user_id)
+    async with flushed_user_lock(user_id):
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    await conn.begin()
+                    await cur.execute(
+                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                        (str(user_id),),
+                    )
+                    await cur.execute(
+                        "SELECT 1 FROM guild_members WHERE guild_id=%s AND user_id=%s FOR UPDATE",
+                        (GLOBAL_GUILD_ID, str(user_id)),
+                    )
+                    if not await cur.fetchone():
+                        await conn.rollback()
+                        return False, "공용 길드 소속이 아닙니다."
+                    await cur.execute(
+                        """SELECT equipped_char_index FROM artifacts
+                           WHERE id=%s AND user_id=%s FOR UPDATE""",
+                        (artifact_data["id"], str(user_id)),
+                    )
+                    stored = await cur.fetchone()
+                    if not stored:
+                        await conn.rollback()
+                        return False, "보관할 아티팩트를 찾을 수 없습니다."
+                    if int(stored[0] if stored[0] is not None else -1) != -1:
+                        await conn.rollback()
+                        return False, "캐릭터가 장착 중인 아티팩트는 보관할 수 없습니다."
+                    await cur.execute("INSERT INTO guild_stored_artifacts (guild_id, artifact_id, name, rank_level, level, data) VALUES (%s, %s, %s, %s, %s, %s)", 
+                                      (guild_id, artifact_data['id'], artifact_data['name'], artifact_data.get('rank', 1), artifact_data.get('level', 0), json.dumps(artifact_data)))
+                    await cur.execute(
+                        "DELETE FROM artifacts WHERE id=%s AND user_id=%s",
+                        (artifact_data["id"], str(user_id)),
+                    )
+                    await cur.execute("INSERT INTO guild_log (guild_id, user_id, action_type, item_name, count) VALUES (%s, %s, 'deposit_artifact', %s, 1)", (guild_id, str(user_id), artifact_data['name']))
+                    await conn.commit()
+                    _bump_guild_warehouse(GLOBAL_GUILD_ID)
+                    invalidate_user_snapshot(user_id)
+                    return True, "보관 완료"
+                except Exception as e:
+                    await conn.rollback()
+                    return False, str(e)
+
+# guild_log keeps GUILD_LOG_RETENTION_DAYS of raw rows. Older rows are folded
+# into guild_log_monthly (one row per guild, month, action_type and user) by
+# archive_guild_logs, which the bot runs periodically. Pages are read by
+# keyset on idx_guild_log_page (guild_id, logged_at, id), so a page costs the
+# same no matter how deep it is or how large the table has grown.
+try:
+    from config import GUILD_LOG_RETENTION_DAYS
+except ImportError:
+    GUILD_LOG_RETENTION_DAYS = 30
+
+_GUILD_LOG_ARCHIVE_BATCH = 1000
+
+
+async def get_guild_logs_page(guild_id, before=None, limit=10):
+    """Return ``(rows, next_cursor)`` newest first.
+
+    ``before`` is the ``next_cursor`` of the previous page, a
+    ``(logged_at, id)`` pair; ``next_cursor`` is None on the last page.
+    """
+    sql = "SELECT * FROM guild_log WHERE guild_id = %s"
+    params = [guild_id]
+    if before is not None:
+        logged_at, log_id = before
+        sql += " AND (logged_at < %s OR (logged_at = %s AND id < %s))"
+        params.extend((logged_at, logged_at, log_id))
+    sql += " ORDER BY logged_at DESC, id DESC LIMIT %s"
+    params.append(limit + 1)
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(sql, tuple(params))
+            rows = list(await cur.fetchall())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1]["logged_at"], rows[-1]["id"])
+
+
+async def get_guild_logs(guild_id, limit=10):
+    rows, _ = await get_guild_logs_page(guild_id, limit=limit)
+    return rows
+
+
+def _summarize_guild_logs(rows):
+    summary = {}
+    for guild_id, user_id, user_name, action_type, count, logged_at in rows:
+        key = (guild_id, logged_at.date().replace(day=1), action_type or "", user_id or "")
+        entry = summary.get(key)
+        if entry is None:
+            entry = summary[key] = [user_name, 0, 0, logged_at, logged_at]
+        if user_name:
+            entry[0] = user_name
+        entry[1] += 1
+        entry[2] += int(count or 0)
+        entry[3] = min(entry[3], logged_at)
+        entry[4] = max(entry[4], logged_at)
+    return [key + tuple(entry) for key, entry in summary.items()]
+
+
+async def archive_guild_logs(retention_days=None, max_batches=20):
+    """Fold guild_log rows older than the retention window into monthly totals.
+
+    Rows with no logged_at or guild_id cannot be placed in a month and are
+    deleted first. Expired rows are then taken oldest-first by primary key in
+    batches of _GUILD_LOG_ARCHIVE_BATCH, with the cutoff applied in SQL; each
+    batch is summarized, upserted into guild_log_monthly and deleted in one
+    transaction. Returns the number of rows archived.
+    """
+    if retention_days is None:
+        retention_days = GUILD_LOG_RETENTION_DAYS
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=retention_days)
+    archived = 0
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
             try:
                 await conn.begin()
                 await cur.execute(
-                    "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                    (str(user_id),),
-                )
-                await cur.execute(
-                    "SELECT 1 FROM guild_members WHERE guild_id=%s AND user_id=%s FOR UPDATE",
-                    (GLOBAL_GUILD_ID, str(user_id)),
-                )
-                if not await cur.fetchone():
-                    await conn.rollback()
-                    return False, "공용 길드 소속이 아닙니다."
-                await cur.execute(
-                    """SELECT equipped_char_index FROM artifacts
-                       WHERE id=%s AND user_id=%s FOR UPDATE""",
-                    (artifact_data["id"], str(user_id)),
-                )
-                stored = await cur.fetchone()
-                if not stored:
-                    await conn.rollback()
-                    return False, "보관할 아티팩트를 찾을 수 없습니다."
-                if int(stored[0] if stored[0] is not None else -1) != -1:
-                    await conn.rollback()
-                    return False, "캐릭터가 장착 중인 아티팩트는 보관할 수 없습니다."
-                await cur.execute("INSERT INTO guild_stored_artifacts (guild_id, artifact_id, name, rank_level, level, data) VALUES (%s, %s, %s, %s, %s, %s)", 
-                                  (guild_id, artifact_data['id'], artifact_data['name'], artifact_data.get('rank', 1), artifact_data.get('level', 0), json.dumps(artifact_data)))
-                await cur.execute(
-                    "DELETE FROM artifacts WHERE id=%s AND user_id=%s",
-                    (artifact_data["id"], str(user_id)),
+                    "DELETE FROM guild_log WHERE logged_at IS NULL OR guild_id IS NULL"
                 )
-                await cur.execute("INSERT INTO guild_log (guild_id, user_id, action_type, item_name, count) VALUES (%s, %s, 'deposit_artifact', %s, 1)", (guild_id, str(user_id), artifact_data['name']))
+                dropped = cur.rowcount
                 await conn.commit()
-                return True, "보관 완료"
-            except Exception as e:
+            except Exception:
                 await conn.rollback()
-                return False, str(e)
+                raise
+            if dropped:
+                logger.warning("시각·길드가 없는 길드 로그 %d건을 보관 없이 삭제했습니다.", dropped)
+            for _ in range(max_batches):
+                try:
+                    await conn.begin()
+                    await cur.execute(
+                        """SELECT id, guild_id, user_id, user_name, action_type, count, logged_at
+                           FROM guild_log WHERE logged_at < %s
+                           ORDER BY id LIMIT %s FOR UPDATE""",
+                        (cutoff, _GUILD_LOG_ARCHIVE_BATCH),
+                    )
+                    rows = list(await cur.fetchall())
+                    if not rows:
+                        await conn.rollback()
+                        break
+                    summary = _summarize_guild_logs(row[1:] for row in rows)
+                    await cur.executemany(
+                        """INSERT INTO guild_log_monthly
+                           (guild_id, month, action_type, user_id, user_name,
+                            events, total_count, first_at, last_at)
+                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) AS new
+                           ON DUPLICATE KEY UPDATE
+                               user_name=COALESCE(new.user_name, guild_log_monthly.user_name),
+                               events=guild_log_monthly.events+new.events,
+                               total_count=guild_log_monthly.total_count+new.total_count,
+                               first_at=LEAST(guild_log_monthly.first_at, new.first_at),
+                               last_at=GREATEST(guild_log_monthly.last_at, new.last_at)""",
+                        summary,
+                    )
+                    await cur.execute(
+                        f"DELETE FROM guild_log WHERE id IN ({','.join(['%s'] * len(rows))})",
+                        tuple(row[0] for row in rows),
+                    )
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+                archived += len(rows)
+                if len(rows) < _GUILD_LOG_ARCHIVE_BATCH:
+                    break
+    if archived:
+        logger.info("길드 로그 %d건을 월별 요약으로 보관했습니다.", archived)
+    return archived
 
-async def get_guild_logs(guild_id, limit=10):
+
+async def get_subjugation_ranking(limit=10, region=None):
+    """Top of the region's (or the all-region) board with last known names."""
     pool = await get_db_pool()
     async with pool.acquire() as conn:
         async with conn.cursor(aiomysql.DictCursor) as cur:
-            await cur.execute("SELECT * FROM guild_log WHERE guild_id = %s ORDER BY logged_at DESC LIMIT %s", (guild_id, limit))
+            await cur.execute(
+                """SELECT l.user_id, l.depth AS max_subjugation_depth,
+                          l.char_name AS max_subjugation_char,
+                          l.region AS max_subjugation_region,
+                          n.display_name
+                   FROM subjugation_leaderboard l
+                   LEFT JOIN user_display_names n ON n.user_id = l.user_id
+                   WHERE l.board = %s
+                   ORDER BY l.depth DESC, l.achieved_at
+                   LIMIT %s""",
+                (region or SUBJUGATION_ALL_REGIONS, int(limit)),
+            )
             return await cur.fetchall()
 
-async def get_subjugation_ranking(limit=10, region=None):
+
+# Last display name written per user by this process, so an interaction only
+# costs a write when the name is new or has changed. Bounded like the save
+# baselines; an evicted user just costs one more idempotent upsert.
+_DISPLAY_NAME_CACHE_LIMIT = 8192
+_display_names = OrderedDict()
+
+
+async def remember_display_name(user_id, display_name):
+    user_key = str(user_id)
+    display_name = str(display_name or "")[:100]
+    if not display_name:
+        return False
+    if _display_names.get(user_key) == display_name:
+        _display_names.move_to_end(user_key)
+        return False
     pool = await get_db_pool()
     async with pool.acquire() as conn:
-        async with conn.cursor(aiomysql.DictCursor) as cur:
-            sql = "SELECT user_id, max_subjugation_depth, max_subjugation_char, max_subjugation_region FROM users WHERE max_subjugation_depth > 0"
-            params = []
-            if region:
-                sql += " AND max_subjugation_region = %s"
-                params.append(region)
-            sql += " ORDER BY max_subjugation_depth DESC LIMIT %s"
-            params.append(limit)
-            await cur.execute(sql, tuple(params))
-            return await cur.fetchall()
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """INSERT INTO user_display_names (user_id, display_name)
+                   VALUES (%s, %s) AS new
+                   ON DUPLICATE KEY UPDATE display_name=new.display_name""",
+                (user_key, display_name),
+            )
+    _display_names[user_key] = display_name
+    _display_names.move_to_end(user_key)
+    while len(_display_names) > _DISPLAY_NAME_CACHE_LIMIT:
+        _display_names.popitem(last=False)
+    return True
@@ -0,0 +1,196 @@
+"""Per-call-site query metrics for the shared aiomysql pool.
+
+``get_db_pool()`` hands out an ``InstrumentedPool``. Its connections and
+cursors behave exactly like aiomysql's, but every ``execute``/``executemany``
+is tagged with the function that issued it and recorded into a latency
+histogram, along with rows affected/returned and lock-wait errors. Pool
+acquire waits are recorded the same way. Statements slower than
+SLOW_QUERY_MS are written to the log.
+"""
+import bisect
+import logging
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+try:
+    from config import SLOW_QUERY_MS
+except ImportError:
+    SLOW_QUERY_MS = 200
+
+# Upper bounds (ms) of the histogram buckets; one overflow bucket follows.
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+# Lock wait timeout, deadlock.
+_LOCK_ERROR_CODES = {1205, 1213}
+
+_sites = {}
+_pool_stats = None
+
+
+def _empty_histogram():
+    return [0] * (len(BUCKETS_MS) + 1)
+
+
+def _reset_pool_stats():
+    global _pool_stats
+    _pool_stats = {
+        "acquires": 0,
+        "wait_ms_total": 0.0,
+        "wait_ms_max": 0.0,
+        "histogram": _empty_histogram(),
+    }
+
+
+_reset_pool_stats()
+
+
+def reset_query_stats():
+    _sites.clear()
+    _reset_pool_stats()
+
+
+def histogram_percentile(histogram, q):
+    """Upper bucket bound (ms) under which a ``q`` fraction of samples fall."""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    needed = q * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= needed:
+            return float(BUCKETS_MS[index]) if index < len(BUCKETS_MS) else float("inf")
+    return float("inf")
+
+
+def get_query_stats():
+    """Snapshot of pool and per-site counters, safe to mutate."""
+    sites = {}
+    for site, stats in _sites.items():
+        entry = dict(stats, histogram=list(stats["histogram"]))
+        entry["avg_ms"] = stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0
+        entry["p50_ms"] = histogram_percentile(stats["histogram"], 0.50)
+        entry["p99_ms"] = histogram_percentile(stats["histogram"], 0.99)
+        sites[site] = entry
+    pool = dict(_pool_stats, histogram=list(_pool_stats["histogram"]))
+    pool["avg_wait_ms"] = pool["wait_ms_total"] / pool["acquires"] if pool["acquires"] else 0.0
+    return {"slow_query_ms": SLOW_QUERY_MS, "pool": pool, "sites": sites}
+
+
+def _call_site(depth):
+    frame = sys._getframe(depth)
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_name}"
+
+
+def _record(site, sql, elapsed_ms, rows, error):
+    stats = _sites.get(site)
+    if stats is None:
+        stats = _sites[site] = {
+            "calls": 0,
+            "errors": 0,
+            "lock_errors": 0,
+            "slow": 0,
+            "rows": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "histogram": _empty_histogram(),
+        }
+    stats["calls"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+    stats["histogram"][bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+    if rows and rows > 0:
+        stats["rows"] += rows
+    if error is not None:
+        stats["errors"] += 1
+        code = error.args[0] if getattr(error, "args", None) else None
+        if code in _LOCK_ERROR_CODES:
+            stats["lock_errors"] += 1
+    if SLOW_QUERY_MS and elapsed_ms >= SLOW_QUERY_MS:
+        stats["slow"] += 1
+        logger.warning(
+            "느린 쿼리 %.1fms [%s] rows=%s: %s",
+            elapsed_ms, site, rows, " ".join(str(sql).split())[:300],
+        )
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def _timed(self, method, sql, args):
+        site = _call_site(3)
+        started = time.perf_counter()
+        error = None
+        try:
+            return await method(sql, args)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _record(site, sql, elapsed_ms, getattr(self._cursor, "rowcount", None), error)
+
+    async def execute(self, sql, args=None):
+        return await self._timed(self._cursor.execute, sql, args)
+
+    async def executemany(self, sql, args):
+        return await self._timed(self._cursor.executemany, sql, args)
+
+
+class _CursorContext:
+    def __init__(self, context):
+        self._context = context
+
+    async def __aenter__(self):
+        return InstrumentedCursor(await self._context.__aenter__())
+
+    async def __aexit__(self, *exc):
+        return await self._context.__aexit__(*exc)
+
+
+class InstrumentedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *cursors):
+        return _CursorContext(self._conn.cursor(*cursors))
+
+
+class _AcquireContext:
+    def __init__(self, context):
+        self._context = context
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        conn = await self._context.__aenter__()
+        waited = (time.perf_counter() - started) * 1000
+        _pool_stats["acquires"] += 1
+        _pool_stats["wait_ms_total"] += waited
+        _pool_stats["wait_ms_max"] = max(_pool_stats["wait_ms_max"], waited)
+        _pool_stats["histogram"][bisect.bisect_left(BUCKETS_MS, waited)] += 1
+        return InstrumentedConnection(conn)
+
+    async def __aexit__(self, *exc):
+        return await self._context.__aexit__(*exc)
+
+
+class InstrumentedPool:
+    """Wraps an aiomysql pool; everything but ``acquire`` passes through."""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+    def acquire(self):
+        return _AcquireContext(self._pool.acquire())
@@ -0,0 +1,262 @@
+"""Exact dice value distributions and card expected-value/clash tables.
+
+Every die rolls uniformly on ``Dice.bounds(attack, defense)``, so its value
+distribution, moments and the probability of beating another die are all
+exact closed forms of the convolution of two uniform distributions. The
+scalar helpers below work everywhere; when NumPy is installed the same
+formulas are evaluated for every ``SKILL_CARDS``/``BOSS_CARDS`` entry over
+``STAT_GRID`` and cached to a versioned ``.npz`` file so screens can read
+EV, variance and clash win rates with a single array index.
+"""
+import hashlib
+import logging
+import os
+
+from cards import BOSS_CARDS, SKILL_CARDS, get_card
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from config import DICE_TABLE_PATH
+except ImportError:
+    DICE_TABLE_PATH = "dice_tables.npz"
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever Dice.bounds or the table layout change. Card rebalances are
+# caught by the per-card dice hashes stored next to the tables.
+TABLE_VERSION = 2
+STAT_GRID = (0, 5, 10, 15, 20, 30, 40, 60, 80)
+ACTION_TYPES = ("attack", "defense", "counter", "heal", "heal_hp", "mental_heal")
+_MAX_DICE = 3
+
+_tables = None
+
+
+def die_distribution(dice, attack=0, defense=0):
+    """Return {value: probability} for one die at the given stats."""
+    low, high = dice.bounds(attack, defense)
+    weight = 1 / (high - low + 1)
+    return {value: weight for value in range(low, high + 1)}
+
+
+def uniform_moments(low, high):
+    """Mean and variance of a uniform integer roll on [low, high]."""
+    size = high - low + 1
+    return (low + high) / 2, (size * size - 1) / 12
+
+
+def _beaten_count(t, low, size):
+    # Number of (x, y) pairs with x <= t and y < x, y uniform on [low, low + size).
+    u = t - low
+    clipped = min(max(u, 0), size)
+    return clipped * (clipped + 1) // 2 + max(u - size, 0) * size
+
+
+def win_probability(bounds_a, bounds_b):
+    """Exact P(a > b) for independent uniform rolls; ties are not wins."""
+    (low_a, high_a), (low_b, high_b) = bounds_a, bounds_b
+    size_b = high_b - low_b + 1
+    wins = _beaten_count(high_a, low_b, size_b) - _beaten_count(low_a - 1, low_b, size_b)
+    return wins / ((high_a - low_a + 1) * size_b)
+
+
+def card_moments(card, attack=0, defense=0):
+    """Per-action-type (mean, variance) of a card's summed dice."""
+    totals = {}
+    for dice in card.dice_list:
+        mean, variance = uniform_moments(*dice.bounds(attack, defense))
+        old_mean, old_variance = totals.get(dice.action_type, (0.0, 0.0))
+        totals[dice.action_type] = (old_mean + mean, old_variance + variance)
+    return totals
+
+
+def clash_win_rate(card_a, stats_a, card_b, stats_b):
+    """Share of paired dice (same index) card_a is expected to win.
+
+    ``stats_*`` are (attack, defense) pairs. Unpaired trailing dice never
+    clash and are left out.
+    """
+    pairs = list(zip(card_a.dice_list, card_b.dice_list))
+    if not pairs:
+        return 0.0
+    return sum(
+        win_probability(a.bounds(*stats_a), b.bounds(*stats_b)) for a, b in pairs
+    ) / len(pairs)
+
+
+def table_cards():
+    """Card names covered by the precomputed tables, in table order."""
+    names = list(SKILL_CARDS)
+    names.extend(name for name in BOSS_CARDS if name not in SKILL_CARDS)
+    return names
+
+
+def card_dice_hash(name):
+    """Stable digest of a card's (name, dice type, min, max) list."""
+    card = get_card(name)
+    dice = [(dice.action_type, dice.d_min, dice.d_max) for dice in card.dice_list] if card else []
+    return hashlib.sha1(repr((name, dice)).encode("utf-8")).hexdigest()
+
+
+def _vector_beaten_count(t, low, size):
+    u = t - low
+    clipped = np.clip(u, 0, size)
+    return clipped * (clipped + 1) // 2 + np.maximum(u - size, 0) * size
+
+
+def build_tables(names=None, grid=STAT_GRID):
+    """Compute every table with NumPy; returns a dict of arrays.
+
+    ``ev``/``var`` are indexed [card, attack, defense, action type] over
+    ``grid``. ``clash`` is indexed [card_a, card_b, level_a, level_b] where
+    a level stands for attack = defense = grid[level].
+    """
+    if np is None:
+        raise RuntimeError("주사위 표 생성에는 numpy가 필요합니다.")
+    names = list(names or table_cards())
+    cards = [get_card(name) for name in names]
+    size = len(grid)
+    # Padded die bounds: [card, die, attack, defense] -> low/high. Dice whose
+    # type has no EV column ("none") keep type -1 but still clash.
+    lows = np.zeros((len(cards), _MAX_DICE, size, size), dtype=np.int64)
+    highs = np.zeros_like(lows)
+    types = np.full((len(cards), _MAX_DICE), -1, dtype=np.int64)
+    present = np.zeros((len(cards), _MAX_DICE), dtype=bool)
+    for c, card in enumerate(cards):
+        for d, dice in enumerate(card.dice_list[:_MAX_DICE]):
+            present[c, d] = True
+            if dice.action_type in ACTION_TYPES:
+                types[c, d] = ACTION_TYPES.index(dice.action_type)
+            for a, attack in enumerate(grid):
+                for f, defense in enumerate(grid):
+                    lows[c, d, a, f], highs[c, d, a, f] = dice.bounds(attack, defense)
+
+    counts = highs - lows + 1
+    means = (lows + highs) / 2
+    variances = (counts * counts - 1) / 12
+    ev = np.zeros((len(cards), size, size, len(ACTION_TYPES)))
+    var = np.zeros_like(ev)
+    for t in range(len(ACTION_TYPES)):
+        mask = (types == t)[:, :, None, None]
+        ev[..., t] = np.where(mask, means, 0).sum(axis=1)
+        var[..., t] = np.where(mask, variances, 0).sum(axis=1)
+
+    # Clash tables use the diagonal attack = defense = level.
+    diagonal = np.arange(size)
+    low_level = lows[:, :, diagonal, diagonal]    # [card, die, level]
+    high_level = highs[:, :, diagonal, diagonal]
+    clash = np.zeros((len(cards), len(cards), size, size))
+    paired = np.zeros((len(cards), len(cards)))
+    for d in range(_MAX_DICE):
+        low_a = low_level[:, None, d, :, None]
+        high_a = high_level[:, None, d, :, None]
+        low_b = low_level[None, :, d, None, :]
+        size_b = high_level[None, :, d, None, :] - low_b + 1
+        wins = (
+            _vector_beaten_count(high_a, low_b, size_b)
+            - _vector_beaten_count(low_a - 1, low_b, size_b)
+        ) / ((high_a - low_a + 1) * size_b)
+        both = present[:, None, d] & present[None, :, d]
+        clash += np.where(both[:, :, None, None], wins, 0)
+        paired += both
+    clash = np.divide(
+        clash, paired[:, :, None, None],
+        out=np.zeros_like(clash), where=paired[:, :, None, None] > 0,
+    )
+    return {
+        "version": np.array(TABLE_VERSION),
+        "cards": np.array(names),
+        "card_hashes": np.array([card_dice_hash(name) for name in names]),
+        "grid": np.array(grid),
+        "ev": ev,
+        "var": var,
+        "clash": clash,
+    }
+
+
+def _tables_match(data, names, grid):
+    return (
+        int(data["version"]) == TABLE_VERSION
+        and list(data["cards"]) == names
+        and list(data["card_hashes"]) == [card_dice_hash(name) for name in names]
+        and tuple(int(value) for value in data["grid"]) == tuple(grid)
+    )
+
+
+def load_tables(path=None, rebuild=False):
+    """Load the cached tables, rebuilding the file when stale or missing.
+
+    Returns None without NumPy; lookups then fall back to the scalar path.
+    """
+    global _tables
+    if np is None:
+        return None
+    path = path or DICE_TABLE_PATH
+    names = table_cards()
+    data = None
+    if not rebuild and os.path.exists(path):
+        try:
+            with np.load(path) as stored:
+                data = {key: stored[key] for key in stored.files}
+            if not _tables_match(data, names, STAT_GRID):
+                data = None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"⚠️ 주사위 표 캐시를 읽지 못해 다시 만듭니다: {e}")
+            data = None
+    if data is None:
+        data = build_tables(names)
+        try:
+            np.savez_compressed(path, **data)
+        except OSError as e:
+            logger.warning(f"⚠️ 주사위 표 캐시 저장 실패: {e}")
+    _tables = {
+        "ev": data["ev"],
+        "var": data["var"],
+        "clash": data["clash"],
+        "card_index": {str(name): index for index, name in enumerate(data["cards"])},
+        "grid_index": {int(value): index for index, value in enumerate(data["grid"])},
+    }
+    return _tables
+
+
+def _table_hit(*keys):
+    if _tables is None:
+        return None
+    card_index, grid_index = _tables["card_index"], _tables["grid_index"]
+    cards, stats = keys
+    try:
+        return [card_index[name] for name in cards], [grid_index[value] for value in stats]
+    except KeyError:
+        return None
+
+
+def card_ev(name, attack=0, defense=0):
+    """{action type: (mean, variance)} for a card; O(1) on table hits."""
+    hit = _table_hit((name,), (attack, defense))
+    if hit is None:
+        card = get_card(name)
+        moments = card_moments(card, attack, defense) if card else {}
+        return {action: moments[action] for action in ACTION_TYPES if action in moments}
+    (c,), (a, f) = hit
+    ev, var = _tables["ev"][c, a, f], _tables["var"][c, a, f]
+    return {
+        action: (float(ev[t]), float(var[t]))
+        for t, action in enumerate(ACTION_TYPES)
+        if ev[t] or var[t]
+    }
+
+
+def clash_lookup(name_a, level_a, name_b, level_b):
+    """clash_win_rate for attack = defense = level on each side."""
+    hit = _table_hit((name_a, name_b), (level_a, level_b))
+    if hit is None:
+        card_a, card_b = get_card(name_a), get_card(name_b)
+        if not card_a or not card_b:
+            return 0.0
+        return clash_win_rate(card_a, (level_a, level_a), card_b, (level_b, level_b))
+    (a, b), (la, lb) = hit
+    return float(_tables["clash"][a, b, la, lb])
@@ -12,6 +12,7 @@ results so applying this patch never rewrites a player's gems.
 from __future__ import annotations
 
 import math
+import operator
 import random
 
 
@@ -102,25 +103,106 @@ def gem_named(source, name):
     return next(iter(gems_named(source, name)), None)
 
 
+class GemProfile:
+    """Flat view of every equipped gem, compiled once per loadout.
+
+    Clash helpers run several times per die; reading pre-summed final values
+    here replaces re-filtering and re-scaling the gem lists on every call.
+    """
+
+    __slots__ = ("parts", "totals", "category_totals", "max_stars", "category_max_stars", "specials")
+
+    def __init__(self, artifacts, parts=()):
+        self.parts = parts
+        self.totals = {}
+        self.category_totals = {}
+        self.max_stars = {}
+        self.category_max_stars = {}
+        self.specials = frozenset(
+            artifact.get("special") for artifact in artifacts if artifact.get("special")
+        )
+        for artifact in artifacts:
+            for gem in artifact.get("gems") or ():
+                if not isinstance(gem, dict):
+                    continue
+                name = gem.get("name")
+                pair = (name, gem.get("category"))
+                value, star = gem_final_effect_value(gem), _star(gem.get("star"))
+                self.totals[name] = self.totals.get(name, 0) + value
+                self.category_totals[pair] = self.category_totals.get(pair, 0) + value
+                self.max_stars[name] = max(self.max_stars.get(name, -1), star)
+                self.category_max_stars[pair] = max(self.category_max_stars.get(pair, -1), star)
+
+    def has(self, name):
+        return name in self.max_stars
+
+
+_EMPTY_PROFILE = GemProfile([])
+
+
+def _profile_parts(artifacts):
+    # Every artifact, its special, socket list and socketed gem. The profile
+    # keeps these objects alive and compares them with ``is``, so swapping any
+    # of them (equip, unsocket) invalidates it; a bare id() could be reused.
+    parts = []
+    for artifact in artifacts:
+        gems = artifact.get("gems") or ()
+        parts.extend((artifact, artifact.get("special"), gems))
+        parts.extend(gems)
+    return parts
+
+
+def _same_parts(cached, parts):
+    return len(cached) == len(parts) and all(map(operator.is_, cached, parts))
+
+
+def gem_profile(source):
+    """Return the GemProfile for a character, artifact, or iterable.
+
+    Characters and monsters keep their compiled profile on the object and
+    reuse it while the equipped artifacts and sockets are unchanged; dict and
+    list sources are compiled on every call.
+    """
+    artifacts = equipped_artifacts(source)
+    if not artifacts:
+        return _EMPTY_PROFILE
+    if isinstance(source, (dict, list, tuple, set)):
+        return GemProfile(artifacts)
+    parts = _profile_parts(artifacts)
+    profile = getattr(source, "_gem_profile", None)
+    if profile is None or not _same_parts(profile.parts, parts):
+        profile = GemProfile(artifacts, parts)
+        try:
+            source._gem_profile = profile
+        except (AttributeError, TypeError):
+            pass
+    return profile
+
+
+def refresh_gem_profile(source):
+    """Recompile at battle start so in-place gem edits are picked up."""
+    if source is not None and not isinstance(source, (dict, list, tuple, set)):
+        try:
+            source._gem_profile = None
+        except (AttributeError, TypeError):
+            pass
+    return gem_profile(source)
+
+
 def gem_effect_total(source, name):
-    return sum(gem_final_effect_value(gem) for gem in gems_named(source, name))
+    return gem_profile(source).totals.get(name, 0)
 
 
 def gem_effect_total_category(source, name, category):
-    return sum(
-        gem_final_effect_value(gem)
-        for gem in gems_named_category(source, name, category)
-    )
+    return gem_profile(source).category_totals.get((name, category), 0)
 
 
 def gem_max_star(source, name):
-    matches = gems_named(source, name)
-    return max((_star(gem.get("star")) for gem in matches), default=-1)
+    return gem_profile(source).max_stars.get(name, -1)
 
 
 def gem_max_star_category(source, name, category):
-    matches = gems_named_category(source, name, category)
-    return max((_star(gem.get("star")) for gem in matches), default=-1)
+    return gem_profile(source).category_max_stars.get((name, category), -1)
 
 
 def runtime_cooldowns(source):
@@ -203,8 +285,9 @@ def status_store(source):
 # ---------------------------------------------------------------------------
 
 def turn_first_dice_bonus(source, valid_index=0):
-    value = gem_effect_total(source, "선봉의 젬")
-    star = gem_max_star(source, "선봉의 젬")
+    profile = gem_profile(source)
+    value = profile.totals.get("선봉의 젬", 0)
+    star = profile.max_stars.get("선봉의 젬", -1)
     if valid_index == 0:
         result = value
     elif valid_index == 1 and star >= 3:
@@ -219,8 +302,9 @@ def turn_first_dice_bonus(source, valid_index=0):
 
 
 def single_dice_bonus(source, dice_type=None):
-    value = gem_effect_total(source, "집중의 젬")
-    star = gem_max_star(source, "집중의 젬")
+    profile = gem_profile(source)
+    value = profile.totals.get("집중의 젬", 0)
+    star = profile.max_stars.get("집중의 젬", -1)
     if star >= 5:
         value = math.ceil(value * 1.5)
     elif star >= 3:
@@ -231,10 +315,11 @@ def single_dice_bonus(source, dice_type=None):
 
 
 def multi_attack_bonus(source, attack_index):
-    if not gems_named(source, "연격의 젬") or attack_index < 2:
+    profile = gem_profile(source)
+    if not profile.has("연격의 젬") or attack_index < 2:
         return 0
-    value = gem_effect_total(source, "연격의 젬")
-    star = gem_max_star(source, "연격의 젬")
+    value = profile.totals["연격의 젬"]
+    star = profile.max_stars["연격의 젬"]
     if attack_index >= 4 and star >= 5:
         result = value * 2
     elif attack_index >= 3 and star >= 3:
@@ -246,11 +331,12 @@ def multi_attack_bonus(source, attack_index):
 
 
 def low_mental_bonus(source, current, maximum):
-    if not gems_named(source, "결의의 젬") or maximum <= 0:
+    profile = gem_profile(source)
+    if not profile.has("결의의 젬") or maximum <= 0:
         return 0
-    star = gem_max_star(source, "결의의 젬")
+    star = profile.max_stars["결의의 젬"]
     threshold = 0.60 if star >= 5 else (0.50 if star >= 3 else 0.40)
-    result = gem_effect_total(source, "결의의 젬") if current / maximum <= threshold else 0
+    result = profile.totals["결의의 젬"] if current / maximum <= threshold else 0
     if result:
         record_gem_activation(source, "결의의 젬", f"저정신 주사위 +{result}")
     return result
@@ -299,7 +385,7 @@ def escalation_roll(source, rng=None):
     rng = rng or random
     minimum = min(40, -10 + gem_effect_total(source, "고양의 젬"))
     rolls = 1
-    if gems_named(source, "폭주의 젬"):
+    if gem_profile(source).has("폭주의 젬"):
         star = gem_max_star(source, "폭주의 젬")
         rolls = 3 if star >= 5 else (2 if star >= 3 else 1)
         if star < 3 and rng.randint(1, 100) <= min(75, gem_effect_total(source, "폭주의 젬")):
@@ -308,11 +394,7 @@ def escalation_roll(source, rng=None):
 
 
 def has_artifact_special(source, special):
-    return any(
-        artifact.get("special") == special
-        for artifact in equipped_artifacts(source)
-        if isinstance(artifact, dict)
-    )
+    return special in gem_profile(source).specials
 
 
 def apply_escalation_to_dice(source, dice_results, rng=None):
@@ -358,13 +440,13 @@ def apply_escalation_to_dice(source, dice_results, rng=None):
         ):
             pending_chain = max(1, math.floor(rolled * chain_percent / 100))
 
-    if gems_named(source, "고양의 젬"):
+    if gem_profile(source).has("고양의 젬"):
         record_gem_activation(
             source,
             "고양의 젬",
             f"고조 최솟값 {-10 + gem_effect_total(source, '고양의 젬'):+d}",
         )
-    if gems_named(source, "폭주의 젬"):
+    if gem_profile(source).has("폭주의 젬"):
         record_gem_activation(source, "폭주의 젬", "모든 주사위 고조 재굴림")
     if chain_percent and any(entry["chained"] for entry in results):
         transferred = sum(entry["chained"] for entry in results)
@@ -373,7 +455,7 @@ def apply_escalation_to_dice(source, dice_results, rng=None):
 
 
 def _ripple_boost_types(source, dice_results, rng):
-    if not gems_named(source, "증폭의 젬"):
+    if not gem_profile(source).has("증폭의 젬"):
         return []
     state = gem_state(source)
     valid_types = sorted({
@@ -423,7 +505,7 @@ def apply_ripple_to_dice(source, dice_results, turn_count, rng=None):
         return None
 
     state = gem_state(source)
-    interval = 1 if gems_named(source, "맥동의 젬") else 2
+    interval = 1 if gem_profile(source).has("맥동의 젬") else 2
     last_turn = int(state.get("ripple_last_turn", -10) or -10)
     if int(turn_count) - last_turn < interval:
         return None
@@ -471,7 +553,7 @@ def apply_ripple_to_dice(source, dice_results, turn_count, rng=None):
 
     total = sum(entry["amount"] for entry in transfers)
     hp_heal = mental_heal = 0
-    if total > 0 and gems_named(source, "환류의 젬"):
+    if total > 0 and gem_profile(source).has("환류의 젬"):
         return_effect = gem_effect_total(source, "환류의 젬")
         return_star = gem_max_star(source, "환류의 젬")
         recovery_percent = 100 + return_effect
@@ -540,7 +622,7 @@ def reduce_turn_first_damage(source, damage, state=None):
             record_gem_activation(source, "인내의 젬", f"피해 {before}→{damage}")
 
     if (
-        not gems_named(source, "수호의 젬")
+        not gem_profile(source).has("수호의 젬")
         or damage <= 0
         or state.get("guardian_turn_used")
     ):
@@ -818,13 +900,9 @@ def revive_gem_effects(source):
         )
         logs.append(f"회귀: 다음 피해 {min(60, return_value)}% 감소")
 
-    dedicated_cleanse = [
-        gem for gem in gems_named(source, "정화의 젬")
-        if gem.get("category") == "dedicated"
-    ]
-    if dedicated_cleanse:
-        star = max(_star(gem.get("star")) for gem in dedicated_cleanse)
-        value = sum(gem_final_effect_value(gem) for gem in dedicated_cleanse)
+    star = gem_max_star_category(source, "정화의 젬", "dedicated")
+    if star >= 0:
+        value = gem_effect_total_category(source, "정화의 젬", "dedicated")
         statuses = status_store(source)
         if star >= 3:
             for key in list(statuses):
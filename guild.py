@@ -5,7 +5,6 @@
 import discord
 # cumulative-v2: one shared guild, automatic membership
 import random
-import json
 import asyncio
 import math
 from copy import deepcopy
@@ -16,8 +15,8 @@ from data_manager import (
     get_user_data, get_db_pool, save_user_data, mutate_user_data,
     get_user_guild_info, create_guild, join_guild_by_id,
     deposit_guild_item, store_guild_item, craft_guild_workshop_item,
-    deposit_guild_artifact, get_guild_logs, get_guild_list,
-    get_guild_items, withdraw_guild_item, craft_guild_item,
+    deposit_guild_artifact, get_guild_logs_page, get_guild_list,
+    get_guild_items, get_guild_artifact_detail, withdraw_guild_item, craft_guild_item,
     consume_guild_raid_supplies, add_guild_contribution,
     get_or_create_daily_guild_shop, buy_guild_shop_item,
     advance_world_turn, GUILD_RANK_THRESHOLDS, GUILD_DONATION_EFFICIENCY,
@@ -290,6 +289,20 @@ def _build_daily_shop_rotation(level, day_key):
     return result
 
 
+_shop_rotation_cache = {}
+
+
+def _daily_shop_rotation(level, day_key):
+    """Cached _build_daily_shop_rotation; only the current day's rosters are kept."""
+    key = (max(1, min(10, int(level or 1))), str(day_key))
+    rows = _shop_rotation_cache.get(key)
+    if rows is None:
+        for stale in [known for known in _shop_rotation_cache if known[1] != key[1]]:
+            del _shop_rotation_cache[stale]
+        rows = _shop_rotation_cache[key] = _build_daily_shop_rotation(*key)
+    return [dict(row, cost=dict(row["cost"])) for row in rows]
+
+
 def _guild_day_key():
     return datetime.now(ZoneInfo("Asia/Seoul")).date().isoformat()
 
@@ -996,7 +1009,7 @@ class GuildShopView(discord.ui.View):
         daily_items = await get_or_create_daily_guild_shop(
             self.guild_info["guild_id"],
             self.day_key,
-            _build_daily_shop_rotation(guild_level, self.day_key),
+            _daily_shop_rotation(guild_level, self.day_key),
         )
         self.items = [
             row for row in daily_items
@@ -1454,6 +1467,7 @@ class GuildWarehouseView(discord.ui.View):
         self.add_item(self.btn_withdraw)
         self.add_item(self.btn_deposit_art)
         self.add_item(self.btn_logs)
+        self.artifact_select = None
         self.message = None
 
     async def select_category(self, interaction):
@@ -1488,12 +1502,7 @@ class GuildWarehouseView(discord.ui.View):
             if self.category == "artifact":
                 lines = []
                 for item in items[:15]:
-                    data = item.get('data', {})
-                    if isinstance(data, str):
-                        try: data = json.loads(data)
-                        except: data = {}
-                    prefix = data.get('prefix', '')
-                    lines.append(f"• **{item['name']}** (+{item.get('level', 0)}) [{prefix}]")
+                    lines.append(f"• **{item['name']}** (+{item.get('level', 0)}) [{item.get('prefix') or ''}]")
                 content = "\n".join(lines)
                 if len(items) > 15: content += f"\n...외 {len(items)-15}개"
             else:
@@ -1501,8 +1510,50 @@ class GuildWarehouseView(discord.ui.View):
                 content = "\n".join(lines)
 
         embed.add_field(name=f"📂 {titles[self.category]} 보관함", value=content, inline=False)
+        self.sync_artifact_select(items if self.category == "artifact" else [])
         return embed
 
+    def sync_artifact_select(self, artifacts):
+        if self.artifact_select is not None:
+            self.remove_item(self.artifact_select)
+            self.artifact_select = None
+        if not artifacts:
+            return
+        select = Select(
+            placeholder="상세 정보를 볼 아티팩트 선택",
+            options=[
+                discord.SelectOption(
+                    label=f"{art['name']} (+{art.get('level', 0)})"[:100],
+                    description=f"{art.get('rank_level') or 1}성 | {art.get('prefix') or ''}"[:100],
+                    value=str(art["id"]),
+                )
+                for art in artifacts[:25]
+            ],
+            row=2,
+        )
+        select.callback = self.show_artifact_detail
+        self.artifact_select = select
+        self.add_item(select)
+
+    async def show_artifact_detail(self, interaction):
+        data = await get_guild_artifact_detail(self.guild_info["guild_id"], interaction.data["values"][0])
+        if not data:
+            return await interaction.response.send_message("이미 창고에서 사라진 아티팩트입니다.", ephemeral=True)
+        embed = discord.Embed(title=f"💍 {data.get('name', '아티팩트')}", color=discord.Color.purple())
+        embed.add_field(name="등급", value=f"{data.get('rank', data.get('grade', 1))}성")
+        embed.add_field(name="강화", value=f"+{data.get('level', 0)}")
+        embed.add_field(name="접두사", value=data.get("prefix") or "없음")
+        stats = data.get("stats") or {}
+        if stats:
+            embed.add_field(
+                name="능력치",
+                value="\n".join(f"{key}: {value}" for key, value in stats.items())[:1024],
+                inline=False,
+            )
+        if data.get("description"):
+            embed.add_field(name="설명", value=str(data["description"])[:1024], inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     async def refresh(self, interaction):
         if interaction.response.is_done():
             await interaction.edit_original_response(embed=await self.get_embed(), view=self)
@@ -1554,28 +1605,84 @@ class GuildWarehouseView(discord.ui.View):
 
     @discord.ui.button(label="📜 로그", style=discord.ButtonStyle.primary, row=1)
     async def btn_logs(self, interaction: discord.Interaction, button: discord.ui.Button):
-        logs = await get_guild_logs(self.guild_info['guild_id'])
-        if not logs: return await interaction.response.send_message("기록이 없습니다.", ephemeral=True)
+        view = GuildLogView(interaction.user, self.guild_info['guild_id'])
+        await view.load()
+        if not view.rows: return await interaction.response.send_message("기록이 없습니다.", ephemeral=True)
+        await interaction.response.send_message(embed=view.get_embed(), view=view, ephemeral=True)
+
+
+GUILD_LOG_ACTION_LABELS = {
+    "deposit": "구형 입고",
+    "donation": "자원 납품",
+    "store_item": "창고 반입",
+    "workshop_personal": "개인 제작",
+    "workshop_guild": "공용 제작",
+    "workshop_auto_donate": "공용 제작·자동 납품",
+    "withdraw": "출고",
+    "deposit_artifact": "보관",
+    "craft": "제작",
+    "shop_purchase": "상점 구매",
+    "mission": "미션 공헌",
+    "training": "수련 공헌",
+    "raid_success": "레이드 성공",
+    "raid_failure": "레이드 참가",
+}
+
+
+class GuildLogView(discord.ui.View):
+    """Pages guild_log by keyset; earlier page cursors are kept for 이전."""
+
+    PER_PAGE = 10
+
+    def __init__(self, author, guild_id):
+        super().__init__(timeout=120)
+        self.author = author
+        self.guild_id = guild_id
+        self.cursors = [None]  # cursor that produced each visited page
+        self.rows = []
+        self.next_cursor = None
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id == self.author.id:
+            return True
+        await interaction.response.send_message("본인의 길드 로그 화면만 조작할 수 있습니다.", ephemeral=True)
+        return False
+
+    async def load(self):
+        self.rows, self.next_cursor = await get_guild_logs_page(
+            self.guild_id, before=self.cursors[-1], limit=self.PER_PAGE
+        )
+        self.rebuild()
+
+    def rebuild(self):
+        self.clear_items()
+        previous = Button(label="최근", disabled=len(self.cursors) == 1)
+        counter = Button(label=f"{len(self.cursors)}쪽", disabled=True)
+        following = Button(label="이전 기록", disabled=self.next_cursor is None)
+        previous.callback = self.newer_page
+        following.callback = self.older_page
+        self.add_item(previous)
+        self.add_item(counter)
+        self.add_item(following)
+
+    def get_embed(self):
         text = ""
-        for l in logs:
-            action = {
-                "deposit": "구형 입고",
-                "donation": "자원 납품",
-                "store_item": "창고 반입",
-                "workshop_personal": "개인 제작",
-                "workshop_guild": "공용 제작",
-                "workshop_auto_donate": "공용 제작·자동 납품",
-                "withdraw": "출고",
-                "deposit_artifact": "보관",
-                "craft": "제작",
-                "shop_purchase": "상점 구매",
-                "mission": "미션 공헌",
-                "training": "수련 공헌",
-                "raid_success": "레이드 성공",
-                "raid_failure": "레이드 참가",
-            }.get(l["action_type"], "활동")
-            text += f"• [{action}] **{l['item_name']}** x{l['count']} ({l.get('user_name', '알수없음')})\n"
-        await interaction.response.send_message(embed=discord.Embed(title="📋 최근 활동", description=text), ephemeral=True)
+        for l in self.rows:
+            action = GUILD_LOG_ACTION_LABELS.get(l["action_type"], "활동")
+            text += f"• [{action}] **{l['item_name']}** x{l['count']} ({l.get('user_name') or '알수없음'})\n"
+        return discord.Embed(title="📋 최근 활동", description=text or "기록이 없습니다.")
+
+    async def newer_page(self, interaction):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await self.load()
+        await interaction.response.edit_message(embed=self.get_embed(), view=self)
+
+    async def older_page(self, interaction):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        await self.load()
+        await interaction.response.edit_message(embed=self.get_embed(), view=self)
 
 # ==================================================================================
 # 4. 레이드 (기존 유지)
@@ -1867,6 +1974,8 @@ class RaidBattleView(discord.ui.View):
         self.shayla_triggers = {uid: False for uid in self.participants}
         self.boss_intent = None
         self.boss_target_ids = []
+        # 전투 전체가 이 RNG 하나로 굴러가므로 시드와 명령만으로 재현할 수 있다.
+        self.rng = battle_engine.BattleRandom()
         self.public_message = message
         self.log_message = None
         self.command_messages = {}
@@ -2051,7 +2160,7 @@ class RaidBattleView(discord.ui.View):
         elif self.boss_intent.is_aoe:
             self.boss_target_ids = list(alive)
         else:
-            self.boss_target_ids = [random.choice(alive)]
+            self.boss_target_ids = [self.rng.choice(alive)]
 
     def _boss_target_text(self):
         if self.boss_intent is None:
@@ -2084,7 +2193,7 @@ class RaidBattleView(discord.ui.View):
                 self.boss_choice_task.cancel()
             self.boss_choice_task = asyncio.create_task(self._boss_choice_timeout(self.turn))
         else:
-            self.boss_intent = self.boss.decide_action()
+            self.boss_intent = self.boss.decide_action(rng=self.rng)
             self._lock_boss_targets()
         self._sync_command_gate()
 
@@ -2093,7 +2202,7 @@ class RaidBattleView(discord.ui.View):
         async with self.resolve_lock:
             if self.finished or self.turn != selected_turn or self.boss_intent is not None:
                 return
-            self.boss_intent = self.boss.decide_action()
+            self.boss_intent = self.boss.decide_action(rng=self.rng)
             self._lock_boss_targets()
             self._sync_command_gate()
         await self._refresh_public_windows()
@@ -2756,7 +2865,7 @@ class RaidBattleView(discord.ui.View):
                     )
         status_potency = float(passives.get("status_extend", 0.0))
         existing = set(participant.get("base_general_passives", set()))
-        if status_potency and random.random() < status_potency:
+        if status_potency and self.rng.random() < status_potency:
             existing.add("status_extend")
         char.general_passives = existing
         return char.current_hp
@@ -2942,7 +3051,7 @@ class RaidBattleView(discord.ui.View):
         if boss_stunned:
             self.logs.append(f"💫 **{self.boss.name}** 기절로 행동 불가!")
         elif hasattr(self.boss, "commit_card"):
-            self.boss.commit_card(boss_card)
+            self.boss.commit_card(boss_card, rng=self.rng)
         if hasattr(self.boss, "on_turn_start"):
             boss_start_log = self.boss.on_turn_start(self.turn, len(alive))
             if boss_start_log:
@@ -2954,7 +3063,7 @@ class RaidBattleView(discord.ui.View):
         if boss_card.is_aoe:
             targets = list(alive)
         elif not targets:
-            targets = [random.choice(alive)]
+            targets = [self.rng.choice(alive)]
             self.boss_target_ids = list(targets)
         
         for uid in alive:
@@ -2992,6 +3101,7 @@ class RaidBattleView(discord.ui.View):
                 else boss_card.use_card(
                     battle_engine.effective_combat_stat(self.boss, "attack"),
                     battle_engine.effective_combat_stat(self.boss, "defense"),
+                    rng=self.rng,
                 )
             )
             boss_res = battle_engine.apply_stat_scaling(boss_res, self.boss)
@@ -3004,12 +3114,13 @@ class RaidBattleView(discord.ui.View):
                     battle_engine.effective_combat_stat(char, "attack"),
                     battle_engine.effective_combat_stat(char, "defense"),
                     char.current_mental,
+                    rng=self.rng,
                 )
             )
             user_res = battle_engine.apply_stat_scaling(user_res, char)
             hp_before = self._prepare_dungeon_passives(participant, user_res)
             if hasattr(self.boss, "modify_opponent_dice"):
-                boss_special_log = self.boss.modify_opponent_dice(user_res, char)
+                boss_special_log = self.boss.modify_opponent_dice(user_res, char, rng=self.rng)
                 if boss_special_log:
                     self.logs.append(f"👑 {boss_special_log}")
             
@@ -3021,13 +3132,14 @@ class RaidBattleView(discord.ui.View):
                 u_effs.append(engraved.get("special"))
             
             art_log, next_trig = battle_engine.process_turn_start_artifacts(
-                char, self.boss, user_res, boss_res, self.turn, self.shayla_triggers.get(uid, False), u_card_name
+                char, self.boss, user_res, boss_res, self.turn, self.shayla_triggers.get(uid, False), u_card_name,
+                rng=self.rng,
             )
             self.shayla_triggers[uid] = next_trig
             if art_log: self.logs.append(art_log)
 
             if "escalation" in u_effs and not user_stunned:
-                escalation = apply_escalation_to_dice(char, user_res)
+                escalation = apply_escalation_to_dice(char, user_res, self.rng)
                 if escalation:
                     summary = ", ".join(
                         f"{entry['index'] + 1}번 {entry['rolled']:+d}"
@@ -3036,7 +3148,7 @@ class RaidBattleView(discord.ui.View):
                     )
                     self.logs.append(f"⚡ **{char.name}[고조]** {summary}")
             if "ripple" in u_effs and not user_stunned:
-                ripple = apply_ripple_to_dice(char, user_res, self.turn)
+                ripple = apply_ripple_to_dice(char, user_res, self.turn, self.rng)
                 if ripple:
                     amounts = " → ".join(
                         f"+{entry['amount']}" for entry in ripple["transfers"]
@@ -3069,6 +3181,7 @@ class RaidBattleView(discord.ui.View):
                     self.turn,
                     is_stunned1=user_stunned,
                     is_stunned2=boss_stunned,
+                    rng=self.rng,
                 )
                 self.logs.append(f"⚔️ **{char.name}** vs **보스**" + clash_log)
             else:
@@ -3084,6 +3197,7 @@ class RaidBattleView(discord.ui.View):
                     self.turn,
                     is_stunned1=user_stunned,
                     is_stunned2=boss_stunned,
+                    rng=self.rng,
                 )
                 self.logs.append(f"🗡️ **{char.name}** 일방 공격!" + clash_log)
 
@@ -3127,7 +3241,7 @@ class RaidBattleView(discord.ui.View):
                 reason="모든 공격자가 행동 불능이 되어 보스가 승리했습니다.",
             )
         if hasattr(self.boss, "on_turn_end"):
-            boss_end_log = self.boss.on_turn_end()
+            boss_end_log = self.boss.on_turn_end(rng=self.rng)
             if boss_end_log:
                 self.logs.append(f"👑 {boss_end_log}")
 
@@ -4044,6 +4158,8 @@ class TrainingBattleView(discord.ui.View):
         self.finished = False
         self.logs = []
         self.shayla_trigger = False
+        # 전투 전체가 이 RNG 하나로 굴러가므로 시드와 명령만으로 재현할 수 있다.
+        self.rng = battle_engine.BattleRandom()
 
     async def interaction_check(self, interaction):
         if interaction.user.id == self.author.id:
@@ -4146,7 +4262,7 @@ class TrainingBattleView(discord.ui.View):
         # Every valid sandbag command is one shared activity turn.
         await advance_guild_world_turn(self.author, 1)
 
-        bag_card = self.sandbag.decide_action() or get_card("기본공격")
+        bag_card = self.sandbag.decide_action(rng=self.rng) or get_card("기본공격")
         user_stunned = (
             battle_engine.ensure_status_effects(self.character).get("stun", 0) > 0
         )
@@ -4161,6 +4277,7 @@ class TrainingBattleView(discord.ui.View):
                 self.character.attack,
                 self.character.defense,
                 self.character.current_mental,
+                rng=self.rng,
             )
         )
         bag_res = (
@@ -4170,6 +4287,7 @@ class TrainingBattleView(discord.ui.View):
                 self.sandbag.attack,
                 self.sandbag.defense,
                 self.sandbag.current_mental,
+                rng=self.rng,
             )
         )
         user_res = battle_engine.apply_stat_scaling(user_res, self.character)
@@ -4189,11 +4307,12 @@ class TrainingBattleView(discord.ui.View):
             self.turn,
             self.shayla_trigger,
             card_name,
+            rng=self.rng,
         )
         escalation_summary = ""
         ripple_summary = ""
         if "escalation" in effects and not user_stunned:
-            escalation = apply_escalation_to_dice(self.character, user_res)
+            escalation = apply_escalation_to_dice(self.character, user_res, self.rng)
             if escalation:
                 escalation_summary = "⚡ 고조: " + ", ".join(
                     f"{entry['index'] + 1}번 {entry['rolled']:+d}"
@@ -4202,7 +4321,7 @@ class TrainingBattleView(discord.ui.View):
                 )
         if "ripple" in effects and not user_stunned:
             ripple = apply_ripple_to_dice(
-                self.character, user_res, self.turn
+                self.character, user_res, self.turn, self.rng
             )
             if ripple:
                 ripple_summary = "🌊 파문: " + " → ".join(
@@ -4219,6 +4338,7 @@ class TrainingBattleView(discord.ui.View):
             self.turn,
             is_stunned1=user_stunned,
             is_stunned2=bag_stunned,
+            rng=self.rng,
         )
         battle_engine.tick_freeze_end_of_turn(self.character, self.turn)
         battle_engine.tick_freeze_end_of_turn(self.sandbag, self.turn)
@@ -20,7 +20,9 @@ import battle_engine
 from cards import get_card
 from character import Character
 from data_manager import (
+    InsufficientResourcesError,
     advance_world_turn,
+    apply_user_deltas,
     get_user_data,
     get_user_guild_info,
     mutate_user_data,
@@ -189,22 +191,13 @@ async def _grant_rewards(
         for name, quantity in (items or {}).items()
         if int(quantity) > 0
     }
-
-    def merge(latest):
-        latest["money"] = int(latest.get("money", 0) or 0) + max(0, int(money))
-        latest["pt"] = int(latest.get("pt", 0) or 0) + max(0, int(pt))
-        inventory = latest.setdefault("inventory", {})
-        for item_name, quantity in clean_items.items():
-            inventory[item_name] = int(inventory.get(item_name, 0) or 0) + quantity
-        if hope > 0:
-            inventory["순수한 희망"] = (
-                int(inventory.get("순수한 희망", 0) or 0) + int(hope)
-            )
-
-    participant["data"] = await mutate_user_data(
+    if hope > 0:
+        clean_items["순수한 희망"] = clean_items.get("순수한 희망", 0) + int(hope)
+    await apply_user_deltas(
         participant["user"].id,
-        merge,
-        participant["user"].display_name,
+        money=max(0, int(money)),
+        pt=max(0, int(pt)),
+        items=clean_items,
     )
 
 
@@ -419,31 +412,19 @@ class GuildDungeonLobbyView(discord.ui.View):
                 charged = []
                 try:
                     for participant in self.participants.values():
-                        def charge(latest):
-                            current = int(latest.get("pt", 0) or 0)
-                            if current < GUILD_DUNGEON_COST:
-                                raise ValueError(
-                                    f"{participant['user'].display_name}님의 포인트가 부족합니다."
-                                )
-                            latest["pt"] = current - GUILD_DUNGEON_COST
-
-                        participant["data"] = await mutate_user_data(
-                            participant["user"].id,
-                            charge,
-                            participant["user"].display_name,
-                        )
+                        try:
+                            await apply_user_deltas(
+                                participant["user"].id, pt=-GUILD_DUNGEON_COST
+                            )
+                        except InsufficientResourcesError:
+                            raise ValueError(
+                                f"{participant['user'].display_name}님의 포인트가 부족합니다."
+                            ) from None
                         charged.append(participant)
                 except Exception as exc:
                     for participant in charged:
-                        def refund(latest):
-                            latest["pt"] = (
-                                int(latest.get("pt", 0) or 0) + GUILD_DUNGEON_COST
-                            )
-
-                        await mutate_user_data(
-                            participant["user"].id,
-                            refund,
-                            participant["user"].display_name,
+                        await apply_user_deltas(
+                            participant["user"].id, pt=GUILD_DUNGEON_COST
                         )
                     return await interaction.followup.send(
                         f"출발 비용 결제를 취소했습니다: {exc}",
@@ -1536,6 +1517,8 @@ class GuildDungeonBattleView(discord.ui.View):
         self.shayla_triggers = {
             uid: False for uid in self.run.participants
         }
+        # 전투 전체가 이 RNG 하나로 굴러가므로 시드와 명령만으로 재현할 수 있다.
+        self.rng = battle_engine.BattleRandom()
 
     def get_embed(self, message: str = ""):
         embed = discord.Embed(
@@ -1771,7 +1754,7 @@ class GuildDungeonBattleView(discord.ui.View):
                 )
                 card_name = self.selected_cards[user_id]
                 user_card = get_card(card_name)
-                monster_card = self.monster.decide_action() or get_card("기본공격")
+                monster_card = self.monster.decide_action(rng=self.rng) or get_card("기본공격")
                 if not user_card or not monster_card:
                     continue
 
@@ -1788,6 +1771,7 @@ class GuildDungeonBattleView(discord.ui.View):
                         battle_engine.effective_combat_stat(character, "attack"),
                         battle_engine.effective_combat_stat(character, "defense"),
                         character.current_mental,
+                        rng=self.rng,
                     )
                 )
                 monster_result = (
@@ -1797,6 +1781,7 @@ class GuildDungeonBattleView(discord.ui.View):
                         battle_engine.effective_combat_stat(self.monster, "attack"),
                         battle_engine.effective_combat_stat(self.monster, "defense"),
                         self.monster.current_mental,
+                        rng=self.rng,
                     )
                 )
                 user_result = battle_engine.apply_stat_scaling(user_result, character)
@@ -1813,12 +1798,13 @@ class GuildDungeonBattleView(discord.ui.View):
                     self.turn,
                     self.shayla_triggers.get(user_id, False),
                     card_name,
+                    rng=self.rng,
                 )
                 self.shayla_triggers[user_id] = trigger
                 if "escalation" in effects and not user_stunned:
-                    apply_escalation_to_dice(character, user_result)
+                    apply_escalation_to_dice(character, user_result, self.rng)
                 if "ripple" in effects and not user_stunned:
-                    apply_ripple_to_dice(character, user_result, self.turn)
+                    apply_ripple_to_dice(character, user_result, self.turn, self.rng)
 
                 before_hp = character.current_hp
                 before_enemy_hp = self.monster.current_hp
@@ -1832,6 +1818,7 @@ class GuildDungeonBattleView(discord.ui.View):
                     self.turn,
                     is_stunned1=user_stunned,
                     is_stunned2=monster_stunned,
+                    rng=self.rng,
                 )
                 notes = self._tool_after_clash(
                     participant,
@@ -0,0 +1,110 @@
+"""Per-key asyncio locks that only exist while someone holds or waits for them.
+
+Each namespace keeps a refcount per key (holders plus waiters); the entry is
+dropped when it reaches zero, so a table keyed by user id stays as large as
+the number of users acting right now rather than every user ever seen.
+"""
+import asyncio
+import contextlib
+import time
+
+_NAMESPACES = {}
+
+
+def get_lock_stats():
+    """Contention counters for every namespace, keyed by namespace name."""
+    return {name: locks.get_stats() for name, locks in _NAMESPACES.items()}
+
+
+class KeyedLocks:
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self._entries = {}  # key -> [lock, refcount, acquired_at]
+        self._stats = {
+            "acquired": 0,
+            "contended": 0,
+            "timeouts": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "hold_ms_total": 0.0,
+            "hold_ms_max": 0.0,
+            "peak_keys": 0,
+        }
+        _NAMESPACES[namespace] = self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self):
+        stats = dict(self._stats)
+        stats["active_keys"] = len(self._entries)
+        return stats
+
+    def locked(self, key):
+        entry = self._entries.get(str(key))
+        return bool(entry and entry[0].locked())
+
+    async def acquire(self, key, timeout=None):
+        """Acquire ``key``; with ``timeout`` (0 = don't wait) return False on expiry."""
+        key = str(key)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [asyncio.Lock(), 0, 0.0]
+            self._stats["peak_keys"] = max(self._stats["peak_keys"], len(self._entries))
+        entry[1] += 1
+        lock = entry[0]
+        started = time.perf_counter()
+        contended = lock.locked()
+        try:
+            if contended and timeout is not None and timeout <= 0:
+                raise asyncio.TimeoutError
+            if timeout is None or not contended:
+                await lock.acquire()
+            else:
+                await asyncio.wait_for(lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            self._unref(key, entry)
+            return False
+        except BaseException:
+            self._unref(key, entry)
+            raise
+        entry[2] = time.perf_counter()
+        waited = (entry[2] - started) * 1000
+        self._stats["acquired"] += 1
+        self._stats["contended"] += int(contended)
+        self._stats["wait_ms_total"] += waited
+        self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], waited)
+        return True
+
+    def release(self, key):
+        key = str(key)
+        entry = self._entries[key]
+        held = (time.perf_counter() - entry[2]) * 1000
+        self._stats["hold_ms_total"] += held
+        self._stats["hold_ms_max"] = max(self._stats["hold_ms_max"], held)
+        entry[0].release()
+        self._unref(key, entry)
+
+    def _unref(self, key, entry):
+        entry[1] -= 1
+        if entry[1] <= 0 and self._entries.get(key) is entry:
+            del self._entries[key]
+
+    @contextlib.asynccontextmanager
+    async def hold(self, key):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    @contextlib.asynccontextmanager
+    async def try_hold(self, key, timeout=0):
+        """Yield whether ``key`` was acquired within ``timeout`` seconds."""
+        acquired = await self.acquire(key, timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.release(key)
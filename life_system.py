@@ -11,7 +11,6 @@
 # life-button-ui-v8.5
 from __future__ import annotations
 
-import asyncio
 import random
 import uuid
 from typing import Any
@@ -29,6 +28,7 @@ from gem_effects import (
     gem_final_aux_value,
     gem_final_effect_value,
 )
+from keyed_locks import KeyedLocks
 from navigation_v7 import attach_navigation
 
 # guild-pvp-stability-v7.2
@@ -49,7 +49,7 @@ CRAFT_TURNS = 20
 MAX_TOOL_BREAKTHROUGH = 3
 MAX_EQUIPPED_TOOLS = 3
 
-_APPRAISAL_OPERATION_LOCKS: dict[str, asyncio.Lock] = {}
+_APPRAISAL_OPERATION_LOCKS = KeyedLocks("appraisal")
 
 
 # category:
@@ -1601,8 +1601,7 @@ async def _run_latest_appraisal_operation(author, save_func, current_data, opera
     committed. Old Discord messages therefore cannot replay a completed slot.
     """
     user_key = str(author.id)
-    lock = _APPRAISAL_OPERATION_LOCKS.setdefault(user_key, asyncio.Lock())
-    async with lock:
+    async with _APPRAISAL_OPERATION_LOCKS.hold(user_key):
         fresh = await get_user_data(author.id, getattr(author, "display_name", None))
         ok, payload = operation(fresh)
         if ok:
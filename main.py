@@ -4,12 +4,18 @@ import os
 import logging
 import asyncio
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 # [중요] 지속성 뷰(Persistent View)를 위해 필요한 클래스 임포트
 # 길드 뷰는 main.py에서 등록해야 재시작 후에도 버튼이 반응합니다.
-from guild import GuildMainView 
-from data_manager import get_db_pool, save_user_data
+from guild import GuildMainView, _guild_day_key
+from boss_training import backfill_boss_summaries, rollover_weekly_ratings
+from dice_tables import load_tables as load_dice_tables
+from data_manager import (
+    get_db_pool, save_user_data, flush_all_saves, flush_save_history, reconcile_global_guild,
+    flush_guild_contributions, archive_guild_logs, purge_stale_guild_shop_stock,
+    remember_display_name,
+)
 
 # -------------------------------------------------------------------------
 # 1. 환경 설정 및 모듈 경로 잡기
@@ -54,6 +60,49 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Main")
 
+# 공헌도 누적 카운터(guilds.exp)를 길드원 합계와 주기적으로 맞춘다.
+@tasks.loop(minutes=10)
+async def reconcile_guild_counters():
+    try:
+        await reconcile_global_guild()
+    except Exception as e:
+        logger.warning("길드 공헌도 정산 실패: %s", e)
+
+@tasks.loop(hours=1)
+async def archive_old_guild_logs():
+    try:
+        await archive_guild_logs()
+    except Exception as e:
+        logger.warning("길드 로그 보관 실패: %s", e)
+
+@tasks.loop(hours=24)
+async def purge_guild_shop_stock():
+    try:
+        await purge_stale_guild_shop_stock(_guild_day_key())
+    except Exception as e:
+        logger.warning("지난 길드 상점 재고 정리 실패: %s", e)
+
+@tasks.loop(hours=1)
+async def rollover_boss_weekly_elo():
+    # 표식 행이 이번 주로 갱신되어 있으면 아무것도 하지 않으므로 주 1회만 초기화된다.
+    try:
+        reset = await rollover_weekly_ratings()
+        if reset:
+            logger.info("보스 주간 Elo 초기화: %d건", reset)
+    except Exception as e:
+        logger.warning("보스 주간 Elo 초기화 실패: %s", e)
+
+@tasks.loop(hours=1)
+async def backfill_boss_summary_columns():
+    # 레거시 보스 인자 정규화·요약 열 채우기. 시작 직후 한 번 돌고, 실패한 행은
+    # 다음 주기에 다시 시도한다. 모두 끝난 뒤에는 빈 조회 한 번이다.
+    try:
+        backfilled = await backfill_boss_summaries()
+        if backfilled:
+            logger.info("보스 요약 열 백필: %d건", backfilled)
+    except Exception as e:
+        logger.warning("보스 요약 열 백필 실패: %s", e)
+
 # -------------------------------------------------------------------------
 # 3. 봇 클래스 정의
 # -------------------------------------------------------------------------
@@ -78,6 +127,23 @@ class MyBot(commands.Bot):
             logger.info("✅ 데이터베이스 연결 풀 초기화 성공")
         except Exception as e:
             logger.error(f"❌ 데이터베이스 연결 실패: {e}")
+        # 카드 기대값·합 승률 표. numpy가 없으면 화면에서 즉석 계산한다.
+        try:
+            if await asyncio.to_thread(load_dice_tables) is not None:
+                logger.info("주사위 기대값 표 로드 완료")
+        except Exception as e:
+            logger.warning("주사위 기대값 표 로드 실패: %s", e)
+
+        if not reconcile_guild_counters.is_running():
+            reconcile_guild_counters.start()
+        if not archive_old_guild_logs.is_running():
+            archive_old_guild_logs.start()
+        if not purge_guild_shop_stock.is_running():
+            purge_guild_shop_stock.start()
+        if not rollover_boss_weekly_elo.is_running():
+            rollover_boss_weekly_elo.start()
+        if not backfill_boss_summary_columns.is_running():
+            backfill_boss_summary_columns.start()
 
         # 2. 확장 모듈(Commands) 로드
         try:
@@ -120,6 +186,31 @@ class MyBot(commands.Bot):
         except Exception as e:
             logger.error("Slash command sync failed: %s", e)
 
+    async def on_interaction(self, interaction):
+        # 랭킹 등에서 Discord API 없이 이름을 보여주기 위해 마지막 표시 이름을 기록한다.
+        try:
+            await remember_display_name(interaction.user.id, interaction.user.display_name)
+        except Exception as e:
+            logger.warning("표시 이름 기록 실패: %s", e)
+
+    async def close(self):
+        reconcile_guild_counters.cancel()
+        archive_old_guild_logs.cancel()
+        purge_guild_shop_stock.cancel()
+        rollover_boss_weekly_elo.cancel()
+        backfill_boss_summary_columns.cancel()
+        # 지연 저장 대기분을 먼저 커밋한 뒤 저장 기록 대기열을 비운다.
+        try:
+            await flush_guild_contributions()
+        except Exception as e:
+            logger.error("길드 공헌도 기록 실패: %s", e)
+        try:
+            await flush_all_saves()
+            await flush_save_history()
+        except Exception as e:
+            logger.error("저장 기록 정리 실패: %s", e)
+        await super().close()
+
 bot = MyBot()
 
 # -------------------------------------------------------------------------
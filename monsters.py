@@ -1,8 +1,34 @@
 # monsters.py
 # pve-gem-runtime-v8.2
 import random
+from itertools import accumulate
+
 from cards import get_card, SKILL_CARDS
 
+# (deck, pattern_type) -> (cards, cumulative weights), shared by every spawn.
+_ACTION_TABLES = {}
+
+
+def _pattern_weight(card, pattern_type):
+    primary_type = card.dice_list[0].action_type
+    if pattern_type == "aggressive":
+        return 70 if primary_type == "attack" else 15
+    elif pattern_type == "defensive":
+        return 70 if primary_type in ["defense", "counter", "heal"] else 15
+    return 33
+
+
+def compile_action_table(card_deck, pattern_type):
+    """Resolve a deck once into its cards and cumulative pattern weights."""
+    key = (tuple(card_deck), pattern_type)
+    table = _ACTION_TABLES.get(key)
+    if table is None:
+        cards = tuple(card for card in map(get_card, card_deck) if card)
+        cum_weights = tuple(accumulate(_pattern_weight(card, pattern_type) for card in cards))
+        table = _ACTION_TABLES[key] = (cards, cum_weights)
+    return table
+
+
 class Monster:
     """모든 몬스터의 기본 클래스"""
     def __init__(self, name, hp, attack, defense, description="", 
@@ -27,23 +53,12 @@ class Monster:
         self.status_effects = {"bleed": 0, "paralysis": 0, "stun": 0, "freeze": 0}
         
         self.card_deck = card_deck if card_deck else ["기본공격", "기본방어"]
+        self.action_table = compile_action_table(self.card_deck, self.pattern_type)
 
-    def decide_action(self):
-        available_cards = [get_card(name) for name in self.card_deck if get_card(name)]
-        if not available_cards: return get_card("기본공격")
-
-        weights = []
-        for card in available_cards:
-            primary_type = card.dice_list[0].action_type
-            if self.pattern_type == "aggressive":
-                w = 70 if primary_type == "attack" else 15
-            elif self.pattern_type == "defensive":
-                w = 70 if primary_type in ["defense", "counter", "heal"] else 15
-            else:
-                w = 33 
-            weights.append(w)
-
-        return random.choices(available_cards, weights=weights)[0]
+    def decide_action(self, rng=None):
+        cards, cum_weights = self.action_table
+        if not cards: return get_card("기본공격")
+        return (rng or random).choices(cards, cum_weights=cum_weights)[0]
 
 # --- 몬스터 도감 ---
 MONSTER_DATA = {
@@ -8,6 +8,7 @@ import asyncio
 from cards import get_card
 from character import Character 
 from data_manager import mutate_user_data
+from keyed_locks import KeyedLocks
 import battle_engine
 from gem_effects import (
     apply_escalation_to_dice,
@@ -19,7 +20,8 @@ from gem_effects import (
 
 # guild-pvp-stability-v7.2
 # pvp-private-command-panel-v8.5
-ACTIVE_PVP_USERS = set()
+# Held for the whole match; acquired without waiting so a busy player is refused.
+ACTIVE_PVP_USERS = KeyedLocks("pvp_match")
 
 class PVPInviteView(discord.ui.View):
     def __init__(self, author, load_func, save_func):
@@ -43,21 +45,21 @@ class PVPInviteView(discord.ui.View):
         if target.bot:
             return await interaction.response.send_message("봇과는 싸울 수 없습니다.", ephemeral=True)
 
-        # [DB 수정] 두 유저의 데이터를 DB에서 로드
-        u1_data = await self.load_func(self.author.id, self.author.display_name)
-        u2_data = await self.load_func(target.id, target.display_name)
+        # [DB 수정] 출전 가능 여부만 확인하므로 캐릭터 정보만 로드 (출전 선택 시 전체 재로드)
+        u1_data = await self.load_func(self.author.id, self.author.display_name, sections=("characters",))
+        u2_data = await self.load_func(target.id, target.display_name, sections=("characters",))
         
         u1_chars = u1_data.get("characters", [])
         u2_chars = u2_data.get("characters", [])
 
         if not u1_chars: return await interaction.response.send_message(f"❌ 본인의 캐릭터가 없습니다.", ephemeral=True)
         if not u2_chars: return await interaction.response.send_message(f"❌ 상대방의 캐릭터가 없습니다.", ephemeral=True)
-        if self.author.id in ACTIVE_PVP_USERS:
+        if not await ACTIVE_PVP_USERS.acquire(self.author.id, timeout=0):
             return await interaction.response.send_message("이미 진행 중인 대련이 있습니다.", ephemeral=True)
-        if target.id in ACTIVE_PVP_USERS:
+        if not await ACTIVE_PVP_USERS.acquire(target.id, timeout=0):
+            ACTIVE_PVP_USERS.release(self.author.id)
             return await interaction.response.send_message("상대방이 이미 다른 대련을 진행 중입니다.", ephemeral=True)
 
-        ACTIVE_PVP_USERS.update((self.author.id, target.id))
         view = PVPBattleView(self.author, target, u1_data, u2_data, self.save_func, self.load_func)
         
         embed = discord.Embed(
@@ -223,6 +225,7 @@ class PVPBattleView(discord.ui.View):
         self.load_func = load_func 
         self.p1_data = p1_data
         self.p2_data = p2_data
+        self.users_released = False
         
         self.p1_char = None
         self.p2_char = None
@@ -230,6 +233,8 @@ class PVPBattleView(discord.ui.View):
         self.p2_char_idx = -1
         
         self.turn_count = 1
+        # 전투 전체가 이 RNG 하나로 굴러가므로 시드와 명령만으로 재현할 수 있다.
+        self.rng = battle_engine.BattleRandom()
         self.p1_card = "waiting" 
         self.p2_card = "waiting"
         
@@ -262,8 +267,11 @@ class PVPBattleView(discord.ui.View):
         self.update_setup_buttons()
 
     def release_users(self):
-        ACTIVE_PVP_USERS.discard(self.p1_user.id)
-        ACTIVE_PVP_USERS.discard(self.p2_user.id)
+        if self.users_released:
+            return
+        self.users_released = True
+        ACTIVE_PVP_USERS.release(self.p1_user.id)
+        ACTIVE_PVP_USERS.release(self.p2_user.id)
 
     def expected_user(self, player_num):
         return self.p1_user if player_num == 1 else self.p2_user
@@ -714,7 +722,8 @@ class PVPBattleView(discord.ui.View):
                 battle_engine.effective_combat_stat(self.p1_char, "attack"),
                 battle_engine.effective_combat_stat(self.p1_char, "defense"),
                 self.p1_char.current_mental,
-                damage_taken=self.p1_damage_last, character=self.p1_char, user_data=self.p1_data
+                damage_taken=self.p1_damage_last, character=self.p1_char, user_data=self.p1_data,
+                rng=self.rng,
             )
             p1_res = battle_engine.apply_stat_scaling(p1_res, self.p1_char)
             battle_engine.apply_time_accel_power(p1_res, accel_stacks1)
@@ -737,7 +746,8 @@ class PVPBattleView(discord.ui.View):
                 battle_engine.effective_combat_stat(self.p2_char, "attack"),
                 battle_engine.effective_combat_stat(self.p2_char, "defense"),
                 self.p2_char.current_mental,
-                damage_taken=self.p2_damage_last, character=self.p2_char, user_data=self.p2_data
+                damage_taken=self.p2_damage_last, character=self.p2_char, user_data=self.p2_data,
+                rng=self.rng,
             )
             p2_res = battle_engine.apply_stat_scaling(p2_res, self.p2_char)
             battle_engine.apply_time_accel_power(p2_res, accel_stacks2)
@@ -762,7 +772,7 @@ class PVPBattleView(discord.ui.View):
         # P1 Artifacts
         p1_card_name = self.p1_card.name if self.p1_card else ""
         log1, next_trig1 = battle_engine.process_turn_start_artifacts(
-            self.p1_char, self.p2_char, p1_res, p2_res, self.turn_count, self.p1_shayla_trigger, p1_card_name
+            self.p1_char, self.p2_char, p1_res, p2_res, self.turn_count, self.p1_shayla_trigger, p1_card_name, rng=self.rng
         )
         log += log1
         self.p1_shayla_trigger = next_trig1
@@ -770,7 +780,7 @@ class PVPBattleView(discord.ui.View):
         # P2 Artifacts
         p2_card_name = self.p2_card.name if self.p2_card else ""
         log2, next_trig2 = battle_engine.process_turn_start_artifacts(
-            self.p2_char, self.p1_char, p2_res, p1_res, self.turn_count, self.p2_shayla_trigger, p2_card_name
+            self.p2_char, self.p1_char, p2_res, p1_res, self.turn_count, self.p2_shayla_trigger, p2_card_name, rng=self.rng
         )
         log += log2
         self.p2_shayla_trigger = next_trig2
@@ -783,7 +793,7 @@ class PVPBattleView(discord.ui.View):
                 p1_status_stunned if char is self.p1_char else p2_status_stunned
             )
             if "escalation" in effects and not status_stunned:
-                escalation = apply_escalation_to_dice(char, results)
+                escalation = apply_escalation_to_dice(char, results, self.rng)
                 if escalation:
                     summary = ", ".join(
                         f"{entry['index'] + 1}번 {entry['rolled']:+d}"
@@ -792,7 +802,7 @@ class PVPBattleView(discord.ui.View):
                     )
                     log += f"{marker} ⚡ **{char.name}[고조]** {summary}\n"
             if "ripple" in effects and not status_stunned:
-                ripple = apply_ripple_to_dice(char, results, self.turn_count)
+                ripple = apply_ripple_to_dice(char, results, self.turn_count, self.rng)
                 if ripple:
                     amounts = " → ".join(
                         f"+{entry['amount']}" for entry in ripple["transfers"]
@@ -810,6 +820,7 @@ class PVPBattleView(discord.ui.View):
             self.p1_char, self.p2_char, p1_res, p2_res, effs1, effs2, self.turn_count,
             is_stunned1=(self.p1_card is None or p1_status_stunned),
             is_stunned2=(self.p2_card is None or p2_status_stunned),
+            rng=self.rng,
         )
         
         # [시간가속] 적립된 보너스 적용
@@ -28,9 +28,9 @@ class QuestMonster:
         self.reward = None
         self.reward_count = 0
 
-    def decide_action(self):
+    def decide_action(self, rng=None):
         """랜덤으로 카드 하나 선택"""
-        card_name = random.choice(self.equipped_cards)
+        card_name = (rng or random).choice(self.equipped_cards)
         return get_card(card_name)
     
 
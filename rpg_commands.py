@@ -23,6 +23,7 @@ async def _author_only_interaction(view, interaction):
 
 # [DB 및 데이터 매니저]
 from data_manager import get_db_pool, get_user_data, save_user_data
+from db_metrics import get_query_stats, reset_query_stats
 from decorators import auto_defer
 
 # [각 기능별 View 임포트]
@@ -449,5 +450,43 @@ class RPGCommands(commands.Cog):
         msg = await interaction.followup.send(content="⚔️ **모의 레이드 전투 시작!**", embed=battle_view.get_embed(), view=battle_view)
         battle_view.message = msg
 
+    @admin.command(name="쿼리통계", description="[관리자] 호출 위치별 DB 쿼리 지연 시간과 풀 대기 시간을 봅니다.")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.choices(sort=[
+        app_commands.Choice(name="누적 시간", value="total_ms"),
+        app_commands.Choice(name="p99 지연", value="p99_ms"),
+        app_commands.Choice(name="호출 수", value="calls"),
+        app_commands.Choice(name="락 오류", value="lock_errors"),
+    ])
+    async def admin_query_stats(self, interaction: discord.Interaction, sort: str = "total_ms", reset: bool = False):
+        await interaction.response.defer(ephemeral=True)
+        stats = get_query_stats()
+        pool = stats["pool"]
+        embed = discord.Embed(
+            title="🩺 DB 쿼리 통계",
+            description=(
+                f"풀 대기: {pool['acquires']:,}회 · 평균 {pool['avg_wait_ms']:.2f}ms · 최대 {pool['wait_ms_max']:.1f}ms\n"
+                f"느린 쿼리 기준: {stats['slow_query_ms']}ms"
+            ),
+            color=discord.Color.dark_teal(),
+        )
+        ranked = sorted(stats["sites"].items(), key=lambda item: item[1][sort], reverse=True)
+        for site, entry in ranked[:10]:
+            embed.add_field(
+                name=site[:256],
+                value=(
+                    f"{entry['calls']:,}회 · 누적 {entry['total_ms']:,.0f}ms · 평균 {entry['avg_ms']:.1f}ms\n"
+                    f"p50≤{entry['p50_ms']:g}ms · p99≤{entry['p99_ms']:g}ms · 최대 {entry['max_ms']:.1f}ms\n"
+                    f"행 {entry['rows']:,} · 느림 {entry['slow']} · 오류 {entry['errors']} (락 {entry['lock_errors']})"
+                ),
+                inline=False,
+            )
+        if not ranked:
+            embed.add_field(name="기록 없음", value="아직 실행된 쿼리가 없습니다.", inline=False)
+        if reset:
+            reset_query_stats()
+            embed.set_footer(text="조회 후 통계를 초기화했습니다.")
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
 async def setup(bot):
     await bot.add_cog(RPGCommands(bot))
@@ -0,0 +1,118 @@
+"""Compact encoding for user_save_history rows.
+
+A user's history is a chain of rows ordered by revision. A keyframe row holds
+a whole snapshot; each delta row holds the RFC 6902 operations that turn the
+snapshot of its ``base_revision`` row into its own. Payloads are
+zlib-compressed JSON. Rows written before delta encoding keep the plain
+snapshot in the ``data`` column and act as keyframes.
+"""
+import json
+import zlib
+
+KEYFRAME = "key"
+DELTA = "delta"
+LEGACY = "full"
+
+
+def _escape(token):
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old, new, path=""):
+    """JSON-patch operations turning ``old`` into ``new`` (both JSON values)."""
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(new, dict):
+        ops = [
+            {"op": "remove", "path": f"{path}/{_escape(key)}"}
+            for key in old if key not in new
+        ]
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key in old:
+                ops.extend(make_patch(old[key], value, child))
+            else:
+                ops.append({"op": "add", "path": child, "value": value})
+        return ops
+    if isinstance(new, list):
+        if old == new:
+            return []
+        common = min(len(old), len(new))
+        ops = []
+        for index in range(common):
+            ops.extend(make_patch(old[index], new[index], f"{path}/{index}"))
+        ops.extend(
+            {"op": "remove", "path": f"{path}/{index}"}
+            for index in range(len(old) - 1, common - 1, -1)
+        )
+        ops.extend({"op": "add", "path": f"{path}/-", "value": value} for value in new[common:])
+        # An insert near the front shifts every element; one replace is smaller.
+        if len(ops) > max(1, len(new) // 2):
+            return [{"op": "replace", "path": path, "value": new}]
+        return ops
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply_patch(doc, ops):
+    """Apply ``make_patch`` output to ``doc`` in place and return the result."""
+    for op in ops:
+        path = op["path"]
+        if not path:
+            doc = op["value"]
+            continue
+        tokens = [_unescape(token) for token in path[1:].split("/")]
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            if op["op"] == "add":
+                if last == "-":
+                    parent.append(op["value"])
+                else:
+                    parent.insert(int(last), op["value"])
+            elif op["op"] == "remove":
+                del parent[int(last)]
+            else:
+                parent[int(last)] = op["value"]
+        elif op["op"] == "remove":
+            del parent[last]
+        else:
+            parent[last] = op["value"]
+    return doc
+
+
+def encode_payload(value):
+    text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def decode_payload(payload):
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def rebuild_snapshot(rows):
+    """Replay ``(revision, kind, base_revision, payload, data)`` rows.
+
+    Rows must be in ascending revision order and start at a keyframe or a
+    legacy row. Raises ValueError when a delta does not follow its base.
+    """
+    snapshot = None
+    previous = None
+    for revision, kind, base_revision, payload, data in rows:
+        if kind == DELTA:
+            if snapshot is None or base_revision != previous:
+                raise ValueError(f"broken save history chain at revision {revision}")
+            snapshot = apply_patch(snapshot, decode_payload(payload))
+        elif kind == KEYFRAME:
+            snapshot = decode_payload(payload)
+        else:
+            snapshot = json.loads(data) if isinstance(data, (str, bytes)) else data
+        previous = revision
+    return snapshot
@@ -242,7 +242,10 @@ CREATE TABLE IF NOT EXISTS user_save_history (
     id BIGINT AUTO_INCREMENT PRIMARY KEY,
     user_id VARCHAR(50) NOT NULL,
     revision BIGINT NOT NULL,
-    data JSON NOT NULL,
+    kind VARCHAR(8) NOT NULL DEFAULT 'full',
+    base_revision BIGINT NULL,
+    payload MEDIUMBLOB NULL,
+    data JSON NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     INDEX idx_user_revision (user_id, revision),
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
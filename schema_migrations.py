@@ -0,0 +1,578 @@
+"""Numbered schema migrations recorded in the ``schema_migrations`` table.
+
+Every step is idempotent (it checks before it creates or alters), so a
+database that predates the ledger simply replays all of them once. After
+that, startup is a single ``SELECT MAX(version)`` until a new step is
+appended to ``MIGRATIONS``. Append only: never renumber or edit a step that
+has shipped; add a new one instead.
+"""
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+_LEDGER_TABLE_SQL = """CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    duration_ms INT NOT NULL DEFAULT 0,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)"""
+_LOCK_NAME = "schema_migrations"
+_LOCK_TIMEOUT_SECONDS = 60
+
+
+async def _table_exists(cur, table_name):
+    await cur.execute(
+        """SELECT 1
+           FROM information_schema.tables
+           WHERE table_schema=DATABASE() AND table_name=%s
+           LIMIT 1""",
+        (table_name,),
+    )
+    return bool(await cur.fetchone())
+
+
+async def _create_table_if_missing(cur, table_name, create_sql):
+    """Avoid MySQL 1050 warnings by checking before CREATE TABLE."""
+    if not await _table_exists(cur, table_name):
+        await cur.execute(create_sql)
+
+
+async def _table_columns(cur, table_name):
+    await cur.execute(
+        """SELECT column_name
+           FROM information_schema.columns
+           WHERE table_schema=DATABASE() AND table_name=%s""",
+        (table_name,),
+    )
+    return {row[0] for row in await cur.fetchall()}
+
+
+async def _index_exists(cur, table_name, index_name):
+    await cur.execute(
+        """SELECT 1
+           FROM information_schema.statistics
+           WHERE table_schema=DATABASE() AND table_name=%s AND index_name=%s
+           LIMIT 1""",
+        (table_name, index_name),
+    )
+    return bool(await cur.fetchone())
+
+
+async def _add_missing_columns(cur, table_name, columns):
+    existing = await _table_columns(cur, table_name)
+    if not existing:  # table not created by schema.sql on this install
+        return
+    for name, definition in columns:
+        if name not in existing:
+            await cur.execute(f"ALTER TABLE {table_name} ADD COLUMN {name} {definition}")
+
+
+async def _m001_base_schema(cur):
+    if await _table_exists(cur, "users") or not os.path.exists("schema.sql"):
+        return
+    with open("schema.sql", "r", encoding="utf-8") as f:
+        for stmt in f.read().split(';'):
+            if stmt.strip() and not stmt.upper().startswith(("CREATE DATABASE", "USE")):
+                try: await cur.execute(stmt)
+                except: continue
+
+
+async def _m002_guild_tables(cur):
+    await _create_table_if_missing(cur, "guilds", """CREATE TABLE guilds (
+            guild_id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(50) NOT NULL UNIQUE,
+            owner_id VARCHAR(50),
+            level INT DEFAULT 1,
+            exp INT DEFAULT 0,
+            member_count INT DEFAULT 1,
+            token_wood INT DEFAULT 0, token_iron INT DEFAULT 0,
+            token_magic INT DEFAULT 0, token_sorcery INT DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+    await _create_table_if_missing(cur, "guild_members", """CREATE TABLE guild_members (
+            guild_id INT, user_id VARCHAR(50), role VARCHAR(20) DEFAULT 'member',
+            contribution INT DEFAULT 0, joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, user_id), FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
+        )""")
+    await _create_table_if_missing(cur, "guild_inventory", """CREATE TABLE guild_inventory (
+            guild_id INT, item_name VARCHAR(100), count INT DEFAULT 0, category VARCHAR(50),
+            PRIMARY KEY (guild_id, item_name), FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
+        )""")
+    await _create_table_if_missing(cur, "guild_stored_artifacts", """CREATE TABLE guild_stored_artifacts (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY, guild_id INT, artifact_id VARCHAR(100),
+            name VARCHAR(100), rank_level INT, level INT, data JSON,
+            stored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
+        )""")
+    await _create_table_if_missing(cur, "guild_log", """CREATE TABLE guild_log (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY, guild_id INT, user_id VARCHAR(50),
+            user_name VARCHAR(100), action_type VARCHAR(50), item_name VARCHAR(100),
+            count INT, logged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
+        )""")
+    await _create_table_if_missing(cur, "guild_shop_stock", """CREATE TABLE guild_shop_stock (
+            guild_id INT NOT NULL,
+            day_key VARCHAR(10) NOT NULL,
+            slot_index INT NOT NULL,
+            item_name VARCHAR(100) NOT NULL,
+            category VARCHAR(50) NOT NULL,
+            stock INT NOT NULL,
+            initial_stock INT NOT NULL,
+            cost_json JSON NOT NULL,
+            description VARCHAR(255),
+            PRIMARY KEY (guild_id, day_key, slot_index),
+            FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
+        )""")
+
+
+async def _m003_user_columns(cur):
+    u_cols = await _table_columns(cur, "users")
+    required_user_columns = [
+        ("guild_rank", "VARCHAR(20)"),
+        ("guild_data", "JSON"),
+        ("characters", "JSON"),
+        ("fishing_max_slots", "INT NOT NULL DEFAULT 3"),
+        ("max_subjugation_depth", "INT NOT NULL DEFAULT 0"),
+        ("daily_quests", "JSON"),
+        ("last_quest_date", "DATE"),
+        ("construction_step", "INT NOT NULL DEFAULT 0"),
+        ("current_dungeon", "JSON"),
+        ("max_subjugation_char", "VARCHAR(100)"),
+        ("max_subjugation_region", "VARCHAR(100)"),
+        ("data_revision", "BIGINT NOT NULL DEFAULT 0"),
+    ]
+    for col, typ in required_user_columns:
+        if col not in u_cols:
+            try:
+                await cur.execute(f"ALTER TABLE users ADD COLUMN {col} {typ}")
+            except Exception as e:
+                logger.warning("users.%s migration skipped: %s", col, e)
+    if "total_turns" not in u_cols:
+        try:
+            await cur.execute("ALTER TABLE users ADD COLUMN total_turns BIGINT NOT NULL DEFAULT 0")
+            await cur.execute(
+                "UPDATE users SET total_turns=GREATEST(COALESCE(total_investigations,0),"
+                " COALESCE(total_subjugations,0)) WHERE total_turns=0"
+            )
+        except Exception as e:
+            logger.warning("total_turns migration skipped: %s", e)
+
+
+async def _m004_user_side_tables(cur):
+    await _create_table_if_missing(cur, "user_life_data", """CREATE TABLE user_life_data (
+        user_id VARCHAR(50) PRIMARY KEY,
+        data JSON NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+    )""")
+    await _create_table_if_missing(cur, "user_save_history", """CREATE TABLE user_save_history (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        user_id VARCHAR(50) NOT NULL,
+        revision BIGINT NOT NULL,
+        kind VARCHAR(8) NOT NULL DEFAULT 'full',
+        base_revision BIGINT NULL,
+        payload MEDIUMBLOB NULL,
+        data JSON NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_user_revision (user_id, revision),
+        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+    )""")
+
+
+async def _m005_save_history_deltas(cur):
+    if "kind" not in await _table_columns(cur, "user_save_history"):
+        await cur.execute(
+            "ALTER TABLE user_save_history"
+            " ADD COLUMN kind VARCHAR(8) NOT NULL DEFAULT 'full' AFTER revision,"
+            " ADD COLUMN base_revision BIGINT NULL AFTER kind,"
+            " ADD COLUMN payload MEDIUMBLOB NULL AFTER base_revision,"
+            " MODIFY COLUMN data JSON NULL"
+        )
+
+
+async def _m006_user_boss_tables(cur):
+    await _create_table_if_missing(cur, "user_bosses", """CREATE TABLE user_bosses (
+        boss_id CHAR(32) PRIMARY KEY,
+        owner_id VARCHAR(50) NOT NULL,
+        guild_id INT,
+        boss_name VARCHAR(80) NOT NULL,
+        grade VARCHAR(4) NOT NULL,
+        power_score INT NOT NULL,
+        boss_data JSON NOT NULL,
+        is_published TINYINT(1) NOT NULL DEFAULT 0,
+        publish_scope VARCHAR(10) NOT NULL DEFAULT 'guild',
+        active_battles INT NOT NULL DEFAULT 0,
+        weekly_key VARCHAR(10),
+        weekly_elo INT NOT NULL DEFAULT 1500,
+        all_time_best_elo INT NOT NULL DEFAULT 1500,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_user_boss_owner (owner_id, created_at),
+        INDEX idx_user_boss_publish (is_published, publish_scope, weekly_elo),
+        INDEX idx_user_boss_power (power_score),
+        FOREIGN KEY (owner_id) REFERENCES users(user_id) ON DELETE CASCADE
+    )""")
+    await _create_table_if_missing(cur, "user_boss_battles", """CREATE TABLE user_boss_battles (
+        battle_id CHAR(32) PRIMARY KEY,
+        boss_id CHAR(32) NOT NULL,
+        challenger_id VARCHAR(50) NOT NULL,
+        result VARCHAR(12) NOT NULL,
+        weekly_key VARCHAR(10) NOT NULL,
+        elo_before INT NOT NULL,
+        elo_after INT NOT NULL,
+        owner_rewarded TINYINT(1) NOT NULL DEFAULT 0,
+        battle_data JSON,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_user_boss_battle_boss (boss_id, created_at),
+        INDEX idx_user_boss_battle_week (weekly_key, elo_after),
+        FOREIGN KEY (boss_id) REFERENCES user_bosses(boss_id) ON DELETE CASCADE
+    )""")
+
+
+async def _m007_unpublish_unlocked_bosses(cur):
+    # User-boss raids now require a locked five-floor dungeon.  Legacy
+    # bosses remain owned, but must be configured once before republishing.
+    await cur.execute(
+        """UPDATE user_bosses
+           SET is_published=0
+           WHERE is_published=1
+             AND (
+               JSON_EXTRACT(boss_data, '$.dungeon.locked') IS NULL
+               OR JSON_UNQUOTE(JSON_EXTRACT(boss_data, '$.dungeon.locked')) <> 'true'
+             )"""
+    )
+
+
+async def _m008_workshop_counts(cur):
+    await _add_missing_columns(cur, "workshop_slots", (
+        ("start_count", "BIGINT NOT NULL DEFAULT 0"),
+        ("required_count", "BIGINT NOT NULL DEFAULT 0"),
+    ))
+
+
+async def _m009_artifact_gems(cur):
+    await _add_missing_columns(cur, "artifacts", (("gems", "JSON"), ("metadata", "JSON")))
+
+
+async def _m010_global_guild(cur):
+    await cur.execute("""INSERT INTO guilds
+        (guild_id, name, owner_id, level, exp, member_count)
+        VALUES (1, '공용 길드', NULL, 1, 0, 0)
+        ON DUPLICATE KEY UPDATE name='공용 길드'""")
+
+
+async def _m011_trade_tables(cur):
+    await _create_table_if_missing(cur, "global_trades", """CREATE TABLE global_trades (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        seller_id BIGINT NOT NULL,
+        seller_name VARCHAR(100),
+        item_name VARCHAR(100),
+        quantity INT,
+        price INT,
+        currency VARCHAR(10),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+    await _create_table_if_missing(cur, "global_quests", """CREATE TABLE global_quests (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        q_type VARCHAR(50),
+        q_rank INT,
+        target VARCHAR(100),
+        count INT,
+        current INT DEFAULT 0,
+        description VARCHAR(255),
+        accepted_by BIGINT,
+        accepted_name VARCHAR(100),
+        completed BOOLEAN DEFAULT FALSE,
+        claimed BOOLEAN DEFAULT FALSE,
+        created_date DATE
+    )""")
+
+
+async def _m012_market_assets(cur):
+    await _add_missing_columns(cur, "global_trades", (
+        ("asset_type", "VARCHAR(20) NOT NULL DEFAULT 'item'"),
+        ("asset_data", "JSON NULL"),
+    ))
+    await _create_table_if_missing(cur, "global_purchase_requests", """CREATE TABLE global_purchase_requests (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        buyer_id BIGINT NOT NULL,
+        buyer_name VARCHAR(100) NOT NULL,
+        asset_type VARCHAR(20) NOT NULL,
+        item_name VARCHAR(100) NOT NULL,
+        quantity INT NOT NULL,
+        price INT NOT NULL,
+        currency VARCHAR(10) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+
+
+async def _m013_cafe_tycoon(cur):
+    await _create_table_if_missing(cur, "cafe_tycoon_sessions", """CREATE TABLE cafe_tycoon_sessions (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        host_id BIGINT NOT NULL,
+        host_name VARCHAR(100) NOT NULL,
+        status VARCHAR(20) NOT NULL DEFAULT 'lobby',
+        turn_no INT NOT NULL DEFAULT 0,
+        score BIGINT NOT NULL DEFAULT 0,
+        cafe_cash BIGINT NOT NULL DEFAULT 30000,
+        season_no INT NOT NULL DEFAULT 1,
+        reputation INT NOT NULL DEFAULT 0,
+        decor_tokens INT NOT NULL DEFAULT 0,
+        state_json JSON NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_tycoon_status (status)
+    )""")
+    await _add_missing_columns(cur, "cafe_tycoon_sessions", (
+        ("season_no", "INT NOT NULL DEFAULT 1"),
+        ("reputation", "INT NOT NULL DEFAULT 0"),
+        ("decor_tokens", "INT NOT NULL DEFAULT 0"),
+    ))
+    await _create_table_if_missing(cur, "cafe_tycoon_members", """CREATE TABLE cafe_tycoon_members (
+        session_id BIGINT NOT NULL,
+        user_id BIGINT NOT NULL,
+        user_name VARCHAR(100) NOT NULL,
+        actions_left INT NOT NULL DEFAULT 2,
+        ready TINYINT(1) NOT NULL DEFAULT 0,
+        participating TINYINT(1) NOT NULL DEFAULT 0,
+        last_action_at DATETIME NULL,
+        end_vote TINYINT(1) NOT NULL DEFAULT 0,
+        reward_choices JSON NULL,
+        reward_claimed TINYINT(1) NOT NULL DEFAULT 0,
+        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (session_id,user_id),
+        INDEX idx_tycoon_member_user (user_id),
+        FOREIGN KEY (session_id) REFERENCES cafe_tycoon_sessions(id)
+            ON DELETE CASCADE
+    )""")
+    await _add_missing_columns(cur, "cafe_tycoon_members", (
+        ("participating", "TINYINT(1) NOT NULL DEFAULT 0"),
+        ("last_action_at", "DATETIME NULL"),
+    ))
+    await _create_table_if_missing(cur, "cafe_tycoon_seasons", """CREATE TABLE cafe_tycoon_seasons (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        session_id BIGINT NOT NULL,
+        season_no INT NOT NULL,
+        score BIGINT NOT NULL,
+        reputation INT NOT NULL,
+        reward_money BIGINT NOT NULL,
+        reward_points BIGINT NOT NULL,
+        reward_rare_total INT NOT NULL,
+        settled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE KEY uq_tycoon_season (session_id,season_no),
+        INDEX idx_tycoon_season_session (session_id,id),
+        FOREIGN KEY (session_id) REFERENCES cafe_tycoon_sessions(id)
+            ON DELETE CASCADE
+    )""")
+    await _create_table_if_missing(cur, "cafe_tycoon_season_rewards", """CREATE TABLE cafe_tycoon_season_rewards (
+        season_id BIGINT NOT NULL,
+        user_id BIGINT NOT NULL,
+        reward_choices JSON NULL,
+        claimed TINYINT(1) NOT NULL DEFAULT 0,
+        claimed_at DATETIME NULL,
+        PRIMARY KEY (season_id,user_id),
+        INDEX idx_tycoon_reward_user (user_id,claimed),
+        FOREIGN KEY (season_id) REFERENCES cafe_tycoon_seasons(id)
+            ON DELETE CASCADE
+    )""")
+
+
+async def _m014_guild_log_retention(cur):
+    if not await _index_exists(cur, "guild_log", "idx_guild_log_page"):
+        await cur.execute(
+            "ALTER TABLE guild_log ADD INDEX idx_guild_log_page (guild_id, logged_at, id)"
+        )
+    await _create_table_if_missing(cur, "guild_log_monthly", """CREATE TABLE guild_log_monthly (
+        guild_id INT NOT NULL,
+        month DATE NOT NULL,
+        action_type VARCHAR(50) NOT NULL,
+        user_id VARCHAR(50) NOT NULL,
+        user_name VARCHAR(100) NULL,
+        events INT NOT NULL DEFAULT 0,
+        total_count BIGINT NOT NULL DEFAULT 0,
+        first_at TIMESTAMP NULL,
+        last_at TIMESTAMP NULL,
+        PRIMARY KEY (guild_id,month,action_type,user_id),
+        FOREIGN KEY (guild_id) REFERENCES guilds(guild_id) ON DELETE CASCADE
+    )""")
+
+
+async def _m015_subjugation_leaderboard(cur):
+    # board is a region name, or '*' for the all-region board.
+    await _create_table_if_missing(cur, "subjugation_leaderboard", """CREATE TABLE subjugation_leaderboard (
+        board VARCHAR(100) NOT NULL,
+        user_id VARCHAR(50) NOT NULL,
+        depth INT NOT NULL,
+        char_name VARCHAR(100) NOT NULL DEFAULT '',
+        region VARCHAR(100) NOT NULL DEFAULT '',
+        achieved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (board,user_id),
+        INDEX idx_subjugation_board_rank (board, depth DESC, achieved_at)
+    )""")
+    await cur.execute(
+        """INSERT IGNORE INTO subjugation_leaderboard (board, user_id, depth, char_name, region)
+           SELECT '*', user_id, max_subjugation_depth,
+                  COALESCE(max_subjugation_char, ''), COALESCE(max_subjugation_region, '')
+           FROM users WHERE max_subjugation_depth > 0"""
+    )
+    await cur.execute(
+        """INSERT IGNORE INTO subjugation_leaderboard (board, user_id, depth, char_name, region)
+           SELECT max_subjugation_region, user_id, max_subjugation_depth,
+                  COALESCE(max_subjugation_char, ''), max_subjugation_region
+           FROM users
+           WHERE max_subjugation_depth > 0 AND COALESCE(max_subjugation_region, '') <> ''"""
+    )
+    await _create_table_if_missing(cur, "user_display_names", """CREATE TABLE user_display_names (
+        user_id VARCHAR(50) PRIMARY KEY,
+        display_name VARCHAR(100) NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )""")
+    # Seed with the newest name each member left in the guild log.
+    await cur.execute(
+        """INSERT IGNORE INTO user_display_names (user_id, display_name)
+           SELECT l.user_id, l.user_name FROM guild_log l
+           JOIN (SELECT user_id, MAX(id) AS id FROM guild_log
+                 WHERE user_name IS NOT NULL AND user_name <> '' GROUP BY user_id) newest
+             ON newest.id = l.id"""
+    )
+
+
+async def _m016_maintenance_markers(cur):
+    await _create_table_if_missing(cur, "maintenance_markers", """CREATE TABLE maintenance_markers (
+        name VARCHAR(64) PRIMARY KEY,
+        value VARCHAR(64) NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )""")
+
+
+async def _m017_user_boss_summary(cur):
+    # Listings read only these columns; boss_data is decoded when a boss is
+    # opened. factor_version 0 marks rows boss_training.backfill_boss_summaries
+    # still has to normalize (it also fills dungeon_ready).
+    await _add_missing_columns(cur, "user_bosses", (
+        ("dungeon_ready", "TINYINT(1) NOT NULL DEFAULT 0"),
+        ("factor_version", "INT NOT NULL DEFAULT 0"),
+    ))
+    for name, columns in (
+        ("idx_user_boss_guild_listing", "guild_id, is_published, dungeon_ready"),
+        ("idx_user_boss_factor_version", "factor_version, boss_id"),
+    ):
+        if not await _index_exists(cur, "user_bosses", name):
+            await cur.execute(f"ALTER TABLE user_bosses ADD INDEX {name} ({columns})")
+
+
+async def _m018_user_boss_rank_indexes(cur):
+    # One index per ranking ORDER BY (see boss_training._query_boss_rankings).
+    # The power index covers world listings too; databases that created
+    # idx_user_boss_world_listing under an earlier migration 17 drop it here.
+    for name, columns in (
+        ("idx_user_boss_weekly_rank",
+         "is_published, publish_scope, dungeon_ready, weekly_key, weekly_elo, power_score"),
+        ("idx_user_boss_best_rank",
+         "is_published, publish_scope, dungeon_ready, all_time_best_elo, power_score"),
+        ("idx_user_boss_power_rank",
+         "is_published, publish_scope, dungeon_ready, power_score, all_time_best_elo"),
+    ):
+        if not await _index_exists(cur, "user_bosses", name):
+            await cur.execute(f"ALTER TABLE user_bosses ADD INDEX {name} ({columns})")
+    if await _index_exists(cur, "user_bosses", "idx_user_boss_world_listing"):
+        await cur.execute("ALTER TABLE user_bosses DROP INDEX idx_user_boss_world_listing")
+
+
+async def _m019_guild_log_archive_index(cur):
+    # archive_guild_logs filters on logged_at alone (and on IS NULL for cleanup).
+    if not await _index_exists(cur, "guild_log", "idx_guild_log_logged_at"):
+        await cur.execute("ALTER TABLE guild_log ADD INDEX idx_guild_log_logged_at (logged_at)")
+
+
+# (version, name, step) in apply order. Append new steps at the end.
+MIGRATIONS = [
+    (1, "base_schema", _m001_base_schema),
+    (2, "guild_tables", _m002_guild_tables),
+    (3, "user_columns", _m003_user_columns),
+    (4, "user_side_tables", _m004_user_side_tables),
+    (5, "save_history_deltas", _m005_save_history_deltas),
+    (6, "user_boss_tables", _m006_user_boss_tables),
+    (7, "unpublish_unlocked_bosses", _m007_unpublish_unlocked_bosses),
+    (8, "workshop_counts", _m008_workshop_counts),
+    (9, "artifact_gems", _m009_artifact_gems),
+    (10, "global_guild", _m010_global_guild),
+    (11, "trade_tables", _m011_trade_tables),
+    (12, "market_assets", _m012_market_assets),
+    (13, "cafe_tycoon", _m013_cafe_tycoon),
+    (14, "guild_log_retention", _m014_guild_log_retention),
+    (15, "subjugation_leaderboard", _m015_subjugation_leaderboard),
+    (16, "maintenance_markers", _m016_maintenance_markers),
+    (17, "user_boss_summary", _m017_user_boss_summary),
+    (18, "user_boss_rank_indexes", _m018_user_boss_rank_indexes),
+    (19, "guild_log_archive_index", _m019_guild_log_archive_index),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def _current_version(cur):
+    try:
+        await cur.execute("SELECT MAX(version) FROM schema_migrations")
+    except Exception as e:
+        if getattr(e, "args", None) and e.args[0] == 1146:  # table doesn't exist
+            return None
+        raise
+    row = await cur.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+async def apply_migrations(conn, cur):
+    """Run every step newer than the ledger; return the versions applied.
+
+    Steps run under a MySQL named lock so two processes booting at once do
+    not race on the same ALTER. DDL auto-commits, so each step is recorded
+    as soon as it finishes and a failed step is retried on the next boot.
+    """
+    started = time.perf_counter()
+    current = await _current_version(cur)
+    if current is not None and current >= LATEST_VERSION:
+        logger.info(
+            "스키마 최신 상태 확인 (v%d, %.1fms)",
+            current, (time.perf_counter() - started) * 1000,
+        )
+        return []
+
+    await cur.execute("SELECT GET_LOCK(%s, %s)", (_LOCK_NAME, _LOCK_TIMEOUT_SECONDS))
+    locked = await cur.fetchone()
+    if not locked or not locked[0]:
+        raise RuntimeError("스키마 마이그레이션 잠금을 얻지 못했습니다.")
+    applied = []
+    try:
+        if current is None:
+            await cur.execute(_LEDGER_TABLE_SQL)
+        # Another process may have finished while we waited for the lock.
+        current = await _current_version(cur) or 0
+        for version, name, step in MIGRATIONS:
+            if version <= current:
+                continue
+            step_started = time.perf_counter()
+            try:
+                await step(cur)
+            except Exception:
+                logger.error("스키마 마이그레이션 %03d_%s 실패", version, name)
+                raise
+            duration_ms = int((time.perf_counter() - step_started) * 1000)
+            await cur.execute(
+                "INSERT INTO schema_migrations (version, name, duration_ms) VALUES (%s, %s, %s)",
+                (version, name, duration_ms),
+            )
+            await conn.commit()
+            applied.append(version)
+            logger.info("스키마 마이그레이션 %03d_%s 적용 (%dms)", version, name, duration_ms)
+    finally:
+        await cur.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NAME,))
+        await cur.fetchone()
+    logger.info(
+        "스키마 마이그레이션 완료 (v%d, %d단계, %.1fms)",
+        LATEST_VERSION, len(applied), (time.perf_counter() - started) * 1000,
+    )
+    return applied
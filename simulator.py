@@ -0,0 +1,339 @@
+"""디스코드 없이 전투만 대량으로 돌려 보는 밸런스 시뮬레이터.
+
+사용법:
+    python -m simulator build.json --enemy monster:굴레늑대 [--fights 10000]
+    python -m simulator build.json --enemy dungeon:기원의 쌍성:2 --policy greedy
+    python -m simulator build.json --enemy raid:Gold --policy scripted --script 강타,기본방어
+    python -m simulator build.json --enemy enemy.json --workers 8 --seed 7 --json
+
+build.json 은 Character.to_dict() 형식의 캐릭터 딕셔너리이거나
+{"character": {...}, "user_data": {...}} 형태다. enemy.json 은 Monster 생성자
+인자(name, hp, attack, defense, pattern_type, card_deck) 딕셔너리다.
+같은 --seed 면 워커 수와 관계없이 같은 결과가 나온다.
+"""
+import argparse
+import json
+import statistics
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import battle_engine
+from cards import get_card
+from character import Character
+from gem_effects import (
+    apply_escalation_to_dice,
+    apply_ripple_to_dice,
+    process_gem_turn_start,
+    revive_gem_effects,
+    runtime_cooldowns,
+)
+from monsters import (
+    DUNGEON_BOSSES,
+    MONSTER_DATA,
+    RAID_BOSS_DATA,
+    Monster,
+    get_dungeon_boss,
+    get_raid_boss,
+    spawn_monster,
+)
+
+DEFAULT_MAX_TURNS = 100
+_DUNGEON_TIER_DEPTH = {1: 30, 2: 60, 3: 90}
+_OFFENSIVE_DICE = {"attack", "counter"}
+
+
+def load_fixture(path):
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def split_build(build):
+    """Return (character dict, user_data) from either fixture shape."""
+    if "character" in build:
+        return build["character"], build.get("user_data", {})
+    return build, {}
+
+
+def build_character(character_data):
+    character = Character.from_dict(character_data)
+    battle_engine.ensure_status_effects(character)
+    character.runtime_cooldowns = {}
+    character.apply_battle_start_buffs()
+    character.current_hp = character.max_hp
+    character.current_mental = character.max_mental
+    return character
+
+
+def build_enemy(spec):
+    """Build a fresh Monster from ``monster:이름``, ``dungeon:지역:단계``,
+    ``raid:등급`` or an inline Monster fixture dict."""
+    if isinstance(spec, dict):
+        enemy = Monster(**spec)
+    else:
+        kind, _, rest = str(spec).partition(":")
+        if kind == "monster":
+            if rest not in MONSTER_DATA:
+                raise ValueError(f"알 수 없는 몬스터: {rest}")
+            enemy = spawn_monster(rest)
+        elif kind == "dungeon":
+            region, _, tier = rest.rpartition(":")
+            if region not in DUNGEON_BOSSES or not tier.isdigit() or int(tier) not in _DUNGEON_TIER_DEPTH:
+                raise ValueError(f"알 수 없는 던전 보스: {rest}")
+            enemy = get_dungeon_boss(region, _DUNGEON_TIER_DEPTH[int(tier)])
+        elif kind == "raid":
+            if rest not in RAID_BOSS_DATA:
+                raise ValueError(f"알 수 없는 레이드 보스: {rest}")
+            enemy = get_raid_boss(rest)
+        else:
+            raise ValueError(f"적 지정 형식이 올바르지 않습니다: {spec}")
+    battle_engine.ensure_status_effects(enemy)
+    runtime_cooldowns(enemy)
+    return enemy
+
+
+def _expected_offense(card, character):
+    attack = battle_engine.effective_combat_stat(character, "attack")
+    total = 0.0
+    for dice in card.dice_list:
+        if dice.action_type in _OFFENSIVE_DICE:
+            total += (dice.d_min + dice.d_max + attack) / 2
+    return total
+
+
+def pick_random(character, cards, turn, rng, script):
+    return rng.choice(cards)
+
+
+def pick_greedy(character, cards, turn, rng, script):
+    """Highest expected attack/counter output; ties keep deck order."""
+    return max(cards, key=lambda card: _expected_offense(card, character))
+
+
+def pick_scripted(character, cards, turn, rng, script):
+    name = script[(turn - 1) % len(script)]
+    return get_card(name) or cards[0]
+
+
+POLICIES = {
+    "random": pick_random,
+    "greedy": pick_greedy,
+    "scripted": pick_scripted,
+}
+
+
+def simulate_fight(build, enemy_spec, policy="random", seed=0, script=None,
+                   max_turns=DEFAULT_MAX_TURNS):
+    """Play one PvE fight with BattleView's turn order and return its stats."""
+    character_data, user_data = split_build(build)
+    player = build_character(character_data)
+    enemy = build_enemy(enemy_spec)
+    rng = battle_engine.BattleRandom(seed)
+    choose = POLICIES[policy]
+    cards = [card for card in map(get_card, player.equipped_cards) if card]
+    if not cards:
+        cards = [get_card("기본공격")]
+
+    effects = [
+        artifact.get("special")
+        for artifact in (player.equipped_artifact, player.equipped_engraved_artifact)
+        if isinstance(artifact, dict) and artifact.get("special")
+    ]
+    shayla_trigger = False
+    revived = False
+    is_panic = False
+    accel_stacks = 0
+    damage_taken_last = 0
+    dealt = taken = 0
+    turn = 0
+    won = False
+
+    while turn < max_turns:
+        turn += 1
+        card = None if is_panic else choose(player, cards, turn, rng, script)
+        process_gem_turn_start(player, enemy, turn, card.name if card else "")
+        if enemy.current_hp <= 0:
+            won = True
+            break
+
+        applied_accel, accel_stacks = accel_stacks, 0
+        if is_panic:
+            player.current_mental = min(
+                player.max_mental, player.current_mental + player.max_mental // 2
+            )
+            is_panic = False
+
+        player_stunned = player.status_effects.get("stun", 0) > 0
+        if player.current_mental <= 0:
+            is_panic = True
+            player_stunned = True
+            card = None
+        if player_stunned or card is None:
+            player_res = [{"type": "none", "value": 0}]
+        else:
+            player_res = card.use_card(
+                battle_engine.effective_combat_stat(player, "attack"),
+                battle_engine.effective_combat_stat(player, "defense"),
+                player.current_mental,
+                user_data=user_data,
+                damage_taken=damage_taken_last,
+                character=player,
+                rng=rng,
+            )
+            player_res = battle_engine.apply_stat_scaling(player_res, player)
+            battle_engine.apply_time_accel_power(player_res, applied_accel)
+
+        enemy_stunned = enemy.status_effects.get("stun", 0) > 0
+        if enemy_stunned:
+            enemy_res = [{"type": "none", "value": 0}]
+        else:
+            enemy_res = enemy.decide_action(rng=rng).use_card(
+                battle_engine.effective_combat_stat(enemy, "attack"),
+                battle_engine.effective_combat_stat(enemy, "defense"),
+                rng=rng,
+            )
+        enemy_res = battle_engine.apply_stat_scaling(enemy_res, enemy)
+
+        _, shayla_trigger = battle_engine.process_turn_start_artifacts(
+            player, enemy, player_res, enemy_res, turn, shayla_trigger,
+            card.name if card else "", rng=rng,
+        )
+        if "escalation" in effects and not player_stunned:
+            apply_escalation_to_dice(player, player_res, rng)
+        if "ripple" in effects and not player_stunned:
+            apply_ripple_to_dice(player, player_res, turn, rng)
+
+        _, dmg_player, dmg_enemy = battle_engine.process_clash_loop(
+            player, enemy, player_res, enemy_res, effects, [], turn,
+            is_stunned1=player_stunned, is_stunned2=enemy_stunned, rng=rng,
+        )
+        accel_stacks += player.runtime_cooldowns.pop("time_accel_next_stacks", 0)
+        damage_taken_last = dmg_player
+        dealt += dmg_enemy
+        taken += dmg_player
+
+        if player.current_hp <= 0 and "immortality" in effects and not revived:
+            revived = True
+            player.current_hp = player.max_hp
+            revive_gem_effects(player)
+        battle_engine.tick_freeze_end_of_turn(player, turn)
+        battle_engine.tick_freeze_end_of_turn(enemy, turn)
+
+        if enemy.current_hp <= 0:
+            won = True
+            break
+        if player.current_hp <= 0:
+            break
+
+    return {
+        "won": won,
+        "timeout": not won and player.current_hp > 0,
+        "turns": turn,
+        "dealt": dealt,
+        "taken": taken,
+    }
+
+
+def _run_chunk(job):
+    build, enemy_spec, policy, seed, script, max_turns, indexes = job
+    return [
+        simulate_fight(
+            build, enemy_spec, policy, f"{seed}:{index}", script, max_turns
+        )
+        for index in indexes
+    ]
+
+
+def run_simulation(build, enemy_spec, fights=1000, policy="random", seed=0,
+                   script=None, workers=1, max_turns=DEFAULT_MAX_TURNS,
+                   chunk_size=250):
+    """Run ``fights`` fights and return per-fight stats in fight order.
+
+    Every fight is seeded from (seed, fight index), so the result does not
+    depend on ``workers`` or ``chunk_size``.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"알 수 없는 정책: {policy}")
+    if policy == "scripted" and not script:
+        raise ValueError("scripted 정책은 --script 카드 목록이 필요합니다.")
+    build_enemy(enemy_spec)  # Reject a bad enemy spec before forking workers.
+    jobs = [
+        (build, enemy_spec, policy, seed, script, max_turns,
+         range(start, min(start + chunk_size, fights)))
+        for start in range(0, fights, chunk_size)
+    ]
+    if workers <= 1:
+        chunks = map(_run_chunk, jobs)
+        return [fight for chunk in chunks for fight in chunk]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [fight for chunk in pool.map(_run_chunk, jobs) for fight in chunk]
+
+
+def percentiles(samples, cuts=(50, 90, 99)):
+    if not samples:
+        return {cut: 0 for cut in cuts}
+    if len(samples) == 1:
+        return {cut: samples[0] for cut in cuts}
+    quantiles = statistics.quantiles(sorted(samples), n=100, method="inclusive")
+    return {cut: quantiles[cut - 1] for cut in cuts}
+
+
+def summarize(results):
+    wins = [fight for fight in results if fight["won"]]
+    kill_turns = [fight["turns"] for fight in wins]
+    return {
+        "fights": len(results),
+        "win_rate": len(wins) / len(results) if results else 0.0,
+        "timeouts": sum(1 for fight in results if fight["timeout"]),
+        "turns_to_kill": dict(sorted(Counter(kill_turns).items())),
+        "turns_to_kill_pct": percentiles(kill_turns),
+        "damage_dealt_pct": percentiles([fight["dealt"] for fight in results]),
+        "damage_taken_pct": percentiles([fight["taken"] for fight in results]),
+    }
+
+
+def print_summary(summary):
+    print(f"전투 {summary['fights']}회 · 승률 {summary['win_rate'] * 100:.2f}%")
+    turns = summary["turns_to_kill_pct"]
+    print(f"처치 턴: p50={turns[50]:.1f} p90={turns[90]:.1f} p99={turns[99]:.1f}")
+    for label, key in (("가한 피해", "damage_dealt_pct"), ("받은 피해", "damage_taken_pct")):
+        values = summary[key]
+        print(f"{label}: p50={values[50]:.1f} p90={values[90]:.1f} p99={values[99]:.1f}")
+    if summary["turns_to_kill"]:
+        peak = max(summary["turns_to_kill"].values())
+        for turns_taken, count in summary["turns_to_kill"].items():
+            bar = "█" * max(1, round(count / peak * 30))
+            print(f"{turns_taken:>4}턴 {bar} {count}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("build", help="캐릭터 빌드 JSON 경로")
+    parser.add_argument("--enemy", required=True,
+                        help="monster:이름 / dungeon:지역:단계 / raid:등급 / 적 JSON 경로")
+    parser.add_argument("--fights", type=int, default=1000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--script", default="", help="scripted 정책의 카드 순서 (쉼표 구분)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    parser.add_argument("--json", action="store_true", help="요약을 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    enemy = load_fixture(args.enemy) if args.enemy.endswith(".json") else args.enemy
+    script = [name.strip() for name in args.script.split(",") if name.strip()]
+    results = run_simulation(
+        load_fixture(args.build), enemy, fights=args.fights, policy=args.policy,
+        seed=args.seed, script=script, workers=args.workers, max_turns=args.max_turns,
+    )
+    summary = summarize(results)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print_summary(summary)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 # subjugation.py
 import discord
 import random
-import asyncio
 import uuid
 from items import REGIONS, RARE_ITEMS, STAT_UP_ITEMS, ITEM_CATEGORIES
 from monsters import spawn_monster, get_dungeon_boss
@@ -10,19 +9,12 @@ from character import Character
 from data_manager import get_user_data, get_subjugation_ranking, advance_world_turn
 from trade import update_cafe_quest_progress
 from decorators import auto_defer
+from keyed_locks import KeyedLocks
 
 SUBJUGATION_COST = 2000
-_DUNGEON_LOCKS = {}
+_DUNGEON_LOCKS = KeyedLocks("dungeon")
 # guild-shared-turns-v8.6
 
-
-def _dungeon_lock(user_id):
-    lock = _DUNGEON_LOCKS.get(int(user_id))
-    if lock is None:
-        lock = asyncio.Lock()
-        _DUNGEON_LOCKS[int(user_id)] = lock
-    return lock
-
 # ==================================================================================
 # 4. Dungeon Item Logic (New)
 # ==================================================================================
@@ -576,11 +568,12 @@ class DungeonMainView(discord.ui.View):
         async def callback(interaction: discord.Interaction):
             if self.author and interaction.user.id != self.author.id:
                 return await interaction.response.send_message("❌ 본인의 던전만 조작할 수 있습니다.", ephemeral=True)
-            lock = _dungeon_lock(interaction.user.id)
-            if lock.locked():
+            if _DUNGEON_LOCKS.locked(interaction.user.id):
                 return await interaction.response.send_message("⏳ 이전 던전 행동을 처리 중입니다.", ephemeral=True)
             await interaction.response.defer()
-            async with lock:
+            async with _DUNGEON_LOCKS.try_hold(interaction.user.id) as acquired:
+                if not acquired:
+                    return await interaction.followup.send("⏳ 이전 던전 행동을 처리 중입니다.", ephemeral=True)
                 user_data = await get_user_data(interaction.user.id, interaction.user.display_name)
                 state = user_data.get("current_dungeon") or {}
                 if not state:
@@ -983,7 +976,8 @@ class SubjugationRegionView(discord.ui.View):
     async def char_select_callback(self, interaction: discord.Interaction):
         if interaction.user.id != self.author.id: return
         await interaction.response.defer()
-        self.p_data = await get_user_data(self.author.id, self.author.display_name)
+        # 캐릭터·지역 선택지 표시용 조회. 출발 시 region_select_callback에서 전체 데이터를 다시 읽는다.
+        self.p_data = await get_user_data(self.author.id, self.author.display_name, sections=("characters", "unlocked_regions"))
         self.selected_char_index = int(interaction.data['values'][0])
         self.clear_items()
         self.add_character_select()
@@ -1029,10 +1023,9 @@ class SubjugationRegionView(discord.ui.View):
         if region_name == "none": return
 
         await interaction.response.defer()
-        lock = _dungeon_lock(self.author.id)
-        if lock.locked():
-            return await interaction.followup.send("⏳ 다른 던전 요청을 처리 중입니다.", ephemeral=True)
-        async with lock:
+        async with _DUNGEON_LOCKS.try_hold(self.author.id) as acquired:
+            if not acquired:
+                return await interaction.followup.send("⏳ 다른 던전 요청을 처리 중입니다.", ephemeral=True)
             self.p_data = await get_user_data(self.author.id, self.author.display_name)
             if self.p_data.get("current_dungeon"):
                 return await interaction.followup.send(
@@ -1084,12 +1077,12 @@ class RankingFilterView(discord.ui.View):
             char_name = entry.get('max_subjugation_char') or "알 수 없음"
             region = entry.get('max_subjugation_region') or "알 수 없음"
             
-            user = interaction.client.get_user(user_id)
-            if not user:
-                try: user = await interaction.client.fetch_user(user_id)
-                except: user = None
-            
-            name = user.display_name if user else f"Unknown({user_id})"
+            # Names come from user_display_names; the client cache is only a
+            # fallback, so rendering the ranking makes no Discord API calls.
+            name = entry.get('display_name')
+            if not name:
+                user = interaction.client.get_user(user_id)
+                name = user.display_name if user else f"Unknown({user_id})"
             medal = "🥇" if i == 0 else "🥈" if i == 1 else "🥉" if i == 2 else f"**{i+1}위**"
             rank_text += f"{medal} {name} : `{depth}층` ({region} | {char_name})\n"
             
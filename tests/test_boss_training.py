@@ -1,3 +1,5 @@
+import asyncio
+import json
 import random
 import statistics
 import sys
@@ -857,8 +859,9 @@ class BossTrainingViewSmokeTests(unittest.IsolatedAsyncioTestCase):
             },
         }
         view = boss.BossArchiveView(author, {"guild_id": 1})
-        view.records = [record]
+        view.records = [{key: value for key, value in record.items() if key != "boss_data"}]
         view.selected_id = record["boss_id"]
+        view.detail = record
         embed = view.get_embed()
         factor_field = next(field for field in embed.fields if field.name == "🧬 보유 인자")
         self.assertIn("★★★ HP 인자", factor_field.value)
@@ -962,6 +965,320 @@ class BossSkillRewardTests(unittest.IsolatedAsyncioTestCase):
         )
 
 
+class BossRatingCursor:
+    def __init__(self, rows=(), marker=None):
+        self.rows = list(rows)
+        self.marker = marker
+        self.statements = []
+        self.rowcount = 0
+        self._rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append((sql, params))
+        self._rows = []
+        if sql.startswith("SELECT b.boss_id"):
+            self._rows = [
+                {key: value for key, value in row.items() if key != "boss_data"}
+                for row in self.rows
+            ]
+        elif sql.startswith("SELECT * FROM user_bosses WHERE boss_id IN"):
+            self._rows = [dict(row) for row in self.rows if row["boss_id"] in params]
+        elif sql.startswith("SELECT boss_id,boss_name,grade,boss_data FROM user_bosses"):
+            version, last_id, limit = params
+            pending = sorted(
+                (row for row in self.rows
+                 if row.get("factor_version", 0) < version and row["boss_id"] > last_id),
+                key=lambda row: row["boss_id"],
+            )
+            self._rows = [dict(row) for row in pending[:limit]]
+        elif sql.startswith("SELECT value FROM maintenance_markers"):
+            self._rows = [(self.marker,)] if self.marker else []
+        elif sql.startswith("UPDATE user_bosses SET weekly_key"):
+            self.rowcount = len(self.rows)
+
+    async def executemany(self, sql, rows):
+        sql = " ".join(sql.split())
+        self.statements.append((sql, rows))
+        by_id = {row["boss_id"]: row for row in self.rows}
+        for data, ready, version, boss_id in rows:
+            by_id[boss_id].update(boss_data=data, dungeon_ready=ready, factor_version=version)
+
+    async def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    async def fetchall(self):
+        return self._rows
+
+
+class BossRatingPool:
+    def __init__(self, cursor):
+        self.conn = AsyncMock()
+        self.conn.cursor = lambda *args: cursor
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+class WeeklyRatingTests(unittest.IsolatedAsyncioTestCase):
+    def use(self, cursor):
+        boss._boss_ranking_snapshots.clear()
+        pool = BossRatingPool(cursor)
+        patcher = patch.object(boss, "get_db_pool", AsyncMock(return_value=pool))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return pool
+
+    async def test_listing_is_read_only_and_rates_stale_weeks_at_1500(self):
+        current = boss.weekly_key()
+        cursor = BossRatingCursor([
+            {"boss_id": "old", "weekly_key": "2020-01-06", "weekly_elo": 1720, "boss_data": {}},
+            {"boss_id": "new", "weekly_key": current, "weekly_elo": 1610, "boss_data": {}},
+        ])
+        pool = self.use(cursor)
+
+        rows = await boss.list_owned_bosses(1)
+        await boss.list_published_bosses(99, "world")
+
+        self.assertEqual([row["weekly_elo"] for row in rows], [1500, 1610])
+        self.assertTrue(all(row["weekly_key"] == current for row in rows))
+        self.assertTrue(all(sql.startswith("SELECT") for sql, _ in cursor.statements))
+        self.assertIn("CASE WHEN weekly_key=%s THEN weekly_elo ELSE 1500 END DESC", cursor.statements[1][0])
+        self.assertEqual(cursor.statements[1][1][0], current)
+        pool.conn.commit.assert_not_called()
+
+    async def test_listings_select_summary_columns_and_filter_readiness_in_sql(self):
+        cursor = BossRatingCursor([
+            {"boss_id": "a", "weekly_key": boss.weekly_key(), "weekly_elo": 1500,
+             "dungeon_ready": 1, "owner_name": "주인", "boss_data": "{}"},
+        ])
+        self.use(cursor)
+        rows = await boss.list_published_bosses(99, "guild", limit=5)
+        await boss.get_boss_rankings(3)
+
+        self.assertNotIn("boss_data", rows[0])
+        self.assertEqual(rows[0]["owner_name"], "주인")
+        for sql, params in cursor.statements:
+            self.assertNotIn("*", sql.split(" FROM ")[0])
+            self.assertIn("b.dungeon_ready=1", sql)
+            self.assertTrue(sql.endswith("LIMIT %s"))
+        self.assertEqual(cursor.statements[0][1], (99, boss.weekly_key(), 5))
+
+    async def test_rollover_runs_once_per_week(self):
+        cursor = BossRatingCursor([{"boss_id": "old"}], marker=boss.weekly_key())
+        pool = self.use(cursor)
+        self.assertEqual(await boss.rollover_weekly_ratings(), 0)
+        self.assertFalse(any(sql.startswith("UPDATE") for sql, _ in cursor.statements))
+        pool.conn.commit.assert_not_called()
+
+        cursor = BossRatingCursor([{"boss_id": "old"}], marker="2020-01-06")
+        pool = self.use(cursor)
+        self.assertEqual(await boss.rollover_weekly_ratings(), 1)
+        marker_sql, marker_params = cursor.statements[-1]
+        self.assertTrue(marker_sql.startswith("INSERT INTO maintenance_markers"))
+        self.assertEqual(marker_params, ("boss_weekly_rollover", boss.weekly_key()))
+        pool.conn.commit.assert_awaited_once()
+
+
+class RankingCursor:
+    """Answers the ranking queries from in-memory bosses, honouring ORDER BY."""
+
+    def __init__(self, bosses, delay=0.0):
+        self.bosses = bosses
+        self.delay = delay
+        self.statements = []
+        self._rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        rows = [dict(row) for row in self.bosses.values()]
+        if "b.weekly_key=%s" in sql:
+            rows = [row for row in rows if row["weekly_key"] == params[0]]
+        elif "b.weekly_key<>%s" in sql:
+            rows = [row for row in rows if row["weekly_key"] != params[0]]
+        order = sql.split("ORDER BY ")[1].split(" LIMIT")[0]
+        columns = [part.split(" ")[0][2:] for part in order.split(",")]
+        rows.sort(key=lambda row: tuple(row[column] for column in columns), reverse=True)
+        self._rows = rows[: params[-1]]
+
+    async def fetchall(self):
+        return self._rows
+
+
+class BossRankingSnapshotTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        boss._boss_ranking_snapshots.clear()
+        boss._boss_ranking_refreshes.clear()
+        week = boss.weekly_key()
+        self.bosses = {
+            f"b{index}": {
+                "boss_id": f"b{index}", "boss_name": f"보스{index}", "grade": "A",
+                "owner_name": f"주인{index}", "is_published": 1, "publish_scope": "world",
+                "dungeon_ready": 1, "weekly_key": week, "weekly_elo": 1500 + index * 10,
+                "all_time_best_elo": 1600 + index * 10, "power_score": 9000 - index * 100,
+            }
+            for index in range(5)
+        }
+        self.bosses["b0"]["weekly_key"] = "2020-01-06"
+        self.cursor = RankingCursor(self.bosses)
+        patcher = patch.object(
+            boss, "get_db_pool", AsyncMock(return_value=BossRatingPool(self.cursor))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def battle(self, boss_id, weekly_elo, best=None):
+        row = dict(self.bosses[boss_id], weekly_key=boss.weekly_key(), weekly_elo=weekly_elo)
+        row["all_time_best_elo"] = max(row["all_time_best_elo"], best or weekly_elo)
+        self.bosses[boss_id] = row
+        boss._apply_battle_to_rankings({k: v for k, v in row.items() if k != "owner_name"})
+
+    async def test_snapshot_is_reused_until_a_writer_bumps_it(self):
+        first = await boss.get_boss_rankings(3)
+        self.assertEqual(len(self.cursor.statements), 4)
+        self.assertEqual([row["boss_id"] for row in first["weekly"]], ["b4", "b3", "b2"])
+        self.assertEqual([row["boss_id"] for row in first["power"]], ["b0", "b1", "b2"])
+
+        first["weekly"][0]["weekly_elo"] = -1
+        again = await boss.get_boss_rankings(3)
+        self.assertEqual(len(self.cursor.statements), 4)
+        self.assertEqual(again["weekly"][0]["weekly_elo"], 1540)
+
+        boss._bump_boss_rankings()
+        await boss.get_boss_rankings(3)
+        self.assertEqual(len(self.cursor.statements), 8)
+
+    async def test_battles_patch_the_boards_without_requerying(self):
+        await boss.get_boss_rankings(3)
+        self.battle("b2", 1600)   # climbs to first
+        self.battle("b1", 1700)   # enters from outside; owner known from the power board
+        rankings = await boss.get_boss_rankings(3)
+        self.assertEqual(len(self.cursor.statements), 4)
+        self.assertEqual([row["boss_id"] for row in rankings["weekly"]], ["b1", "b2", "b4"])
+        self.assertEqual(rankings["weekly"][0]["owner_name"], "주인1")
+        self.assertEqual([row["boss_id"] for row in rankings["all_time"]], ["b1", "b4", "b3"])
+
+        fresh = await boss._query_boss_rankings(3, boss.weekly_key())
+        for board in ("weekly", "all_time", "power"):
+            self.assertEqual(
+                [row["boss_id"] for row in rankings[board]],
+                [row["boss_id"] for row in fresh[board]],
+            )
+
+    async def test_falling_to_the_cutoff_forces_a_requery(self):
+        await boss.get_boss_rankings(3)
+        self.battle("b2", 1400)
+        rankings = await boss.get_boss_rankings(3)
+        self.assertEqual(len(self.cursor.statements), 8)
+        self.assertEqual([row["boss_id"] for row in rankings["weekly"]], ["b4", "b3", "b1"])
+
+    async def test_slow_refresh_serves_the_stale_snapshot(self):
+        await boss.get_boss_rankings(3)
+        self.bosses["b1"]["power_score"] = 99_999
+        boss._bump_boss_rankings()
+        self.cursor.delay = 0.02
+        with patch.object(boss, "BOSS_RANKING_REFRESH_TIMEOUT", 0.01):
+            stale = await boss.get_boss_rankings(3)
+            self.assertEqual(stale["power"][0]["boss_id"], "b0")
+            await boss._boss_ranking_refreshes[3]
+            fresh = await boss.get_boss_rankings(3)
+        self.assertEqual(fresh["power"][0]["boss_id"], "b1")
+        self.assertEqual(len(self.cursor.statements), 8)
+
+
+    async def test_failed_refresh_serves_the_stale_snapshot(self):
+        await boss.get_boss_rankings(3)
+        boss._bump_boss_rankings()
+        with patch.object(
+            boss, "_refresh_boss_rankings", AsyncMock(side_effect=RuntimeError("db down"))
+        ), self.assertLogs(boss.logger, "WARNING"):
+            stale = await boss.get_boss_rankings(3)
+        self.assertEqual([row["boss_id"] for row in stale["weekly"]], ["b4", "b3", "b2"])
+        self.assertNotIn(3, boss._boss_ranking_refreshes)
+
+class BossSummaryBackfillTests(unittest.IsolatedAsyncioTestCase):
+    @staticmethod
+    def legacy_row(boss_id, dungeon=None):
+        data = {"name": boss_id, "grade": "B", "hp": 1000, "mental": 100,
+                "attack": 10, "defense": 10}
+        if dungeon:
+            data["dungeon"] = dungeon
+        return {"boss_id": boss_id, "boss_name": boss_id, "grade": "B",
+                "boss_data": json.dumps(data), "factor_version": 0}
+
+    async def test_backfill_normalizes_in_batches_then_goes_quiet(self):
+        ready = {"version": boss.DUNGEON_VERSION, "locked": True,
+                 "monsters": [{}, {}, {}], "elite": {}}
+        cursor = BossRatingCursor(
+            [self.legacy_row(f"boss{index}") for index in range(5)]
+            + [self.legacy_row("ready", ready)]
+        )
+        pool = BossRatingPool(cursor)
+        with patch.object(boss, "get_db_pool", AsyncMock(return_value=pool)), \
+                patch.object(boss, "_BOSS_BACKFILL_BATCH", 4):
+            self.assertEqual(await boss.backfill_boss_summaries(), 6)
+            self.assertEqual(pool.conn.commit.await_count, 2)
+            for row in cursor.rows:
+                data = json.loads(row["boss_data"])
+                self.assertEqual(row["factor_version"], boss.FACTOR_VERSION)
+                self.assertTrue(data["factors"])
+                self.assertEqual(row["dungeon_ready"], int(row["boss_id"] == "ready"))
+
+            cursor.statements.clear()
+            self.assertEqual(await boss.backfill_boss_summaries(), 0)
+            self.assertEqual(len(cursor.statements), 1)
+
+    async def test_malformed_row_is_skipped_and_the_rest_are_backfilled(self):
+        broken = dict(self.legacy_row("boss1"), boss_data="{not json")
+        cursor = BossRatingCursor(
+            [self.legacy_row("boss0"), broken, self.legacy_row("boss2")]
+        )
+        pool = BossRatingPool(cursor)
+        with patch.object(boss, "get_db_pool", AsyncMock(return_value=pool)), \
+                patch.object(boss, "_BOSS_BACKFILL_BATCH", 2), \
+                self.assertLogs("boss_training", level="WARNING") as logs:
+            self.assertEqual(await boss.backfill_boss_summaries(), 2)
+        self.assertIn("boss_id=boss1", logs.output[0])
+        versions = {row["boss_id"]: row["factor_version"] for row in cursor.rows}
+        self.assertEqual(versions, {"boss0": boss.FACTOR_VERSION, "boss1": 0,
+                                    "boss2": boss.FACTOR_VERSION})
+
+    async def test_opening_a_boss_decodes_only_that_row(self):
+        cursor = BossRatingCursor([self.legacy_row("one"), self.legacy_row("two")])
+        pool = BossRatingPool(cursor)
+        with patch.object(boss, "get_db_pool", AsyncMock(return_value=pool)):
+            record = await boss.get_boss_record("two")
+            self.assertIsNone(await boss.get_boss_record("missing"))
+        self.assertEqual(record["boss_data"]["name"], "two")
+        self.assertTrue(record["boss_data"]["factors"])
+        self.assertTrue(all(sql.startswith("SELECT") for sql, _ in cursor.statements))
+        pool.conn.commit.assert_not_called()
+
+
 class BossBalanceSimulationTests(unittest.TestCase):
     @staticmethod
     def _simulate_scores(*, scenario=False, strong_parents=False):
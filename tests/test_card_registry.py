@@ -0,0 +1,70 @@
+import random
+import sys
+import unittest
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import cards
+import monsters
+
+
+class CardRegistryTests(unittest.TestCase):
+    def test_special_and_table_cards_are_interned(self):
+        for name in ("전부매입", "인파이트", "잠금", "시간술식:기본형", "모닝 글로리", "기본공격", "강철타격"):
+            self.assertIs(cards.get_card(name), cards.get_card(name), name)
+        self.assertIsNone(cards.get_card("없는 카드"))
+
+    def test_using_a_shared_card_leaves_it_unchanged(self):
+        card = cards.get_card("모닝 글로리")
+        before = [(dice.action_type, dice.d_min, dice.d_max, dice.effect) for dice in card.dice_list]
+        card.use_card(10, 10, 0, rng=random.Random(1))
+        card.use_card(10, 10, 100, rng=random.Random(2))
+        after = [(dice.action_type, dice.d_min, dice.d_max, dice.effect) for dice in card.dice_list]
+        self.assertEqual(before, after)
+
+    def test_reregistered_reward_cards_are_not_stale(self):
+        name = "레지스트리 시험 스킬"
+        self.addCleanup(cards._BOSS_REWARD_CARDS.pop, name, None)
+
+        def register(high):
+            cards.register_boss_reward_cards({"boss_skill_rewards": {"skills": {
+                name: {"spec": {"name": name, "dice": [{"type": "attack", "min": 5, "max": high}]}},
+            }}})
+
+        register(9)
+        self.assertEqual(cards.get_card(name).dice_list[0].d_max, 9)
+        register(14)
+        self.assertEqual(cards.get_card(name).dice_list[0].d_max, 14)
+
+
+class CompiledActionTableTests(unittest.TestCase):
+    def test_spawns_share_one_table(self):
+        first = monsters.spawn_monster("굴레늑대")
+        second = monsters.spawn_monster("굴레늑대")
+        self.assertIs(first.action_table, second.action_table)
+        names = [card.name for card in first.action_table[0]]
+        self.assertEqual(names, monsters.MONSTER_DATA["굴레늑대"]["card_deck"])
+
+    def test_choices_match_per_turn_weights_for_the_same_seed(self):
+        for name, data in monsters.MONSTER_DATA.items():
+            monster = monsters.spawn_monster(name)
+            deck = [cards.get_card(card) for card in data["card_deck"] if cards.get_card(card)]
+            weights = [
+                monsters._pattern_weight(card, monster.pattern_type) for card in deck
+            ]
+            expected_rng, actual_rng = random.Random(name), random.Random(name)
+            expected = [expected_rng.choices(deck, weights=weights)[0].name for _ in range(20)]
+            actual = [monster.decide_action(rng=actual_rng).name for _ in range(20)]
+            self.assertEqual(actual, expected, name)
+
+    def test_unknown_deck_falls_back_to_basic_attack(self):
+        monster = monsters.Monster("빈 덱", 10, 1, 1, card_deck=["없는 카드"])
+        self.assertEqual(monster.decide_action(rng=random.Random(1)).name, "기본공격")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import db_metrics
+
+
+class LockWaitTimeout(Exception):
+    pass
+
+
+class RawCursor:
+    def __init__(self):
+        self.rowcount = -1
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, args=None):
+        if "FOR UPDATE" in sql:
+            raise LockWaitTimeout(1205, "Lock wait timeout exceeded")
+        if "SLEEP" in sql:
+            await asyncio.sleep(0.03)
+        self.rowcount = 3
+
+    async def executemany(self, sql, args):
+        self.rowcount = len(args)
+
+    async def fetchall(self):
+        return [(1,), (2,), (3,)]
+
+
+class RawConnection:
+    def cursor(self, *cursors):
+        return RawCursor()
+
+    async def commit(self):
+        return None
+
+
+class RawPool:
+    def __init__(self):
+        self.closed = False
+
+    def acquire(self):
+        class Acquire:
+            async def __aenter__(self):
+                return RawConnection()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+    def close(self):
+        self.closed = True
+
+
+async def load_things(pool):
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT * FROM things")
+            rows = await cur.fetchall()
+            await cur.executemany("INSERT INTO things VALUES (%s)", [(1,), (2,)])
+            await conn.commit()
+            return rows
+
+
+async def lock_things(pool):
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT * FROM things FOR UPDATE")
+
+
+class QueryMetricsTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        db_metrics.reset_query_stats()
+
+    async def test_statements_are_tagged_with_calling_function(self):
+        pool = db_metrics.InstrumentedPool(RawPool())
+        rows = await load_things(pool)
+        pool.close()
+
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(pool._pool.closed)
+        stats = db_metrics.get_query_stats()
+        site = stats["sites"][f"{__name__}.load_things"]
+        self.assertEqual(site["calls"], 2)
+        self.assertEqual(site["rows"], 5)
+        self.assertEqual(sum(site["histogram"]), 2)
+        self.assertEqual(stats["pool"]["acquires"], 1)
+
+    async def test_lock_wait_errors_are_counted_and_reraised(self):
+        pool = db_metrics.InstrumentedPool(RawPool())
+        with self.assertRaises(LockWaitTimeout):
+            await lock_things(pool)
+        site = db_metrics.get_query_stats()["sites"][f"{__name__}.lock_things"]
+        self.assertEqual((site["errors"], site["lock_errors"]), (1, 1))
+
+    async def test_slow_queries_are_logged(self):
+        pool = db_metrics.InstrumentedPool(RawPool())
+        with patch.object(db_metrics, "SLOW_QUERY_MS", 10), \
+                self.assertLogs("db_metrics", level="WARNING") as logs:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT SLEEP(0.03)")
+        self.assertIn("test_slow_queries_are_logged", logs.output[0])
+        site = next(iter(db_metrics.get_query_stats()["sites"].values()))
+        self.assertEqual(site["slow"], 1)
+        self.assertGreaterEqual(site["p99_ms"], 25)
+
+    def test_histogram_percentile(self):
+        histogram = db_metrics._empty_histogram()
+        histogram[0] = 98  # <=1ms
+        histogram[6] = 2   # <=100ms
+        self.assertEqual(db_metrics.histogram_percentile(histogram, 0.5), 1.0)
+        self.assertEqual(db_metrics.histogram_percentile(histogram, 0.99), 100.0)
+        self.assertEqual(db_metrics.histogram_percentile(db_metrics._empty_histogram(), 0.5), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import dice_tables
+from cards import Dice, get_card
+
+
+def brute_force_win(bounds_a, bounds_b):
+    (low_a, high_a), (low_b, high_b) = bounds_a, bounds_b
+    wins = sum(
+        1
+        for x in range(low_a, high_a + 1)
+        for y in range(low_b, high_b + 1)
+        if x > y
+    )
+    return wins / ((high_a - low_a + 1) * (high_b - low_b + 1))
+
+
+class ExactDiceMathTests(unittest.TestCase):
+    def test_win_probability_matches_enumeration(self):
+        rng = random.Random(3)
+        for _ in range(300):
+            a = tuple(sorted(rng.sample(range(0, 60), 2)))
+            b = tuple(sorted(rng.sample(range(0, 60), 2)))
+            self.assertAlmostEqual(
+                dice_tables.win_probability(a, b), brute_force_win(a, b), places=12
+            )
+        self.assertEqual(dice_tables.win_probability((5, 5), (5, 5)), 0)
+
+    def test_distribution_and_moments_follow_dice_bounds(self):
+        dice = Dice("counter", 5, 9)
+        self.assertEqual(dice.bounds(4, 2), (7, 13))
+        distribution = dice_tables.die_distribution(dice, 4, 2)
+        self.assertEqual(sorted(distribution), list(range(7, 14)))
+        self.assertAlmostEqual(sum(distribution.values()), 1.0)
+        self.assertEqual(dice_tables.uniform_moments(7, 13), (10.0, 4.0))
+
+    def test_card_ev_without_tables_is_computed_directly(self):
+        with patch.object(dice_tables, "_tables", None):
+            moments = dice_tables.card_ev("강철타격", attack=3)
+        self.assertEqual(moments["attack"][0], 2 * (10 + 23) / 2)
+        self.assertEqual(set(moments), {"attack"})
+
+
+@unittest.skipIf(dice_tables.np is None, "numpy가 없으면 표를 만들지 않는다")
+class DiceTableTests(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, dice_tables, "_tables", None)
+        self.path = os.path.join(tempfile.mkdtemp(), "dice.npz")
+
+    def test_table_lookups_equal_the_scalar_path(self):
+        dice_tables.load_tables(self.path)
+        names = dice_tables.table_cards()
+        rng = random.Random(8)
+        for _ in range(400):
+            a, b = rng.choice(names), rng.choice(names)
+            level_a, level_b = rng.choice(dice_tables.STAT_GRID), rng.choice(dice_tables.STAT_GRID)
+            expected = dice_tables.clash_win_rate(
+                get_card(a), (level_a, level_a), get_card(b), (level_b, level_b)
+            )
+            self.assertAlmostEqual(dice_tables.clash_lookup(a, level_a, b, level_b), expected)
+            with patch.object(dice_tables, "_tables", None):
+                direct = dice_tables.card_ev(a, level_a, level_b)
+            self.assertEqual(dice_tables.card_ev(a, level_a, level_b), direct)
+
+    def test_cache_is_reused_and_rebuilt_on_version_change(self):
+        dice_tables.load_tables(self.path)
+        with patch.object(dice_tables, "build_tables", side_effect=AssertionError):
+            dice_tables.load_tables(self.path)
+        built = []
+        original = dice_tables.build_tables
+        with patch.object(dice_tables, "TABLE_VERSION", dice_tables.TABLE_VERSION + 1), \
+                patch.object(dice_tables, "build_tables", lambda names: built.append(1) or original(names)):
+            dice_tables.load_tables(self.path)
+        self.assertEqual(built, [1])
+
+    def test_rebalanced_card_rebuilds_the_cache(self):
+        dice_tables.load_tables(self.path)
+        card = get_card("강철타격")
+        self.addCleanup(setattr, card.dice_list[0], "d_max", card.dice_list[0].d_max)
+        card.dice_list[0].d_max += 3
+        built = []
+        original = dice_tables.build_tables
+        with patch.object(dice_tables, "build_tables", lambda names: built.append(1) or original(names)):
+            dice_tables.load_tables(self.path)
+        self.assertEqual(built, [1])
+        self.assertEqual(
+            dice_tables.card_ev("강철타격", attack=0)["attack"][0],
+            sum((dice.d_min + dice.d_max) / 2 for dice in card.dice_list),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,337 @@
+import json
+import random
+import sys
+import unittest
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import battle_engine
+from cards import get_card
+from character import Character
+import gem_effects
+from gem_effects import (
+    apply_escalation_to_dice,
+    apply_ripple_to_dice,
+    battle_end_gem_heal,
+    gem_final_effect_value,
+    gem_profile,
+    process_gem_turn_start,
+    refresh_gem_profile,
+    revive_gem_effects,
+)
+from monsters import get_dungeon_boss, spawn_monster
+
+
+GOLDEN_PATH = Path(__file__).with_name("golden_gem_battles.json")
+
+
+def gem(name, star, value, category="combat_common", special=None):
+    entry = {
+        "id": f"{name}-{star}-{value}-{category}",
+        "name": name,
+        "star": star,
+        "effect_value": value,
+        "category": category,
+        "main_stat": "attack",
+        "main_stat_mode": "flat",
+        "main_stat_value": 2,
+        "aux_stat_value": 2,
+    }
+    if special:
+        entry["target_special"] = special
+    return entry
+
+
+def dedicated(special, *gems):
+    return [gem(name, star, value, "dedicated", special) for name, star, value in gems]
+
+
+BUILDS = {
+    "fierce_sturdy": {
+        "name": "맹렬견고",
+        "hp": 420, "max_mental": 160, "attack": 14, "defense": 10,
+        "equipped_cards": ["연속할퀴기", "기본방어", "기본반격", "강한참격"],
+        "equipped_artifact": {
+            "name": "맹렬한 검", "special": "fierce_attack", "stats": {"atk": 4},
+            "gems": [
+                *dedicated("fierce_attack", ("격화의 젬", 5, 6), ("도화선의 젬", 3, 20), ("잔불의 젬", 4, 40)),
+                gem("선봉의 젬", 5, 4), gem("연격의 젬", 5, 3), gem("결의의 젬", 3, 5),
+            ],
+        },
+        "equipped_engraved_artifact": {
+            "name": "견고한 방패", "special": "sturdy_defense", "stats": {"def": 3},
+            "gems": [
+                *dedicated("sturdy_defense", ("맥박의 젬", 5, 8), ("축성의 젬", 3, 50), ("인내의 젬", 5, 20)),
+                gem("수호의 젬", 5, 30), gem("정화의 젬", 5, 40), gem("순환의 젬", 5, 6),
+            ],
+        },
+    },
+    "escalation_ripple": {
+        "name": "고조파문",
+        "hp": 380, "max_mental": 180, "attack": 12, "defense": 9,
+        "equipped_cards": ["기본공격", "연속할퀴기", "회전베기", "기본반격"],
+        "equipped_artifact": {
+            "name": "고조된 부적", "special": "escalation", "stats": {"atk": 3},
+            "gems": [
+                *dedicated("escalation", ("고양의 젬", 3, 15), ("폭주의 젬", 2, 30), ("연쇄의 젬", 5, 40)),
+                gem("집중의 젬", 5, 4), gem("균형의 젬", 5, 3),
+            ],
+        },
+        "equipped_engraved_artifact": {
+            "name": "파문의 종", "special": "ripple", "stats": {"hp": 20},
+            "gems": [
+                *dedicated("ripple", ("증폭의 젬", 5, 20), ("맥동의 젬", 3, 4), ("환류의 젬", 5, 30)),
+                gem("정화의 젬", 2, 30), gem("여명의 젬", 5, 12),
+            ],
+        },
+    },
+    "reuse_reflection": {
+        "name": "복기반사",
+        "hp": 450, "max_mental": 150, "attack": 11, "defense": 12,
+        "equipped_cards": ["복합반격", "복합공격", "회전베기", "자각몽"],
+        "equipped_artifact": {
+            "name": "꼼꼼한 시계", "special": "reuse_last_dice", "stats": {"def": 4},
+            "gems": [
+                *dedicated("reuse_last_dice", ("복기의 젬", 5, 6), ("교정의 젬", 3, 3), ("여백의 젬", 5, 10)),
+                gem("선봉의 젬", 2, 3), gem("수호의 젬", 3, 25),
+            ],
+        },
+        "equipped_engraved_artifact": {
+            "name": "앙심품은 가면", "special": "reflection", "stats": {"atk": 2},
+            "gems": [
+                *dedicated("reflection", ("가시의 젬", 5, 8), ("원한의 젬", 3, 4), ("응보의 젬", 5, 30)),
+                *dedicated("immortality", ("회귀의 젬", 5, 40), ("정화의 젬", 5, 50)),
+                gem("결의의 젬", 5, 6),
+            ],
+        },
+    },
+}
+
+ENEMIES = {
+    "wolf": lambda: spawn_monster("굴레늑대"),
+    "boss": lambda: get_dungeon_boss("기원의 쌍성", 30),
+}
+
+
+def _effects(source):
+    return [
+        artifact.get("special")
+        for artifact in (source.equipped_artifact, source.equipped_engraved_artifact)
+        if isinstance(artifact, dict) and artifact.get("special")
+    ]
+
+
+def _snapshot(source):
+    state = dict(source.runtime_cooldowns.get("gem_state", {}))
+    state.pop("activation_log", None)
+    return {
+        "hp": source.current_hp,
+        "mental": source.current_mental,
+        "status": dict(source.status_effects),
+        "gem_state": json.loads(json.dumps(state, sort_keys=True, default=str)),
+    }
+
+
+def record_battle(build_key, enemy_key, seed, turns=25):
+    """Play a seeded battle the way BattleView does and keep every turn."""
+    rng = battle_engine.BattleRandom(seed)
+    player = Character.from_dict(json.loads(json.dumps(BUILDS[build_key])))
+    battle_engine.ensure_status_effects(player)
+    player.runtime_cooldowns = {}
+    player.apply_battle_start_buffs()
+    player.current_hp, player.current_mental = player.max_hp, player.max_mental
+    if enemy_key == "mirror":
+        enemy = Character.from_dict(json.loads(json.dumps(BUILDS["reuse_reflection"])))
+        battle_engine.ensure_status_effects(enemy)
+        enemy.runtime_cooldowns = {}
+        enemy.apply_battle_start_buffs()
+    else:
+        enemy = ENEMIES[enemy_key]()
+        battle_engine.ensure_status_effects(enemy)
+        enemy.attack += 25
+    # Long fights so stacking gems, revive and low-mental bonuses all show up.
+    enemy.max_hp *= 8
+    enemy.current_hp = enemy.max_hp
+    if enemy_key == "mirror":
+        enemy.current_mental = enemy.max_mental
+    effects, enemy_effects = _effects(player), _effects(enemy) if enemy_key == "mirror" else []
+    triggers = [False, False]
+    revived = False
+    frames = []
+    for turn in range(1, turns + 1):
+        card = get_card(rng.choice(player.equipped_cards))
+        if enemy_key == "mirror":
+            enemy_card = get_card(rng.choice(enemy.equipped_cards))
+        else:
+            enemy_card = enemy.decide_action(rng=rng)
+        logs = [
+            process_gem_turn_start(player, enemy, turn, card.name),
+            process_gem_turn_start(enemy, player, turn, enemy_card.name) if enemy_key == "mirror" else "",
+        ]
+        player_res = battle_engine.apply_stat_scaling(card.use_card(
+            battle_engine.effective_combat_stat(player, "attack"),
+            battle_engine.effective_combat_stat(player, "defense"),
+            player.current_mental, character=player, rng=rng,
+        ), player)
+        enemy_res = battle_engine.apply_stat_scaling(enemy_card.use_card(
+            battle_engine.effective_combat_stat(enemy, "attack"),
+            battle_engine.effective_combat_stat(enemy, "defense"),
+            enemy.current_mental, character=enemy, rng=rng,
+        ), enemy)
+        art_log, triggers[0] = battle_engine.process_turn_start_artifacts(
+            player, enemy, player_res, enemy_res, turn, triggers[0], card.name, rng=rng
+        )
+        logs.append(art_log)
+        for side, results, side_effects in ((player, player_res, effects), (enemy, enemy_res, enemy_effects)):
+            if "escalation" in side_effects:
+                logs.append(json.dumps(apply_escalation_to_dice(side, results, rng), ensure_ascii=False))
+            if "ripple" in side_effects:
+                logs.append(json.dumps(apply_ripple_to_dice(side, results, turn, rng), ensure_ascii=False))
+        clash_log, dmg_player, dmg_enemy = battle_engine.process_clash_loop(
+            player, enemy, player_res, enemy_res, effects, enemy_effects, turn, rng=rng
+        )
+        logs.append(clash_log)
+        if player.current_hp <= 0 and not revived:
+            revived = True
+            player.current_hp = player.max_hp
+            logs.append(revive_gem_effects(player))
+        battle_engine.tick_freeze_end_of_turn(player, turn)
+        battle_engine.tick_freeze_end_of_turn(enemy, turn)
+        frames.append({
+            "turn": turn,
+            "cards": [card.name, enemy_card.name],
+            "damage": [dmg_player, dmg_enemy],
+            "logs": [line for line in logs if line],
+            "player": _snapshot(player),
+            "enemy": _snapshot(enemy) if enemy_key == "mirror" else {
+                "hp": enemy.current_hp, "status": dict(enemy.status_effects),
+            },
+        })
+        if player.current_hp <= 0 or enemy.current_hp <= 0:
+            break
+    frames.append({"battle_end_heal": battle_end_gem_heal(player)})
+    return frames
+
+
+SCENARIOS = [
+    (build, enemy, seed)
+    for build in BUILDS
+    for enemy in ("wolf", "boss", "mirror")
+    for seed in (11, 29)
+]
+
+
+def record_all():
+    return {
+        f"{build}/{enemy}/{seed}": record_battle(build, enemy, seed)
+        for build, enemy, seed in SCENARIOS
+    }
+
+
+class GemProfileTests(unittest.TestCase):
+    def test_profile_matches_scanning_the_sockets(self):
+        rng = random.Random(4)
+        names = ["선봉의 젬", "정화의 젬", "수호의 젬", "회귀의 젬"]
+        for _ in range(50):
+            artifacts = [
+                {"special": rng.choice(["ripple", "reflection", None]), "gems": [
+                    gem(rng.choice(names), rng.randint(0, 5), rng.randint(0, 40),
+                        rng.choice(["combat_common", "dedicated"]))
+                    if rng.random() < 0.8 else None
+                    for _ in range(rng.randint(0, 4))
+                ]}
+                for _ in range(2)
+            ]
+            source = Character.from_dict({"name": "검사", "equipped_artifact": artifacts[0],
+                                          "equipped_engraved_artifact": artifacts[1]})
+            gems = gem_effects.equipped_gems(source)
+            for name in names:
+                matches = [item for item in gems if item["name"] == name]
+                self.assertEqual(gem_effects.gem_effect_total(source, name),
+                                 sum(map(gem_final_effect_value, matches)))
+                self.assertEqual(gem_effects.gem_max_star(source, name),
+                                 max((item["star"] for item in matches), default=-1))
+                for category in ("combat_common", "dedicated"):
+                    scoped = [item for item in matches if item["category"] == category]
+                    self.assertEqual(gem_effects.gem_effect_total_category(source, name, category),
+                                     sum(map(gem_final_effect_value, scoped)))
+                    self.assertEqual(gem_effects.gem_max_star_category(source, name, category),
+                                     max((item["star"] for item in scoped), default=-1))
+            for special in ("ripple", "reflection"):
+                self.assertEqual(gem_effects.has_artifact_special(source, special),
+                                 any(artifact["special"] == special for artifact in artifacts))
+
+    def test_cached_profile_follows_equip_changes(self):
+        player = Character.from_dict(json.loads(json.dumps(BUILDS["fierce_sturdy"])))
+        profile = gem_profile(player)
+        self.assertIs(gem_profile(player), profile)
+        self.assertEqual(profile.totals["선봉의 젬"], 7)
+
+        player.equipped_artifact["gems"][3] = None
+        self.assertFalse(gem_profile(player).has("선봉의 젬"))
+        player.equipped_artifact = None
+        self.assertFalse(gem_effects.has_artifact_special(player, "fierce_attack"))
+
+        # In-place edits keep the same objects, so battle start recompiles.
+        player.equipped_engraved_artifact["gems"][3]["star"] = 0
+        self.assertEqual(gem_effects.gem_max_star(player, "수호의 젬"), 5)
+        refresh_gem_profile(player)
+        self.assertEqual(gem_effects.gem_max_star(player, "수호의 젬"), 0)
+
+
+    def test_replacement_objects_with_recycled_ids_rebuild_the_profile(self):
+        player = Character.from_dict({"name": "검사", "equipped_artifact": {
+            "special": "ripple", "gems": [gem("선봉의 젬", 0, 10)],
+        }})
+        recycled = 0
+        for value in range(1, 200):
+            old_id = id(player.equipped_artifact["gems"][0])
+            gem_profile(player)
+            # Drop the old gem and socket a new one; CPython tends to hand the
+            # freed slot straight back to the next dict of the same size.
+            player.equipped_artifact["gems"][0] = None
+            player.equipped_artifact["gems"][0] = gem("선봉의 젬", 0, value)
+            recycled += id(player.equipped_artifact["gems"][0]) == old_id
+            self.assertEqual(gem_effects.gem_effect_total(player, "선봉의 젬"), value)
+        for _ in range(50):
+            old_id = id(player.equipped_artifact["gems"])
+            gem_profile(player)
+            player.equipped_artifact["gems"] = [gem("결의의 젬", 1, 5)]
+            self.assertFalse(gem_profile(player).has("선봉의 젬"))
+            player.equipped_artifact["gems"] = [gem("선봉의 젬", 2, 3)]
+            self.assertEqual(gem_effects.gem_max_star(player, "선봉의 젬"), 2)
+            recycled += id(player.equipped_artifact["gems"]) == old_id
+        self.assertEqual(recycled, 0)  # the cached profile keeps old objects alive
+
+
+class GoldenGemBattleTests(unittest.TestCase):
+    """Recorded battles pin gem/artifact behavior turn by turn."""
+
+    maxDiff = None
+
+    @classmethod
+    def setUpClass(cls):
+        with GOLDEN_PATH.open(encoding="utf-8") as handle:
+            cls.golden = json.load(handle)
+
+    def test_recorded_battles_replay_identically(self):
+        self.assertEqual(sorted(self.golden), sorted(f"{b}/{e}/{s}" for b, e, s in SCENARIOS))
+        for build, enemy, seed in SCENARIOS:
+            key = f"{build}/{enemy}/{seed}"
+            with self.subTest(battle=key):
+                replay = json.loads(json.dumps(record_battle(build, enemy, seed), ensure_ascii=False))
+                self.assertEqual(replay, self.golden[key])
+
+
+if __name__ == "__main__":
+    if "--record" in sys.argv:
+        GOLDEN_PATH.write_text(
+            json.dumps(record_all(), ensure_ascii=False, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+    else:
+        unittest.main()
@@ -0,0 +1,192 @@
+import datetime
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import data_manager
+
+
+NOW = datetime.datetime.now().replace(microsecond=0)
+
+
+class LogTableCursor:
+    """Serves the guild_log page/archive statements from an in-memory table."""
+
+    def __init__(self, rows):
+        self.rows = rows  # dicts with guild_id, id, logged_at, ...
+        self.monthly = {}
+        self.statements = []
+        self.rowcount = 0
+        self._result = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        self._result = []
+        if sql.startswith("SELECT * FROM guild_log WHERE guild_id"):
+            guild_id, limit = params[0], params[-1]
+            rows = [row for row in self.rows if row["guild_id"] == guild_id]
+            if "logged_at < %s" in sql:
+                logged_at, _, log_id = params[1:4]
+                rows = [row for row in rows if (row["logged_at"], row["id"]) < (logged_at, log_id)]
+            rows.sort(key=lambda row: (row["logged_at"], row["id"]), reverse=True)
+            self._result = [dict(row) for row in rows[:limit]]
+        elif sql.startswith("SELECT id, guild_id, user_id"):
+            cutoff, limit = params
+            rows = sorted(
+                (row for row in self.rows
+                 if row["logged_at"] is not None and row["logged_at"] < cutoff),
+                key=lambda row: row["id"],
+            )[:limit]
+            self._result = [
+                (row["id"], row["guild_id"], row["user_id"], row["user_name"],
+                 row["action_type"], row["count"], row["logged_at"])
+                for row in rows
+            ]
+        elif sql.startswith("DELETE FROM guild_log WHERE logged_at IS NULL"):
+            kept = [
+                row for row in self.rows
+                if row["logged_at"] is not None and row["guild_id"] is not None
+            ]
+            self.rowcount = len(self.rows) - len(kept)
+            self.rows = kept
+        elif sql.startswith("DELETE FROM guild_log WHERE id IN"):
+            ids = set(params)
+            self.rows = [row for row in self.rows if row["id"] not in ids]
+
+    async def executemany(self, sql, rows):
+        for guild_id, month, action, user_id, name, events, total, first, last in rows:
+            assert guild_id is not None  # guild_log_monthly.guild_id is NOT NULL
+            key = (guild_id, month, action, user_id)
+            entry = self.monthly.setdefault(key, {"events": 0, "total_count": 0})
+            entry["events"] += events
+            entry["total_count"] += total
+
+    async def fetchall(self):
+        return self._result
+
+
+class LogPool:
+    def __init__(self, cursor):
+        self.conn = AsyncMock()
+        self.conn.cursor = lambda *args: cursor
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+def make_rows(count, guild_id=1, days_old=0):
+    start = NOW - datetime.timedelta(days=days_old)
+    return [
+        {
+            "id": index + 1,
+            "guild_id": guild_id,
+            "user_id": str(index % 3),
+            "user_name": f"user{index % 3}",
+            "action_type": "donation",
+            "item_name": "목재",
+            "count": 2,
+            # Two rows per second so the id tiebreak matters.
+            "logged_at": start + datetime.timedelta(seconds=index // 2),
+        }
+        for index in range(count)
+    ]
+
+
+class GuildLogPagingTests(unittest.IsolatedAsyncioTestCase):
+    async def run_with(self, cursor, coro_factory):
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=LogPool(cursor))):
+            return await coro_factory()
+
+    async def test_pages_walk_every_row_once_newest_first(self):
+        cursor = LogTableCursor(make_rows(25) + make_rows(5, guild_id=2))
+        seen, before, pages = [], None, 0
+        while True:
+            rows, before = await self.run_with(
+                cursor, lambda: data_manager.get_guild_logs_page(1, before=before, limit=10)
+            )
+            seen.extend(row["id"] for row in rows)
+            pages += 1
+            if before is None:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, list(range(25, 0, -1)))
+
+    async def test_every_page_is_one_bounded_query(self):
+        cursor = LogTableCursor(make_rows(25))
+        _, before = await self.run_with(cursor, lambda: data_manager.get_guild_logs_page(1, limit=10))
+        await self.run_with(cursor, lambda: data_manager.get_guild_logs_page(1, before=before, limit=10))
+        self.assertEqual(len(cursor.statements), 2)
+        self.assertTrue(all(sql.endswith("ORDER BY logged_at DESC, id DESC LIMIT %s") for sql in cursor.statements))
+        self.assertNotIn("OFFSET", cursor.statements[1])
+
+
+class GuildLogArchiveTests(unittest.IsolatedAsyncioTestCase):
+    async def test_old_rows_are_folded_into_monthly_totals(self):
+        old = make_rows(30, days_old=60)
+        recent = [dict(row, id=row["id"] + 100) for row in make_rows(4)]
+        cursor = LogTableCursor(old + recent)
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=LogPool(cursor))), \
+                patch.object(data_manager, "_GUILD_LOG_ARCHIVE_BATCH", 8):
+            archived = await data_manager.archive_guild_logs(retention_days=30)
+
+        self.assertEqual(archived, 30)
+        self.assertEqual([row["id"] for row in cursor.rows], [101, 102, 103, 104])
+        self.assertEqual(sum(entry["events"] for entry in cursor.monthly.values()), 30)
+        self.assertEqual(sum(entry["total_count"] for entry in cursor.monthly.values()), 60)
+        self.assertEqual({key[3] for key in cursor.monthly}, {"0", "1", "2"})
+        self.assertTrue(all(key[1].day == 1 for key in cursor.monthly))
+
+    async def test_nothing_to_archive_is_a_noop(self):
+        cursor = LogTableCursor(make_rows(5))
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=LogPool(cursor))):
+            self.assertEqual(await data_manager.archive_guild_logs(retention_days=30), 0)
+        self.assertEqual(len(cursor.rows), 5)
+        self.assertFalse(any(sql.startswith("DELETE FROM guild_log WHERE id") for sql in cursor.statements))
+
+    async def test_rows_without_time_or_guild_do_not_stall_the_archive(self):
+        old = make_rows(12, days_old=60)
+        old[0]["logged_at"] = None
+        old[1]["guild_id"] = None
+        cursor = LogTableCursor(old + [dict(row, id=row["id"] + 100) for row in make_rows(3)])
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=LogPool(cursor))), \
+                patch.object(data_manager, "_GUILD_LOG_ARCHIVE_BATCH", 4), \
+                self.assertLogs("data_manager", level="WARNING") as logs:
+            archived = await data_manager.archive_guild_logs(retention_days=30)
+        self.assertEqual(archived, 10)
+        self.assertIn("2건", logs.output[0])
+        self.assertEqual([row["id"] for row in cursor.rows], [101, 102, 103])
+        self.assertEqual(sum(entry["events"] for entry in cursor.monthly.values()), 10)
+
+    async def test_out_of_order_timestamps_are_still_archived(self):
+        rows = make_rows(6, days_old=60)
+        rows[0]["logged_at"] = NOW  # a recent row with the lowest id
+        cursor = LogTableCursor(rows)
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=LogPool(cursor))):
+            self.assertEqual(await data_manager.archive_guild_logs(retention_days=30), 5)
+        self.assertEqual([row["id"] for row in cursor.rows], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
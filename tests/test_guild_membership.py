@@ -0,0 +1,226 @@
+import asyncio
+import random
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import data_manager
+
+
+class GuildCursor:
+    def __init__(self, member_guilds=(data_manager.GLOBAL_GUILD_ID,), credited=(1,)):
+        self.member_guilds = list(member_guilds)
+        self.credited = list(credited)
+        self.statements = []
+        self.rowcount = 0
+        self._rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        self._rows = [(0,)]
+        self.rowcount = 1
+        if sql.startswith("SELECT guild_id FROM guild_members"):
+            self._rows = [(guild_id,) for guild_id in self.member_guilds]
+        elif sql.startswith("UPDATE guild_members m JOIN guilds g"):
+            self.rowcount = self.credited.pop(0) if self.credited else 1
+
+    async def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    async def fetchall(self):
+        return self._rows
+
+
+class GuildPool:
+    def __init__(self, cursor):
+        self.conn = AsyncMock()
+        self.conn.cursor = lambda *args: cursor
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+class GuildMembershipTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager._global_guild_members.clear()
+
+    async def run_with(self, cursor, coro_factory):
+        with patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=GuildPool(cursor))
+        ):
+            return await coro_factory()
+
+    async def test_membership_is_checked_once_per_process(self):
+        cursor = GuildCursor()
+        await self.run_with(cursor, lambda: data_manager.ensure_global_guild_membership(5))
+        await self.run_with(cursor, lambda: data_manager.ensure_global_guild_membership(5))
+        self.assertEqual(cursor.statements, ["SELECT guild_id FROM guild_members WHERE user_id=%s"])
+
+    async def test_new_user_takes_the_slow_path_once(self):
+        cursor = GuildCursor(member_guilds=())
+        await self.run_with(cursor, lambda: data_manager.ensure_global_guild_membership(6))
+        self.assertTrue(any(sql.startswith("INSERT INTO guild_members") for sql in cursor.statements))
+        self.assertIn("6", data_manager._global_guild_members)
+
+    async def test_transactional_credit_is_one_statement(self):
+        cursor = GuildCursor()
+        self.assertTrue(await data_manager._credit_guild_contribution(cursor, 7, 30))
+        self.assertEqual(len(cursor.statements), 1)
+        self.assertIn("g.exp=g.exp+%s", cursor.statements[0])
+
+
+class LedgerCursor(GuildCursor):
+    """Applies the flush statements to in-memory totals; can fail once."""
+
+    def __init__(self, fail_on_flush=None):
+        super().__init__()
+        self.members = {}
+        self.guild_exp = 0
+        self.logs = []
+        self.flushes = 0
+        self.fail_on_flush = fail_on_flush
+        self.poisoned = set()
+        self.gate = None
+        self.in_flight = asyncio.Event()
+
+    async def execute(self, sql, params=None):
+        await super().execute(sql, params)
+        if sql.startswith("INSERT INTO guild_members"):
+            self.flushes += 1
+            if self.flushes == self.fail_on_flush:
+                raise RuntimeError("deadlock")
+            if self.poisoned & set(params[1::3]):
+                raise RuntimeError("foreign key constraint fails")
+            if self.gate is not None:
+                self.in_flight.set()
+                await self.gate.wait()
+            self.pending = list(zip(params[1::3], params[2::3]))
+        elif sql.startswith("UPDATE guilds SET exp=exp+%s"):
+            self.pending_exp = params[0]
+
+    async def executemany(self, sql, rows):
+        self.pending_logs = list(rows)
+
+
+class CommittingPool(GuildPool):
+    def __init__(self, cursor):
+        super().__init__(cursor)
+
+        async def commit():
+            for user_key, amount in cursor.pending:
+                cursor.members[user_key] = cursor.members.get(user_key, 0) + amount
+            cursor.guild_exp += cursor.pending_exp
+            cursor.logs.extend(getattr(cursor, "pending_logs", []))
+            cursor.pending, cursor.pending_exp, cursor.pending_logs = [], 0, []
+
+        self.conn.commit = commit
+
+
+class GuildContributionBufferTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager._take_guild_contributions()
+        data_manager._global_guild_members.update(str(user) for user in range(20))
+
+    async def produce(self, cursor, producers=20, events=30):
+        expected = {}
+        rng = random.Random(4)
+        plan = [
+            [(user, rng.randint(1, 50)) for user in rng.choices(range(20), k=events)]
+            for _ in range(producers)
+        ]
+        for credits in plan:
+            for user, amount in credits:
+                expected[str(user)] = expected.get(str(user), 0) + amount
+
+        async def producer(credits):
+            for user, amount in credits:
+                await data_manager.add_guild_contribution(user, amount, "raid_success")
+                await asyncio.sleep(0)
+
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=CommittingPool(cursor))), \
+                patch.object(data_manager, "GUILD_CONTRIBUTION_FLUSH_MS", 2), \
+                patch.object(data_manager, "_GUILD_CONTRIBUTION_BATCH", 25):
+            await asyncio.gather(*(producer(credits) for credits in plan))
+            await asyncio.sleep(0.01)
+            await data_manager.flush_guild_contributions()
+        return expected, producers * events
+
+    async def test_totals_are_exact_under_concurrent_producers(self):
+        cursor = LedgerCursor()
+        expected, events = await self.produce(cursor)
+        self.assertEqual(cursor.members, expected)
+        self.assertEqual(cursor.guild_exp, sum(expected.values()))
+        self.assertEqual(len(cursor.logs), events)
+        self.assertLess(cursor.flushes, events // 10)
+
+    async def test_failed_flush_is_retried_without_loss(self):
+        cursor = LedgerCursor(fail_on_flush=2)
+        with self.assertLogs("data_manager", level="ERROR"):
+            expected, events = await self.produce(cursor)
+        self.assertEqual(cursor.members, expected)
+        self.assertEqual(len(cursor.logs), events)
+        self.assertEqual(data_manager.get_guild_contribution_stats()["pending_events"], 0)
+
+    async def test_shutdown_waits_for_an_in_flight_flush(self):
+        cursor = LedgerCursor()
+        cursor.gate = asyncio.Event()
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=CommittingPool(cursor))), \
+                patch.object(data_manager, "GUILD_CONTRIBUTION_FLUSH_MS", 2):
+            await data_manager.add_guild_contribution(1, 10, "raid_success")
+            await cursor.in_flight.wait()
+            # The worker holds the first batch; more credits arrive meanwhile.
+            await data_manager.add_guild_contribution(2, 5, "raid_success")
+            shutdown = asyncio.create_task(data_manager.flush_guild_contributions())
+            await asyncio.sleep(0.01)
+            self.assertFalse(shutdown.done())
+            cursor.gate.set()
+            await shutdown
+        self.assertEqual(cursor.members, {"1": 10, "2": 5})
+        self.assertEqual(len(cursor.logs), 2)
+        self.assertEqual(data_manager.get_guild_contribution_stats()["pending_events"], 0)
+        self.assertTrue(data_manager._guild_contribution_writer[1].done())
+
+    async def test_poisoned_user_is_isolated_and_dead_lettered(self):
+        cursor = LedgerCursor()
+        cursor.poisoned = {"13"}
+        data_manager._guild_contribution_attempts.clear()
+        dead_before = data_manager.get_guild_contribution_stats()["dead_lettered"]
+        with patch.object(data_manager, "_GUILD_CONTRIBUTION_MAX_BACKOFF", 0.001), \
+                self.assertLogs("data_manager", level="ERROR") as logs:
+            expected, _ = await self.produce(cursor)
+        poisoned_amount = expected.pop("13")
+        self.assertEqual(cursor.members, expected)
+        self.assertEqual(data_manager.get_guild_contribution_stats()["pending_events"], 0)
+        self.assertGreater(data_manager.get_guild_contribution_stats()["dead_lettered"], dead_before)
+        dead = [line for line in logs.output if "dead-lettered" in line]
+        self.assertTrue(dead)
+        self.assertTrue(all("user_key=13" in line for line in dead))
+        self.assertEqual(
+            sum(int(line.split("amount=")[1].split()[0]) for line in dead), poisoned_amount
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import data_manager
+import guild
+
+
+class ShopCursor:
+    """Keeps guild_shop_stock rows in memory and records every statement."""
+
+    def __init__(self):
+        self.stock = {}  # (day_key, slot_index) -> row
+        self.statements = []
+        self.rowcount = 0
+        self._rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        self._rows = []
+        self.rowcount = 0
+        if sql.startswith("SELECT guild_id FROM guilds"):
+            self._rows = [{"guild_id": params[0]}]
+        elif sql.startswith("SELECT * FROM guild_shop_stock"):
+            day_key = params[1]
+            self._rows = [
+                dict(row) for (day, _), row in sorted(self.stock.items()) if day == day_key
+            ]
+        elif sql.startswith("INSERT INTO guild_shop_stock"):
+            _, day_key, slot_index, item_name, category, stock, initial, cost_json, desc = params
+            self.stock[(day_key, slot_index)] = {
+                "slot_index": slot_index,
+                "item_name": item_name,
+                "category": category,
+                "stock": stock,
+                "initial_stock": initial,
+                "cost_json": cost_json,
+            }
+        elif sql.startswith("DELETE FROM guild_shop_stock WHERE guild_id=%s AND day_key<>%s"):
+            stale = [key for key in self.stock if key[0] != params[1]]
+            for key in stale:
+                del self.stock[key]
+            self.rowcount = len(stale)
+
+    async def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    async def fetchall(self):
+        return self._rows
+
+
+class ShopPool:
+    def __init__(self, cursor):
+        self.conn = AsyncMock()
+        self.conn.cursor = lambda *args: cursor
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+class DailyGuildShopTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager._guild_shop_materialized.clear()
+        guild._shop_rotation_cache.clear()
+        self.cursor = ShopCursor()
+        patcher = patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=ShopPool(self.cursor))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def open_shop(self, level, day_key):
+        return await data_manager.get_or_create_daily_guild_shop(
+            data_manager.GLOBAL_GUILD_ID, day_key, guild._daily_shop_rotation(level, day_key)
+        )
+
+    async def test_materialized_rotation_is_read_without_locks(self):
+        first = await self.open_shop(3, "2026-10-18")
+        self.assertTrue(any("FOR UPDATE" in sql for sql in self.cursor.statements))
+
+        self.cursor.statements.clear()
+        second = await self.open_shop(3, "2026-10-18")
+        self.assertEqual(len(self.cursor.statements), 1)
+        self.assertNotIn("FOR UPDATE", self.cursor.statements[0])
+        self.assertEqual(
+            [row["item_name"] for row in second], [row["item_name"] for row in first]
+        )
+        self.assertIsInstance(second[0]["cost"], dict)
+
+    async def test_rank_up_rematerializes_the_day(self):
+        await self.open_shop(1, "2026-10-18")
+        self.cursor.statements.clear()
+        rows = await self.open_shop(10, "2026-10-18")
+        self.assertTrue(any("FOR UPDATE" in sql for sql in self.cursor.statements))
+        expected = guild._build_daily_shop_rotation(10, "2026-10-18")
+        self.assertEqual([row["item_name"] for row in rows], [row["item_name"] for row in expected])
+
+    async def test_purge_drops_other_days_and_their_markers(self):
+        await self.open_shop(3, "2026-10-17")
+        await self.open_shop(3, "2026-10-18")
+        deleted = await data_manager.purge_stale_guild_shop_stock("2026-10-18")
+        self.assertGreater(deleted, 0)
+        self.assertEqual({day for day, _ in self.cursor.stock}, {"2026-10-18"})
+        self.assertEqual({day for day, _ in data_manager._guild_shop_materialized}, {"2026-10-18"})
+
+    def test_rotation_cache_returns_independent_copies(self):
+        rows = guild._daily_shop_rotation(5, "2026-10-18")
+        rows[0]["cost"]["wood"] = -1
+        again = guild._daily_shop_rotation(5, "2026-10-18")
+        self.assertEqual(again, guild._build_daily_shop_rotation(5, "2026-10-18"))
+        guild._daily_shop_rotation(5, "2026-10-19")
+        self.assertEqual({day for _, day in guild._shop_rotation_cache}, {"2026-10-19"})
+
+
+if __name__ == "__main__":
+    unittest.main()
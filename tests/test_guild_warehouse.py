@@ -0,0 +1,200 @@
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import data_manager
+
+
+GUILD_ID = data_manager.GLOBAL_GUILD_ID
+
+
+class WarehouseCursor:
+    def __init__(self, inventory, artifacts=()):
+        self.inventory = inventory  # item_name -> (count, category)
+        self.artifacts = list(artifacts)
+        self.statements = []
+        self._rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        self._rows = []
+        if sql.startswith("SELECT * FROM guild_inventory"):
+            self._rows = [
+                {"guild_id": GUILD_ID, "item_name": name, "count": count, "category": category}
+                for name, (count, category) in self.inventory.items()
+            ]
+        elif sql.startswith("SELECT id, guild_id, artifact_id"):
+            self._rows = [
+                {"id": art["id"], "name": art["name"], "level": 0,
+                 "rank_level": 3, "prefix": json.loads(art["data"]).get("prefix")}
+                for art in self.artifacts
+            ]
+        elif sql.startswith("SELECT data FROM guild_stored_artifacts"):
+            self._rows = [(art["data"],) for art in self.artifacts if art["id"] == params[1]]
+        elif sql.startswith("SELECT item_name FROM guild_inventory"):
+            self._rows = [
+                (name,) for name in params[1:] if self.inventory.get(name, (0, None))[0] >= 1
+            ]
+        elif sql.startswith("UPDATE guild_inventory SET count=count-CASE"):
+            size = (len(params) - 1) // 5
+            needed = dict(zip(params[0:2 * size:2], params[1:2 * size:2]))
+            self.rowcount = 0
+            for name, need in needed.items():
+                count, category = self.inventory.get(name, (0, None))
+                if name in self.inventory and count >= need:
+                    self.inventory[name] = (count - need, category)
+                    self.rowcount += 1
+        elif sql.startswith("DELETE FROM guild_inventory"):
+            for name in params[1:]:
+                if name in self.inventory and self.inventory[name][0] <= 0:
+                    del self.inventory[name]
+        elif sql.startswith("INSERT INTO guild_inventory"):
+            for index in range(0, len(params), 4):
+                _, name, count, category = params[index:index + 4]
+                old = self.inventory.get(name, (0, category))
+                self.inventory[name] = (old[0] + count, old[1])
+
+    async def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    async def fetchall(self):
+        return self._rows
+
+
+class WarehousePool:
+    def __init__(self, cursor):
+        self.conn = AsyncMock()
+        self.conn.cursor = lambda *args: cursor
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+class GuildWarehouseCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager._guild_warehouse_cache.clear()
+        data_manager._guild_warehouse_versions.clear()
+
+    def use(self, cursor):
+        patcher = patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=WarehousePool(cursor))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_category_pages_share_one_read_until_a_write(self):
+        cursor = WarehouseCursor({
+            "목재": (10, "material"),
+            "철괴": (4, "material"),
+            "길드 응급상자": (2, "consumable"),
+        })
+        self.use(cursor)
+
+        materials = await data_manager.get_guild_items(GUILD_ID, "material")
+        consumables = await data_manager.get_guild_items(GUILD_ID, "consumable")
+        everything = await data_manager.get_guild_items(GUILD_ID)
+        self.assertEqual({row["item_name"] for row in materials}, {"목재", "철괴"})
+        self.assertEqual([row["item_name"] for row in consumables], ["길드 응급상자"])
+        self.assertEqual(len(everything), 3)
+        self.assertEqual(len(cursor.statements), 1)
+
+        materials[0]["count"] = -99
+        again = await data_manager.get_guild_items(GUILD_ID, "material")
+        self.assertNotIn(-99, [row["count"] for row in again])
+
+        cursor.inventory["목재"] = (3, "material")
+        data_manager._bump_guild_warehouse(GUILD_ID)
+        refreshed = await data_manager.get_guild_items(GUILD_ID, "material")
+        self.assertEqual(len(cursor.statements), 2)
+        self.assertIn({"item_name": "목재", "count": 3}, [
+            {"item_name": row["item_name"], "count": row["count"]} for row in refreshed
+        ])
+
+    async def test_consuming_raid_supplies_bumps_the_version(self):
+        cursor = WarehouseCursor({"길드 응급상자": (2, "consumable")})
+        self.use(cursor)
+        before = data_manager.get_guild_warehouse_version(GUILD_ID)
+        consumed = await data_manager.consume_guild_raid_supplies(GUILD_ID)
+        self.assertEqual(consumed, ["길드 응급상자"])
+        self.assertEqual(data_manager.get_guild_warehouse_version(GUILD_ID), before + 1)
+
+        cursor.inventory.clear()
+        await data_manager.consume_guild_raid_supplies(GUILD_ID)
+        self.assertEqual(data_manager.get_guild_warehouse_version(GUILD_ID), before + 1)
+
+    async def test_raid_start_is_three_statements_for_all_supplies(self):
+        cursor = WarehouseCursor({
+            "길드 응급상자": (1, "consumable"),
+            "길드 전투도구": (3, "consumable"),
+            "길드 보호부적": (2, "consumable"),
+        })
+        self.use(cursor)
+        consumed = await data_manager.consume_guild_raid_supplies(GUILD_ID)
+        self.assertEqual(consumed, list(data_manager.GUILD_RAID_SUPPLY_NAMES))
+        self.assertEqual(len(cursor.statements), 3)
+        self.assertEqual(cursor.inventory, {
+            "길드 전투도구": (2, "consumable"),
+            "길드 보호부적": (1, "consumable"),
+        })
+
+    async def test_bulk_take_is_all_or_nothing(self):
+        cursor = WarehouseCursor({"목재": (5, "material"), "철괴": (1, "material")})
+        self.assertFalse(await data_manager._take_guild_items(cursor, {"목재": 5, "철괴": 2}))
+        self.assertFalse(any(sql.startswith("DELETE") for sql in cursor.statements))
+
+        cursor = WarehouseCursor({"목재": (5, "material"), "철괴": (2, "material")})
+        self.assertTrue(await data_manager._take_guild_items(cursor, {"목재": 5, "철괴": 1}))
+        self.assertEqual(cursor.inventory, {"철괴": (1, "material")})
+        self.assertEqual(len(cursor.statements), 2)
+
+    async def test_bulk_put_is_one_upsert(self):
+        cursor = WarehouseCursor({"목재": (5, "material")})
+        await data_manager._put_guild_items(
+            cursor, [("목재", 2, "material"), ("길드 응급상자", 1, "consumable"), ("철괴", 0, "material")]
+        )
+        self.assertEqual(len(cursor.statements), 1)
+        self.assertEqual(cursor.inventory, {
+            "목재": (7, "material"),
+            "길드 응급상자": (1, "consumable"),
+        })
+
+    async def test_artifact_list_skips_data_until_detail_opens(self):
+        data = {"name": "⭐⭐⭐ 폭풍의 반지", "prefix": "폭풍의", "stats": {"atk": 7}}
+        cursor = WarehouseCursor({}, [{"id": 11, "name": data["name"], "data": json.dumps(data)}])
+        self.use(cursor)
+
+        listing = await data_manager.get_guild_items(GUILD_ID, "artifact")
+        self.assertEqual(listing[0]["prefix"], "폭풍의")
+        self.assertNotIn("data", listing[0])
+        self.assertNotIn(" data,", cursor.statements[0])
+
+        detail = await data_manager.get_guild_artifact_detail(GUILD_ID, 11)
+        self.assertEqual(detail["stats"], {"atk": 7})
+        self.assertIsNone(await data_manager.get_guild_artifact_detail(GUILD_ID, 12))
+
+
+if __name__ == "__main__":
+    unittest.main()
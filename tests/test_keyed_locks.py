@@ -0,0 +1,75 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from keyed_locks import KeyedLocks, get_lock_stats
+
+
+class KeyedLocksTests(unittest.IsolatedAsyncioTestCase):
+    async def test_same_key_is_serialized_and_reclaimed(self):
+        locks = KeyedLocks("test_serial")
+        order = []
+
+        async def worker(tag):
+            async with locks.hold(7):
+                order.append(f"{tag}+")
+                await asyncio.sleep(0.01)
+                order.append(f"{tag}-")
+
+        await asyncio.gather(worker("a"), worker("b"), worker("c"))
+
+        self.assertEqual(order, ["a+", "a-", "b+", "b-", "c+", "c-"])
+        self.assertEqual(len(locks), 0)
+        stats = get_lock_stats()["test_serial"]
+        self.assertEqual(stats["acquired"], 3)
+        self.assertEqual(stats["contended"], 2)
+        self.assertGreater(stats["wait_ms_max"], 5)
+        self.assertGreater(stats["hold_ms_max"], 5)
+
+    async def test_try_hold_gives_up_after_timeout(self):
+        locks = KeyedLocks("test_try")
+        async with locks.hold("u"):
+            async with locks.try_hold("u") as acquired:
+                self.assertFalse(acquired)
+            async with locks.try_hold("u", timeout=0.01) as acquired:
+                self.assertFalse(acquired)
+            async with locks.try_hold("other") as acquired:
+                self.assertTrue(acquired)
+        self.assertEqual(len(locks), 0)
+        self.assertEqual(locks.get_stats()["timeouts"], 2)
+
+    async def test_cancelled_waiter_releases_its_reference(self):
+        locks = KeyedLocks("test_cancel")
+        await locks.acquire(1)
+        waiter = asyncio.create_task(locks.acquire(1))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        locks.release(1)
+        self.assertEqual(len(locks), 0)
+
+    async def test_memory_stays_flat_across_100k_user_ids(self):
+        locks = KeyedLocks("test_stress")
+        peak_sizes = []
+        for start in range(0, 100_000, 1_000):
+            batch = range(start, start + 1_000)
+            for user_id in batch:
+                await locks.acquire(user_id)
+            peak_sizes.append(sys.getsizeof(locks._entries))
+            for user_id in batch:
+                locks.release(user_id)
+
+        self.assertEqual(len(locks), 0)
+        self.assertEqual(locks.get_stats()["peak_keys"], 1_000)
+        self.assertEqual(max(peak_sizes), peak_sizes[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -29,7 +29,7 @@ class DummyBoss:
     attack = 25
     defense = 25
 
-    def decide_action(self):
+    def decide_action(self, rng=None):
         return DummyCard()
 
 
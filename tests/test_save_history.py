@@ -0,0 +1,170 @@
+import json
+import random
+import sys
+import unittest
+from copy import deepcopy
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import data_manager
+import save_history
+
+
+def make_snapshot():
+    return {
+        "_data_revision": 1,
+        "pt": 100,
+        "money": 5_000,
+        "inventory": {"나무": 3, "a/b~c": 1},
+        "characters": [{"name": "영산", "hp": 270, "equipped_cards": ["기본공격"]}],
+        "artifacts": [{"id": f"a{i}", "gems": [{"id": f"g{i}", "level": i}]} for i in range(6)],
+        "myhome": {"garden": {"slots": [{"planted": True, "stage": 1}]}},
+        "life_data": {"gems": [{"id": "g", "level": 1}], "stones": {"마석": 2}, "flag": None},
+    }
+
+
+def mutate(snapshot, rng):
+    """One random save's worth of edits."""
+    choice = rng.randrange(7)
+    if choice == 0:
+        snapshot["pt"] += rng.randint(1, 50)
+    elif choice == 1:
+        snapshot["inventory"][f"item{rng.randint(0, 9)}"] = rng.randint(1, 5)
+    elif choice == 2 and snapshot["inventory"]:
+        snapshot["inventory"].pop(rng.choice(sorted(snapshot["inventory"])))
+    elif choice == 3:
+        snapshot["artifacts"].insert(0, {"id": f"n{rng.random()}", "gems": []})
+    elif choice == 4 and snapshot["artifacts"]:
+        snapshot["artifacts"].pop(rng.randrange(len(snapshot["artifacts"])))
+    elif choice == 5:
+        snapshot["life_data"]["gems"][0]["level"] += 1
+        snapshot["life_data"]["flag"] = rng.choice([None, True, 1, "x", [1, 2]])
+    else:
+        snapshot["characters"][0]["equipped_cards"].append("강타")
+
+
+class JsonPatchTests(unittest.TestCase):
+    def test_random_edit_sequences_round_trip(self):
+        rng = random.Random(5)
+        for _ in range(200):
+            old = make_snapshot()
+            for _ in range(rng.randint(0, 4)):
+                mutate(old, rng)
+            new = deepcopy(old)
+            for _ in range(rng.randint(1, 4)):
+                mutate(new, rng)
+            patch_ops = save_history.make_patch(old, new)
+            encoded = save_history.encode_payload(patch_ops)
+            rebuilt = save_history.apply_patch(deepcopy(old), save_history.decode_payload(encoded))
+            self.assertEqual(rebuilt, new)
+
+    def test_unchanged_snapshot_has_empty_patch(self):
+        self.assertEqual(save_history.make_patch(make_snapshot(), make_snapshot()), [])
+
+    def test_type_change_is_a_replace(self):
+        ops = save_history.make_patch({"a": 1}, {"a": True})
+        self.assertEqual(ops, [{"op": "replace", "path": "/a", "value": True}])
+
+    def test_delta_without_its_base_is_rejected(self):
+        rows = [
+            (1, save_history.KEYFRAME, None, save_history.encode_payload({"a": 1}), None),
+            (3, save_history.DELTA, 2, save_history.encode_payload([]), None),
+        ]
+        with self.assertRaises(ValueError):
+            save_history.rebuild_snapshot(rows)
+
+
+class HistoryCursor:
+    def __init__(self, table):
+        self.table = table
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def executemany(self, sql, rows):
+        self.table.extend(rows)
+
+
+class HistoryPool:
+    def __init__(self):
+        self.table = []
+        self.conn = AsyncMock()
+        self.conn.cursor = lambda *a: HistoryCursor(self.table)
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+class SaveHistoryWriterTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager._save_history_heads.clear()
+
+    async def queue_revisions(self, pool, count, rng):
+        snapshot = make_snapshot()
+        expected = {}
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=pool)):
+            for revision in range(1, count + 1):
+                mutate(snapshot, rng)
+                text = json.dumps(
+                    {k: v for k, v in snapshot.items() if k != "life_data"}, ensure_ascii=False
+                )
+                life = json.dumps(snapshot["life_data"], ensure_ascii=False)
+                data_manager._queue_save_history("7", revision, text, life)
+                expected[revision] = dict(deepcopy(snapshot), _data_revision=revision)
+            await data_manager.flush_save_history()
+        return expected
+
+    async def test_every_revision_rebuilds_from_keyframe_and_deltas(self):
+        pool = HistoryPool()
+        expected = await self.queue_revisions(pool, 25, random.Random(11))
+
+        kinds = [row[2] for row in pool.table]
+        self.assertEqual(len(pool.table), 25)
+        self.assertEqual(kinds.count(save_history.KEYFRAME), 3)
+        rows = [(r[1], r[2], r[3], r[4], None) for r in pool.table]
+        for revision, snapshot in expected.items():
+            start = max(i for i, row in enumerate(rows)
+                        if row[0] <= revision and row[1] == save_history.KEYFRAME)
+            chain = [row for row in rows[start:] if row[0] <= revision]
+            self.assertEqual(save_history.rebuild_snapshot(chain), snapshot)
+
+    async def test_deltas_are_smaller_than_keyframes(self):
+        pool = HistoryPool()
+        await self.queue_revisions(pool, 10, random.Random(3))
+        keyframe = pool.table[0][4]
+        self.assertTrue(all(len(row[4]) < len(keyframe) for row in pool.table[1:]))
+
+    async def test_failed_write_restarts_chain_with_keyframe(self):
+        pool = HistoryPool()
+        failing = AsyncMock(side_effect=RuntimeError("db down"))
+        rng = random.Random(1)
+        await self.queue_revisions(pool, 2, rng)
+        with patch.object(data_manager, "get_db_pool", failing):
+            data_manager._queue_save_history("7", 3, "{}", "{}")
+            await data_manager.flush_save_history()
+        self.assertNotIn("7", data_manager._save_history_heads)
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=pool)):
+            data_manager._queue_save_history("7", 4, "{}", "{}")
+            await data_manager.flush_save_history()
+        self.assertEqual(pool.table[-1][2], save_history.KEYFRAME)
+
+
+if __name__ == "__main__":
+    unittest.main()
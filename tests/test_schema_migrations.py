@@ -0,0 +1,103 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import schema_migrations
+
+
+class MissingTable(Exception):
+    pass
+
+
+class LedgerCursor:
+    """Answers only the ledger queries; records everything else it is given."""
+
+    def __init__(self, version):
+        self.version = version  # None = ledger table does not exist yet
+        self.statements = []
+        self._row = None
+
+    async def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        self._row = None
+        if sql.startswith("SELECT MAX(version)"):
+            if self.version is None:
+                raise MissingTable(1146, "Table 'schema_migrations' doesn't exist")
+            self._row = (self.version,)
+        elif sql.startswith("CREATE TABLE IF NOT EXISTS schema_migrations"):
+            self.version = 0
+        elif sql.startswith("INSERT INTO schema_migrations"):
+            self.version = params[0]
+        elif sql.startswith(("SELECT GET_LOCK", "SELECT RELEASE_LOCK")):
+            self._row = (1,)
+
+    async def fetchone(self):
+        return self._row
+
+
+def fake_steps(calls, fail_at=None):
+    def make(version):
+        async def step(cur):
+            if version == fail_at:
+                raise RuntimeError("boom")
+            calls.append(version)
+        return step
+
+    return [(version, f"step{version}", make(version)) for version in (1, 2, 3)]
+
+
+class MigrationLedgerTests(unittest.IsolatedAsyncioTestCase):
+    async def run_with(self, cur, steps):
+        conn = AsyncMock()
+        with patch.object(schema_migrations, "MIGRATIONS", steps), \
+                patch.object(schema_migrations, "LATEST_VERSION", steps[-1][0]):
+            return await schema_migrations.apply_migrations(conn, cur)
+
+    async def test_current_schema_costs_one_select(self):
+        calls = []
+        cur = LedgerCursor(version=3)
+        applied = await self.run_with(cur, fake_steps(calls))
+        self.assertEqual(applied, [])
+        self.assertEqual(calls, [])
+        self.assertEqual(cur.statements, ["SELECT MAX(version) FROM schema_migrations"])
+
+    async def test_fresh_database_creates_ledger_and_runs_all_steps(self):
+        calls = []
+        cur = LedgerCursor(version=None)
+        applied = await self.run_with(cur, fake_steps(calls))
+        self.assertEqual(applied, [1, 2, 3])
+        self.assertEqual(calls, [1, 2, 3])
+        self.assertEqual(cur.version, 3)
+        self.assertTrue(cur.statements[-1].startswith("SELECT RELEASE_LOCK"))
+
+    async def test_only_pending_steps_run(self):
+        calls = []
+        cur = LedgerCursor(version=1)
+        applied = await self.run_with(cur, fake_steps(calls))
+        self.assertEqual(applied, [2, 3])
+        self.assertEqual(calls, [2, 3])
+
+    async def test_failed_step_is_not_recorded_and_releases_lock(self):
+        calls = []
+        cur = LedgerCursor(version=0)
+        with self.assertRaises(RuntimeError):
+            await self.run_with(cur, fake_steps(calls, fail_at=2))
+        self.assertEqual(calls, [1])
+        self.assertEqual(cur.version, 1)
+        self.assertTrue(cur.statements[-1].startswith("SELECT RELEASE_LOCK"))
+
+    def test_versions_are_unique_and_ascending(self):
+        versions = [version for version, _, _ in schema_migrations.MIGRATIONS]
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertEqual(schema_migrations.LATEST_VERSION, versions[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import sys
+import unittest
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import simulator
+
+
+BUILD = {
+    "name": "시뮬레이션",
+    "hp": 300,
+    "max_mental": 150,
+    "attack": 12,
+    "defense": 8,
+    "equipped_cards": ["기본공격", "기본방어", "기본반격", "연속할퀴기"],
+}
+
+
+class SimulatorTests(unittest.TestCase):
+    def test_same_seed_gives_the_same_fights_for_any_worker_count(self):
+        inline = simulator.run_simulation(
+            BUILD, "monster:굴레늑대", fights=40, seed=5, chunk_size=7
+        )
+        pooled = simulator.run_simulation(
+            BUILD, "monster:굴레늑대", fights=40, seed=5, workers=2, chunk_size=13
+        )
+        self.assertEqual(inline, pooled)
+        other = simulator.run_simulation(BUILD, "monster:굴레늑대", fights=40, seed=6)
+        self.assertNotEqual(inline, other)
+
+    def test_summary_reports_win_rate_and_kill_turns(self):
+        results = simulator.run_simulation(
+            BUILD, "monster:굴레늑대", fights=30, policy="greedy", seed=1
+        )
+        summary = simulator.summarize(results)
+        wins = sum(1 for fight in results if fight["won"])
+        self.assertEqual(summary["fights"], 30)
+        self.assertAlmostEqual(summary["win_rate"], wins / 30)
+        self.assertEqual(sum(summary["turns_to_kill"].values()), wins)
+        self.assertLessEqual(summary["damage_dealt_pct"][50], summary["damage_dealt_pct"][99])
+
+    def test_scripted_policy_follows_the_script(self):
+        picked = [
+            simulator.pick_scripted(None, [], turn, None, ["기본공격", "기본반격"]).name
+            for turn in range(1, 5)
+        ]
+        self.assertEqual(picked, ["기본공격", "기본반격", "기본공격", "기본반격"])
+        with self.assertRaises(ValueError):
+            simulator.run_simulation(BUILD, "raid:Gold", fights=1, policy="scripted")
+
+    def test_enemy_specs(self):
+        self.assertEqual(simulator.build_enemy("raid:Gold").max_hp, 5000)
+        self.assertEqual(simulator.build_enemy("dungeon:기원의 쌍성:2").max_hp, 1800)
+        fixture = {"name": "허수아비", "hp": 40, "attack": 1, "defense": 1}
+        self.assertEqual(simulator.build_enemy(fixture).name, "허수아비")
+        for spec in ("monster:없는 몬스터", "dungeon:기원의 쌍성:9", "boss:Gold"):
+            with self.assertRaises(ValueError):
+                simulator.build_enemy(spec)
+
+    def test_turn_cap_counts_as_a_timeout(self):
+        tank = {"name": "샌드백", "hp": 100_000, "attack": 0, "defense": 0,
+                "card_deck": ["기본방어"]}
+        fight = simulator.simulate_fight(
+            dict(BUILD, equipped_cards=["기본방어"]), tank, "greedy", seed=1, max_turns=5
+        )
+        self.assertFalse(fight["won"])
+        self.assertTrue(fight["timeout"])
+        self.assertEqual(fight["turns"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
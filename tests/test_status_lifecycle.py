@@ -1,7 +1,10 @@
+import random
 import unittest
 
 import battle_engine
+from cards import get_card
 from gem_effects import apply_ripple_to_dice
+from monsters import Monster
 
 
 class DummyCombatant:
@@ -170,5 +173,48 @@ class EncounterRuntimeTests(unittest.TestCase):
         )
 
 
+class BattleRandomReplayTests(unittest.TestCase):
+    def play(self, seed, turns=8):
+        rng = battle_engine.BattleRandom(seed)
+        player = DummyCombatant("플레이어")
+        monster = Monster(
+            "재현 몬스터", hp=1_000, attack=3, defense=2,
+            pattern_type="aggressive",
+            card_deck=["기본공격", "연속할퀴기", "섬세한 방어", "기본반격"],
+        )
+        logs = []
+        for turn in range(1, turns + 1):
+            monster_card = monster.decide_action(rng=rng)
+            player_res = get_card("연속할퀴기").use_card(3, 2, 100, rng=rng)
+            monster_res = monster_card.use_card(
+                monster.attack, monster.defense, monster.current_mental, rng=rng
+            )
+            clash_log, _, _ = battle_engine.process_clash_loop(
+                player, monster, player_res, monster_res, [], [], turn, rng=rng
+            )
+            logs.append((monster_card.name, clash_log))
+        return logs, player.current_hp, monster.current_hp
+
+    def test_same_seed_replays_the_same_battle(self):
+        self.assertEqual(self.play(1234), self.play(1234))
+        self.assertNotEqual(self.play(1234)[0], self.play(4321)[0])
+
+    def test_battle_leaves_the_global_random_stream_alone(self):
+        random.seed(99)
+        expected = random.random()
+        random.seed(99)
+        self.play(7)
+        self.assertEqual(random.random(), expected)
+
+    def test_seed_is_exposed_for_replays(self):
+        self.assertEqual(battle_engine.BattleRandom(42).battle_seed, 42)
+        generated = battle_engine.BattleRandom()
+        replay = battle_engine.BattleRandom(generated.battle_seed)
+        self.assertEqual(
+            [generated.randint(1, 100) for _ in range(5)],
+            [replay.randint(1, 100) for _ in range(5)],
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,763 @@
+import asyncio
+import json
+import re
+import sys
+import unittest
+from copy import deepcopy
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import cafe_market_v91
+import data_manager
+
+
+def make_snapshot(revision=3):
+    return {
+        "_data_revision": revision,
+        "pt": 100,
+        "money": 5_000,
+        "inventory": {"나무": 3, "철광석": 2},
+        "characters": [
+            {"name": "영산", "hp": 270, "current_hp": 270, "equipped_cards": ["기본공격"]},
+        ],
+        "artifacts": [
+            {"id": "a1", "name": "낡은 반지", "rank": 1, "grade": 1, "stats": {"attack": 1}},
+        ],
+        "unlocked_regions": ["기원의 쌍성"],
+        "recruit_progress": {"Yeongsan": 2},
+        "myhome": {
+            "garden": {"level": 1, "slots": [{"planted": True, "plant_name": "당근", "stage": 1}]},
+            "fishing": {"dismantle_slots": []},
+            "workshop_slots": [],
+        },
+        "fertilizers": [],
+        "life_data": {"progression": {"collection": {}}},
+    }
+
+
+class FakeCursor:
+    def __init__(self, revision, *, dict_rows=False):
+        self.revision = revision
+        self.dict_rows = dict_rows
+        self.statements = []
+        self.rowcount = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.statements.append((" ".join(sql.split()), params))
+        self.rowcount = 0
+
+    async def executemany(self, sql, rows):
+        self.statements.append((" ".join(sql.split()), list(rows)))
+
+    async def fetchone(self):
+        if self.dict_rows:
+            return {"data_revision": self.revision}
+        return (self.revision,)
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.begin = AsyncMock()
+        self.commit = AsyncMock()
+        self.rollback = AsyncMock()
+
+    def cursor(self, *args):
+        return self._cursor
+
+
+class FakeAcquire:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakePool:
+    def __init__(self, cursor):
+        self.conn = FakeConnection(cursor)
+
+    def acquire(self):
+        return FakeAcquire(self.conn)
+
+
+class SaveChangeSetTests(unittest.TestCase):
+    def test_unchanged_snapshot_produces_empty_change_set(self):
+        rows = data_manager._build_save_rows("1", make_snapshot())
+        changes = data_manager._diff_save_rows(rows, deepcopy(rows))
+        self.assertEqual(changes["users"], {})
+        self.assertIsNone(changes["life_data"])
+        self.assertEqual(changes["upserts"], {})
+        self.assertEqual(changes["deletes"], {})
+        self.assertEqual(changes["replace"], {})
+
+    def test_scalar_change_only_touches_that_column(self):
+        snapshot = make_snapshot()
+        base = data_manager._build_save_rows("1", snapshot)
+        snapshot["pt"] += 10
+        changes = data_manager._diff_save_rows(
+            base, data_manager._build_save_rows("1", snapshot)
+        )
+        self.assertEqual(changes["users"], {"pt": 110})
+        self.assertEqual(changes["upserts"], {})
+        self.assertEqual(changes["replace"], {})
+
+    def test_inventory_changes_upsert_and_delete_single_rows(self):
+        snapshot = make_snapshot()
+        base = data_manager._build_save_rows("1", snapshot)
+        snapshot["inventory"]["나무"] = 7
+        snapshot["inventory"]["철광석"] = 0
+        snapshot["inventory"]["마력석"] = 1
+        changes = data_manager._diff_save_rows(
+            base, data_manager._build_save_rows("1", snapshot)
+        )
+        self.assertEqual(
+            sorted(changes["upserts"]["inventory"]),
+            [("1", "나무", 7), ("1", "마력석", 1)],
+        )
+        self.assertEqual(changes["deletes"]["inventory"], ["철광석"])
+
+    def test_changed_artifact_is_deleted_and_reinserted(self):
+        snapshot = make_snapshot()
+        base = data_manager._build_save_rows("1", snapshot)
+        snapshot["artifacts"][0]["level"] = 3
+        changes = data_manager._diff_save_rows(
+            base, data_manager._build_save_rows("1", snapshot)
+        )
+        self.assertEqual(changes["deletes"]["artifacts"], ["a1"])
+        self.assertEqual(changes["upserts"]["artifacts"][0][5], 3)
+
+    def test_slot_tables_are_replaced_only_when_changed(self):
+        snapshot = make_snapshot()
+        base = data_manager._build_save_rows("1", snapshot)
+        snapshot["myhome"]["garden"]["slots"][0]["stage"] = 2
+        changes = data_manager._diff_save_rows(
+            base, data_manager._build_save_rows("1", snapshot)
+        )
+        self.assertEqual(list(changes["replace"]), ["garden_slots"])
+
+
+class IncrementalSaveTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager._save_baselines.clear()
+        patcher = patch.object(data_manager, "_queue_save_history")
+        self.queued_history = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def save_with_cursor(self, cursor, snapshot):
+        with patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=FakePool(cursor))
+        ):
+            await data_manager._save_user_data_unlocked("1", snapshot)
+
+    async def test_pt_only_save_writes_one_users_update(self):
+        snapshot = make_snapshot(revision=3)
+        data_manager._sync_obtained_wiki(snapshot)
+        data_manager._remember_save_baseline(
+            "1", 3, data_manager._build_save_rows("1", snapshot)
+        )
+        snapshot["pt"] = 250
+        cursor = FakeCursor(revision=3)
+
+        await self.save_with_cursor(cursor, snapshot)
+
+        writes = [sql for sql, _ in cursor.statements if not sql.startswith("SELECT")]
+        self.assertEqual(
+            writes, ["UPDATE users SET pt=%s, data_revision=%s WHERE user_id=%s"]
+        )
+        self.queued_history.assert_called_once()
+        self.assertEqual(self.queued_history.call_args.args[:2], ("1", 4))
+        self.assertEqual(data_manager.get_save_metrics()["last_rows_written"], 1)
+        self.assertEqual(snapshot["_data_revision"], 4)
+        self.assertEqual(data_manager._save_baselines["1"][0], 4)
+
+    async def test_missing_baseline_falls_back_to_full_rewrite(self):
+        snapshot = make_snapshot(revision=3)
+        cursor = FakeCursor(revision=3)
+
+        await self.save_with_cursor(cursor, snapshot)
+
+        deleted = {
+            sql.split()[2] for sql, _ in cursor.statements
+            if sql.startswith("DELETE FROM")
+        }
+        self.assertIn("inventory", deleted)
+        self.assertIn("characters", deleted)
+        self.assertEqual(snapshot["_data_revision"], 4)
+
+    async def test_stale_revision_is_still_rejected(self):
+        snapshot = make_snapshot(revision=2)
+        data_manager._remember_save_baseline(
+            "1", 2, data_manager._build_save_rows("1", snapshot)
+        )
+        cursor = FakeCursor(revision=3)
+
+        with self.assertRaises(data_manager.StaleUserDataError):
+            await self.save_with_cursor(cursor, snapshot)
+        self.assertEqual(snapshot["_data_revision"], 2)
+
+
+class SubjugationLeaderboardTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager._save_baselines.clear()
+        data_manager._display_names.clear()
+        patcher = patch.object(data_manager, "_queue_save_history")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def save_incremental(self, mutate):
+        snapshot = make_snapshot(revision=3)
+        data_manager._sync_obtained_wiki(snapshot)
+        data_manager._remember_save_baseline(
+            "1", 3, data_manager._build_save_rows("1", snapshot)
+        )
+        mutate(snapshot)
+        cursor = FakeCursor(revision=3)
+        with patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=FakePool(cursor))
+        ):
+            await data_manager._save_user_data_unlocked("1", snapshot)
+        return [
+            (sql, rows) for sql, rows in cursor.statements
+            if "subjugation_leaderboard" in sql
+        ]
+
+    async def test_new_best_depth_updates_region_and_global_boards(self):
+        def dive(snapshot):
+            snapshot["myhome"].update(
+                max_subjugation_depth=12,
+                max_subjugation_char="영산",
+                max_subjugation_region="기원의 쌍성",
+            )
+
+        writes = await self.save_incremental(dive)
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(
+            [row[0] for row in writes[0][1]],
+            [data_manager.SUBJUGATION_ALL_REGIONS, "기원의 쌍성"],
+        )
+        self.assertIn("GREATEST(subjugation_leaderboard.depth, new.depth)", writes[0][0])
+
+    async def test_other_saves_leave_the_board_alone(self):
+        writes = await self.save_incremental(lambda snapshot: snapshot.update(pt=1))
+        self.assertEqual(writes, [])
+
+    async def test_ranking_reads_one_board_with_names(self):
+        cursor = FakeCursor(revision=0)
+        with patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=FakePool(cursor))
+        ):
+            cursor.fetchall = AsyncMock(return_value=[])
+            await data_manager.get_subjugation_ranking(10, "기원의 쌍성")
+            await data_manager.get_subjugation_ranking(10)
+        (first_sql, first_params), (_, second_params) = cursor.statements
+        self.assertIn("LEFT JOIN user_display_names", first_sql)
+        self.assertIn("ORDER BY l.depth DESC, l.achieved_at LIMIT %s", first_sql)
+        self.assertEqual(first_params, ("기원의 쌍성", 10))
+        self.assertEqual(second_params, (data_manager.SUBJUGATION_ALL_REGIONS, 10))
+
+    async def test_display_name_is_written_only_when_it_changes(self):
+        cursor = FakeCursor(revision=0)
+        with patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=FakePool(cursor))
+        ):
+            self.assertTrue(await data_manager.remember_display_name(7, "영산"))
+            self.assertFalse(await data_manager.remember_display_name(7, "영산"))
+            self.assertTrue(await data_manager.remember_display_name(7, "영산2"))
+        self.assertEqual([params for _, params in cursor.statements], [("7", "영산"), ("7", "영산2")])
+
+
+    async def test_display_name_cache_evicts_the_least_recent_user(self):
+        cursor = FakeCursor(revision=0)
+        with patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=FakePool(cursor))
+        ), patch.object(data_manager, "_DISPLAY_NAME_CACHE_LIMIT", 2):
+            await data_manager.remember_display_name(1, "영산")
+            await data_manager.remember_display_name(2, "어즈렉")
+            await data_manager.remember_display_name(1, "영산")
+            await data_manager.remember_display_name(3, "카이안")
+            self.assertEqual(list(data_manager._display_names), ["1", "3"])
+            self.assertTrue(await data_manager.remember_display_name(2, "어즈렉"))
+        self.assertEqual(len(cursor.statements), 4)
+
+class UserSnapshotCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager.invalidate_user_snapshot("1")
+        data_manager._save_baselines.clear()
+
+    async def load(self, cursor, loader):
+        with patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=FakePool(cursor))
+        ), patch.object(data_manager, "_load_user_data", loader):
+            return await data_manager.get_user_data("1")
+
+    def loader_for(self, snapshot):
+        rows = data_manager._build_save_rows("1", snapshot)
+        return AsyncMock(side_effect=lambda *a: (deepcopy(snapshot), rows))
+
+    async def test_matching_revision_is_served_from_cache(self):
+        loader = self.loader_for(make_snapshot(revision=5))
+        cursor = FakeCursor(revision=5, dict_rows=True)
+        before = data_manager.get_user_cache_stats()
+
+        first = await self.load(cursor, loader)
+        first["pt"] = 999_999
+        second = await self.load(cursor, loader)
+
+        self.assertEqual(loader.await_count, 1)
+        self.assertEqual(second["pt"], 100)
+        stats = data_manager.get_user_cache_stats()
+        self.assertEqual(stats["hits"] - before["hits"], 1)
+        self.assertEqual(stats["misses"] - before["misses"], 1)
+
+    async def test_revision_bump_forces_reload(self):
+        loader = self.loader_for(make_snapshot(revision=5))
+        await self.load(FakeCursor(revision=5, dict_rows=True), loader)
+        await self.load(FakeCursor(revision=6, dict_rows=True), loader)
+        self.assertEqual(loader.await_count, 2)
+
+    async def test_explicit_invalidation_drops_entry(self):
+        loader = self.loader_for(make_snapshot(revision=5))
+        await self.load(FakeCursor(revision=5, dict_rows=True), loader)
+        data_manager.invalidate_user_snapshot(1)
+        await self.load(FakeCursor(revision=5, dict_rows=True), loader)
+        self.assertEqual(loader.await_count, 2)
+
+    async def test_cache_evicts_least_recently_used_entry(self):
+        snapshot = make_snapshot()
+        rows = data_manager._build_save_rows("x", snapshot)
+        before = data_manager.get_user_cache_stats()["evictions"]
+        with patch.object(data_manager, "_USER_SNAPSHOT_CACHE_LIMIT", 2):
+            for user_key in ("a", "b", "c"):
+                data_manager._cache_user_snapshot(user_key, 1, snapshot, rows)
+        self.assertNotIn("a", data_manager._user_snapshot_cache)
+        self.assertEqual(
+            data_manager.get_user_cache_stats()["evictions"] - before, 1
+        )
+        data_manager.invalidate_user_snapshot("b", "c")
+
+
+class ListingCursor(FakeCursor):
+    """Answers buy_sale: the seller lookup, the listing and both balances."""
+
+    def __init__(self):
+        super().__init__(0)
+        self.result = []
+
+    async def execute(self, sql, params=None):
+        await super().execute(sql, params)
+        if sql.startswith("SELECT seller_id"):
+            self.result = [("2",)]
+        elif "FROM global_trades" in sql:
+            self.result = [{
+                "id": 7, "seller_id": "2", "item_name": "나무", "quantity": 1,
+                "price": 100, "currency": "money", "asset_type": "item",
+            }]
+        elif "FROM users" in sql:
+            self.result = [{"user_id": "1", "balance": 5_000}, {"user_id": "2", "balance": 0}]
+
+    async def fetchone(self):
+        return self.result[0] if self.result else None
+
+    async def fetchall(self):
+        return self.result
+
+
+class WriteBehindSaveTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager._pending_saves.clear()
+        data_manager._failed_write_behind.clear()
+        self.writes = AsyncMock()
+        for patcher in (
+            patch.object(data_manager, "SAVE_WRITE_BEHIND_MS", 20),
+            patch.object(data_manager, "_save_user_data_unlocked", self.writes),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_burst_is_committed_once_at_the_callers_revision(self):
+        snapshot = make_snapshot(revision=3)
+        before = data_manager.get_save_metrics()["coalesced_saves"]
+        for pt in (110, 120, 130):
+            snapshot["pt"] = pt
+            await data_manager.save_user_data("1", snapshot)
+        self.assertEqual(snapshot["_data_revision"], 6)
+        self.writes.assert_not_awaited()
+
+        await data_manager.flush_user_saves("1")
+
+        self.writes.assert_awaited_once()
+        written = self.writes.await_args
+        self.assertEqual(written.args[1]["pt"], 130)
+        self.assertEqual(written.kwargs, {"expected_revision": 3, "target_revision": 6})
+        self.assertEqual(data_manager.get_save_metrics()["coalesced_saves"] - before, 2)
+        self.assertNotIn("1", data_manager._pending_saves)
+
+    async def test_window_expiry_flushes_without_a_caller(self):
+        await data_manager.save_user_data("1", make_snapshot(revision=3))
+        await asyncio.sleep(0.05)
+        self.writes.assert_awaited_once()
+
+    async def test_out_of_order_save_is_rejected_immediately(self):
+        await data_manager.save_user_data("1", make_snapshot(revision=3))
+        with self.assertRaises(data_manager.StaleUserDataError):
+            await data_manager.save_user_data("1", make_snapshot(revision=3))
+        await data_manager.flush_all_saves()
+
+    async def test_reads_are_served_from_the_pending_snapshot(self):
+        snapshot = make_snapshot(revision=3)
+        snapshot["money"] = 42
+        await data_manager.save_user_data("1", snapshot)
+        with patch.object(data_manager, "get_db_pool", AsyncMock()) as pool:
+            latest = await data_manager.get_user_data("1")
+        pool.assert_not_awaited()
+        self.assertEqual((latest["money"], latest["_data_revision"]), (42, 4))
+        latest["money"] = 0
+        self.assertEqual(data_manager._pending_saves["1"]["data"]["money"], 42)
+        await data_manager.flush_all_saves()
+
+    async def test_failed_flush_is_reported_on_the_next_save(self):
+        snapshot = make_snapshot(revision=3)
+        self.writes.side_effect = data_manager.StaleUserDataError("1", 3, 5)
+        await data_manager.save_user_data("1", snapshot)
+        await data_manager.flush_user_saves("1")
+        with self.assertRaises(data_manager.StaleUserDataError):
+            await data_manager.save_user_data("1", snapshot)
+
+    async def test_economy_write_holds_the_lock_until_its_revision_bump(self):
+        await data_manager.save_user_data("1", make_snapshot(revision=3))
+        order = []
+        self.writes.side_effect = lambda user_key, data, **kwargs: order.append(
+            ("save", data["_data_revision"])
+        )
+        async with data_manager.flushed_user_lock("1"):
+            self.assertEqual(order, [("save", 4)])
+            # A click during the economy transaction must not be queued.
+            late = asyncio.create_task(data_manager.save_user_data("1", make_snapshot(revision=4)))
+            await asyncio.sleep(0.03)
+            self.assertFalse(late.done())
+            self.assertNotIn("1", data_manager._pending_saves)
+            order.append(("economy", 5))
+        await late
+        self.assertEqual(order, [("save", 4), ("economy", 5), ("save", 4)])
+        self.assertNotIn("1", data_manager._pending_saves)
+
+    async def test_trade_holds_both_locks_until_its_revision_bump(self):
+        await data_manager.save_user_data("1", make_snapshot(revision=3))
+        await data_manager.save_user_data("2", make_snapshot(revision=3))
+        order = []
+        self.writes.side_effect = lambda user_key, data, **kwargs: order.append(("save", user_key))
+        pool = FakePool(ListingCursor())
+        late = []
+
+        async def commit():
+            # The seller is only known from the listing row, yet is locked too.
+            late.append(asyncio.create_task(data_manager.save_user_data("2", make_snapshot(revision=4))))
+            await asyncio.sleep(0.03)
+            self.assertFalse(late[0].done())
+            self.assertNotIn("2", data_manager._pending_saves)
+            order.append(("economy", "2"))
+
+        pool.conn.commit.side_effect = commit
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=pool)), \
+                patch.object(cafe_market_v91, "get_db_pool", AsyncMock(return_value=pool)):
+            ok, message = await cafe_market_v91.buy_sale(type("User", (), {"id": 1})(), 7)
+        self.assertTrue(ok, message)
+        await late[0]
+        self.assertEqual(
+            order,
+            [("save", "1"), ("save", "2"), ("economy", "2"), ("save", "2")],
+        )
+
+    async def test_stale_save_after_an_economy_write_reaches_the_caller(self):
+        self.writes.side_effect = data_manager.StaleUserDataError("1", 4, 5)
+        async with data_manager.flushed_user_lock("1"):
+            late = asyncio.create_task(data_manager.save_user_data("1", make_snapshot(revision=4)))
+            await asyncio.sleep(0)
+        with self.assertRaises(data_manager.StaleUserDataError):
+            await late
+        self.assertEqual(data_manager._failed_write_behind, {})
+
+
+def loader_corpus():
+    full_user = {
+        "user_id": "10", "pt": 40, "money": 1200, "last_checkin": None,
+        "investigator_index": 1, "main_quest_id": 2, "main_quest_current": 3,
+        "main_quest_index": 0, "main_quest_progress": '{"a": 1}',
+        "cards": '["기본공격", "강타"]', "buffs": None, "garden_level": 2,
+        "water_can": 5, "workshop_level": 1, "fishing_level": 3, "fishing_rod": 1,
+        "fishing_spot_level": 2, "fishing_max_slots": 4, "total_investigations": 30,
+        "total_subjugations": 12, "total_turns": 45, "max_subjugation_depth": 7,
+        "max_subjugation_char": "영산", "max_subjugation_region": "기원의 쌍성",
+        "construction_step": 2, "daily_quests": "[]", "last_quest_date": None,
+        "current_dungeon": None, "guild_rank": "member", "guild_data": '{"x": 1}',
+        "characters": '[{"name": "영산", "level": 20}, {"name": "어즈렉", "level": 5}]',
+        "data_revision": 9,
+    }
+    full_tables = {
+        "inventory": [
+            {"item_name": "나무", "quantity": 3},
+            {"item_name": "철광석", "quantity": 8},
+        ],
+        "characters": [
+            {"id": 4, "name": "영산", "hp": 270, "current_hp": 200, "max_mental": 160,
+             "current_mental": 160, "attack": 25, "defense": 40, "defense_rate": 5,
+             "card_slots": 4, "equipped_cards": '["기본공격"]',
+             "equipped_engraved_artifact": '{"id": "e1", "gems": []}'},
+            {"id": 9, "name": "어즈렉", "hp": 280, "current_hp": 280, "max_mental": 200,
+             "current_mental": 150, "attack": 20, "defense": 50, "defense_rate": 0,
+             "card_slots": 3, "equipped_cards": None, "equipped_engraved_artifact": None},
+        ],
+        "artifacts": [
+            {"id": "a1", "name": "반지", "rank_level": 2, "grade": 1, "level": 4,
+             "prefix": "빛나는", "stats": '{"attack": 3}', "special": None,
+             "description": "설명", "equipped_char_index": 1,
+             "gems": '[{"id": "g1", "name": "루비"}]', "metadata": None},
+            {"id": "b7", "name": "목걸이", "rank_level": 1, "grade": 1, "level": 0,
+             "prefix": "", "stats": None, "special": "출혈", "description": None,
+             "equipped_char_index": -1, "gems": None, "metadata": '{"source": "shop"}'},
+        ],
+        "unlocked_regions": [{"region_name": "기원의 쌍성"}, {"region_name": "얼어붙은 호수"}],
+        "recruit_progress": [{"char_key": "Kaian", "progress": 2}],
+        "garden_slots": [
+            {"id": 3, "slot_index": 0, "planted": 1, "plant_name": "당근", "stage": 2,
+             "last_invest_count": 10, "fertilizer": None},
+            {"id": 2, "slot_index": 1, "planted": 0, "plant_name": None, "stage": 0,
+             "last_invest_count": 0, "fertilizer": "퇴비"},
+        ],
+        "workshop_slots": [
+            {"id": 1, "slot_index": 0, "craft_item": "목재 상자", "start_count": 3,
+             "required_count": 5},
+        ],
+        "fishing_slots": [{"id": 5, "fish_name": "붕어", "start_count": 2}],
+        "user_fertilizers": [{"id": 1, "target": "당근"}, {"id": 2, "target": "감자"}],
+        "user_life_data": {"data": '{"gems": [{"id": "g2"}], "stones": {"마석": 2}}'},
+    }
+    json_only_user = dict(full_user, user_id="11", characters='[{"name": "센쇼", "hp": 180}]')
+    json_only_tables = {name: [] for name in data_manager._USER_LOAD_TABLES}
+    json_only_tables["user_life_data"] = None
+    empty_user = dict(full_user, user_id="12", characters=None, cards=None, guild_data=None)
+    empty_tables = dict(json_only_tables, user_life_data={"data": "not json"})
+    return [
+        (full_user, full_tables),
+        (json_only_user, json_only_tables),
+        (empty_user, empty_tables),
+    ]
+
+
+class CorpusCursor:
+    """Answers the per-table queries and the aggregate query from fixtures."""
+
+    def __init__(self, user_row, tables):
+        self.user_row = user_row
+        self.tables = tables
+        self.statements = 0
+        self.tables_read = []
+        self._next = None
+
+    async def execute(self, sql, params=None):
+        self.statements += 1
+        if sql.startswith("SELECT u.*"):
+            row = dict(self.user_row)
+            for table in data_manager._USER_LOAD_TABLES:
+                if f"agg_{table}" not in sql:
+                    continue
+                self.tables_read.append(table)
+                rows = list(reversed(self.tables[table]))
+                row[f"agg_{table}"] = json.dumps(rows, ensure_ascii=False) if rows else None
+            if "agg_user_life_data" in sql:
+                self.tables_read.append("user_life_data")
+                life = self.tables["user_life_data"]
+                row["agg_user_life_data"] = life["data"] if life else None
+            self._next = [row]
+            return
+        table = re.search(r"FROM (\w+)", sql).group(1)
+        if table != "users":
+            self.tables_read.append(table)
+        if table == "users":
+            self._next = [self.user_row]
+        elif table == "user_life_data":
+            life = self.tables["user_life_data"]
+            self._next = [life] if life else []
+        else:
+            self._next = self.tables[table]
+
+    async def fetchone(self):
+        return self._next[0] if self._next else None
+
+    async def fetchall(self):
+        return self._next
+
+
+class AggregateLoaderTests(unittest.IsolatedAsyncioTestCase):
+    async def test_aggregate_loader_matches_per_table_loader(self):
+        for user_row, tables in loader_corpus():
+            with self.subTest(user=user_row["user_id"]):
+                per_table_cur = CorpusCursor(user_row, tables)
+                aggregate_cur = CorpusCursor(user_row, tables)
+                expected = await data_manager._load_user_data(
+                    per_table_cur, user_row["user_id"], mode="tables"
+                )
+                actual = await data_manager._load_user_data(
+                    aggregate_cur, user_row["user_id"], mode="aggregate"
+                )
+                self.assertEqual(actual, expected)
+                self.assertEqual(aggregate_cur.statements, 1)
+                self.assertGreater(per_table_cur.statements, 10)
+
+    def test_aggregate_sql_reads_json_columns_as_text(self):
+        sql = data_manager._AGGREGATE_USER_SQL
+        self.assertIn("'equipped_cards', CAST(equipped_cards AS CHAR)", sql)
+        self.assertIn("AS agg_user_fertilizers", sql)
+        self.assertEqual(sql.count("%s"), 1)
+
+
+class ProjectionLoaderTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        data_manager.invalidate_user_snapshot("10")
+
+    async def test_projection_reads_only_requested_tables(self):
+        user_row, tables = loader_corpus()[0]
+        full, _ = await data_manager._load_user_data(
+            CorpusCursor(user_row, tables), "10", mode="tables"
+        )
+        for mode in ("tables", "aggregate"):
+            with self.subTest(mode=mode):
+                cur = CorpusCursor(user_row, tables)
+                projected, baseline = await data_manager._load_user_data(
+                    cur, "10", mode=mode, sections=("characters",)
+                )
+                self.assertIsNone(baseline)
+                self.assertEqual(sorted(cur.tables_read), ["artifacts", "characters"])
+                self.assertEqual(projected["characters"], full["characters"])
+                self.assertEqual(projected["_data_revision"], 9)
+                self.assertNotIn("life_data", projected)
+                self.assertNotIn("inventory", projected)
+
+    async def test_projection_is_served_from_valid_cache_entry(self):
+        snapshot = make_snapshot(revision=4)
+        data_manager._cache_user_snapshot(
+            "10", 4, snapshot, data_manager._build_save_rows("10", snapshot)
+        )
+        loader = AsyncMock()
+        with patch.object(
+            data_manager, "get_db_pool",
+            AsyncMock(return_value=FakePool(FakeCursor(revision=4, dict_rows=True))),
+        ), patch.object(data_manager, "_load_user_data", loader):
+            projected = await data_manager.get_user_data(10, sections=["scalars", "inventory"])
+        loader.assert_not_awaited()
+        self.assertEqual(projected["pt"], 100)
+        self.assertEqual(projected["inventory"], snapshot["inventory"])
+        self.assertEqual(projected["_projection"], ("inventory", "scalars"))
+        self.assertNotIn("characters", projected)
+
+    async def test_projection_cannot_be_saved(self):
+        cursor = FakeCursor(revision=4)
+        projected = {"_data_revision": 4, "_projection": ("characters",), "characters": []}
+        with patch.object(
+            data_manager, "get_db_pool", AsyncMock(return_value=FakePool(cursor))
+        ):
+            with self.assertRaises(data_manager.ReadOnlyUserDataError):
+                await data_manager.save_user_data("10", projected)
+        self.assertEqual(cursor.statements, [])
+
+    async def test_unknown_section_is_rejected(self):
+        with self.assertRaises(ValueError):
+            await data_manager.get_user_data("10", sections=("wallet",))
+
+
+class DeltaCursor(FakeCursor):
+    """Answers apply_user_deltas' checks: ledger lookups and guarded updates."""
+
+    def __init__(self, *, ledger=(), short=()):
+        super().__init__(revision=8)
+        self.ledger = set(ledger)
+        self.short = set(short)
+        self._row = None
+
+    async def execute(self, sql, params=None):
+        await super().execute(sql, params)
+        self._row = (8,)
+        if "JSON_CONTAINS" in sql:
+            self._row = (int(params[1] in self.ledger),)
+        elif sql.startswith("UPDATE users"):
+            self.rowcount = 0 if "pt>=%s" in sql and "pt" in self.short else 1
+        elif sql.startswith("UPDATE inventory"):
+            self.rowcount = 0 if params[2] in self.short else 1
+        elif sql.startswith("SELECT money, pt"):
+            self._row = (500, 10, 9)
+
+    async def fetchone(self):
+        return self._row
+
+
+class ApplyUserDeltasTests(unittest.IsolatedAsyncioTestCase):
+    async def apply(self, cursor, **kwargs):
+        pool = FakePool(cursor)
+        with patch.object(data_manager, "get_db_pool", AsyncMock(return_value=pool)), \
+                patch.object(data_manager, "invalidate_user_snapshot") as invalidate:
+            result = await data_manager.apply_user_deltas("1", **kwargs)
+        return result, pool.conn, invalidate
+
+    async def test_grant_increments_in_sql_and_bumps_revision_once(self):
+        cursor = DeltaCursor()
+        result, conn, invalidate = await self.apply(
+            cursor, money=100, pt=5, items={"나무": 2, "없음": 0},
+            life_paths={"boss_training.last_grant": "2026-10-18"},
+            once=("boss_training.sold_boss_ids", "boss-1"),
+        )
+        self.assertEqual(result, (500, 10, 9))
+        sqls = [sql for sql, _ in cursor.statements]
+        self.assertEqual(sum("data_revision=data_revision+1" in sql for sql in sqls), 1)
+        inventory = next(rows for sql, rows in cursor.statements if sql.startswith("INSERT INTO inventory"))
+        self.assertEqual(inventory, [("1", "나무", 2)])
+        life = next(params for sql, params in cursor.statements if sql.startswith("UPDATE user_life_data SET data=JSON_SET"))
+        self.assertEqual(json.loads(life[0]), {"boss_training": {}})
+        self.assertIn('$."boss_training"."sold_boss_ids"', life)
+        self.assertFalse(any(sql.startswith(("DELETE FROM inventory", "SELECT * FROM", "DELETE FROM characters")) for sql in sqls))
+        conn.commit.assert_awaited_once()
+        invalidate.assert_called_once_with("1")
+
+    async def test_repeated_token_is_a_no_op(self):
+        cursor = DeltaCursor(ledger={"battle-7"})
+        result, conn, invalidate = await self.apply(
+            cursor, money=100, once=("boss_training.rewarded_battle_ids", "battle-7"),
+        )
+        self.assertIsNone(result)
+        self.assertFalse(any(sql.startswith("UPDATE users") for sql, _ in cursor.statements))
+        conn.commit.assert_not_awaited()
+        invalidate.assert_not_called()
+
+    async def test_overdraw_is_rejected_without_commit(self):
+        for kwargs, resource in (({"pt": -2_000}, "pt"), ({"items": {"나무": -5}}, "나무")):
+            cursor = DeltaCursor(short={resource})
+            with self.assertRaises(data_manager.InsufficientResourcesError) as caught:
+                await self.apply(cursor, **kwargs)
+            self.assertEqual(caught.exception.resource, resource)
+
+    async def test_spent_items_that_reach_zero_are_deleted(self):
+        cursor = DeltaCursor()
+        await self.apply(cursor, items={"나무": -3})
+        update, params = next((sql, p) for sql, p in cursor.statements if sql.startswith("UPDATE inventory"))
+        self.assertIn("quantity>=%s", update)
+        self.assertEqual(params, (3, "1", "나무", 3))
+        self.assertTrue(any(sql.startswith("DELETE FROM inventory") for sql, _ in cursor.statements))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,7 +8,13 @@ import aiomysql
 import random
 import datetime
 # [수정] DB 연결 풀을 공유하기 위해 data_manager에서 import
-from data_manager import get_db_pool, get_user_data
+from data_manager import (
+    flushed_user_lock,
+    flushed_user_lock_where,
+    get_db_pool,
+    get_user_data,
+    invalidate_user_snapshot,
+)
 from decorators import auto_defer
 from items import REGIONS, ITEM_CATEGORIES, CRAFT_RECIPES, COMMON_ITEMS, RARE_ITEMS
 from cafe_market_v91 import CafeMarketView
@@ -26,49 +32,6 @@ CAFE_MENU = [
     {"name": "허니브레드", "price": 3500, "stat": "max_mental", "value": 100, "duration": 3, "desc": "3회 전투동안 정신력 +100"},
 ]
 
-async def check_global_tables():
-    """거래 및 퀘스트 테이블 확인/생성"""
-    try:
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                # 거래 테이블
-                await cursor.execute("SHOW TABLES LIKE 'global_trades'")
-                if not await cursor.fetchone():
-                    await cursor.execute("""
-                        CREATE TABLE global_trades (
-                            id INT AUTO_INCREMENT PRIMARY KEY,
-                            seller_id BIGINT NOT NULL,
-                            seller_name VARCHAR(100),
-                            item_name VARCHAR(100),
-                            quantity INT,
-                            price INT,
-                            currency VARCHAR(10),
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        )
-                    """)
-                # [신규] 글로벌 퀘스트 테이블
-                await cursor.execute("SHOW TABLES LIKE 'global_quests'")
-                if not await cursor.fetchone():
-                    await cursor.execute("""
-                        CREATE TABLE global_quests (
-                            id INT AUTO_INCREMENT PRIMARY KEY,
-                            q_type VARCHAR(50),
-                            q_rank INT,
-                            target VARCHAR(100),
-                            count INT,
-                            current INT DEFAULT 0,
-                            description VARCHAR(255),
-                            accepted_by BIGINT,
-                            accepted_name VARCHAR(100),
-                            completed BOOLEAN DEFAULT FALSE,
-                            claimed BOOLEAN DEFAULT FALSE,
-                            created_date DATE
-                        )
-                    """)
-    except Exception as e:
-        print(f"⚠️ 테이블 확인 중 오류: {e}")
-
 # ==================================================================================
 # [신규] 카페 미니 퀘스트 시스템
 # ==================================================================================
@@ -238,7 +201,6 @@ class CafeQuestView(discord.ui.View):
         self.quests = []
 
     async def async_init(self):
-        await check_global_tables()
         await refresh_global_quests(self.user_data)
         await self.fetch_quests()
         self.update_buttons()
@@ -504,8 +466,6 @@ class CafeView(View):
     @discord.ui.button(label="거래 게시판", style=ButtonStyle.primary, emoji="📜")
     @auto_defer()
     async def trade_board(self, interaction: discord.Interaction, button: Button):
-        # 뷰 진입 시 테이블 체크
-        await check_global_tables()
         view = CafeMarketView(self.author, self)
         await view.open(interaction)
 
@@ -655,121 +615,126 @@ class TradeBoardView(View):
     @auto_defer()
     async def buy_callback(self, interaction: discord.Interaction):
         trade_id = int(interaction.data['values'][0])
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            try:
-                async with conn.cursor(aiomysql.DictCursor) as cursor:
-                    await conn.begin()
-                    await cursor.execute(
-                        "SELECT * FROM global_trades WHERE id=%s FOR UPDATE",
-                        (trade_id,),
-                    )
-                    trade = await cursor.fetchone()
-                    if not trade:
-                        await conn.rollback()
-                        return await interaction.followup.send(
-                            "❌ 이미 판매되었거나 존재하지 않는 매물입니다.",
-                            ephemeral=True,
+        async with flushed_user_lock_where(
+            "SELECT seller_id FROM global_trades WHERE id=%s", (trade_id,), self.author.id
+        ):
+            pool = await get_db_pool()
+            async with pool.acquire() as conn:
+                try:
+                    async with conn.cursor(aiomysql.DictCursor) as cursor:
+                        await conn.begin()
+                        await cursor.execute(
+                            "SELECT * FROM global_trades WHERE id=%s FOR UPDATE",
+                            (trade_id,),
                         )
+                        trade = await cursor.fetchone()
+                        if not trade:
+                            await conn.rollback()
+                            return await interaction.followup.send(
+                                "❌ 이미 판매되었거나 존재하지 않는 매물입니다.",
+                                ephemeral=True,
+                            )
+
+                        seller_id = str(trade["seller_id"])
+                        buyer_id = str(self.author.id)
+                        item_name = trade["item_name"]
+                        quantity = int(trade["quantity"])
+
+                        if seller_id == buyer_id:
+                            await cursor.execute(
+                                """INSERT INTO inventory (user_id,item_name,quantity)
+                                   VALUES (%s,%s,%s) AS new
+                                   ON DUPLICATE KEY UPDATE
+                                     quantity=inventory.quantity+new.quantity""",
+                                (seller_id, item_name, quantity),
+                            )
+                            await cursor.execute(
+                                "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                                (seller_id,),
+                            )
+                            await cursor.execute("DELETE FROM global_trades WHERE id=%s", (trade_id,))
+                            await conn.commit()
+                            invalidate_user_snapshot(seller_id)
+                            fresh = await get_user_data(self.author.id, self.author.display_name)
+                            self.user_data.clear()
+                            self.user_data.update(fresh)
+                            await interaction.followup.send(
+                                f"✅ **{item_name}** 판매를 취소하고 회수했습니다.",
+                                ephemeral=True,
+                            )
+                            await self.update_message(interaction)
+                            return
+
+                        price = int(trade["price"])
+                        currency = str(trade["currency"])
+                        if currency not in {"money", "pt"}:
+                            await conn.rollback()
+                            return await interaction.followup.send(
+                                "❌ 지원하지 않는 거래 화폐입니다.",
+                                ephemeral=True,
+                            )
+                        await cursor.execute(
+                            f"""SELECT user_id, {currency} AS balance FROM users
+                                WHERE user_id IN (%s,%s)
+                                ORDER BY user_id FOR UPDATE""",
+                            (buyer_id, seller_id),
+                        )
+                        account_rows = {
+                            str(row["user_id"]): row for row in await cursor.fetchall()
+                        }
+                        buyer = account_rows.get(buyer_id)
+                        if seller_id not in account_rows:
+                            await conn.rollback()
+                            return await interaction.followup.send(
+                                "❌ 판매자 데이터를 찾을 수 없습니다.",
+                                ephemeral=True,
+                            )
+                        if not buyer or int(buyer["balance"] or 0) < price:
+                            await conn.rollback()
+                            return await interaction.followup.send(
+                                f"❌ 잔액이 부족합니다. (필요: {price}{currency})",
+                                ephemeral=True,
+                            )
 
-                    seller_id = str(trade["seller_id"])
-                    buyer_id = str(self.author.id)
-                    item_name = trade["item_name"]
-                    quantity = int(trade["quantity"])
-
-                    if seller_id == buyer_id:
+                        await cursor.execute(
+                            f"""UPDATE users
+                                SET {currency}={currency}-%s,
+                                    data_revision=data_revision+1
+                                WHERE user_id=%s""",
+                            (price, buyer_id),
+                        )
                         await cursor.execute(
                             """INSERT INTO inventory (user_id,item_name,quantity)
                                VALUES (%s,%s,%s) AS new
                                ON DUPLICATE KEY UPDATE
                                  quantity=inventory.quantity+new.quantity""",
-                            (seller_id, item_name, quantity),
+                            (buyer_id, item_name, quantity),
                         )
                         await cursor.execute(
-                            "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                            (seller_id,),
+                            f"""UPDATE users
+                                SET {currency}={currency}+%s,
+                                    data_revision=data_revision+1
+                                WHERE user_id=%s""",
+                            (price, seller_id),
                         )
                         await cursor.execute("DELETE FROM global_trades WHERE id=%s", (trade_id,))
                         await conn.commit()
+                        invalidate_user_snapshot(buyer_id, seller_id)
                         fresh = await get_user_data(self.author.id, self.author.display_name)
                         self.user_data.clear()
                         self.user_data.update(fresh)
                         await interaction.followup.send(
-                            f"✅ **{item_name}** 판매를 취소하고 회수했습니다.",
+                            f"✅ **{item_name}** 구매 완료!",
                             ephemeral=True,
                         )
                         await self.update_message(interaction)
-                        return
-
-                    price = int(trade["price"])
-                    currency = str(trade["currency"])
-                    if currency not in {"money", "pt"}:
-                        await conn.rollback()
-                        return await interaction.followup.send(
-                            "❌ 지원하지 않는 거래 화폐입니다.",
-                            ephemeral=True,
-                        )
-                    await cursor.execute(
-                        f"""SELECT user_id, {currency} AS balance FROM users
-                            WHERE user_id IN (%s,%s)
-                            ORDER BY user_id FOR UPDATE""",
-                        (buyer_id, seller_id),
-                    )
-                    account_rows = {
-                        str(row["user_id"]): row for row in await cursor.fetchall()
-                    }
-                    buyer = account_rows.get(buyer_id)
-                    if seller_id not in account_rows:
-                        await conn.rollback()
-                        return await interaction.followup.send(
-                            "❌ 판매자 데이터를 찾을 수 없습니다.",
-                            ephemeral=True,
-                        )
-                    if not buyer or int(buyer["balance"] or 0) < price:
-                        await conn.rollback()
-                        return await interaction.followup.send(
-                            f"❌ 잔액이 부족합니다. (필요: {price}{currency})",
-                            ephemeral=True,
-                        )
-
-                    await cursor.execute(
-                        f"""UPDATE users
-                            SET {currency}={currency}-%s,
-                                data_revision=data_revision+1
-                            WHERE user_id=%s""",
-                        (price, buyer_id),
-                    )
-                    await cursor.execute(
-                        """INSERT INTO inventory (user_id,item_name,quantity)
-                           VALUES (%s,%s,%s) AS new
-                           ON DUPLICATE KEY UPDATE
-                             quantity=inventory.quantity+new.quantity""",
-                        (buyer_id, item_name, quantity),
-                    )
-                    await cursor.execute(
-                        f"""UPDATE users
-                            SET {currency}={currency}+%s,
-                                data_revision=data_revision+1
-                            WHERE user_id=%s""",
-                        (price, seller_id),
-                    )
-                    await cursor.execute("DELETE FROM global_trades WHERE id=%s", (trade_id,))
-                    await conn.commit()
-                    fresh = await get_user_data(self.author.id, self.author.display_name)
-                    self.user_data.clear()
-                    self.user_data.update(fresh)
+                except Exception as e:
+                    await conn.rollback()
+                    print(f"Trade Error: {e}")
                     await interaction.followup.send(
-                        f"✅ **{item_name}** 구매 완료!",
+                        "❌ 거래 처리 중 오류가 발생했습니다.",
                         ephemeral=True,
                     )
-                    await self.update_message(interaction)
-            except Exception as e:
-                await conn.rollback()
-                print(f"Trade Error: {e}")
-                await interaction.followup.send(
-                    "❌ 거래 처리 중 오류가 발생했습니다.",
-                    ephemeral=True,
-                )
 
 
 class RegisterTradeModal(Modal):
@@ -815,58 +780,60 @@ class RegisterTradeModal(Modal):
             return await interaction.response.send_message(f"❌ 아이템이 부족합니다. (보유: {inv.get(item, 0)}개)", ephemeral=True)
 
         # Listing creation and inventory removal must commit together.
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            try:
-                async with conn.cursor() as cursor:
-                    await conn.begin()
-                    await cursor.execute(
-                        """SELECT quantity FROM inventory
-                           WHERE user_id=%s AND item_name=%s FOR UPDATE""",
-                        (str(interaction.user.id), item),
-                    )
-                    stored = await cursor.fetchone()
-                    if not stored or int(stored[0]) < qty:
-                        await conn.rollback()
-                        return await interaction.response.send_message(
-                            "❌ 등록 직전에 재고가 변경되었습니다. 메뉴를 다시 열어주세요.",
-                            ephemeral=True,
-                        )
-                    if int(stored[0]) == qty:
+        async with flushed_user_lock(interaction.user.id):
+            pool = await get_db_pool()
+            async with pool.acquire() as conn:
+                try:
+                    async with conn.cursor() as cursor:
+                        await conn.begin()
                         await cursor.execute(
-                            "DELETE FROM inventory WHERE user_id=%s AND item_name=%s",
+                            """SELECT quantity FROM inventory
+                               WHERE user_id=%s AND item_name=%s FOR UPDATE""",
                             (str(interaction.user.id), item),
                         )
-                    else:
+                        stored = await cursor.fetchone()
+                        if not stored or int(stored[0]) < qty:
+                            await conn.rollback()
+                            return await interaction.response.send_message(
+                                "❌ 등록 직전에 재고가 변경되었습니다. 메뉴를 다시 열어주세요.",
+                                ephemeral=True,
+                            )
+                        if int(stored[0]) == qty:
+                            await cursor.execute(
+                                "DELETE FROM inventory WHERE user_id=%s AND item_name=%s",
+                                (str(interaction.user.id), item),
+                            )
+                        else:
+                            await cursor.execute(
+                                """UPDATE inventory SET quantity=quantity-%s
+                                   WHERE user_id=%s AND item_name=%s""",
+                                (qty, str(interaction.user.id), item),
+                            )
                         await cursor.execute(
-                            """UPDATE inventory SET quantity=quantity-%s
-                               WHERE user_id=%s AND item_name=%s""",
-                            (qty, str(interaction.user.id), item),
+                            "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
+                            (str(interaction.user.id),),
                         )
-                    await cursor.execute(
-                        "UPDATE users SET data_revision=data_revision+1 WHERE user_id=%s",
-                        (str(interaction.user.id),),
+                        await cursor.execute("""
+                            INSERT INTO global_trades (seller_id, seller_name, item_name, quantity, price, currency)
+                            VALUES (%s, %s, %s, %s, %s, %s)
+                        """, (interaction.user.id, interaction.user.display_name, item, qty, price, currency))
+                        await conn.commit()
+                        invalidate_user_snapshot(interaction.user.id)
+                    fresh = await get_user_data(interaction.user.id, interaction.user.display_name)
+                    self.user_data.clear()
+                    self.user_data.update(fresh)
+                    await interaction.response.send_message(
+                        f"✅ **{item} x{qty}** 판매 등록 완료!",
+                        ephemeral=True,
+                    )
+                    await self.parent_view.update_message(interaction)
+                except Exception as e:
+                    await conn.rollback()
+                    print(f"Register Error: {e}")
+                    await interaction.response.send_message(
+                        "❌ 등록 중 오류가 발생했습니다.",
+                        ephemeral=True,
                     )
-                    await cursor.execute("""
-                        INSERT INTO global_trades (seller_id, seller_name, item_name, quantity, price, currency)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (interaction.user.id, interaction.user.display_name, item, qty, price, currency))
-                    await conn.commit()
-                fresh = await get_user_data(interaction.user.id, interaction.user.display_name)
-                self.user_data.clear()
-                self.user_data.update(fresh)
-                await interaction.response.send_message(
-                    f"✅ **{item} x{qty}** 판매 등록 완료!",
-                    ephemeral=True,
-                )
-                await self.parent_view.update_message(interaction)
-            except Exception as e:
-                await conn.rollback()
-                print(f"Register Error: {e}")
-                await interaction.response.send_message(
-                    "❌ 등록 중 오류가 발생했습니다.",
-                    ephemeral=True,
-                )
 
 
 class SendMoneyView(discord.ui.View):
@@ -928,58 +895,60 @@ class SendMoneyAmountModal(Modal):
 
         sender_id = str(interaction.user.id)
         target_key = str(target_id)
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            try:
-                async with conn.cursor(aiomysql.DictCursor) as cursor:
-                    await conn.begin()
-                    await cursor.execute(
-                        f"""SELECT user_id, {key} AS balance FROM users
-                            WHERE user_id IN (%s,%s)
-                            ORDER BY user_id FOR UPDATE""",
-                        (sender_id, target_key),
-                    )
-                    rows = {str(row["user_id"]): row for row in await cursor.fetchall()}
-                    if sender_id not in rows or target_key not in rows:
-                        await conn.rollback()
-                        return await interaction.response.send_message(
-                            "❌ 송금 대상의 게임 데이터를 찾을 수 없습니다.",
-                            ephemeral=True,
+        async with flushed_user_lock(sender_id, target_key):
+            pool = await get_db_pool()
+            async with pool.acquire() as conn:
+                try:
+                    async with conn.cursor(aiomysql.DictCursor) as cursor:
+                        await conn.begin()
+                        await cursor.execute(
+                            f"""SELECT user_id, {key} AS balance FROM users
+                                WHERE user_id IN (%s,%s)
+                                ORDER BY user_id FOR UPDATE""",
+                            (sender_id, target_key),
                         )
-                    balance = int(rows[sender_id]["balance"] or 0)
-                    if balance < amount:
-                        await conn.rollback()
-                        return await interaction.response.send_message(
-                            f"❌ 잔액이 부족합니다. (보유: {balance}{unit})",
-                            ephemeral=True,
+                        rows = {str(row["user_id"]): row for row in await cursor.fetchall()}
+                        if sender_id not in rows or target_key not in rows:
+                            await conn.rollback()
+                            return await interaction.response.send_message(
+                                "❌ 송금 대상의 게임 데이터를 찾을 수 없습니다.",
+                                ephemeral=True,
+                            )
+                        balance = int(rows[sender_id]["balance"] or 0)
+                        if balance < amount:
+                            await conn.rollback()
+                            return await interaction.response.send_message(
+                                f"❌ 잔액이 부족합니다. (보유: {balance}{unit})",
+                                ephemeral=True,
+                            )
+                        await cursor.execute(
+                            f"""UPDATE users
+                                SET {key}={key}-%s, data_revision=data_revision+1
+                                WHERE user_id=%s""",
+                            (amount, sender_id),
                         )
-                    await cursor.execute(
-                        f"""UPDATE users
-                            SET {key}={key}-%s, data_revision=data_revision+1
-                            WHERE user_id=%s""",
-                        (amount, sender_id),
+                        await cursor.execute(
+                            f"""UPDATE users
+                                SET {key}={key}+%s, data_revision=data_revision+1
+                                WHERE user_id=%s""",
+                            (amount, target_key),
+                        )
+                        await conn.commit()
+                        invalidate_user_snapshot(sender_id, target_key)
+                    fresh = await get_user_data(interaction.user.id, interaction.user.display_name)
+                    self.user_data.clear()
+                    self.user_data.update(fresh)
+                    await interaction.response.send_message(
+                        f"✅ **송금 완료!**\n{self.target_user.mention}님에게 {amount}{unit}을 보냈습니다.",
+                        ephemeral=True,
                     )
-                    await cursor.execute(
-                        f"""UPDATE users
-                            SET {key}={key}+%s, data_revision=data_revision+1
-                            WHERE user_id=%s""",
-                        (amount, target_key),
+                except Exception as e:
+                    await conn.rollback()
+                    print(f"Transfer Error: {e}")
+                    await interaction.response.send_message(
+                        "❌ 송금 처리 중 오류가 발생했습니다.",
+                        ephemeral=True,
                     )
-                    await conn.commit()
-                fresh = await get_user_data(interaction.user.id, interaction.user.display_name)
-                self.user_data.clear()
-                self.user_data.update(fresh)
-                await interaction.response.send_message(
-                    f"✅ **송금 완료!**\n{self.target_user.mention}님에게 {amount}{unit}을 보냈습니다.",
-                    ephemeral=True,
-                )
-            except Exception as e:
-                await conn.rollback()
-                print(f"Transfer Error: {e}")
-                await interaction.response.send_message(
-                    "❌ 송금 처리 중 오류가 발생했습니다.",
-                    ephemeral=True,
-                )
 
 # ---------------------------------------------------------
 # 2. 카페 주문 (버프 음식)